@@ -0,0 +1,198 @@
+"""
+Sound effects.
+
+`SoundPlayer` reads every sound's WAV header once at startup (its length
+is what coalescing needs) and hands playback to a backend, which plays
+the file:
+
+- `QtAudioBackend` keeps a preloaded `QSoundEffect` per sound; Qt mixes
+  and plays them on its own audio thread.
+- `PlaysoundBackend` falls back to the `playsound` library, played one
+  after another on a single long-lived worker thread.
+- `NullAudioBackend` plays nothing and records what would have played,
+  for headless runs and tests.
+
+A sound requested while the same sound is still playing is coalesced
+into the one already playing, so a fast Auto-Snap doesn't stack clicks.
+"""
+import os
+import queue
+import threading
+import time
+import wave
+
+SOUND_FILES = {
+    'snap': 'snap_mosaic/sounds/snap.wav',
+    'save': 'snap_mosaic/sounds/save.wav',
+    'clipboard': 'snap_mosaic/sounds/clipboard.wav',
+    'error': 'snap_mosaic/sounds/error.wav',
+}
+
+ENV_VAR = "SNAPMOSAIC_AUDIO_BACKEND"
+
+
+class Sound:
+    """A WAV file's format and length, from its header; the backends play the file itself."""
+
+    def __init__(self, name, path):
+        self.name = name
+        self.path = path
+        with wave.open(path, 'rb') as wav:
+            self.channels = wav.getnchannels()
+            self.sample_width = wav.getsampwidth()
+            self.frame_rate = wav.getframerate()
+            self.frame_count = wav.getnframes()
+        self.duration = self.frame_count / self.frame_rate if self.frame_rate else 0.0
+
+
+class NullAudioBackend:
+    name = 'null'
+
+    def __init__(self):
+        self.played = []
+
+    def load(self, sound):
+        pass
+
+    def play(self, sound):
+        self.played.append(sound.name)
+
+    def close(self):
+        pass
+
+
+class QtAudioBackend:
+    name = 'qt'
+
+    def __init__(self):
+        from PySide6.QtMultimedia import QSoundEffect
+        self._effect_class = QSoundEffect
+        self.effects = {}
+        self._reported = set()
+
+    @staticmethod
+    def available():
+        try:
+            from PySide6.QtMultimedia import QMediaDevices
+        except ImportError: # QtMultimedia missing, or its system audio libraries are
+            return False
+        return bool(QMediaDevices.audioOutputs())
+
+    def load(self, sound):
+        from PySide6.QtCore import QUrl
+        effect = self._effect_class()
+        effect.setSource(QUrl.fromLocalFile(sound.path))
+        self.effects[sound.name] = effect
+
+    def play(self, sound):
+        effect = self.effects[sound.name]
+        if effect.status() == self._effect_class.Status.Error:
+            if sound.name not in self._reported:
+                self._reported.add(sound.name)
+                print(f"Error playing sound '{sound.name}': could not load {sound.path}")
+            return
+        effect.play()
+
+    def close(self):
+        for effect in self.effects.values():
+            effect.stop()
+        self.effects.clear()
+
+
+class PlaysoundBackend:
+    """Plays through `playsound` on one worker thread; requests queue behind the sound playing."""
+    name = 'playsound'
+
+    def __init__(self):
+        from playsound import playsound
+        self._playsound = playsound
+        self._queue = queue.Queue()
+        self._pending = set() # Names waiting in the queue; a second request for one is dropped
+        self._lock = threading.Lock()
+        self._worker = None
+
+    @staticmethod
+    def available():
+        try:
+            import playsound # noqa: F401
+        except ImportError:
+            return False
+        return True
+
+    def load(self, sound):
+        pass
+
+    def play(self, sound):
+        if self._worker is None:
+            self._worker = threading.Thread(target=self._run, name="SoundPlayer", daemon=True)
+            self._worker.start()
+        with self._lock:
+            if sound.name in self._pending:
+                return
+            self._pending.add(sound.name)
+        self._queue.put(sound)
+
+    def _run(self):
+        while True:
+            sound = self._queue.get()
+            if sound is None:
+                return
+            with self._lock:
+                self._pending.discard(sound.name)
+            try:
+                self._playsound(sound.path, True)
+            except Exception as e:
+                print(f"Error playing sound '{sound.name}': {e}")
+
+    def close(self):
+        if self._worker is not None:
+            self._queue.put(None)
+            self._worker = None
+
+
+def create_audio_backend(name='auto'):
+    """Return the backend called `name`; 'auto' prefers Qt, then playsound, then silence."""
+    name = os.environ.get(ENV_VAR) or name
+    if name in ('auto', 'qt') and QtAudioBackend.available():
+        return QtAudioBackend()
+    if name in ('auto', 'qt', 'playsound') and PlaysoundBackend.available():
+        return PlaysoundBackend()
+    if name != 'null':
+        print(f"Warning: No audio backend available for '{name}'; sounds are muted.")
+    return NullAudioBackend()
+
+
+class SoundPlayer:
+    """Plays sounds by name from the files in `paths`, whose headers are read once here."""
+
+    def __init__(self, paths, backend=None):
+        self.backend = backend if backend is not None else create_audio_backend()
+        self.sounds = {}
+        for name, path in paths.items():
+            try:
+                sound = Sound(name, path)
+                self.backend.load(sound)
+            except (OSError, EOFError, wave.Error) as e:
+                print(f"Error loading sound '{name}' from {path}: {e}")
+                continue
+            self.sounds[name] = sound
+        self._playing_until = {} # name -> monotonic time the last start of that sound ends
+        self.play_count = 0
+        self.coalesced_count = 0
+
+    def play(self, name):
+        sound = self.sounds.get(name)
+        if sound is None:
+            print(f"Warning: Sound '{name}' is not loaded.")
+            return False
+        now = time.monotonic()
+        if now < self._playing_until.get(name, 0.0):
+            self.coalesced_count += 1
+            return False
+        self._playing_until[name] = now + sound.duration
+        self.play_count += 1
+        self.backend.play(sound)
+        return True
+
+    def close(self):
+        self.backend.close()
@@ -0,0 +1,177 @@
+"""
+Save All: write many captures to image files at once.
+
+Image encoding is CPU-bound (a 4K PNG takes a few hundred
+milliseconds) and the encoders hold the GIL for part of it, so
+`BatchSaver` hands each frame's raw pixels to a pool of worker processes
+and encodes on every core. Each file is written under a temporary name
+and renamed once complete, so a cancelled or failed save never leaves a
+truncated image under its final name.
+
+Worker processes are started with the 'spawn' method (forking a process
+with Qt threads running is unsafe), which imports the main module in each
+worker: scripts that use BatchSaver must keep their top-level code under
+`if __name__ == "__main__":`.
+
+`python -m snap_mosaic.batch_save` measures encode throughput for a range
+of worker counts.
+"""
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from PySide6.QtCore import QThread, Signal
+from PySide6.QtGui import QImage
+
+from .image_formats import FORMATS, ImageEncoder, image_format_for_path
+
+TEMP_SUFFIX = '.part'
+
+
+def temp_path_for(path):
+    """A hidden name next to `path` that folder views and image lists skip."""
+    directory, name = os.path.split(path)
+    return os.path.join(directory, f".{name}{TEMP_SUFFIX}")
+
+
+def encode_file(pixels, width, height, bytes_per_line, pixel_format, path, encoder=None):
+    """
+    Runs in a worker process: encode raw pixels into `path` via a temporary
+    file. Without an ImageEncoder, the format follows the extension. Returns `path`.
+    """
+    image = QImage(pixels, width, height, bytes_per_line, QImage.Format(pixel_format))
+    encoder = encoder or ImageEncoder(image_format_for_path(path) or 'png')
+    temp_path = temp_path_for(path)
+    if not encoder.save(image, temp_path):
+        _remove(temp_path)
+        raise OSError(f"could not write {temp_path}")
+    os.replace(temp_path, path)
+    return path
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def default_workers():
+    return os.cpu_count() or 1
+
+
+class BatchSaver(QThread):
+    """
+    Saves `jobs`, a list of (load, path) pairs where `load()` returns the
+    QImage to write to `path`, with `encoder` (an ImageEncoder; default:
+    by extension) on `workers` processes (default: one per core). Frames are loaded on this thread, a few ahead of the workers,
+    so memory stays bounded however many jobs there are.
+    """
+    progress = Signal(int, int) # files done (written or failed), total
+    save_finished = Signal(list, list, bool) # paths written, (path, error) failures, cancelled
+
+    def __init__(self, jobs, workers=0, encoder=None, parent=None):
+        super().__init__(parent)
+        self.jobs = list(jobs)
+        self.workers = workers or default_workers()
+        self.encoder = encoder
+        self.written = []
+        self.failed = []
+        self.cancelled = False
+        self.elapsed = 0.0
+
+    def run(self):
+        start = time.perf_counter()
+        total = len(self.jobs)
+        max_in_flight = self.workers * 2
+        pending = {} # future -> path
+        context = multiprocessing.get_context('spawn')
+
+        def collect(done):
+            if not done:
+                return
+            for future in done:
+                path = pending.pop(future)
+                try:
+                    self.written.append(future.result())
+                except Exception as e:
+                    self.failed.append((path, str(e)))
+            self.progress.emit(len(self.written) + len(self.failed), total)
+
+        with ProcessPoolExecutor(self.workers, mp_context=context) as pool:
+            for load, path in self.jobs:
+                if self.isInterruptionRequested():
+                    break
+                while len(pending) >= max_in_flight:
+                    collect(wait(pending, timeout=0.1, return_when=FIRST_COMPLETED).done)
+                    if self.isInterruptionRequested():
+                        break
+                if self.isInterruptionRequested():
+                    break
+                image = load()
+                if image is None or image.isNull():
+                    self.failed.append((path, "the capture's image could not be loaded"))
+                    continue
+                if image.format() not in (QImage.Format.Format_RGB32, QImage.Format.Format_ARGB32):
+                    image = image.convertToFormat(QImage.Format.Format_RGB32)
+                future = pool.submit(encode_file, bytes(image.constBits()), image.width(), image.height(),
+                                     image.bytesPerLine(), image.format().value, path, self.encoder)
+                pending[future] = path
+
+            while pending and not self.isInterruptionRequested():
+                collect(wait(pending, timeout=0.1, return_when=FIRST_COMPLETED).done)
+
+            if pending:
+                # Cancelled: frames not started are dropped; those already encoding still finish
+                self.cancelled = True
+                for future in pending:
+                    future.cancel()
+                pool.shutdown(wait=True, cancel_futures=True)
+                collect([future for future in pending if not future.cancelled()])
+                for future in list(pending):
+                    _remove(temp_path_for(pending.pop(future)))
+
+        self.cancelled = self.cancelled or self.isInterruptionRequested()
+        self.elapsed = time.perf_counter() - start
+        self.save_finished.emit(self.written, self.failed, self.cancelled)
+
+
+def main(argv=None):
+    """Measure Save All throughput (frames per second) for several worker counts."""
+    import argparse
+    import shutil
+    import tempfile
+    from PySide6.QtCore import QSize
+    from .capture_backends import SyntheticBackend
+
+    parser = argparse.ArgumentParser(description="Measure Save All throughput per worker count")
+    parser.add_argument('--frames', type=int, default=1000)
+    parser.add_argument('--width', type=int, default=3840)
+    parser.add_argument('--height', type=int, default=2160)
+    parser.add_argument('--format', choices=FORMATS, default='png')
+    parser.add_argument('--workers', type=int, nargs='+', default=sorted({1, default_workers()}),
+                        help="Worker counts to compare (default: 1 and one per core)")
+    args = parser.parse_args(argv)
+
+    # A handful of distinct frames, reused, so generating them doesn't dominate
+    backend = SyntheticBackend(QSize(args.width, args.height), frame_count=8)
+    frames = [backend.next_frame() for _ in range(8)]
+    print(f"Saving {args.frames} {args.width}x{args.height} {args.format.upper()} frames "
+          f"({os.cpu_count()} cores)")
+    for workers in args.workers:
+        folder = tempfile.mkdtemp(prefix="snapmosaic-saveall-")
+        jobs = [(lambda frame=frames[i % len(frames)]: frame, os.path.join(folder, f"frame-{i:04d}.{args.format}"))
+                for i in range(args.frames)]
+        saver = BatchSaver(jobs, workers, ImageEncoder(args.format))
+        saver.run()
+        rate = len(saver.written) / saver.elapsed if saver.elapsed else 0.0
+        print(f"{workers:>3} worker(s): {rate:7.2f} frames/s, {saver.elapsed:7.1f} s"
+              + (f", {len(saver.failed)} failed" if saver.failed else ""))
+        shutil.rmtree(folder, ignore_errors=True)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
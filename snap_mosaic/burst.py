@@ -0,0 +1,117 @@
+import statistics
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+from PySide6.QtCore import QThread, Signal
+
+from .imaging import qimage_to_array, array_to_qimage
+
+
+class BurstResult:
+    """Frames grabbed by a burst plus the timing they were grabbed with."""
+
+    def __init__(self, frames, timestamps, offsets_ms, grab_times_ms, frame_count, fps):
+        self.frames = frames # QImages, oldest first
+        self.timestamps = timestamps # datetime of each grab
+        self.offsets_ms = offsets_ms # Lateness of each grab relative to its deadline
+        self.grab_times_ms = grab_times_ms
+        self.requested_frames = frame_count
+        self.target_fps = fps
+
+    def stats(self):
+        """Timing jitter of the burst, all times in milliseconds."""
+        target_interval = 1000.0 / self.target_fps
+        starts = [(t - self.timestamps[0]).total_seconds() * 1000.0 for t in self.timestamps]
+        intervals = [b - a for a, b in zip(starts, starts[1:])]
+        duration = starts[-1] if starts else 0.0
+        return {
+            'frames': len(self.frames),
+            'requested_frames': self.requested_frames,
+            'target_fps': self.target_fps,
+            'achieved_fps': (len(starts) - 1) * 1000.0 / duration if duration > 0 else 0.0,
+            'target_interval_ms': target_interval,
+            'mean_interval_ms': statistics.fmean(intervals) if intervals else 0.0,
+            'interval_stdev_ms': statistics.pstdev(intervals) if intervals else 0.0,
+            'max_interval_error_ms': max((abs(i - target_interval) for i in intervals), default=0.0),
+            'mean_lateness_ms': statistics.fmean(self.offsets_ms) if self.offsets_ms else 0.0,
+            'max_lateness_ms': max(self.offsets_ms, default=0.0),
+            'mean_grab_ms': statistics.fmean(self.grab_times_ms) if self.grab_times_ms else 0.0,
+            'max_grab_ms': max(self.grab_times_ms, default=0.0),
+        }
+
+
+class BurstCapture(QThread):
+    """
+    Grabs `frame_count` frames at `fps` on its own thread.
+
+    The first grab sizes a buffer for the whole burst, which is allocated
+    once up front, so the timed loop does no allocation beyond the grab. `grab_func`
+    must be safe to call off the GUI thread (see
+    `capture_backends.off_thread_grab`) and return a QImage, QPixmap or
+    BGRA array (or None on failure). The finished frames are delivered together via
+    `burst_finished` once the burst is over.
+    """
+    burst_finished = Signal(object)
+    frame_grabbed = Signal(int)
+
+    def __init__(self, grab_func, frame_count=30, fps=20.0, parent=None):
+        super().__init__(parent)
+        self.grab_func = grab_func
+        self.frame_count = max(1, int(frame_count))
+        self.fps = max(0.1, float(fps))
+
+    def _grab_array(self):
+        frame = self.grab_func()
+        if frame is None or isinstance(frame, np.ndarray):
+            return frame # Arrays may be a backend's reused buffer; they are copied into the burst buffer
+        if hasattr(frame, 'toImage'):
+            frame = frame.toImage()
+        return None if frame.isNull() else qimage_to_array(frame)
+
+    def run(self):
+        interval = 1.0 / self.fps
+
+        # The first grab sizes the buffer; it is also frame 0 of the burst
+        start = time.monotonic()
+        wall_start = datetime.now()
+        first_array = self._grab_array()
+        if first_array is None:
+            print("Burst capture failed: could not grab the capture region.")
+            self.burst_finished.emit(None)
+            return
+        buffer = np.empty((self.frame_count,) + first_array.shape, dtype=np.uint8)
+        buffer[0] = first_array
+        offsets = [0.0]
+        grab_times = [(time.monotonic() - start) * 1000.0]
+        timestamps = [wall_start]
+        self.frame_grabbed.emit(1)
+
+        count = 1
+        for index in range(1, self.frame_count):
+            if self.isInterruptionRequested():
+                break
+            deadline = start + index * interval
+            remaining = deadline - time.monotonic()
+            if remaining > 0:
+                time.sleep(remaining)
+
+            grab_start = time.monotonic()
+            array = self._grab_array()
+            if array is None:
+                print(f"Burst capture stopped early: grab {index} failed.")
+                break
+            if array.shape != buffer.shape[1:]:
+                print("Burst capture stopped early: the capture region changed size.")
+                break
+            buffer[index] = array
+            grab_end = time.monotonic()
+
+            offsets.append((grab_start - deadline) * 1000.0)
+            grab_times.append((grab_end - grab_start) * 1000.0)
+            timestamps.append(wall_start + timedelta(seconds=grab_start - start))
+            count += 1
+            self.frame_grabbed.emit(count)
+
+        frames = [array_to_qimage(buffer[i]) for i in range(count)]
+        self.burst_finished.emit(BurstResult(frames, timestamps, offsets, grab_times, self.frame_count, self.fps))
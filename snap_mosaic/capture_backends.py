@@ -0,0 +1,587 @@
+"""
+Screen-grab backends.
+
+Every backend grabs a rectangle of the screen given in logical (Qt)
+coordinates and returns it at device pixels:
+
+- `QtBackend` uses `QScreen.grabWindow` and works everywhere Qt does.
+- `X11ShmBackend` reads the X11 root window through the MIT shared-memory
+  extension into a segment that is reused from frame to frame, so the
+  per-frame cost is a single copy out of shared memory.
+- `SyntheticBackend` serves deterministic generated (or replayed) frames,
+  so the whole capture pipeline can run and be benchmarked headlessly.
+
+The burst and instant replay threads grab off the GUI thread. Backends
+with `thread_safe` set (X11 shared memory, synthetic) are called from
+those threads directly. Qt's grabs use QScreen and QPixmap, which belong
+to the GUI thread, so `GuiThreadGrab` runs them there on the worker's
+behalf.
+
+`benchmark_backends` measures grabs per second, which `create_backend`
+uses to pick the fastest available backend for the 'auto' setting. Run
+`python -m snap_mosaic.capture_backends` to print the numbers.
+"""
+import ctypes
+import ctypes.util
+import os
+import sys
+import threading
+import time
+
+import numpy as np
+from PySide6.QtCore import QObject, QRect, QSize, QThread, Signal
+from PySide6.QtGui import QColor, QGuiApplication, QImage, QLinearGradient, QPainter
+
+from .imaging import array_to_qimage, qimage_to_array
+
+DEFAULT_BACKEND = 'qt'
+ENV_VAR = "SNAPMOSAIC_CAPTURE_BACKEND"
+
+
+class CaptureBackend:
+    """Base class: grabs a logical screen rectangle, or returns None on failure."""
+    name = None
+    label = None
+    thread_safe = False # Whether grabs may run on threads other than the GUI thread
+
+    @classmethod
+    def available(cls):
+        return True
+
+    def grab(self, rect):
+        """Return a QPixmap or QImage of `rect` at device pixels, owned by the caller."""
+        raise NotImplementedError
+
+    def grab_array(self, rect):
+        """
+        Return a read-only (height, width, 4) BGRA array of `rect`.
+
+        Backends with a reusable frame buffer return a view of it, valid
+        until the same thread grabs again; copy it to keep it.
+        """
+        image = self.grab(rect)
+        if image is None:
+            return None
+        if hasattr(image, 'toImage'):
+            image = image.toImage()
+        return qimage_to_array(image)
+
+    def grab_desktop(self, rect):
+        """Grab the whole virtual desktop `rect` as a backdrop for region selection."""
+        return self.grab(rect)
+
+    def release_thread(self):
+        """Free what the calling thread's grabs allocated; grabbing threads call it as they finish."""
+
+    def close(self):
+        pass
+
+
+class QtBackend(CaptureBackend):
+    name = 'qt'
+    label = "Qt (all platforms)"
+
+    def grab(self, rect):
+        screen = QGuiApplication.primaryScreen()
+        if not screen:
+            print("Error: Could not get primary screen.")
+            return None
+
+        # IMPORTANT: Keep the device pixel ratio for High-DPI displays
+        dpr = screen.devicePixelRatio()
+        pixmap = screen.grabWindow(
+            0,
+            int(rect.x() * dpr),
+            int(rect.y() * dpr),
+            int(rect.width() * dpr),
+            int(rect.height() * dpr)
+        )
+        return None if pixmap.isNull() else pixmap
+
+    def grab_desktop(self, rect):
+        screen = QGuiApplication.primaryScreen()
+        if not screen:
+            print("Error: Could not get primary screen.")
+            return None
+        return screen.grabWindow(0, rect.x(), rect.y(), rect.width(), rect.height())
+
+
+# --- X11 shared memory ---
+
+_Z_PIXMAP = 2
+_ALL_PLANES = 0xFFFFFFFF
+_IPC_PRIVATE = 0
+_IPC_CREAT = 0o1000
+_IPC_RMID = 0
+
+
+class _XShmSegmentInfo(ctypes.Structure):
+    _fields_ = [('shmseg', ctypes.c_ulong), ('shmid', ctypes.c_int),
+                ('shmaddr', ctypes.c_void_p), ('readOnly', ctypes.c_int)]
+
+
+class _XImage(ctypes.Structure):
+    # Leading fields of Xlib's XImage; it is only ever used through a pointer
+    _fields_ = [('width', ctypes.c_int), ('height', ctypes.c_int), ('xoffset', ctypes.c_int),
+                ('format', ctypes.c_int), ('data', ctypes.c_void_p), ('byte_order', ctypes.c_int),
+                ('bitmap_unit', ctypes.c_int), ('bitmap_bit_order', ctypes.c_int),
+                ('bitmap_pad', ctypes.c_int), ('depth', ctypes.c_int),
+                ('bytes_per_line', ctypes.c_int), ('bits_per_pixel', ctypes.c_int)]
+
+
+class _XErrorEvent(ctypes.Structure):
+    _fields_ = [('type', ctypes.c_int), ('display', ctypes.c_void_p), ('resourceid', ctypes.c_ulong),
+                ('serial', ctypes.c_ulong), ('error_code', ctypes.c_ubyte),
+                ('request_code', ctypes.c_ubyte), ('minor_code', ctypes.c_ubyte)]
+
+
+_X_ERROR_HANDLER = ctypes.CFUNCTYPE(ctypes.c_int, ctypes.c_void_p, ctypes.POINTER(_XErrorEvent))
+_x_errors = [] # Error codes reported by Xlib since the last grab
+
+
+def _on_x_error(display, event):
+    _x_errors.append(event.contents.error_code)
+    return 0
+
+
+# Installed process-wide, so it must outlive any one backend
+_x_error_handler = _X_ERROR_HANDLER(_on_x_error)
+
+
+def _load_x11():
+    """Load and prototype libX11, libXext and libc, or return None if they are missing."""
+    paths = [ctypes.util.find_library(name) for name in ('X11', 'Xext', 'c')]
+    if not all(paths):
+        return None
+    try:
+        x11, xext, libc = (ctypes.CDLL(path) for path in paths)
+    except OSError:
+        return None
+
+    x11.XOpenDisplay.restype = ctypes.c_void_p
+    x11.XOpenDisplay.argtypes = [ctypes.c_char_p]
+    x11.XCloseDisplay.argtypes = [ctypes.c_void_p]
+    x11.XDefaultScreen.argtypes = [ctypes.c_void_p]
+    x11.XRootWindow.restype = ctypes.c_ulong
+    x11.XRootWindow.argtypes = [ctypes.c_void_p, ctypes.c_int]
+    x11.XDefaultVisual.restype = ctypes.c_void_p
+    x11.XDefaultVisual.argtypes = [ctypes.c_void_p, ctypes.c_int]
+    x11.XDefaultDepth.argtypes = [ctypes.c_void_p, ctypes.c_int]
+    x11.XDisplayWidth.argtypes = [ctypes.c_void_p, ctypes.c_int]
+    x11.XDisplayHeight.argtypes = [ctypes.c_void_p, ctypes.c_int]
+    x11.XSync.argtypes = [ctypes.c_void_p, ctypes.c_int]
+    x11.XFree.argtypes = [ctypes.c_void_p]
+    x11.XSetErrorHandler.restype = ctypes.c_void_p
+    x11.XSetErrorHandler.argtypes = [ctypes.c_void_p]
+
+    xext.XShmQueryExtension.argtypes = [ctypes.c_void_p]
+    xext.XShmCreateImage.restype = ctypes.POINTER(_XImage)
+    xext.XShmCreateImage.argtypes = [ctypes.c_void_p, ctypes.c_void_p, ctypes.c_uint, ctypes.c_int,
+                                     ctypes.c_void_p, ctypes.POINTER(_XShmSegmentInfo), ctypes.c_uint, ctypes.c_uint]
+    xext.XShmAttach.argtypes = [ctypes.c_void_p, ctypes.POINTER(_XShmSegmentInfo)]
+    xext.XShmDetach.argtypes = [ctypes.c_void_p, ctypes.POINTER(_XShmSegmentInfo)]
+    xext.XShmGetImage.argtypes = [ctypes.c_void_p, ctypes.c_ulong, ctypes.POINTER(_XImage),
+                                  ctypes.c_int, ctypes.c_int, ctypes.c_ulong]
+
+    libc.shmget.argtypes = [ctypes.c_int, ctypes.c_size_t, ctypes.c_int]
+    libc.shmat.restype = ctypes.c_void_p
+    libc.shmat.argtypes = [ctypes.c_int, ctypes.c_void_p, ctypes.c_int]
+    libc.shmdt.argtypes = [ctypes.c_void_p]
+    libc.shmctl.argtypes = [ctypes.c_int, ctypes.c_int, ctypes.c_void_p]
+    return x11, xext, libc
+
+
+class _ShmImage:
+    """A shared-memory XImage of one size, reused for every grab of that size."""
+
+    def __init__(self, backend, width, height):
+        x11, xext, libc = backend.libs
+        self.backend = backend
+        self.info = _XShmSegmentInfo()
+        self.image = xext.XShmCreateImage(backend.display, backend.visual, backend.depth, _Z_PIXMAP,
+                                          None, ctypes.byref(self.info), width, height)
+        if not self.image:
+            raise OSError("XShmCreateImage failed")
+        image = self.image.contents
+        if image.bits_per_pixel != 32:
+            x11.XFree(self.image)
+            raise OSError(f"unsupported X11 pixel format ({image.bits_per_pixel} bits per pixel)")
+        size = image.bytes_per_line * height
+        self.info.shmid = libc.shmget(_IPC_PRIVATE, size, _IPC_CREAT | 0o600)
+        if self.info.shmid < 0:
+            x11.XFree(self.image)
+            raise OSError("shmget failed")
+        address = libc.shmat(self.info.shmid, None, 0)
+        if address in (None, ctypes.c_void_p(-1).value):
+            libc.shmctl(self.info.shmid, _IPC_RMID, None)
+            x11.XFree(self.image)
+            raise OSError("shmat failed")
+        self.info.shmaddr = address
+        self.info.readOnly = 0
+        image.data = address
+        xext.XShmAttach(backend.display, ctypes.byref(self.info))
+        x11.XSync(backend.display, 0)
+        # The segment goes away by itself once both sides have detached, even after a crash
+        libc.shmctl(self.info.shmid, _IPC_RMID, None)
+
+        rows = np.ctypeslib.as_array(ctypes.cast(address, ctypes.POINTER(ctypes.c_uint8)), shape=(size,))
+        self.array = rows.reshape(height, image.bytes_per_line)[:, :width * 4].reshape(height, width, 4)
+        self.array.flags.writeable = False
+        self.width = width
+        self.height = height
+
+    def release(self):
+        x11, xext, libc = self.backend.libs
+        xext.XShmDetach(self.backend.display, ctypes.byref(self.info))
+        x11.XSync(self.backend.display, 0)
+        self.image.contents.data = None
+        x11.XFree(self.image)
+        libc.shmdt(self.info.shmaddr)
+        self.array = None
+
+
+class X11ShmBackend(CaptureBackend):
+    """
+    Grabs the X11 root window with XShmGetImage.
+
+    Each thread gets its own shared-memory image per frame size, allocated
+    on first use and reused afterwards, so a burst or an Auto-Snap run does
+    no per-frame allocation or X11 image setup. A thread's images are freed
+    by `release_thread` when it is done grabbing. `grab_array` returns a view
+    of that image; `grab` copies it into a QImage the caller owns.
+    Works under Xvfb, so it can be tested headlessly.
+    """
+    name = 'x11shm'
+    label = "X11 shared memory (Linux)"
+    thread_safe = True
+
+    def __init__(self, device_pixel_ratio=1.0, display_name=None):
+        self.device_pixel_ratio = device_pixel_ratio
+        self.libs = _load_x11()
+        if self.libs is None:
+            raise OSError("libX11/libXext not found")
+        x11, xext, _ = self.libs
+        self.display = x11.XOpenDisplay(display_name.encode() if display_name else None)
+        if not self.display:
+            raise OSError("cannot open X11 display")
+        if not xext.XShmQueryExtension(self.display):
+            x11.XCloseDisplay(self.display)
+            raise OSError("X11 display has no MIT-SHM extension")
+        screen = x11.XDefaultScreen(self.display)
+        self.root = x11.XRootWindow(self.display, screen)
+        self.visual = x11.XDefaultVisual(self.display, screen)
+        self.depth = x11.XDefaultDepth(self.display, screen)
+        self.screen_rect = QRect(0, 0, x11.XDisplayWidth(self.display, screen), x11.XDisplayHeight(self.display, screen))
+
+        self._lock = threading.Lock() # One X connection, shared by every grabbing thread
+        self._local = threading.local()
+        self._images = []
+        # Xlib's default error handler exits the process; record the error instead
+        x11.XSetErrorHandler(ctypes.cast(_x_error_handler, ctypes.c_void_p))
+
+    @classmethod
+    def available(cls):
+        if not sys.platform.startswith('linux') or not os.environ.get('DISPLAY'):
+            return False
+        # Under Wayland the X11 root window is XWayland's, not the desktop
+        app = QGuiApplication.instance()
+        if app is not None and QGuiApplication.platformName() != 'xcb':
+            return False
+        return _load_x11() is not None
+
+    def _device_rect(self, rect):
+        dpr = self.device_pixel_ratio
+        device = QRect(int(rect.x() * dpr), int(rect.y() * dpr), int(rect.width() * dpr), int(rect.height() * dpr))
+        return device.intersected(self.screen_rect)
+
+    def _shm_image(self, width, height):
+        images = getattr(self._local, 'images', None)
+        if images is None:
+            images = self._local.images = {}
+        shm = images.get((width, height))
+        if shm is None:
+            shm = _ShmImage(self, width, height)
+            images[(width, height)] = shm
+            self._images.append(shm)
+        return shm
+
+    def release_thread(self):
+        images = getattr(self._local, 'images', None)
+        if not images:
+            return
+        self._local.images = {}
+        with self._lock:
+            for shm in images.values():
+                if shm in self._images: # close() may have freed it already
+                    self._images.remove(shm)
+                    shm.release()
+
+    def grab_array(self, rect):
+        device = self._device_rect(rect)
+        if device.isEmpty() or self.display is None:
+            return None
+        x11, xext, _ = self.libs
+        with self._lock:
+            try:
+                shm = self._shm_image(device.width(), device.height())
+            except OSError as e:
+                print(f"Error: X11 shared-memory grab unavailable: {e}")
+                return None
+            _x_errors.clear()
+            ok = xext.XShmGetImage(self.display, self.root, shm.image, device.x(), device.y(), _ALL_PLANES)
+            if not ok or _x_errors:
+                print(f"Error: XShmGetImage failed (X errors {_x_errors}).")
+                return None
+        return shm.array
+
+    def grab(self, rect):
+        array = self.grab_array(rect)
+        if array is None:
+            return None
+        # Depth-24 visuals leave the padding byte undefined; RGB32 ignores it
+        return array_to_qimage(array)
+
+    def close(self):
+        if self.display is None:
+            return
+        with self._lock:
+            for shm in self._images:
+                shm.release()
+            self._images.clear()
+            self.libs[0].XCloseDisplay(self.display)
+            self.display = None
+
+
+# --- Synthetic frames ---
+
+class SyntheticBackend(CaptureBackend):
+    """
+    Serves a deterministic sequence of desktop frames instead of the screen.
+
+    Without `frames`, `frame_count` desktops of `size` are rendered (a
+    gradient with coloured blocks that move from frame to frame) the first
+    time they are needed; with `frames` (QImages, e.g. from
+    `from_directory`), those are replayed in order. Each grab advances to
+    the next frame and cuts `rect` out of it; the same sequence of grabs
+    always yields the same pixels.
+    """
+    name = 'synthetic'
+    label = "Synthetic frames (testing)"
+    thread_safe = True
+
+    def __init__(self, size=QSize(1920, 1080), frame_count=8, frames=None):
+        if frames:
+            self._frames = [frame.convertToFormat(QImage.Format.Format_RGB32) for frame in frames]
+            self.size = self._frames[0].size()
+        else:
+            self._frames = [None] * max(1, frame_count)
+            self.size = QSize(size)
+        self._lock = threading.Lock()
+        self.grab_count = 0
+
+    @classmethod
+    def from_directory(cls, path):
+        """Replay the images in `path`, in file name order."""
+        from .image_formats import image_files, read_image
+        frames = []
+        for file_path in image_files(path):
+            image = read_image(file_path)
+            if not image.isNull():
+                frames.append(image)
+        if not frames:
+            raise ValueError(f"no images to replay in {path}")
+        return cls(frames=frames)
+
+    def _render(self, index):
+        width, height = self.size.width(), self.size.height()
+        image = QImage(width, height, QImage.Format.Format_RGB32)
+        gradient = QLinearGradient(0, 0, width, height)
+        gradient.setColorAt(0, QColor(30, 60, 90))
+        gradient.setColorAt(1, QColor(200, 220, 240))
+        painter = QPainter(image)
+        painter.fillRect(image.rect(), gradient)
+        block = max(8, width // 16)
+        for i in range(12):
+            x = (index * 37 + i * block * 2) % max(1, width - block)
+            y = (i * block) % max(1, height - block)
+            painter.fillRect(x, y, block, block, QColor.fromHsv((i * 30 + index * 7) % 360, 200, 220))
+        painter.end()
+        return image
+
+    def next_frame(self):
+        with self._lock:
+            index = self.grab_count % len(self._frames)
+            self.grab_count += 1
+            if self._frames[index] is None:
+                self._frames[index] = self._render(index)
+            return self._frames[index]
+
+    def grab(self, rect):
+        frame = self.next_frame()
+        rect = QRect(rect).intersected(frame.rect())
+        if rect.isEmpty():
+            return None
+        return frame.copy(rect)
+
+
+class _GrabRequest:
+    def __init__(self):
+        self.done = threading.Event()
+        self.cancelled = False
+        self.result = None
+
+
+class GuiThreadGrab(QObject):
+    """
+    Calls `grab_func` on the GUI thread for a worker thread, and waits for it.
+
+    Create it on the GUI thread. A QPixmap result is converted to a QImage
+    before it is handed over. While it waits, the worker polls its own
+    interruption flag and gives up with None, so the GUI thread can stop
+    a worker with `requestInterruption()` + `wait()` without deadlocking.
+    """
+    _requested = Signal(object)
+
+    def __init__(self, grab_func, parent=None):
+        super().__init__(parent)
+        self.grab_func = grab_func
+        self._requested.connect(self._run) # Queued: emitted from the worker, run on the GUI thread
+
+    def _run(self, request):
+        try:
+            if not request.cancelled:
+                result = self.grab_func()
+                request.result = result.toImage() if hasattr(result, 'toImage') else result
+        finally:
+            request.done.set()
+
+    def __call__(self):
+        if QThread.currentThread() is self.thread():
+            return self.grab_func()
+        request = _GrabRequest()
+        self._requested.emit(request)
+        while not request.done.wait(0.05):
+            if QThread.currentThread().isInterruptionRequested():
+                request.cancelled = True
+                return None
+        return request.result
+
+
+def off_thread_grab(backend, grab_func, parent=None):
+    """`grab_func` made safe to call from a worker thread: as is if `backend` is thread-safe, else via the GUI thread."""
+    if backend.thread_safe:
+        return grab_func
+    return GuiThreadGrab(grab_func, parent)
+
+
+BACKENDS = {backend.name: backend for backend in (QtBackend, X11ShmBackend, SyntheticBackend)}
+
+
+def available_backends():
+    """Names of the backends that grab the real screen and can run here."""
+    return [name for name, backend in BACKENDS.items() if backend is not SyntheticBackend and backend.available()]
+
+
+def _instantiate(name, device_pixel_ratio):
+    backend = BACKENDS[name]
+    if backend is X11ShmBackend:
+        return backend(device_pixel_ratio)
+    return backend()
+
+
+def benchmark_backends(backends, rect, duration=0.25, max_grabs=200):
+    """
+    Grab `rect` with each backend for about `duration` seconds (after one
+    warm-up grab). Returns {name: grabs per second}; None if it failed.
+    """
+    results = {}
+    for backend in backends:
+        if backend.grab(rect) is None:
+            results[backend.name] = None
+            continue
+        count = 0
+        start = time.perf_counter()
+        elapsed = 0.0
+        while count < max_grabs and elapsed < duration:
+            if backend.grab(rect) is None:
+                break
+            count += 1
+            elapsed = time.perf_counter() - start
+        results[backend.name] = count / elapsed if count and elapsed > 0 else None
+    return results
+
+
+def create_backend(name=DEFAULT_BACKEND, device_pixel_ratio=1.0, benchmark_rect=None):
+    """
+    Create the backend called `name`. 'auto' benchmarks every available
+    screen backend on `benchmark_rect` and keeps the fastest. A backend
+    that cannot run here falls back to Qt.
+    """
+    if name == 'auto':
+        candidates = []
+        for candidate in available_backends():
+            try:
+                candidates.append(_instantiate(candidate, device_pixel_ratio))
+            except OSError as e:
+                print(f"Capture backend '{candidate}' unavailable: {e}")
+        rect = benchmark_rect or QRect(0, 0, 640, 480)
+        results = benchmark_backends(candidates, rect)
+        print("Capture backends (grabs/s): " + ", ".join(
+            f"{key} {value:.1f}" if value else f"{key} failed" for key, value in results.items()))
+        working = [backend for backend in candidates if results.get(backend.name)]
+        best = max(working, key=lambda backend: results[backend.name], default=None)
+        for backend in candidates:
+            if backend is not best:
+                backend.close()
+        return best or QtBackend()
+
+    if name not in BACKENDS:
+        print(f"Warning: Unknown capture backend '{name}', using '{DEFAULT_BACKEND}'.")
+        return QtBackend()
+    if not BACKENDS[name].available():
+        print(f"Warning: Capture backend '{name}' is not available here, using '{DEFAULT_BACKEND}'.")
+        return QtBackend()
+    try:
+        return _instantiate(name, device_pixel_ratio)
+    except OSError as e:
+        print(f"Warning: Could not start capture backend '{name}' ({e}), using '{DEFAULT_BACKEND}'.")
+        return QtBackend()
+
+
+def main(argv=None):
+    import argparse
+    from PySide6.QtWidgets import QApplication
+
+    parser = argparse.ArgumentParser(description="Measure screen grabs per second for each capture backend")
+    parser.add_argument('--width', type=int, default=1920)
+    parser.add_argument('--height', type=int, default=1080)
+    parser.add_argument('--duration', type=float, default=1.0, help="Seconds per backend")
+    args = parser.parse_args(argv)
+
+    app = QApplication.instance() or QApplication(sys.argv[:1])
+    screen = app.primaryScreen()
+    dpr = screen.devicePixelRatio() if screen else 1.0
+    rect = QRect(0, 0, args.width, args.height)
+    if screen:
+        rect = rect.intersected(screen.geometry())
+
+    backends = []
+    for name in available_backends():
+        try:
+            backends.append(_instantiate(name, dpr))
+        except OSError as e:
+            print(f"{name:>10}: unavailable ({e})")
+    backends.append(SyntheticBackend(QSize(args.width, args.height)))
+    results = benchmark_backends(backends, rect, duration=args.duration, max_grabs=10 ** 6)
+    for name, rate in results.items():
+        print(f"{name:>10}: {rate:8.1f} grabs/s" if rate else f"{name:>10}: failed")
+    for backend in backends:
+        backend.close()
+    fastest = max((name for name in results if results[name] and name != SyntheticBackend.name),
+                  key=lambda name: results[name], default=None)
+    print(f"Fastest screen backend: {fastest or 'none'} ({rect.width()}x{rect.height()})")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,638 @@
+import bisect
+import itertools
+from collections import Counter
+from datetime import datetime
+from PySide6.QtWidgets import (
+    QApplication, QStyledItemDelegate, QStyle, QStyleOptionViewItem, QToolTip, QAbstractItemView
+)
+from PySide6.QtGui import QPainter, QColor, QPen, QPainterPath, QIcon, QRegion
+from PySide6.QtCore import (
+    Qt, QEvent, QRect, QSize, Signal, QAbstractListModel, QModelIndex, QPersistentModelIndex
+)
+
+from .utils import resource_path
+from .tracing import tracer
+
+_capture_ids = itertools.count(1)
+
+
+def reserve_capture_ids(last_id):
+    """Make sure new captures get ids above `last_id` (e.g. after restoring a session)."""
+    global _capture_ids
+    next_id = next(_capture_ids)
+    _capture_ids = itertools.count(max(next_id, last_id + 1))
+
+
+class Capture:
+    """
+    A single captured image as held by the grid model.
+
+    Only the display pixmap stays resident. When a CaptureStore is given,
+    the full-resolution image is kept there (and may be spilled to disk);
+    use `original_image()` to get it back. The display pixmap may be None
+    (with an explicit `display_size`) while a thumbnail is still being made.
+    """
+
+    def __init__(self, display_pixmap, original_image=None, capture_id=None, timestamp=None, store=None,
+                 display_size=None):
+        self.id = capture_id if capture_id is not None else next(_capture_ids)
+        self.timestamp = timestamp or datetime.now()
+        self._display_pixmap = display_pixmap
+        self._thumbnail_loader = None
+        self.thumbnail_key = None # What the display pixmap was made for, see ThumbnailService
+        self.display_size = display_size if display_size is not None else display_pixmap.size()
+        self.store = store
+        if original_image is None:
+            original_image = display_pixmap.toImage()
+        self.original_size = original_image.size()
+        if store is not None:
+            store.add(self.id, original_image)
+            self._original_image = None
+        else:
+            self._original_image = original_image
+        self.is_saved = False
+        self.phash = None
+        self.duplicate_of = None # Id of an earlier capture this one nearly matches
+        self.repeat_count = 1 # Near-duplicates collapsed into this capture
+        self.region = None # Name of the capture region (None for the first region)
+
+    @classmethod
+    def restored(cls, capture_id, timestamp, original_size, display_size, thumbnail_loader, store):
+        """
+        A capture from a previous session. Neither image is decoded yet:
+        `thumbnail_loader()` returns the display pixmap on first paint and
+        the store loads the full-resolution image on demand.
+        """
+        capture = cls.__new__(cls)
+        capture.id = capture_id
+        capture.timestamp = timestamp
+        capture._display_pixmap = None
+        capture._thumbnail_loader = thumbnail_loader
+        capture.thumbnail_key = None
+        capture.display_size = display_size
+        capture.store = store
+        capture.original_size = original_size
+        capture._original_image = None
+        capture.is_saved = False
+        capture.phash = None
+        capture.duplicate_of = None
+        capture.repeat_count = 1
+        capture.region = None
+        return capture
+
+    @property
+    def display_pixmap(self):
+        if self._display_pixmap is None and self._thumbnail_loader is not None:
+            self._display_pixmap = self._thumbnail_loader()
+            self._thumbnail_loader = None
+        return self._display_pixmap
+
+    def has_lazy_thumbnail(self):
+        """True for a restored capture whose thumbnail has not been loaded yet."""
+        return self._display_pixmap is None and self._thumbnail_loader is not None
+
+    def set_display_pixmap(self, pixmap, thumbnail_key=None):
+        self._display_pixmap = pixmap
+        self._thumbnail_loader = None
+        self.thumbnail_key = thumbnail_key
+
+    def original_image(self):
+        """The full-resolution QImage, reloaded from the store's spill directory if necessary."""
+        if self.store is not None:
+            return self.store.get(self.id)
+        return self._original_image
+
+    def release(self):
+        """Drop the full-resolution image once the capture is deleted."""
+        if self.store is not None:
+            self.store.remove(self.id)
+        self._original_image = None
+
+
+class CaptureListModel(QAbstractListModel):
+    """
+    Newest-first list of captures backing the grid view.
+
+    Captures are stored oldest-first internally so that inserting a new
+    capture at row 0 is an append rather than a shift of the whole list.
+    Each capture also gets an increasing insertion number, kept in a sorted
+    list parallel to the captures, so its row is found by bisection.
+    Display sizes are counted, so the grid can size its cells to fit the
+    largest capture without visiting every one.
+    """
+    CaptureRole = Qt.ItemDataRole.UserRole + 1
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._captures = []
+        self._keys = [] # Insertion number of each capture in _captures, ascending
+        self._key_of = {} # Capture -> insertion number
+        self._next_key = 0
+        self._size_of = {} # Capture -> display size (width, height) it is counted under
+        self._size_counts = Counter()
+
+    def _position(self, row):
+        return len(self._captures) - 1 - row
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self._captures)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid() or not 0 <= index.row() < len(self._captures):
+            return None
+        capture = self._captures[self._position(index.row())]
+        if role == Qt.ItemDataRole.DecorationRole:
+            return capture.display_pixmap
+        if role == self.CaptureRole:
+            return capture
+        return None
+
+    def __len__(self):
+        return len(self._captures)
+
+    def captures(self):
+        """All captures, newest first."""
+        return self._captures[::-1]
+
+    def capture_at(self, row):
+        if 0 <= row < len(self._captures):
+            return self._captures[self._position(row)]
+        return None
+
+    def row_of(self, capture):
+        key = self._key_of.get(capture)
+        if key is None:
+            return -1
+        return self._position(bisect.bisect_left(self._keys, key))
+
+    def max_display_size(self):
+        """The largest display width and height among the captures (an empty QSize if there are none)."""
+        if not self._size_counts:
+            return QSize()
+        return QSize(max(width for width, _ in self._size_counts), max(height for _, height in self._size_counts))
+
+    def refresh_display_sizes(self):
+        """Recount display sizes after they changed (e.g. a new maximum display width)."""
+        self._size_of = {capture: (capture.display_size.width(), capture.display_size.height())
+                         for capture in self._captures}
+        self._size_counts = Counter(self._size_of.values())
+
+    def _append(self, captures):
+        for capture in captures:
+            self._key_of[capture] = self._next_key
+            self._keys.append(self._next_key)
+            self._next_key += 1
+            size = self._size_of[capture] = (capture.display_size.width(), capture.display_size.height())
+            self._size_counts[size] += 1
+        self._captures.extend(captures)
+
+    def add_capture(self, capture):
+        self.beginInsertRows(QModelIndex(), 0, 0)
+        self._append([capture])
+        self.endInsertRows()
+
+    def add_captures(self, captures):
+        """Insert several captures (oldest first) in one batch."""
+        if not captures:
+            return
+        self.beginInsertRows(QModelIndex(), 0, len(captures) - 1)
+        self._append(captures)
+        self.endInsertRows()
+
+    def remove_capture(self, capture):
+        row = self.row_of(capture)
+        if row < 0:
+            return False
+        self.beginRemoveRows(QModelIndex(), row, row)
+        position = self._position(row)
+        del self._captures[position]
+        del self._keys[position]
+        del self._key_of[capture]
+        size = self._size_of.pop(capture)
+        self._size_counts[size] -= 1
+        if not self._size_counts[size]:
+            del self._size_counts[size]
+        self.endRemoveRows()
+        return True
+
+    def clear(self):
+        self.beginResetModel()
+        self._captures.clear()
+        self._keys.clear()
+        self._key_of.clear()
+        self._size_of.clear()
+        self._size_counts.clear()
+        self.endResetModel()
+
+    def capture_changed(self, capture):
+        row = self.row_of(capture)
+        if row >= 0:
+            index = self.index(row)
+            self.dataChanged.emit(index, index)
+
+
+class CaptureDelegate(QStyledItemDelegate):
+    """Paints a capture thumbnail with the hover overlay, action icons and saved mark."""
+    ICON_SIZE = 24
+    MARGIN = 5
+    BUTTONS = ('copy', 'save', 'delete')
+    TOOLTIPS = {
+        'copy': "Copy to Clipboard (Ctrl+C)",
+        'save': "Save Image (Ctrl+S)",
+        'delete': "Delete Image (Delete)",
+    }
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.hovered_index = QPersistentModelIndex()
+        self.hovered_button = None # Can be 'save', 'delete', 'copy', or None
+        self.thumbnail_service = None # Asked for a fresh thumbnail whenever a stale one is painted
+        self._icons = None
+
+    def _load_icons(self, style):
+        # Icons are loaded once, not on every paint
+        if self._icons is None:
+            self._icons = {
+                'copy': QIcon(resource_path("snap_mosaic/icons/clipboard.svg")),
+                'save': style.standardIcon(QStyle.StandardPixmap.SP_DialogSaveButton),
+                'delete': style.standardIcon(QStyle.StandardPixmap.SP_MessageBoxCritical),
+                'saved': style.standardIcon(QStyle.StandardPixmap.SP_DialogApplyButton),
+            }
+        return self._icons
+
+    def button_rects(self, rect):
+        """Hotspots for the action buttons in the top-right corner of a cell."""
+        rects = {}
+        step = self.ICON_SIZE + self.MARGIN
+        for i, name in enumerate(self.BUTTONS):
+            offset = (len(self.BUTTONS) - i) * step
+            rects[name] = QRect(rect.right() + 1 - offset, rect.top() + self.MARGIN, self.ICON_SIZE, self.ICON_SIZE)
+        return rects
+
+    def button_at(self, rect, pos):
+        for name, button_rect in self.button_rects(rect).items():
+            if button_rect.contains(pos):
+                return name
+        return None
+
+    def sizeHint(self, option, index):
+        capture = index.data(CaptureListModel.CaptureRole)
+        if capture is None:
+            return QSize()
+        return capture.display_size
+
+    def paint(self, painter, option, index):
+        capture = index.data(CaptureListModel.CaptureRole)
+        if capture is None:
+            return
+
+        if self.thumbnail_service is not None:
+            self.thumbnail_service.request(capture)
+
+        rect = option.rect
+        painter.save()
+        cell_rect = QRect(rect.topLeft(), capture.display_size)
+        pixmap = capture.display_pixmap
+        if pixmap is None:
+            painter.fillRect(cell_rect, QColor(64, 64, 64)) # Thumbnail still being made
+        else:
+            # A stale thumbnail is stretched into the new cell until its replacement arrives
+            painter.drawPixmap(cell_rect, pixmap)
+
+        is_hovering = self.hovered_index.isValid() and self.hovered_index.row() == index.row()
+        if is_hovering or capture.is_saved:
+            style = option.widget.style() if option.widget else QApplication.style()
+            icons = self._load_icons(style)
+
+        if is_hovering:
+            painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+
+            # Draw semi-transparent overlay and border
+            overlay_color = QColor(0, 0, 0, 127) # Black with 50% opacity
+            painter.fillRect(cell_rect, overlay_color)
+            pen = QPen(QColor("#55aaff"), 2) # Blue border
+            painter.setPen(pen)
+            painter.drawRect(cell_rect.adjusted(0, 0, -1, -1))
+
+            # Draw icons, with a hover effect on the one under the cursor
+            hover_color = QColor(255, 255, 255, 70) # White with ~27% opacity
+            for name, button_rect in self.button_rects(cell_rect).items():
+                icons[name].paint(painter, button_rect)
+                if name == self.hovered_button:
+                    painter.fillRect(button_rect, hover_color)
+
+        if capture.is_saved:
+            size = self.ICON_SIZE
+            margin = self.MARGIN
+            saved_rect = QRect(cell_rect.left() + margin, cell_rect.bottom() + 1 - size - margin, size, size)
+
+            # Draw a background for the checkmark for better visibility
+            # The circle will be slightly larger than the icon
+            bg_rect = saved_rect.adjusted(-margin, -margin, margin, margin)
+            path = QPainterPath()
+            path.addEllipse(bg_rect)
+
+            # Use a semi-transparent white for the background
+            painter.setBrush(QColor(255, 255, 255, 180))
+            painter.setPen(Qt.PenStyle.NoPen) # No outline for the circle
+            painter.drawPath(path)
+
+            # Now draw the icon on top
+            icons['saved'].paint(painter, saved_rect)
+
+        if capture.repeat_count > 1 or capture.duplicate_of is not None:
+            self._paint_duplicate_badge(painter, cell_rect, capture)
+
+        painter.restore()
+
+    def _paint_duplicate_badge(self, painter, cell_rect, capture):
+        # "×N" for collapsed repeats, "≈" for a capture marked as a near-duplicate
+        text = f"×{capture.repeat_count}" if capture.repeat_count > 1 else "≈"
+        metrics = painter.fontMetrics()
+        width = max(self.ICON_SIZE, metrics.horizontalAdvance(text) + 2 * self.MARGIN)
+        badge_rect = QRect(cell_rect.right() + 1 - width - self.MARGIN,
+                           cell_rect.bottom() + 1 - self.ICON_SIZE - self.MARGIN,
+                           width, self.ICON_SIZE)
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+        painter.setPen(Qt.PenStyle.NoPen)
+        painter.setBrush(QColor(0, 0, 0, 160))
+        painter.drawRoundedRect(badge_rect, 6, 6)
+        painter.setPen(QColor("white"))
+        painter.drawText(badge_rect, Qt.AlignmentFlag.AlignCenter, text)
+
+
+class CaptureGridView(QAbstractItemView):
+    """
+    Virtualized, reflowing grid of captures.
+
+    Cell positions are computed arithmetically from the row number and the
+    uniform cell size (the largest capture's display size; smaller captures
+    sit at their cell's top left), so inserting, removing or reflowing costs the same
+    regardless of how many captures exist: no per-cell layout state is kept
+    and only cells inside the viewport are painted. Hover and button clicks
+    are resolved by hit-testing the delegate.
+    """
+    delete_requested = Signal(object)
+    save_requested = Signal(object)
+    copy_requested = Signal(object)
+    device_pixel_ratio_changed = Signal()
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.spacing = 10
+        self.setSelectionMode(QAbstractItemView.SelectionMode.NoSelection)
+        self.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        self.setVerticalScrollMode(QAbstractItemView.ScrollMode.ScrollPerPixel)
+        self.setHorizontalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAlwaysOff)
+        self.setFocusPolicy(Qt.FocusPolicy.NoFocus)
+        self.setMouseTracking(True)
+
+        self.capture_delegate = CaptureDelegate(self)
+        self.setItemDelegate(self.capture_delegate)
+
+    def setModel(self, model):
+        if self.model():
+            self.model().rowsRemoved.disconnect(self._on_rows_removed)
+        super().setModel(model)
+        model.rowsRemoved.connect(self._on_rows_removed)
+        self.updateGeometries()
+
+    # --- Grid geometry ---
+
+    def cell_size(self):
+        """Size of one cell; all cells fit the largest capture."""
+        model = self.model()
+        if model is None:
+            return QSize()
+        return model.max_display_size()
+
+    def column_count(self, cell=None):
+        cell = cell or self.cell_size()
+        if cell.isEmpty():
+            return 1
+        return max(1, (self.viewport().width() - self.spacing) // (cell.width() + self.spacing))
+
+    def _row_rect(self, row, cell, columns):
+        grid_row, grid_col = divmod(row, columns)
+        x = self.spacing + grid_col * (cell.width() + self.spacing)
+        y = self.spacing + grid_row * (cell.height() + self.spacing) - self.verticalOffset()
+        return QRect(x, y, cell.width(), cell.height())
+
+    def _visible_rows(self, cell, columns):
+        """Range of model rows intersecting the viewport."""
+        row_height = cell.height() + self.spacing
+        top = max(0, (self.verticalOffset() - self.spacing) // row_height)
+        bottom = (self.verticalOffset() + self.viewport().height()) // row_height
+        count = self.model().rowCount()
+        return range(min(count, top * columns), min(count, (bottom + 1) * columns))
+
+    def visible_captures(self):
+        """Captures whose cells intersect the viewport, newest first."""
+        model = self.model()
+        cell = self.cell_size()
+        if model is None or cell.isEmpty():
+            return []
+        return [model.capture_at(row) for row in self._visible_rows(cell, self.column_count(cell))]
+
+    def visualRect(self, index):
+        """The capture's own rectangle at the top left of its cell."""
+        capture = index.data(CaptureListModel.CaptureRole) if index.isValid() else None
+        if capture is None:
+            return QRect()
+        cell = self.cell_size()
+        return QRect(self._row_rect(index.row(), cell, self.column_count(cell)).topLeft(), capture.display_size)
+
+    def indexAt(self, point):
+        model = self.model()
+        cell = self.cell_size()
+        if model is None or cell.isEmpty():
+            return QModelIndex()
+        x = point.x() - self.spacing
+        y = point.y() + self.verticalOffset() - self.spacing
+        if x < 0 or y < 0:
+            return QModelIndex()
+        grid_col, x_in_cell = divmod(x, cell.width() + self.spacing)
+        grid_row, y_in_cell = divmod(y, cell.height() + self.spacing)
+        columns = self.column_count(cell)
+        # Points in the spacing between cells or right of the last column hit nothing
+        if grid_col >= columns or x_in_cell >= cell.width() or y_in_cell >= cell.height():
+            return QModelIndex()
+        row = grid_row * columns + grid_col
+        if row >= model.rowCount():
+            return QModelIndex()
+        size = model.capture_at(row).display_size # Smaller captures leave part of their cell empty
+        if x_in_cell >= size.width() or y_in_cell >= size.height():
+            return QModelIndex()
+        return model.index(row, 0)
+
+    def scrollTo(self, index, hint=QAbstractItemView.ScrollHint.EnsureVisible):
+        rect = self.visualRect(index)
+        if rect.isNull():
+            return
+        scrollbar = self.verticalScrollBar()
+        if rect.top() < 0:
+            scrollbar.setValue(scrollbar.value() + rect.top() - self.spacing)
+        elif rect.bottom() > self.viewport().height():
+            scrollbar.setValue(scrollbar.value() + rect.bottom() - self.viewport().height() + self.spacing)
+
+    def moveCursor(self, cursor_action, modifiers):
+        return self.currentIndex()
+
+    def horizontalOffset(self):
+        return 0
+
+    def verticalOffset(self):
+        return self.verticalScrollBar().value()
+
+    def isIndexHidden(self, index):
+        return False
+
+    def setSelection(self, rect, flags):
+        pass # Captures are not selectable
+
+    def visualRegionForSelection(self, selection):
+        return QRegion()
+
+    def updateGeometries(self):
+        model = self.model()
+        cell = self.cell_size()
+        scrollbar = self.verticalScrollBar()
+        if model is None or cell.isEmpty():
+            scrollbar.setRange(0, 0)
+        else:
+            grid_rows = -(-model.rowCount() // self.column_count(cell))
+            content_height = self.spacing + grid_rows * (cell.height() + self.spacing)
+            scrollbar.setRange(0, max(0, content_height - self.viewport().height()))
+            scrollbar.setPageStep(self.viewport().height())
+            scrollbar.setSingleStep(max(1, (cell.height() + self.spacing) // 4))
+        super().updateGeometries()
+
+    def relayout(self):
+        """Recompute the grid after the cell size changed (e.g. a new display width)."""
+        if self.model() is not None:
+            self.model().refresh_display_sizes()
+        self.updateGeometries()
+        self.viewport().update()
+
+    # --- Incremental updates ---
+
+    def _update_from_row(self, row):
+        """Repaint only the visible cells at or after `row`; those are the ones that moved."""
+        cell = self.cell_size()
+        if cell.isEmpty():
+            self.viewport().update()
+            return
+        columns = self.column_count(cell)
+        visible = self._visible_rows(cell, columns)
+        if row >= visible.stop and visible.stop < self.model().rowCount():
+            return # Change happened below the viewport; nothing on screen moved
+        first = max(row, visible.start)
+        top = self._row_rect(first - first % columns, cell, columns).top()
+        self.viewport().update(QRect(0, top, self.viewport().width(), self.viewport().height() - top))
+
+    def rowsInserted(self, parent, start, end):
+        super().rowsInserted(parent, start, end)
+        self.updateGeometries()
+        self._update_from_row(start)
+
+    def _on_rows_removed(self, parent, start, end):
+        self.updateGeometries()
+        self._update_from_row(start)
+
+    def dataChanged(self, top_left, bottom_right, roles=()):
+        for row in range(top_left.row(), bottom_right.row() + 1):
+            self.update(self.model().index(row, 0))
+
+    def reset(self):
+        super().reset()
+        self.relayout()
+
+    def scrollContentsBy(self, dx, dy):
+        self.viewport().scroll(dx, dy)
+
+    def event(self, event):
+        # Moving to a screen with another scale factor needs sharper (or smaller) thumbnails
+        if event.type() == QEvent.Type.DevicePixelRatioChange:
+            self.device_pixel_ratio_changed.emit()
+        return super().event(event)
+
+    def resizeEvent(self, event):
+        # Reflowing is arithmetic: a new column count changes only what is painted
+        super().resizeEvent(event)
+        self.updateGeometries()
+
+    def paintEvent(self, event):
+        model = self.model()
+        cell = self.cell_size()
+        if model is None or cell.isEmpty():
+            return
+        with tracer.span('grid_paint'):
+            self._paint_cells(event.rect(), model, cell)
+
+    def _paint_cells(self, dirty, model, cell):
+        painter = QPainter(self.viewport())
+        columns = self.column_count(cell)
+        option = QStyleOptionViewItem()
+        self.initViewItemOption(option)
+        for row in self._visible_rows(cell, columns):
+            rect = self._row_rect(row, cell, columns)
+            if not rect.intersects(dirty):
+                continue
+            option.rect = rect
+            self.capture_delegate.paint(painter, option, model.index(row, 0))
+        painter.end()
+
+    def hovered_capture(self):
+        index = self.capture_delegate.hovered_index
+        if not index.isValid():
+            return None
+        return index.data(CaptureListModel.CaptureRole)
+
+    def _set_hover(self, index, button):
+        delegate = self.capture_delegate
+        old_index = QModelIndex(delegate.hovered_index) if delegate.hovered_index.isValid() else QModelIndex()
+        if old_index == index and delegate.hovered_button == button:
+            return
+        delegate.hovered_index = QPersistentModelIndex(index) if index.isValid() else QPersistentModelIndex()
+        delegate.hovered_button = button
+        # Repaint only the cells whose hover state changed
+        if old_index.isValid():
+            self.viewport().update(self.visualRect(old_index))
+        if index.isValid():
+            self.viewport().update(self.visualRect(index))
+
+    def mouseMoveEvent(self, event):
+        pos = event.position().toPoint()
+        index = self.indexAt(pos)
+        button = None
+        if index.isValid():
+            button = self.capture_delegate.button_at(self.visualRect(index), pos)
+
+        if button != self.capture_delegate.hovered_button:
+            if button:
+                QToolTip.showText(event.globalPosition().toPoint(), CaptureDelegate.TOOLTIPS[button], self)
+            else:
+                QToolTip.hideText()
+        self._set_hover(index, button)
+        super().mouseMoveEvent(event)
+
+    def leaveEvent(self, event):
+        QToolTip.hideText()
+        self._set_hover(QModelIndex(), None)
+        super().leaveEvent(event)
+
+    def mousePressEvent(self, event):
+        pos = event.position().toPoint()
+        index = self.indexAt(pos)
+        if index.isValid():
+            button = self.capture_delegate.button_at(self.visualRect(index), pos)
+            capture = index.data(CaptureListModel.CaptureRole)
+            if button == 'copy':
+                self.copy_requested.emit(capture)
+            elif button == 'save':
+                self.save_requested.emit(capture)
+            elif button == 'delete':
+                self.delete_requested.emit(capture)
+        super().mousePressEvent(event)
@@ -0,0 +1,225 @@
+import os
+import shutil
+import tempfile
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from PySide6.QtCore import QStandardPaths
+from PySide6.QtGui import QImage
+
+from .utils import lower_thread_priority
+
+# PNG quality 80 maps to a low zlib level: lossless, but quick to write and read back
+SPILL_FORMAT = 'png'
+SPILL_QUALITY = 80
+
+
+class CaptureStore:
+    """
+    Holds full-resolution capture images within a memory budget.
+
+    Images past the budget are compressed into a spill directory, least
+    recently used first, and decoded again on demand. Spill files are
+    written on a background thread; until a write finishes the image stays
+    in memory so `get` never has to wait for it.
+
+    An optional `backing` store (anything with `contains(id)` and
+    `load(id)`, such as the SessionStore) already holds images on disk:
+    those are simply dropped from memory instead of spilled, and images
+    the store has never seen are loaded from it.
+    """
+
+    def __init__(self, memory_budget_mb=512, spill_dir=None):
+        self.memory_budget = int(memory_budget_mb * 1024 * 1024)
+        self._spill_root = spill_dir
+        self._spill_dir = None
+        self._lock = threading.RLock()
+        self._resident = OrderedDict() # capture_id -> QImage, least recently used first
+        self._writing = {} # capture_id -> QImage being written to disk
+        self._spilled = {} # capture_id -> spill file path
+        self._removed = set()
+        self.backing = None
+        self.resident_bytes = 0
+        self.spill_writes = 0
+        self.spill_reads = 0
+        self.backing_reads = 0
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="CaptureSpill",
+                                            initializer=lower_thread_priority)
+
+    def __contains__(self, capture_id):
+        with self._lock:
+            return capture_id in self._resident or capture_id in self._writing or capture_id in self._spilled
+
+    def __len__(self):
+        with self._lock:
+            return len(set(self._resident) | set(self._writing) | set(self._spilled))
+
+    def set_memory_budget(self, memory_budget_mb):
+        with self._lock:
+            self.memory_budget = int(memory_budget_mb * 1024 * 1024)
+            self._evict()
+
+    def add(self, capture_id, image):
+        with self._lock:
+            self._removed.discard(capture_id)
+            self._make_resident(capture_id, image)
+            self._evict()
+
+    def get(self, capture_id):
+        """Return the full-resolution QImage, loading it from the spill directory or backing store if needed."""
+        with self._lock:
+            if capture_id in self._resident:
+                self._resident.move_to_end(capture_id)
+                return self._resident[capture_id]
+            if capture_id in self._writing:
+                image = self._writing[capture_id]
+                self._make_resident(capture_id, image)
+                self._evict()
+                return image
+            path = self._spilled.get(capture_id)
+            backing = self.backing if capture_id not in self._removed else None
+
+        if path is not None:
+            image = QImage(path)
+            if image.isNull():
+                print(f"Error: could not reload spilled capture from {path}")
+                return None
+        elif backing is not None:
+            image = backing.load(capture_id)
+            if image is None:
+                return None
+        else:
+            return None
+
+        with self._lock:
+            if capture_id in self._removed:
+                return image
+            if path is not None:
+                self.spill_reads += 1
+            else:
+                self.backing_reads += 1
+            self._make_resident(capture_id, image)
+            self._evict()
+        return image
+
+    def peek(self, capture_id):
+        """
+        The full-resolution QImage if this store holds it, without making it
+        resident or recently used; None otherwise. The backing store is not asked.
+        """
+        with self._lock:
+            image = self._resident.get(capture_id)
+            if image is None:
+                image = self._writing.get(capture_id)
+            path = self._spilled.get(capture_id)
+        if image is not None or path is None:
+            return image
+        image = QImage(path)
+        if image.isNull():
+            print(f"Error: could not read spilled capture from {path}")
+            return None
+        return image
+
+    def remove(self, capture_id):
+        with self._lock:
+            image = self._resident.pop(capture_id, None)
+            if image is not None:
+                self.resident_bytes -= image.sizeInBytes()
+            self._writing.pop(capture_id, None)
+            path = self._spilled.pop(capture_id, None)
+            self._removed.add(capture_id)
+        if path:
+            self._delete_file(path)
+
+    def clear(self):
+        with self._lock:
+            ids = set(self._resident) | set(self._writing) | set(self._spilled)
+        for capture_id in ids:
+            self.remove(capture_id)
+
+    def close(self):
+        """Stop the spill writer and delete the spill directory."""
+        self._executor.shutdown(wait=True)
+        with self._lock:
+            self._resident.clear()
+            self._writing.clear()
+            self._spilled.clear()
+            self.resident_bytes = 0
+            if self._spill_dir:
+                shutil.rmtree(self._spill_dir, ignore_errors=True)
+                self._spill_dir = None
+
+    def stats(self):
+        with self._lock:
+            spilled_bytes = 0
+            for path in self._spilled.values():
+                try:
+                    spilled_bytes += os.path.getsize(path)
+                except OSError:
+                    pass
+            return {
+                'resident_count': len(self._resident),
+                'resident_bytes': self.resident_bytes,
+                'writing_count': len(self._writing),
+                'spilled_count': len(self._spilled),
+                'spilled_bytes': spilled_bytes,
+                'memory_budget': self.memory_budget,
+                'spill_writes': self.spill_writes,
+                'spill_reads': self.spill_reads,
+                'backing_reads': self.backing_reads,
+            }
+
+    # --- Internals (called with the lock held) ---
+
+    def _make_resident(self, capture_id, image):
+        previous = self._resident.pop(capture_id, None)
+        if previous is not None:
+            self.resident_bytes -= previous.sizeInBytes()
+        self._resident[capture_id] = image
+        self.resident_bytes += image.sizeInBytes()
+
+    def _evict(self):
+        # Always keep the most recently used image resident
+        while self.resident_bytes > self.memory_budget and len(self._resident) > 1:
+            capture_id, image = self._resident.popitem(last=False)
+            self.resident_bytes -= image.sizeInBytes()
+            if capture_id in self._spilled or capture_id in self._writing:
+                continue # Already on (or on its way to) disk; just drop it from memory
+            if self.backing is not None and self.backing.contains(capture_id):
+                continue # Persisted by the backing store; it can be loaded from there
+            self._writing[capture_id] = image
+            self._executor.submit(self._write_spill, capture_id, image)
+
+    def _ensure_spill_dir(self):
+        if self._spill_dir is None:
+            root = self._spill_root or QStandardPaths.writableLocation(QStandardPaths.StandardLocation.CacheLocation)
+            if root:
+                os.makedirs(root, exist_ok=True)
+            self._spill_dir = tempfile.mkdtemp(prefix="spill-", dir=root or None)
+        return self._spill_dir
+
+    def _write_spill(self, capture_id, image):
+        with self._lock:
+            spill_dir = self._ensure_spill_dir()
+        path = os.path.join(spill_dir, f"{capture_id}.{SPILL_FORMAT}")
+        ok = image.save(path, SPILL_FORMAT, SPILL_QUALITY)
+
+        with self._lock:
+            still_wanted = self._writing.pop(capture_id, None) is not None
+            if ok and still_wanted:
+                self._spilled[capture_id] = path
+                self.spill_writes += 1
+                return
+            if not ok and still_wanted:
+                # Could not spill; keep the image in memory rather than lose it
+                print(f"Error: could not spill capture {capture_id} to {path}")
+                self._make_resident(capture_id, image)
+                self._resident.move_to_end(capture_id, last=False)
+        if ok:
+            self._delete_file(path) # Removed while it was being written
+
+    def _delete_file(self, path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
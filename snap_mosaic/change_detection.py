@@ -0,0 +1,54 @@
+import numpy as np
+
+from .imaging import qimage_to_array
+
+
+class ChangeDetector:
+    """
+    Decides whether a new frame differs enough from the last kept frame.
+
+    A pixel counts as changed when any colour channel differs by more than
+    `pixel_tolerance`; a frame counts as changed when at least
+    `threshold_percent` of its pixels changed. The comparison is fully
+    vectorized with NumPy.
+    """
+
+    def __init__(self, threshold_percent=0.5, pixel_tolerance=16):
+        self.threshold_percent = threshold_percent
+        self.pixel_tolerance = pixel_tolerance
+        self.last_changed_percent = 100.0
+        self._last_frame = None
+
+    def reset(self):
+        self._last_frame = None
+        self.last_changed_percent = 100.0
+
+    def changed_percent(self, frame):
+        """Percentage of pixels in `frame` (a BGRA array) that differ from the last kept frame."""
+        last = self._last_frame
+        if last is None or last.shape != frame.shape:
+            return 100.0
+        # |a - b| without widening to int16: max(a, b) - min(a, b) stays in uint8
+        diff = np.maximum(frame[..., :3], last[..., :3])
+        diff -= np.minimum(frame[..., :3], last[..., :3])
+        changed = (diff > self.pixel_tolerance).any(axis=2)
+        return 100.0 * np.count_nonzero(changed) / changed.size
+
+    def check(self, image):
+        """
+        Compare a QImage against the last kept frame.
+
+        Returns True (and keeps the image as the new reference) if it changed
+        enough, False if it should be skipped.
+        """
+        return self.check_array(qimage_to_array(image))
+
+    def check_array(self, frame):
+        """Like `check`, for a BGRA array (which may be a view into a larger frame)."""
+        frame = np.asarray(frame)
+        self.last_changed_percent = self.changed_percent(frame)
+        if self._last_frame is not None and self.last_changed_percent < self.threshold_percent:
+            return False
+        # Own a copy; the QImage buffer may be reused or freed
+        self._last_frame = np.array(frame)
+        return True
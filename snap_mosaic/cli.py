@@ -0,0 +1,676 @@
+"""
+Command line entry point: `python -m snap_mosaic [command]`.
+
+Without a command (or with `gui`) the usual window opens, unless one is
+already running: then the request is passed on to it over its control
+socket. `capture`, `watch` and `export` run the capture and save pipeline
+headlessly on a QGuiApplication: no widgets, tray icon, hotkeys or
+sounds are loaded. `send` talks to the running app's control socket.
+`calibrate` compares image format settings on sample captures.
+
+Only the standard library is imported up front; Qt and the pipeline
+modules are imported by the command that needs them, so `--help` is
+instant and a headless capture never loads QtWidgets. `--startup-profile`
+prints how long each startup phase took to stderr.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+from . import __version__
+
+# Kept in step with image_formats.FORMATS, which imports Qt
+IMAGE_FORMATS = ('png', 'jpg', 'webp', 'qoi')
+_IMPORTED_AT = time.perf_counter()
+
+
+class UsageError(Exception):
+    """A bad argument that could only be detected after startup (e.g. an unknown region name)."""
+
+
+class StartupProfile:
+    """Wall-clock time of each startup phase, measured from when this module was imported."""
+
+    def __init__(self, enabled=False, start=None):
+        self.enabled = enabled
+        self.phases = [] # (phase, milliseconds)
+        self._last = start if start is not None else _IMPORTED_AT
+
+    def mark(self, phase):
+        now = time.perf_counter()
+        if self.enabled:
+            self.phases.append((phase, (now - self._last) * 1000))
+        self._last = now
+
+    def total_ms(self):
+        return sum(ms for _, ms in self.phases)
+
+    def report(self, stream=None):
+        if not self.enabled or not self.phases:
+            return
+        stream = stream or sys.stderr
+        print(f"Startup profile: {self.total_ms():.1f} ms", file=stream)
+        for phase, ms in self.phases:
+            print(f"  {phase:<24} {ms:8.1f} ms", file=stream)
+        widgets = "loaded" if 'PySide6.QtWidgets' in sys.modules else "not loaded"
+        print(f"  {len(sys.modules)} modules imported, QtWidgets {widgets}", file=stream)
+        self.phases = [] # Report each phase once
+
+
+# --- Shared startup ---
+
+def _start_application(args, profile):
+    """Create the QGuiApplication and load the config (the GUI's, unless --config is given)."""
+    from PySide6.QtGui import QGuiApplication
+    profile.mark("import Qt")
+
+    app = QGuiApplication.instance() or QGuiApplication(sys.argv[:1])
+    # Same names as the GUI, so the default config and save folder are shared
+    app.setOrganizationName("mirekw")
+    app.setApplicationName("SnapMosaic")
+    profile.mark("create application")
+
+    from .config import Config
+    config = Config(args.config) if args.config else Config()
+    profile.mark("load config")
+    return app, config
+
+
+def _open_backend(args, config, app):
+    from .capture_backends import create_backend, ENV_VAR
+    name = args.backend or os.environ.get(ENV_VAR) or config.get('capture_backend', 'qt')
+    screen = app.primaryScreen()
+    dpr = screen.devicePixelRatio() if screen else 1.0
+    return create_backend(name, dpr, screen.geometry() if screen else None)
+
+
+def parse_rect(spec):
+    """Parse 'X,Y,W,H' into a QRect, or return None if `spec` isn't one."""
+    from PySide6.QtCore import QRect
+    parts = spec.split(',')
+    if len(parts) != 4:
+        return None
+    try:
+        x, y, width, height = (int(part) for part in parts)
+    except ValueError:
+        return None
+    if width <= 0 or height <= 0:
+        return None
+    return QRect(x, y, width, height)
+
+
+def resolve_regions(specs, config, app):
+    """
+    The regions named (or given as X,Y,W,H) in `specs`. Without any, the
+    regions configured in the GUI are used, or else the whole desktop.
+    """
+    from .regions import CaptureRegion, load_regions
+    configured = load_regions(config)
+    if not specs:
+        if configured:
+            return configured
+        screen = app.primaryScreen()
+        if screen is None:
+            raise UsageError("no screen to capture")
+        return [CaptureRegion("Screen", screen.virtualGeometry())]
+
+    by_name = {region.name: region for region in configured}
+    regions = []
+    for spec in specs:
+        if spec in by_name:
+            regions.append(by_name[spec])
+            continue
+        rect = parse_rect(spec)
+        if rect is None:
+            raise UsageError(f"unknown region '{spec}' (expected X,Y,W,H or one of: "
+                             f"{', '.join(by_name) or 'no regions are configured'})")
+        regions.append(CaptureRegion(f"Region {len(regions) + 1}", rect))
+    return regions
+
+
+class FileSaver:
+    """
+    Writes region frames to a folder on an EncoderPool, named like the
+    GUI's auto-saves. The config's numeric counter is read but never
+    written back; names already on disk are skipped instead.
+    """
+
+    def __init__(self, config, location, image_encoder, prefix, region_count):
+        from .encoder import EncoderPool
+        self.location = location
+        self.image_encoder = image_encoder
+        self.image_format = image_encoder.extension
+        self.prefix = prefix
+        self.region_count = region_count
+        self.suffix_type = config.get('auto_save_suffix_type')
+        self._counter = config.get('auto_save_numeric_counter')
+        self._pending = set() # File names handed out whose writes haven't finished
+        self.saved = []
+        self.failed = []
+
+        os.makedirs(location, exist_ok=True)
+        self.encoder = EncoderPool(config.get('encoder_workers', 2), config.get('encoder_queue_size', 8))
+        self.encoder.finished.connect(self.on_encoded)
+
+    def prefix_for(self, region):
+        from .regions import filename_part
+        if region.auto_save_prefix:
+            return region.auto_save_prefix
+        # Regions share the folder, so tell their files apart by region name
+        if self.region_count > 1:
+            return f"{self.prefix}-{filename_part(region.name)}"
+        return self.prefix
+
+    def save(self, frame):
+        from .utils import timestamped_filename, numbered_filename
+        prefix = self.prefix_for(frame.region)
+        if self.suffix_type == 'timestamp':
+            filename = timestamped_filename(self.location, prefix, frame.timestamp, self.image_format,
+                                            taken=self._pending)
+        else:
+            filename, counter = numbered_filename(self.location, prefix, self._counter, self.image_format,
+                                                  taken=self._pending)
+            self._counter = counter + 1
+        self._pending.add(filename)
+        # Block rather than drop: a headless run has no frames to spare
+        self.encoder.submit(frame.image(), os.path.join(self.location, filename), self.image_encoder, block=True)
+
+    def on_encoded(self, token, file_path, success, latency_ms):
+        self._pending.discard(os.path.basename(file_path))
+        if success:
+            self.saved.append(file_path)
+            print(file_path, flush=True)
+        else:
+            self.failed.append(file_path)
+            print(f"Error saving image to {file_path}", file=sys.stderr)
+
+    def finish(self, app):
+        """Wait for every queued write and deliver its result."""
+        self.encoder.wait_for_done()
+        app.processEvents()
+
+
+def _make_image_encoder(args, config):
+    """The auto-save format and settings, with the --format, --quality, --png-compression and --lossless overrides."""
+    from .image_formats import ImageEncoder, format_supported
+    if args.format and not format_supported(args.format):
+        raise UsageError(f"{args.format} images can't be written here (Qt's image plugin for it is not installed)")
+    encoder = ImageEncoder.from_config(config, args.format)
+    if args.quality is not None:
+        encoder.jpg_quality = encoder.webp_quality = args.quality
+    if args.png_compression is not None:
+        encoder.png_compression = args.png_compression
+    if args.lossless:
+        encoder.webp_lossless = True
+    return encoder
+
+
+def _make_saver(args, config, regions):
+    location = args.output or config.get('auto_save_location')
+    prefix = args.prefix or config.get('auto_save_prefix')
+    return FileSaver(config, location, _make_image_encoder(args, config), prefix, len(regions))
+
+
+def _make_grabber(backend, app):
+    from .regions import RegionGrabber
+    return RegionGrabber(backend.grab, lambda: [screen.geometry() for screen in app.screens()])
+
+
+# --- Commands ---
+
+def run_capture(args, profile):
+    app, config = _start_application(args, profile)
+    regions = resolve_regions(args.region, config, app)
+    backend = _open_backend(args, config, app)
+    profile.mark("open capture backend")
+    try:
+        saver = _make_saver(args, config, regions)
+        frames = _make_grabber(backend, app).grab(regions)
+        profile.mark("first grab")
+        for frame in frames:
+            saver.save(frame)
+        saver.finish(app)
+        profile.mark("encode and save")
+    finally:
+        backend.close()
+    profile.report()
+
+    if len(frames) < len(regions):
+        print(f"Error: {len(regions) - len(frames)} of {len(regions)} regions could not be grabbed", file=sys.stderr)
+    return 0 if saver.saved and not saver.failed and len(frames) == len(regions) else 1
+
+
+def run_watch(args, profile):
+    import signal
+    app, config = _start_application(args, profile)
+    from PySide6.QtCore import QTimer
+    from .scheduler import AutoSnapScheduler, format_interval
+    profile.mark("import pipeline")
+
+    regions = resolve_regions(args.region, config, app)
+    backend = _open_backend(args, config, app)
+    profile.mark("open capture backend")
+    saver = _make_saver(args, config, regions)
+    grabber = _make_grabber(backend, app)
+
+    detectors = {}
+    if args.changes_only:
+        from .change_detection import ChangeDetector
+        for region in regions:
+            detectors[region.name] = ChangeDetector(config.get('change_detection_threshold'),
+                                                    config.get('change_detection_pixel_tolerance'))
+
+    stats = {'ticks': 0, 'skipped': 0}
+
+    def on_tick():
+        frames = grabber.grab(regions)
+        if stats['ticks'] == 0:
+            profile.mark("first grab")
+            profile.report()
+        stats['ticks'] += 1
+        for frame in frames:
+            detector = detectors.get(frame.region.name)
+            if detector is not None and not detector.check_array(frame.array()):
+                stats['skipped'] += 1
+                continue
+            saver.save(frame)
+        if args.count and stats['ticks'] >= args.count:
+            app.quit()
+
+    interval_ms = round(args.interval * 1000) if args.interval else config.get('auto_snap_interval_ms')
+    scheduler = AutoSnapScheduler()
+    scheduler.busy_check = lambda: saver.encoder.queue_depth >= saver.encoder.max_pending
+    scheduler.tick.connect(on_tick)
+
+    # Ctrl+C stops cleanly; the idle timer gives Python a chance to run the handler
+    signal.signal(signal.SIGINT, lambda *_: app.quit())
+    wake_timer = QTimer()
+    wake_timer.timeout.connect(lambda: None)
+    wake_timer.start(200)
+    if args.duration:
+        QTimer.singleShot(round(args.duration * 1000), app.quit)
+
+    print(f"Watching {len(regions)} region(s) every {format_interval(interval_ms)}; press Ctrl+C to stop",
+          file=sys.stderr)
+    scheduler.start(interval_ms)
+    QTimer.singleShot(0, on_tick) # First capture right away, then on the schedule
+    try:
+        app.exec()
+    finally:
+        scheduler.stop()
+        wake_timer.stop()
+        signal.signal(signal.SIGINT, signal.SIG_DFL)
+        saver.finish(app)
+        backend.close()
+
+    print(f"Captured {stats['ticks']} time(s): {len(saver.saved)} saved, {stats['skipped']} unchanged skipped, "
+          f"{scheduler.dropped_ticks} ticks dropped", file=sys.stderr)
+    return 1 if saver.failed else 0
+
+
+def run_export(args, profile):
+    app, config = _start_application(args, profile)
+    from .export import AnimationExporter, DirectoryFrameSource, ffmpeg_path, format_for_path
+    profile.mark("import exporter")
+
+    folder = args.folder or config.get('auto_save_location')
+    if not os.path.isdir(folder):
+        raise UsageError(f"no such folder: {folder}")
+    if format_for_path(args.output) == 'video' and not ffmpeg_path():
+        raise UsageError("video export needs ffmpeg on the PATH; use a .gif or .png output instead")
+    source = DirectoryFrameSource(folder)
+    if not len(source):
+        raise UsageError(f"no images to export in {folder}")
+
+    fps = args.fps or config.get('export_fps')
+    max_width = args.max_width if args.max_width is not None else config.get('export_max_width')
+    exporter = AnimationExporter(source, args.output, fps, max_width)
+    result = []
+    exporter.export_finished.connect(lambda success, message: result.append((success, message)))
+    if not args.quiet:
+        exporter.progress.connect(
+            lambda done, total: print(f"\rExporting frame {done}/{total}", end='', file=sys.stderr, flush=True))
+    profile.report()
+
+    # Nothing else runs in this process, so export on the main thread
+    exporter.run()
+    if not args.quiet:
+        print(file=sys.stderr)
+    success, message = result[-1] if result else (False, "export did not finish")
+    if not success:
+        print(f"Error: {message}", file=sys.stderr)
+        return 1
+    if exporter.frames_skipped:
+        print(f"Warning: {exporter.frames_skipped} unreadable images were left out", file=sys.stderr)
+    print(message)
+    return 0
+
+
+def _load_samples(paths, limit):
+    """QImages from image files and folders (up to `limit` per folder, in name order)."""
+    from .image_formats import image_files, read_image
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(image_files(path)[:limit])
+        elif os.path.exists(path):
+            files.append(path)
+        else:
+            raise UsageError(f"no such file or folder: {path}")
+    images = []
+    for path in files:
+        image = read_image(path)
+        if image.isNull():
+            raise UsageError(f"could not read image {path}")
+        images.append(image)
+    if not images:
+        raise UsageError(f"no images found in {', '.join(paths)}")
+    return images
+
+
+def run_calibrate(args, profile):
+    app, config = _start_application(args, profile)
+    from .image_formats import ImageEncoder, calibrate, calibration_encoders, format_supported, supported_formats
+    profile.mark("import encoders")
+    missing = [fmt for fmt in args.format or () if not format_supported(fmt)]
+    if missing:
+        raise UsageError(f"{', '.join(missing)} images can't be written here (Qt's image plugin is not installed)")
+
+    if args.images:
+        images = _load_samples(args.images, args.frames)
+    else:
+        regions = resolve_regions(args.region, config, app)
+        backend = _open_backend(args, config, app)
+        try:
+            grabber = _make_grabber(backend, app)
+            images = [frame.image() for _ in range(args.frames) for frame in grabber.grab(regions)]
+        finally:
+            backend.close()
+        if not images:
+            raise UsageError("nothing could be grabbed to calibrate with")
+    profile.mark("load samples")
+    profile.report()
+
+    # The current auto-save setting is always measured, and marked with '*'
+    current = ImageEncoder.from_config(config)
+    encoders = calibration_encoders(args.format or supported_formats())
+    if current.label not in [encoder.label for encoder in encoders]:
+        encoders.append(current)
+
+    pixels = sum(image.width() * image.height() for image in images) / len(images)
+    raw_bytes = pixels * 3
+    print(f"Encoding {len(images)} sample frame(s) of {pixels / 1e6:.1f} megapixels on average, in memory:")
+    print(f"  {'setting':<20} {'ms/frame':>9} {'KB/frame':>10} {'vs raw':>7}")
+    for encoder, ms, size in calibrate(images, encoders):
+        marker = '*' if encoder.label == current.label else ' '
+        print(f"{marker} {encoder.label:<20} {ms:9.1f} {size / 1024:10.1f} {size / raw_bytes:7.1%}", flush=True)
+    print("* the current auto-save setting. 'vs raw' is the size relative to 3 bytes per pixel.")
+    return 0
+
+
+def gui_requests(args):
+    """Control requests for the gui command's action flags; just bringing the window forward without any."""
+    requests = []
+    if getattr(args, 'capture', False):
+        requests.append({'command': 'capture'})
+    if getattr(args, 'start_auto_snap', False):
+        requests.append({'command': 'start_auto_snap'})
+    if getattr(args, 'stop_auto_snap', False):
+        requests.append({'command': 'stop_auto_snap'})
+    return requests or [{'command': 'activate'}]
+
+
+def forward_to_running_instance(requests, profile):
+    """Send `requests` to an instance that is already running. Returns its exit code, or None if there is none."""
+    from .control import ControlClient, ControlError
+    client = ControlClient()
+    if not client.connect():
+        return None
+    try:
+        replies = client.request(requests)
+    except ControlError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    finally:
+        client.close()
+    profile.mark("forward to running instance")
+    profile.report()
+
+    print("SnapMosaic is already running; passed the request on to it.", file=sys.stderr)
+    if requests != [{'command': 'activate'}]:
+        print(json.dumps(replies))
+    failed = [reply for reply in replies if not reply.get('ok')]
+    for reply in failed:
+        print(f"Error: {reply.get('error')}", file=sys.stderr)
+    return 1 if failed else 0
+
+
+def run_send(args, profile):
+    from .control import ControlClient, ControlError
+    profile.mark("import Qt")
+    if args.json:
+        try:
+            request = json.loads(args.json)
+        except ValueError as e:
+            raise UsageError(f"--json is not valid JSON: {e}")
+    elif args.action:
+        request = {'command': args.action}
+        for item in args.params:
+            key, sep, value = item.partition('=')
+            if not sep or not key:
+                raise UsageError(f"expected KEY=VALUE, got '{item}'")
+            try:
+                request[key] = json.loads(value) # Numbers, booleans, lists...
+            except ValueError:
+                request[key] = value # ...and anything else as a string
+    else:
+        raise UsageError("give a command, or a request with --json")
+
+    client = ControlClient(timeout_ms=round(args.timeout * 1000))
+    if not client.connect():
+        print("SnapMosaic is not running (or its control socket is turned off in Settings).", file=sys.stderr)
+        return 3
+    try:
+        reply = client.request(request)
+    except ControlError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    finally:
+        client.close()
+    profile.mark("round trip")
+    profile.report()
+
+    print(json.dumps(reply, indent=2))
+    replies = reply if isinstance(reply, list) else [reply]
+    return 0 if all(item.get('ok') for item in replies) else 1
+
+
+def run_gui(args, profile, qt_args):
+    # A second launch hands its request to the running instance instead of opening another window
+    requests = gui_requests(args)
+    exit_code = forward_to_running_instance(requests, profile)
+    if exit_code is not None:
+        return exit_code
+
+    from PySide6.QtWidgets import QApplication
+    from PySide6.QtGui import QIcon
+    from PySide6.QtCore import QTimer
+    from .utils import resource_path
+    from .tracing import tracer
+    profile.mark("import Qt")
+
+    app = QApplication(sys.argv[:1] + qt_args)
+    app.setOrganizationName("mirekw")
+    app.setApplicationName("SnapMosaic")
+
+    # Use the .ico on Windows for best results, otherwise use the .svg
+    if sys.platform == "win32":
+        icon_path = resource_path('assets/SnapMosaic.ico')
+    else:
+        icon_path = resource_path('assets/SnapMosaic.svg')
+
+    # Fallback to SVG if ICO is not found on Windows
+    if not os.path.exists(icon_path) and sys.platform == "win32":
+        svg_path = resource_path('assets/SnapMosaic.svg')
+        if os.path.exists(svg_path):
+            icon_path = svg_path
+
+    if os.path.exists(icon_path):
+        app.setWindowIcon(QIcon(icon_path))
+    profile.mark("create application")
+
+    from .main_window import SnapMosaic
+    from .config import Config
+    profile.mark("import main window")
+    window = SnapMosaic(Config(args.config) if args.config else None)
+    profile.mark("create main window")
+    window.show()
+
+    def report_error(reply):
+        if not reply['ok']:
+            print(f"Error: {reply['error']}", file=sys.stderr)
+
+    def on_first_event():
+        profile.mark("show main window")
+        profile.report()
+        # The first launch carries out its own action flags
+        for request in requests:
+            if request['command'] != 'activate':
+                window.control_server.dispatch(request).on_resolved(report_error)
+    QTimer.singleShot(0, on_first_event)
+
+    exit_code = app.exec()
+    if tracer.enabled:
+        tracer.save()
+    return exit_code
+
+
+# --- Arguments ---
+
+def build_parser():
+    # Accepted before or after the command; SUPPRESS keeps a subcommand from resetting them
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument('--config', metavar='PATH', default=argparse.SUPPRESS,
+                        help="Settings file (default: the GUI's)")
+    common.add_argument('--startup-profile', action='store_true', default=argparse.SUPPRESS,
+                        help="Print how long each startup phase took to stderr")
+
+    pipeline = argparse.ArgumentParser(add_help=False)
+    pipeline.add_argument('-r', '--region', action='append', metavar='NAME|X,Y,W,H',
+                          help="Region to capture: a configured region name or a rectangle; repeat for several "
+                               "(default: the configured regions, else the whole desktop)")
+    pipeline.add_argument('-o', '--output', metavar='DIR', help="Folder to save to (default: the auto-save folder)")
+    pipeline.add_argument('--format', choices=IMAGE_FORMATS, help="Image format (default: the auto-save format)")
+    pipeline.add_argument('--quality', type=int, metavar='0-100', help="JPG or WebP quality")
+    pipeline.add_argument('--png-compression', type=int, choices=range(10), metavar='0-9',
+                          help="PNG compression level: 0 is fastest, 9 smallest")
+    pipeline.add_argument('--lossless', action='store_true', help="Write lossless WebP")
+    pipeline.add_argument('--prefix', help="File name prefix (default: the auto-save prefix)")
+    pipeline.add_argument('--backend', help="Capture backend: qt, x11shm, synthetic or auto")
+
+    parser = argparse.ArgumentParser(
+        prog='snap_mosaic', parents=[common],
+        description="SnapMosaic screen capture. Without a command, the GUI opens.",
+        epilog="--trace[=PATH] records a pipeline trace with any command.")
+    parser.add_argument('--version', action='version', version=f"SnapMosaic {__version__}")
+    commands = parser.add_subparsers(dest='command', metavar='command')
+
+    gui = commands.add_parser('gui', parents=[common], help="Open the SnapMosaic window (default)",
+                              description="Open the SnapMosaic window. If it is already open, bring it forward "
+                                          "(or pass the actions below on to it) instead.")
+    gui.add_argument('--capture', action='store_true', help="Capture the regions once")
+    gui.add_argument('--start-auto-snap', action='store_true', help="Start Auto-Snap")
+    gui.add_argument('--stop-auto-snap', action='store_true', help="Stop Auto-Snap")
+
+    commands.add_parser('capture', parents=[common, pipeline],
+                        help="Grab the regions once and save them",
+                        description="Grab the regions once, save them, and print the saved paths.")
+
+    watch = commands.add_parser('watch', parents=[common, pipeline],
+                                help="Capture the regions on an interval until stopped",
+                                description="Capture the regions right away and then every --interval "
+                                            "seconds, until Ctrl+C, --count or --duration.")
+    watch.add_argument('-i', '--interval', type=float, metavar='SECONDS',
+                       help="Seconds between captures (default: the Auto-Snap interval)")
+    watch.add_argument('-n', '--count', type=int, metavar='N', help="Stop after N captures")
+    watch.add_argument('--duration', type=float, metavar='SECONDS', help="Stop after this many seconds")
+    watch.add_argument('--changes-only', action='store_true',
+                       help="Skip frames that haven't changed since the last saved one")
+
+    export = commands.add_parser('export', parents=[common],
+                                 help="Export a folder of captures as a GIF, APNG or video",
+                                 description="Export the images in a folder, in file name order, as an animation. "
+                                             "The format follows the output extension.")
+    export.add_argument('folder', nargs='?', help="Folder of images (default: the auto-save folder)")
+    export.add_argument('-o', '--output', required=True, metavar='FILE', help="Output .gif, .png or .mp4")
+    export.add_argument('--fps', type=float, help="Frames per second (default: the export setting)")
+    export.add_argument('--max-width', type=int, metavar='PIXELS', help="Scale frames down to this width; 0 keeps full size")
+    export.add_argument('-q', '--quiet', action='store_true', help="Don't show progress")
+
+    send = commands.add_parser('send', parents=[common],
+                               help="Send a command to the running app over its control socket",
+                               description="Send a command to the running app and print its JSON reply, e.g. "
+                                           "'send capture region=Chat' or 'send set_region x=0 y=0 width=640 height=480'. "
+                                           "Commands: ping, status, capture, start_auto_snap, stop_auto_snap, "
+                                           "set_region, export, save_all, activate.")
+    send.add_argument('action', nargs='?', metavar='COMMAND', help="Command to run")
+    send.add_argument('params', nargs='*', metavar='KEY=VALUE', help="Arguments; values are parsed as JSON when they can be")
+    send.add_argument('--json', metavar='REQUEST', help="Send this JSON request, or a JSON array of them as one batch")
+    send.add_argument('--timeout', type=float, default=30.0, metavar='SECONDS', help="How long to wait for the reply")
+
+    calibrate = commands.add_parser('calibrate', parents=[common],
+                                    help="Compare image format settings by encode time and file size",
+                                    description="Encode sample captures with a range of format settings (PNG "
+                                                "compression levels, JPG and WebP qualities, lossless WebP, QOI) "
+                                                "and print milliseconds and bytes per frame. The samples are the "
+                                                "given images, or frames grabbed from the regions.")
+    calibrate.add_argument('images', nargs='*', metavar='IMAGE|FOLDER', help="Sample images (default: grab the regions)")
+    calibrate.add_argument('-r', '--region', action='append', metavar='NAME|X,Y,W,H',
+                           help="Region to grab samples from; repeat for several (default: the configured regions, "
+                                "else the whole desktop)")
+    calibrate.add_argument('-n', '--frames', type=int, default=5, metavar='N',
+                           help="Grabs to take, or images to read per folder (default: 5)")
+    calibrate.add_argument('--format', action='append', choices=IMAGE_FORMATS,
+                           help="Only compare this format; repeat for several")
+    calibrate.add_argument('--backend', help="Capture backend: qt, x11shm, synthetic or auto")
+    return parser
+
+
+COMMANDS = {
+    'capture': run_capture,
+    'watch': run_watch,
+    'export': run_export,
+    'send': run_send,
+    'calibrate': run_calibrate,
+}
+
+
+def main(argv=None):
+    from .tracing import tracer, configure_from_args
+    # Optional pipeline tracing: --trace[=PATH] or SNAPMOSAIC_TRACE
+    argv = configure_from_args(list(sys.argv[1:] if argv is None else argv))
+    parser = build_parser()
+    # The GUI passes arguments it doesn't know on to Qt (e.g. -style)
+    args, extra = parser.parse_known_args(argv)
+    args.config = getattr(args, 'config', None)
+    args.startup_profile = getattr(args, 'startup_profile', False)
+    profile = StartupProfile(args.startup_profile)
+    profile.mark("parse arguments")
+
+    if args.command in (None, 'gui'):
+        return run_gui(args, profile, extra)
+    if extra:
+        parser.error(f"unrecognized arguments: {' '.join(extra)}")
+
+    try:
+        exit_code = COMMANDS[args.command](args, profile)
+    except UsageError as e:
+        parser.error(str(e))
+    except OSError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        exit_code = 1
+    if tracer.enabled:
+        tracer.save()
+    return exit_code
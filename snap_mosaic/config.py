@@ -1,16 +1,44 @@
+import atexit
+import copy
 import json
 import os
+import tempfile
+import threading
+from contextlib import contextmanager
 from PySide6.QtCore import QStandardPaths
 
+# Changes are written at most this long after the first unsaved set()
+FLUSH_DELAY_SECONDS = 0.5
+
 class Config:
-    def __init__(self, file_path=None):
+    """
+    Application settings backed by a JSON file.
+
+    `set()` only updates memory and schedules a write; changes made within
+    FLUSH_DELAY_SECONDS of each other share one write on a background
+    thread. Group related changes in `with config.batch():` so they are
+    saved together (or not at all, if the block raises). The file is
+    replaced atomically, so a crash mid-write leaves the previous settings
+    intact. Call `flush()` to write pending changes immediately.
+    """
+
+    def __init__(self, file_path=None, flush_delay=FLUSH_DELAY_SECONDS):
         if file_path is None:
             config_dir = QStandardPaths.writableLocation(QStandardPaths.StandardLocation.AppDataLocation)
             os.makedirs(config_dir, exist_ok=True)
             self.file_path = os.path.join(config_dir, 'SnapMosaic.json')
         else:
             self.file_path = file_path
+        self.flush_delay = flush_delay
+        self._lock = threading.RLock()
+        self._write_lock = threading.Lock() # Keeps concurrent flushes from reordering writes
+        self._batch_depth = 0
+        self._dirty = False
+        self._timer = None
+        self.write_count = 0
         self.settings = self.load_config()
+        # Don't lose a pending debounced write on a normal interpreter exit
+        atexit.register(self.flush)
 
     def load_config(self):
         # Start with default settings to ensure all keys are present
@@ -23,6 +51,14 @@ class Config:
                     user_settings = json.load(f)
                     # The user_settings might be None or not a dict if the file is empty/corrupt
                     if isinstance(user_settings, dict):
+                        # Older configs stored the auto-snap interval in whole seconds
+                        legacy_interval = user_settings.pop('auto_snap_interval', None)
+                        if legacy_interval is not None and 'auto_snap_interval_ms' not in user_settings:
+                            user_settings['auto_snap_interval_ms'] = int(legacy_interval * 1000)
+                        # Older configs had a single unnamed capture region
+                        legacy_region = user_settings.pop('capture_region', None)
+                        if legacy_region and not user_settings.get('capture_regions'):
+                            user_settings['capture_regions'] = [dict(legacy_region, name="Region 1")]
                         settings.update(user_settings)
             except (json.JSONDecodeError, TypeError) as e:
                 # Handle corrupted or invalid JSON
@@ -33,15 +69,98 @@ class Config:
         return settings
 
     def save_config(self):
-        with open(self.file_path, 'w') as f:
-            json.dump(self.settings, f, indent=4)
+        """Write the settings now, replacing the file atomically."""
+        with self._write_lock:
+            with self._lock:
+                self._cancel_timer()
+                data = json.dumps(self.settings, indent=4)
+                self._dirty = False
+            self._write_atomically(data)
+
+    def flush(self):
+        """Write pending changes, if any (a no-op inside an open batch)."""
+        with self._lock:
+            if not self._dirty or self._batch_depth:
+                return
+        self.save_config()
 
     def get(self, key, default=None):
         return self.settings.get(key, default)
 
     def set(self, key, value):
-        self.settings[key] = value
-        self.save_config()
+        with self._lock:
+            self.settings[key] = value
+            self._dirty = True
+            if not self._batch_depth:
+                self._schedule_flush()
+
+    @contextmanager
+    def batch(self):
+        """
+        Group several set() calls into one write. If the block raises,
+        its changes are rolled back. Batches may be nested; only the
+        outermost one schedules the write.
+        """
+        with self._lock:
+            if not self._batch_depth:
+                snapshot = copy.deepcopy(self.settings)
+                was_dirty = self._dirty
+            self._batch_depth += 1
+        try:
+            yield self
+        except BaseException:
+            with self._lock:
+                self._batch_depth -= 1
+                if not self._batch_depth:
+                    self.settings = snapshot
+                    self._dirty = was_dirty
+            raise
+        with self._lock:
+            self._batch_depth -= 1
+            if not self._batch_depth and self._dirty:
+                self._schedule_flush()
+
+    def close(self):
+        """Stop the flush timer and write anything still pending (call on quit)."""
+        self.flush()
+        atexit.unregister(self.flush)
+
+    def _schedule_flush(self):
+        # The first change starts the timer; later ones ride along with it
+        if self._timer is not None:
+            return
+        self._timer = threading.Timer(self.flush_delay, self._on_timer)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def _cancel_timer(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+    def _on_timer(self):
+        with self._lock:
+            self._timer = None
+        self.flush()
+
+    def _write_atomically(self, data):
+        directory = os.path.dirname(os.path.abspath(self.file_path))
+        fd, temp_path = tempfile.mkstemp(dir=directory, prefix=os.path.basename(self.file_path) + '.', suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w') as f:
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temp_path, self.file_path)
+            self.write_count += 1
+        except OSError as e:
+            print(f"Error writing settings to {self.file_path}: {e}")
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
+            with self._lock:
+                self._dirty = True # Try again with the next change or flush
 
     def get_default_config(self):
         pictures_location = QStandardPaths.writableLocation(QStandardPaths.StandardLocation.PicturesLocation)
@@ -50,13 +169,30 @@ class Config:
         return {
             'hotkey': 'f7',
             'window_geometry': None,
+            'capture_regions': [], # Named regions; each may override the interval and auto-save prefix
             'auto_copy_to_clipboard': False,
             'minimize_to_tray': False,
             'show_tray_notification': True,
             'sounds_enabled': True,
+            'audio_backend': 'auto', # 'auto' (Qt, else playsound), 'qt', 'playsound' or 'null'
             'max_display_width': 500,
+            'selection_magnifier': True, # Zoomed view of the pixels under the cursor while selecting a region
+            'selection_snap_to_edges': False, # Snap region corners to nearby edges on screen
             'auto_snap_hotkey': 'f8',
-            'auto_snap_interval': 10,
+            'auto_snap_interval_ms': 10000,
+            'burst_hotkey': 'f9',
+            'hotkey_min_interval_ms': 100, # Held keys and key-repeat can't fire the capture hotkey faster than this
+            'toggle_hotkey_min_interval_ms': 400, # Same for the Auto-Snap and burst hotkeys
+            'burst_frame_count': 30,
+            'burst_fps': 20.0,
+            'replay_enabled': False,
+            'replay_seconds': 10,
+            'replay_fps': 5.0,
+            'replay_max_width': 960, # Buffered frames are downscaled to this width (0 keeps full size)
+            'replay_storage': 'jpeg', # 'jpeg' (compressed in memory) or 'raw'
+            'replay_memory_mb': 128,
+            'export_fps': 10.0,
+            'export_max_width': 800, # Animation exports are scaled down to this width (0 keeps full size)
             'confirmations': {
                 'clear_all': True
             },
@@ -65,6 +201,26 @@ class Config:
             'auto_save_prefix': 'SnapMosaic',
             'auto_save_suffix_type': 'timestamp', # 'timestamp' or 'numeric'
             'auto_save_numeric_counter': 1,
-            'auto_save_format': 'png', # 'png' or 'jpg'
-            'auto_save_jpg_quality': 95
+            'auto_save_format': 'png', # 'png', 'jpg', 'webp' or 'qoi'
+            'auto_save_jpg_quality': 95,
+            'auto_save_png_compression': 6, # zlib level: 0 (fastest, largest) to 9 (slowest, smallest)
+            'auto_save_webp_quality': 80,
+            'auto_save_webp_lossless': False,
+            'encoder_workers': 2,
+            'encoder_queue_size': 8,
+            'save_all_workers': 0, # Processes encoding for Save All (0: one per CPU core)
+            'capture_memory_budget_mb': 512,
+            'capture_backend': 'qt', # 'qt', 'x11shm', 'synthetic', or 'auto' (fastest measured at startup)
+            'thumbnail_workers': 2,
+            'thumbnail_cache_mb': 128,
+            'session_restore_enabled': True,
+            'session_storage': 'full', # 'full' images, or 'delta': keyframes plus the tiles that changed in between
+            'session_keyframe_interval': 60, # In 'delta' storage, a full keyframe every this many captures of a region
+            'session_tile_size': 64, # Tile edge in pixels for 'delta' storage
+            'control_socket_enabled': True, # Local socket that scripts use to drive the running app
+            'change_detection_enabled': False,
+            'change_detection_threshold': 0.5, # Percent of pixels that must change
+            'change_detection_pixel_tolerance': 16, # Per-channel difference ignored as noise
+            'duplicate_detection': 'off', # 'off', 'mark', 'collapse' or 'skip'
+            'duplicate_max_distance': 4 # Max Hamming distance between 64-bit perceptual hashes
         }
@@ -0,0 +1,226 @@
+"""
+Local control socket for scripting a running SnapMosaic.
+
+`ControlServer` listens on a QLocalServer (a Unix domain socket, or a
+named pipe on Windows). A request is one line of JSON: an object such as
+`{"command": "capture", "region": "Chat"}`, or an array of them to run
+several commands in one round trip. The reply is one line: the reply
+object, or an array of replies in request order. Every reply has "ok"
+(and "error" when it is false); an "id" given in the request is echoed.
+
+Handlers return a dict, or a `Deferred` for replies that wait on the
+pipeline (a capture being written to disk, an export finishing). Replies
+on one connection always come back in the order the requests were sent.
+
+`ControlClient` is the blocking counterpart, used by `python -m
+snap_mosaic send` and by a second launch of the app to hand its
+arguments to the instance already running.
+"""
+import getpass
+import json
+import os
+
+from PySide6.QtCore import QObject
+from PySide6.QtNetwork import QLocalServer, QLocalSocket
+
+ENV_VAR = "SNAPMOSAIC_CONTROL_SOCKET"
+CONNECT_TIMEOUT_MS = 500
+REPLY_TIMEOUT_MS = 30000
+
+
+def server_name():
+    """The socket name: one per user, unless SNAPMOSAIC_CONTROL_SOCKET names another."""
+    name = os.environ.get(ENV_VAR)
+    if name:
+        return name
+    try:
+        user = getpass.getuser()
+    except (KeyError, OSError):
+        return "SnapMosaic"
+    return f"SnapMosaic-{user}"
+
+
+class ControlError(Exception):
+    """A request that can't be carried out; the message is sent back as the reply's error."""
+
+
+class Deferred:
+    """A reply that is sent later. Call `resolve` (or `fail`) once; later calls are ignored."""
+
+    def __init__(self):
+        self.reply = None
+        self._callbacks = []
+
+    def resolve(self, reply):
+        if self.reply is not None:
+            return
+        self.reply = reply
+        for callback in self._callbacks:
+            callback(reply)
+        self._callbacks.clear()
+
+    def fail(self, message):
+        self.resolve({'ok': False, 'error': message})
+
+    def on_resolved(self, callback):
+        if self.reply is not None:
+            callback(self.reply)
+        else:
+            self._callbacks.append(callback)
+
+
+def _completed(reply):
+    deferred = Deferred()
+    deferred.resolve(reply)
+    return deferred
+
+
+class ControlServer(QObject):
+    """Answers control requests with `handlers`, a dict of command name -> callable(request)."""
+
+    def __init__(self, handlers, name=None, parent=None):
+        super().__init__(parent)
+        self.handlers = dict(handlers)
+        self.name = name or server_name()
+        self.server = QLocalServer(self)
+        self.server.setSocketOptions(QLocalServer.SocketOption.UserAccessOption)
+        self.server.newConnection.connect(self.on_new_connection)
+        self.request_count = 0
+        self._queues = {} # socket -> replies not yet written, in request order
+
+    def listen(self):
+        """Start listening. Returns False if another instance is already serving the name."""
+        probe = ControlClient(self.name)
+        if probe.connect():
+            probe.close()
+            print(f"Control socket '{self.name}' is in use by another instance.")
+            return False
+        # A socket file left behind by a crash would make listen() fail
+        QLocalServer.removeServer(self.name)
+        if not self.server.listen(self.name):
+            print(f"Warning: Could not open control socket '{self.name}': {self.server.errorString()}")
+            return False
+        print(f"Control socket listening on {self.server.fullServerName()}")
+        return True
+
+    def close(self):
+        self.server.close()
+        for socket in list(self._queues):
+            socket.abort()
+        self._queues.clear()
+
+    def on_new_connection(self):
+        while self.server.hasPendingConnections():
+            socket = self.server.nextPendingConnection()
+            self._queues[socket] = []
+            socket.readyRead.connect(lambda socket=socket: self.on_ready_read(socket))
+            socket.disconnected.connect(lambda socket=socket: self.on_disconnected(socket))
+
+    def on_disconnected(self, socket):
+        # Deferred replies still pending for this socket are dropped when they resolve
+        socket.deleteLater()
+        self._queues.pop(socket, None)
+
+    def on_ready_read(self, socket):
+        while socket in self._queues and socket.canReadLine():
+            line = bytes(socket.readLine()).strip()
+            if line:
+                self.handle_line(socket, line)
+
+    def handle_line(self, socket, line):
+        try:
+            request = json.loads(line)
+        except ValueError as e:
+            deferred = _completed({'ok': False, 'error': f"invalid JSON: {e}"})
+        else:
+            deferred = self.dispatch_batch(request) if isinstance(request, list) else self.dispatch(request)
+        self._queues[socket].append(deferred)
+        deferred.on_resolved(lambda reply: self._write_replies(socket))
+
+    def _write_replies(self, socket):
+        queue = self._queues.get(socket)
+        while queue and queue[0].reply is not None:
+            reply = queue.pop(0).reply
+            socket.write(json.dumps(reply).encode('utf-8') + b'\n')
+        if queue is not None:
+            socket.flush()
+
+    def dispatch(self, request):
+        """Run one request. Returns a Deferred that resolves to its reply."""
+        self.request_count += 1
+        if not isinstance(request, dict):
+            return _completed({'ok': False, 'error': "a request must be a JSON object"})
+        command = request.get('command')
+        handler = self.handlers.get(command)
+        if handler is None:
+            result = {'ok': False, 'error': f"unknown command {command!r}; expected one of: {', '.join(self.handlers)}"}
+        else:
+            try:
+                result = handler(request)
+            except ControlError as e:
+                result = {'ok': False, 'error': str(e)}
+            except Exception as e:
+                print(f"Error handling control command {command!r}: {e}")
+                result = {'ok': False, 'error': f"internal error: {e}"}
+
+        deferred = result if isinstance(result, Deferred) else _completed(result)
+        reply = Deferred()
+
+        def finish(result):
+            result = dict(result)
+            result.setdefault('ok', True)
+            if 'id' in request:
+                result['id'] = request['id']
+            reply.resolve(result)
+        deferred.on_resolved(finish)
+        return reply
+
+    def dispatch_batch(self, requests):
+        """Run requests in order; the reply is the list of their replies, sent once all are done."""
+        replies = [self.dispatch(request) for request in requests]
+        batch = Deferred()
+
+        def check(_reply):
+            if all(reply.reply is not None for reply in replies):
+                batch.resolve([reply.reply for reply in replies])
+        for reply in replies:
+            reply.on_resolved(check)
+        if not replies:
+            batch.resolve([])
+        return batch
+
+
+class ControlClient:
+    """Sends requests to a running instance and waits for the replies."""
+
+    def __init__(self, name=None, timeout_ms=REPLY_TIMEOUT_MS):
+        self.name = name or server_name()
+        self.timeout_ms = timeout_ms
+        self.socket = QLocalSocket()
+        self._buffer = b''
+
+    def connect(self, timeout_ms=CONNECT_TIMEOUT_MS):
+        """Returns True if an instance is listening."""
+        self.socket.connectToServer(self.name)
+        return self.socket.waitForConnected(timeout_ms)
+
+    def send(self, request):
+        self.socket.write(json.dumps(request).encode('utf-8') + b'\n')
+        self.socket.waitForBytesWritten(self.timeout_ms)
+
+    def receive(self):
+        """The next reply (an object, or a list for a batch). Raises ControlError on timeout or disconnect."""
+        while b'\n' not in self._buffer:
+            if not self.socket.waitForReadyRead(self.timeout_ms):
+                raise ControlError(f"no reply from '{self.name}': {self.socket.errorString()}")
+            self._buffer += bytes(self.socket.readAll())
+        line, self._buffer = self._buffer.split(b'\n', 1)
+        return json.loads(line)
+
+    def request(self, request):
+        """Send one request (or a list of them) and return the reply."""
+        self.send(request)
+        return self.receive()
+
+    def close(self):
+        self.socket.disconnectFromServer()
@@ -1,11 +1,15 @@
 from PySide6.QtWidgets import (
     QDialog, QVBoxLayout, QHBoxLayout, QPushButton, 
     QLabel, QLineEdit, QCheckBox, QGroupBox, 
-    QFormLayout, QRadioButton, QComboBox, QSpinBox,
-    QFileDialog, QDialogButtonBox, QTabWidget, QWidget, QMessageBox
+    QFormLayout, QRadioButton, QComboBox, QSpinBox, QDoubleSpinBox,
+    QFileDialog, QDialogButtonBox, QTabWidget, QWidget, QMessageBox,
+    QTableWidget, QTableWidgetItem, QHeaderView, QAbstractItemView
 )
 from PySide6.QtCore import Qt
 from .hotkey import HotkeyInput
+from .scheduler import MIN_INTERVAL_MS
+from .capture_backends import BACKENDS
+from .image_formats import FORMATS, format_supported
 
 class SettingsDialog(QDialog):
     def __init__(self, config, parent=None):
@@ -15,6 +19,7 @@ class SettingsDialog(QDialog):
         self.config = config
         self.new_hotkey = self.config.get('hotkey')
         self.new_auto_snap_hotkey = self.config.get('auto_snap_hotkey')
+        self.new_burst_hotkey = self.config.get('burst_hotkey')
 
         # Main layout for the dialog
         main_layout = QVBoxLayout(self)
@@ -24,11 +29,13 @@ class SettingsDialog(QDialog):
         general_tab = self.create_general_tab()
         auto_snap_tab = self.create_auto_snap_tab()
         auto_save_tab = self.create_auto_save_tab()
+        regions_tab = self.create_regions_tab()
 
         # Add tabs
         tab_widget.addTab(general_tab, "General")
         tab_widget.addTab(auto_snap_tab, "Auto-Snap")
         tab_widget.addTab(auto_save_tab, "Auto-Save")
+        tab_widget.addTab(regions_tab, "Regions")
 
         main_layout.addWidget(tab_widget)
 
@@ -78,6 +85,49 @@ class SettingsDialog(QDialog):
         self.sounds_enabled_checkbox.setChecked(self.config.get('sounds_enabled', True))
         layout.addWidget(self.sounds_enabled_checkbox)
 
+        # Session restore setting
+        self.session_restore_checkbox = QCheckBox("Restore captures from the previous session")
+        self.session_restore_checkbox.setChecked(self.config.get('session_restore_enabled', True))
+        self.session_restore_checkbox.setToolTip("Keep captures on disk so they reappear after a restart or crash.\n"
+                                                 "Turning this off deletes the stored session on the next start.")
+        layout.addWidget(self.session_restore_checkbox)
+
+        session_storage_layout = QHBoxLayout()
+        session_storage_layout.addWidget(QLabel("Store session captures as:"))
+        self.session_storage_combo = QComboBox()
+        self.session_storage_combo.addItem("Full images", 'full')
+        self.session_storage_combo.addItem("Keyframes + changed tiles (smaller)", 'delta')
+        self.session_storage_combo.setCurrentIndex(max(0, self.session_storage_combo.findData(self.config.get('session_storage', 'full'))))
+        self.session_storage_combo.setToolTip("For regions where only a small part changes (e.g. a dashboard widget):\n"
+                                              "store a full keyframe now and then, and otherwise only the tiles\n"
+                                              "that changed since the previous capture. Captures are rebuilt\n"
+                                              "exactly when they are copied, saved or exported.")
+        session_storage_layout.addWidget(self.session_storage_combo)
+        session_storage_layout.addStretch()
+        layout.addLayout(session_storage_layout)
+        self.session_restore_checkbox.toggled.connect(self.session_storage_combo.setEnabled)
+        self.session_storage_combo.setEnabled(self.session_restore_checkbox.isChecked())
+
+        # Control socket setting
+        self.control_socket_checkbox = QCheckBox("Allow scripts to control SnapMosaic")
+        self.control_socket_checkbox.setChecked(self.config.get('control_socket_enabled', True))
+        self.control_socket_checkbox.setToolTip("Accept commands such as capture and export on a local socket\n"
+                                                "(python -m snap_mosaic send), and bring this window forward\n"
+                                                "instead of starting a second copy of the app.")
+        layout.addWidget(self.control_socket_checkbox)
+
+        # Region selection helpers
+        selection_layout = QHBoxLayout()
+        self.magnifier_checkbox = QCheckBox("Show magnifier when selecting a region")
+        self.magnifier_checkbox.setChecked(self.config.get('selection_magnifier', True))
+        selection_layout.addWidget(self.magnifier_checkbox)
+        self.snap_checkbox = QCheckBox("Snap to edges")
+        self.snap_checkbox.setChecked(self.config.get('selection_snap_to_edges', False))
+        self.snap_checkbox.setToolTip("Move the corners of a new region onto nearby window and panel edges")
+        selection_layout.addWidget(self.snap_checkbox)
+        selection_layout.addStretch()
+        layout.addLayout(selection_layout)
+
         # Max display width setting
         max_width_layout = QHBoxLayout()
         max_width_layout.addWidget(QLabel("Max display width:"))
@@ -90,6 +140,51 @@ class SettingsDialog(QDialog):
         max_width_layout.addStretch()
         layout.addLayout(max_width_layout)
 
+        # Memory budget for full-resolution captures
+        memory_layout = QHBoxLayout()
+        memory_layout.addWidget(QLabel("Memory for full-size captures:"))
+        self.memory_budget_spinbox = QSpinBox()
+        self.memory_budget_spinbox.setRange(64, 65536)
+        self.memory_budget_spinbox.setSingleStep(64)
+        self.memory_budget_spinbox.setValue(self.config.get('capture_memory_budget_mb', 512))
+        self.memory_budget_spinbox.setSuffix(' MB')
+        self.memory_budget_spinbox.setToolTip("Older full-size captures beyond this budget are compressed to disk and reloaded when needed")
+        memory_layout.addWidget(self.memory_budget_spinbox)
+        memory_layout.addStretch()
+        layout.addLayout(memory_layout)
+
+        # Screen-grab backend
+        backend_layout = QHBoxLayout()
+        backend_layout.addWidget(QLabel("Capture backend:"))
+        self.backend_combo = QComboBox()
+        self.backend_combo.addItem("Fastest available (measured at startup)", 'auto')
+        for name, backend in BACKENDS.items():
+            if name != 'synthetic' or self.config.get('capture_backend') == name: # Synthetic frames are for testing
+                self.backend_combo.addItem(backend.label, name)
+        self.backend_combo.setCurrentIndex(max(0, self.backend_combo.findData(self.config.get('capture_backend', 'qt'))))
+        self.backend_combo.setToolTip("How the screen is grabbed. Backends that cannot run here fall back to Qt.")
+        backend_layout.addWidget(self.backend_combo)
+        backend_layout.addStretch()
+        layout.addLayout(backend_layout)
+
+        # Near-duplicate detection across the whole session
+        duplicate_layout = QHBoxLayout()
+        duplicate_layout.addWidget(QLabel("Near-duplicate captures:"))
+        self.duplicate_combo = QComboBox()
+        for label, mode in (("Keep", 'off'), ("Mark", 'mark'), ("Collapse into earlier capture", 'collapse'), ("Skip", 'skip')):
+            self.duplicate_combo.addItem(label, mode)
+        self.duplicate_combo.setCurrentIndex(max(0, self.duplicate_combo.findData(self.config.get('duplicate_detection', 'off'))))
+        self.duplicate_combo.setToolTip("What to do when a new capture looks like any earlier capture in this session")
+        duplicate_layout.addWidget(self.duplicate_combo)
+        duplicate_layout.addWidget(QLabel("Similarity:"))
+        self.duplicate_distance_spinbox = QSpinBox()
+        self.duplicate_distance_spinbox.setRange(0, 16)
+        self.duplicate_distance_spinbox.setValue(self.config.get('duplicate_max_distance', 4))
+        self.duplicate_distance_spinbox.setToolTip("Maximum number of differing hash bits (0 = visually identical only)")
+        duplicate_layout.addWidget(self.duplicate_distance_spinbox)
+        duplicate_layout.addStretch()
+        layout.addLayout(duplicate_layout)
+
         # Reset confirmations button
         reset_layout = QHBoxLayout()
         reset_label = QLabel("Confirmation dialogs:")
@@ -130,18 +225,189 @@ class SettingsDialog(QDialog):
         # Capture interval
         interval_layout = QHBoxLayout()
         interval_layout.addWidget(QLabel("Capture Interval:"))
-        self.interval_spinbox = QSpinBox()
-        self.interval_spinbox.setRange(1, 3600)
-        self.interval_spinbox.setValue(self.config.get('auto_snap_interval', 10))
+        self.interval_spinbox = QDoubleSpinBox()
+        self.interval_spinbox.setRange(MIN_INTERVAL_MS / 1000.0, 3600)
+        self.interval_spinbox.setDecimals(3)
+        self.interval_spinbox.setSingleStep(0.1)
+        self.interval_spinbox.setValue(self.config.get('auto_snap_interval_ms', 10000) / 1000.0)
         self.interval_spinbox.setSuffix(' seconds')
-        self.interval_spinbox.setToolTip("Time between automatic captures when Auto-Snap is enabled")
+        self.interval_spinbox.setToolTip("Time between automatic captures when Auto-Snap is enabled.\n"
+                                         "Sub-second intervals are allowed; ticks are skipped while a capture is still in progress.")
         interval_layout.addWidget(self.interval_spinbox)
         interval_layout.addStretch()
         layout.addLayout(interval_layout)
 
+        # Change detection
+        self.change_detection_group = QGroupBox("Skip unchanged frames")
+        self.change_detection_group.setCheckable(True)
+        self.change_detection_group.setChecked(self.config.get('change_detection_enabled', False))
+        self.change_detection_group.setToolTip("Only keep an auto-snap capture if the region changed since the last kept capture")
+        change_layout = QFormLayout()
+
+        self.change_threshold_spinbox = QDoubleSpinBox()
+        self.change_threshold_spinbox.setRange(0.0, 100.0)
+        self.change_threshold_spinbox.setDecimals(2)
+        self.change_threshold_spinbox.setSingleStep(0.1)
+        self.change_threshold_spinbox.setValue(self.config.get('change_detection_threshold', 0.5))
+        self.change_threshold_spinbox.setSuffix(' % of pixels')
+        change_layout.addRow("Minimum change:", self.change_threshold_spinbox)
+
+        self.pixel_tolerance_spinbox = QSpinBox()
+        self.pixel_tolerance_spinbox.setRange(0, 255)
+        self.pixel_tolerance_spinbox.setValue(self.config.get('change_detection_pixel_tolerance', 16))
+        self.pixel_tolerance_spinbox.setToolTip("Colour differences up to this value are treated as noise")
+        change_layout.addRow("Pixel tolerance:", self.pixel_tolerance_spinbox)
+
+        self.change_detection_group.setLayout(change_layout)
+        layout.addWidget(self.change_detection_group)
+
+        # Burst capture
+        burst_group = QGroupBox("Burst Capture")
+        burst_group.setToolTip("Capture a fixed number of frames at a steady rate, e.g. for animations")
+        burst_layout = QFormLayout()
+
+        self.burst_hotkey_input = HotkeyInput(self.new_burst_hotkey)
+        self.burst_hotkey_input.key_captured.connect(self.set_new_burst_hotkey)
+        burst_layout.addRow("Burst Hotkey:", self.burst_hotkey_input)
+
+        self.burst_frames_spinbox = QSpinBox()
+        self.burst_frames_spinbox.setRange(2, 600)
+        self.burst_frames_spinbox.setValue(self.config.get('burst_frame_count', 30))
+        self.burst_frames_spinbox.setSuffix(' frames')
+        burst_layout.addRow("Frames per burst:", self.burst_frames_spinbox)
+
+        self.burst_fps_spinbox = QDoubleSpinBox()
+        self.burst_fps_spinbox.setRange(0.5, 60.0)
+        self.burst_fps_spinbox.setDecimals(1)
+        self.burst_fps_spinbox.setValue(self.config.get('burst_fps', 20.0))
+        self.burst_fps_spinbox.setSuffix(' fps')
+        burst_layout.addRow("Frame rate:", self.burst_fps_spinbox)
+
+        burst_group.setLayout(burst_layout)
+        layout.addWidget(burst_group)
+
+        # Instant replay
+        self.replay_group = QGroupBox("Instant Replay")
+        self.replay_group.setCheckable(True)
+        self.replay_group.setChecked(self.config.get('replay_enabled', False))
+        self.replay_group.setToolTip("Keep the last few seconds of the capture region in memory;\n"
+                                     "the capture hotkey adds them to the grid before the new capture")
+        replay_layout = QFormLayout()
+
+        self.replay_seconds_spinbox = QSpinBox()
+        self.replay_seconds_spinbox.setRange(1, 120)
+        self.replay_seconds_spinbox.setValue(self.config.get('replay_seconds', 10))
+        self.replay_seconds_spinbox.setSuffix(' seconds')
+        replay_layout.addRow("Keep the last:", self.replay_seconds_spinbox)
+
+        self.replay_fps_spinbox = QDoubleSpinBox()
+        self.replay_fps_spinbox.setRange(0.5, 30.0)
+        self.replay_fps_spinbox.setDecimals(1)
+        self.replay_fps_spinbox.setValue(self.config.get('replay_fps', 5.0))
+        self.replay_fps_spinbox.setSuffix(' fps')
+        replay_layout.addRow("Frame rate:", self.replay_fps_spinbox)
+
+        self.replay_width_spinbox = QSpinBox()
+        self.replay_width_spinbox.setRange(0, 7680)
+        self.replay_width_spinbox.setSingleStep(160)
+        self.replay_width_spinbox.setSpecialValueText("Full size")
+        self.replay_width_spinbox.setValue(self.config.get('replay_max_width', 960))
+        self.replay_width_spinbox.setSuffix(' px')
+        replay_layout.addRow("Downscale to width:", self.replay_width_spinbox)
+
+        self.replay_storage_combo = QComboBox()
+        self.replay_storage_combo.addItem("JPEG in memory (smaller)", 'jpeg')
+        self.replay_storage_combo.addItem("Uncompressed (less CPU)", 'raw')
+        self.replay_storage_combo.setCurrentIndex(max(0, self.replay_storage_combo.findData(self.config.get('replay_storage', 'jpeg'))))
+        replay_layout.addRow("Storage:", self.replay_storage_combo)
+
+        self.replay_memory_spinbox = QSpinBox()
+        self.replay_memory_spinbox.setRange(16, 4096)
+        self.replay_memory_spinbox.setSingleStep(16)
+        self.replay_memory_spinbox.setValue(self.config.get('replay_memory_mb', 128))
+        self.replay_memory_spinbox.setSuffix(' MB')
+        replay_layout.addRow("Memory limit:", self.replay_memory_spinbox)
+
+        self.replay_group.setLayout(replay_layout)
+        layout.addWidget(self.replay_group)
+
         layout.addStretch()
         return auto_snap_tab
 
+    def create_regions_tab(self):
+        regions_tab = QWidget()
+        layout = QVBoxLayout(regions_tab)
+
+        desc_label = QLabel("All regions are cropped from a single screen grab and get their own tab in the grid. "
+                            "Use 'Add Region' in the main window to add one.")
+        desc_label.setWordWrap(True)
+        layout.addWidget(desc_label)
+
+        self.region_rows = [dict(region) for region in self.config.get('capture_regions') or []]
+        self.regions_table = QTableWidget(0, 4)
+        self.regions_table.setHorizontalHeaderLabels(["Name", "Area", "Interval", "Auto-save prefix"])
+        self.regions_table.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
+        self.regions_table.setSelectionMode(QAbstractItemView.SelectionMode.SingleSelection)
+        self.regions_table.verticalHeader().setVisible(False)
+        self.regions_table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.ResizeToContents)
+        self.regions_table.horizontalHeader().setStretchLastSection(True)
+        for region in self.region_rows:
+            self.add_region_row(region)
+        layout.addWidget(self.regions_table)
+
+        remove_layout = QHBoxLayout()
+        remove_layout.addStretch()
+        self.remove_region_button = QPushButton("Remove Region")
+        self.remove_region_button.setToolTip("Stop capturing the selected region (its captures stay in the grid)")
+        self.remove_region_button.clicked.connect(self.remove_selected_region)
+        remove_layout.addWidget(self.remove_region_button)
+        layout.addLayout(remove_layout)
+
+        return regions_tab
+
+    def add_region_row(self, region):
+        row = self.regions_table.rowCount()
+        self.regions_table.insertRow(row)
+        read_only = Qt.ItemFlag.ItemIsSelectable | Qt.ItemFlag.ItemIsEnabled
+        name_item = QTableWidgetItem(region['name'])
+        name_item.setFlags(read_only)
+        self.regions_table.setItem(row, 0, name_item)
+        area_item = QTableWidgetItem(f"{region['width']}×{region['height']} at ({region['x']}, {region['y']})")
+        area_item.setFlags(read_only)
+        self.regions_table.setItem(row, 1, area_item)
+
+        interval_spinbox = QDoubleSpinBox()
+        interval_spinbox.setDecimals(3)
+        interval_spinbox.setRange(0, 3600)
+        interval_spinbox.setSuffix(" s")
+        interval_spinbox.setSpecialValueText("Global") # 0 follows the Auto-Snap interval
+        interval_spinbox.setValue((region.get('interval_ms') or 0) / 1000.0)
+        interval_spinbox.setToolTip("Auto-Snap interval for this region; 'Global' uses the Auto-Snap tab's interval")
+        self.regions_table.setCellWidget(row, 2, interval_spinbox)
+
+        prefix_item = QTableWidgetItem(region.get('auto_save_prefix') or "")
+        prefix_item.setToolTip("Leave empty to use the Auto-Save prefix followed by the region name")
+        self.regions_table.setItem(row, 3, prefix_item)
+
+    def remove_selected_region(self):
+        row = self.regions_table.currentRow()
+        if row < 0:
+            return
+        self.regions_table.removeRow(row)
+        del self.region_rows[row]
+
+    def region_settings(self):
+        """The regions as edited in the Regions tab, in the config's format."""
+        regions = []
+        for row, region in enumerate(self.region_rows):
+            region = dict(region)
+            seconds = self.regions_table.cellWidget(row, 2).value()
+            # 0 follows the global interval; anything else is held to the scheduler's minimum
+            region['interval_ms'] = max(MIN_INTERVAL_MS, int(round(seconds * 1000))) if seconds > 0 else None
+            region['auto_save_prefix'] = self.regions_table.item(row, 3).text().strip() or None
+            regions.append(region)
+        return regions
+
     def create_auto_save_tab(self):
         auto_save_tab = QWidget()
         layout = QVBoxLayout(auto_save_tab)
@@ -179,8 +445,16 @@ class SettingsDialog(QDialog):
         # Image Format
         format_layout = QHBoxLayout()
         self.format_combo = QComboBox()
-        self.format_combo.addItems(['png', 'jpg'])
-        self.format_combo.setCurrentText(self.config.get('auto_save_format'))
+        self.format_combo.addItems(FORMATS)
+        for index, fmt in enumerate(FORMATS):
+            if not format_supported(fmt): # e.g. WebP without Qt's imageformats plugin
+                item = self.format_combo.model().item(index)
+                item.setEnabled(False)
+                item.setToolTip(f"{fmt} can't be written: Qt's image plugin for it is not installed.")
+        current_format = self.config.get('auto_save_format')
+        self.format_combo.setCurrentText(current_format if format_supported(current_format) else 'png')
+        self.format_combo.setToolTip("QOI is lossless and quicker to write than PNG, but few viewers open it.\n"
+                                     "Run 'python -m snap_mosaic calibrate' to compare the settings on your captures.")
         self.format_combo.currentTextChanged.connect(self.update_quality_visibility)
         format_layout.addWidget(self.format_combo)
 
@@ -192,11 +466,57 @@ class SettingsDialog(QDialog):
         self.quality_spinbox.setSuffix('%')
         format_layout.addWidget(self.quality_label)
         format_layout.addWidget(self.quality_spinbox)
+
+        # PNG compression level
+        self.png_compression_label = QLabel("Compression:")
+        self.png_compression_spinbox = QSpinBox()
+        self.png_compression_spinbox.setRange(0, 9)
+        self.png_compression_spinbox.setValue(self.config.get('auto_save_png_compression', 6))
+        self.png_compression_spinbox.setToolTip("0 writes fastest but largest, 9 smallest but slowest")
+        format_layout.addWidget(self.png_compression_label)
+        format_layout.addWidget(self.png_compression_spinbox)
+
+        # WebP quality, or lossless
+        self.webp_quality_label = QLabel("WebP Quality:")
+        self.webp_quality_spinbox = QSpinBox()
+        self.webp_quality_spinbox.setRange(1, 99)
+        self.webp_quality_spinbox.setValue(self.config.get('auto_save_webp_quality', 80))
+        self.webp_quality_spinbox.setSuffix('%')
+        self.webp_lossless_checkbox = QCheckBox("Lossless")
+        self.webp_lossless_checkbox.setChecked(self.config.get('auto_save_webp_lossless', False))
+        self.webp_lossless_checkbox.toggled.connect(lambda checked: self.webp_quality_spinbox.setEnabled(not checked))
+        self.webp_quality_spinbox.setEnabled(not self.webp_lossless_checkbox.isChecked())
+        format_layout.addWidget(self.webp_quality_label)
+        format_layout.addWidget(self.webp_quality_spinbox)
+        format_layout.addWidget(self.webp_lossless_checkbox)
         format_layout.addStretch()
         group_layout.addRow("Image Format:", format_layout)
 
         self.auto_save_group.setLayout(group_layout)
         layout.addWidget(self.auto_save_group)
+
+        # Animation export
+        export_group = QGroupBox("Animation Export")
+        export_group.setToolTip("Settings used by Export Animation (GIF, animated PNG or video)")
+        export_layout = QFormLayout()
+
+        self.export_fps_spinbox = QDoubleSpinBox()
+        self.export_fps_spinbox.setRange(0.5, 60.0)
+        self.export_fps_spinbox.setDecimals(1)
+        self.export_fps_spinbox.setValue(self.config.get('export_fps', 10.0))
+        self.export_fps_spinbox.setSuffix(' fps')
+        export_layout.addRow("Frame rate:", self.export_fps_spinbox)
+
+        self.export_width_spinbox = QSpinBox()
+        self.export_width_spinbox.setRange(0, 7680)
+        self.export_width_spinbox.setSingleStep(160)
+        self.export_width_spinbox.setSpecialValueText("Full size")
+        self.export_width_spinbox.setValue(self.config.get('export_max_width', 800))
+        self.export_width_spinbox.setSuffix(' px')
+        export_layout.addRow("Max width:", self.export_width_spinbox)
+
+        export_group.setLayout(export_layout)
+        layout.addWidget(export_group)
         layout.addStretch()
 
         # Set initial state
@@ -210,6 +530,9 @@ class SettingsDialog(QDialog):
     def set_new_auto_snap_hotkey(self, hotkey):
         self.new_auto_snap_hotkey = hotkey
 
+    def set_new_burst_hotkey(self, hotkey):
+        self.new_burst_hotkey = hotkey
+
     def browse_for_folder(self):
         directory = QFileDialog.getExistingDirectory(
             self,
@@ -223,26 +546,62 @@ class SettingsDialog(QDialog):
         is_jpg = text.lower() == 'jpg'
         self.quality_label.setVisible(is_jpg)
         self.quality_spinbox.setVisible(is_jpg)
+        is_png = text.lower() == 'png'
+        self.png_compression_label.setVisible(is_png)
+        self.png_compression_spinbox.setVisible(is_png)
+        is_webp = text.lower() == 'webp'
+        self.webp_quality_label.setVisible(is_webp)
+        self.webp_quality_spinbox.setVisible(is_webp)
+        self.webp_lossless_checkbox.setVisible(is_webp)
 
     def apply_settings(self):
-        self.config.set('hotkey', self.new_hotkey)
-        self.config.set('auto_copy_to_clipboard', self.auto_copy_checkbox.isChecked())
-        self.config.set('minimize_to_tray', self.minimize_to_tray_checkbox.isChecked())
-        self.config.set('show_tray_notification', self.show_tray_notification_checkbox.isChecked())
-        self.config.set('sounds_enabled', self.sounds_enabled_checkbox.isChecked())
-        self.config.set('max_display_width', self.max_width_spinbox.value())
-
-        self.config.set('auto_snap_hotkey', self.new_auto_snap_hotkey)
-        self.config.set('auto_snap_interval', self.interval_spinbox.value())
-
-        self.config.set('auto_save_enabled', self.auto_save_group.isChecked())
-        self.config.set('auto_save_location', self.location_edit.text())
-        self.config.set('auto_save_prefix', self.prefix_edit.text())
-        suffix_type = 'numeric' if self.numeric_radio.isChecked() else 'timestamp'
-        self.config.set('auto_save_suffix_type', suffix_type)
-        self.config.set('auto_save_format', self.format_combo.currentText())
-        self.config.set('auto_save_jpg_quality', self.quality_spinbox.value())
-        
+        # One write for the whole dialog instead of one per setting
+        with self.config.batch():
+            self.config.set('hotkey', self.new_hotkey)
+            self.config.set('auto_copy_to_clipboard', self.auto_copy_checkbox.isChecked())
+            self.config.set('minimize_to_tray', self.minimize_to_tray_checkbox.isChecked())
+            self.config.set('show_tray_notification', self.show_tray_notification_checkbox.isChecked())
+            self.config.set('sounds_enabled', self.sounds_enabled_checkbox.isChecked())
+            self.config.set('session_restore_enabled', self.session_restore_checkbox.isChecked())
+            self.config.set('session_storage', self.session_storage_combo.currentData())
+            self.config.set('control_socket_enabled', self.control_socket_checkbox.isChecked())
+            self.config.set('max_display_width', self.max_width_spinbox.value())
+            self.config.set('capture_memory_budget_mb', self.memory_budget_spinbox.value())
+            self.config.set('duplicate_detection', self.duplicate_combo.currentData())
+            self.config.set('selection_magnifier', self.magnifier_checkbox.isChecked())
+            self.config.set('selection_snap_to_edges', self.snap_checkbox.isChecked())
+            self.config.set('capture_backend', self.backend_combo.currentData())
+            self.config.set('duplicate_max_distance', self.duplicate_distance_spinbox.value())
+
+            self.config.set('auto_snap_hotkey', self.new_auto_snap_hotkey)
+            self.config.set('auto_snap_interval_ms', int(round(self.interval_spinbox.value() * 1000)))
+            self.config.set('change_detection_enabled', self.change_detection_group.isChecked())
+            self.config.set('change_detection_threshold', self.change_threshold_spinbox.value())
+            self.config.set('change_detection_pixel_tolerance', self.pixel_tolerance_spinbox.value())
+            self.config.set('burst_hotkey', self.new_burst_hotkey)
+            self.config.set('burst_frame_count', self.burst_frames_spinbox.value())
+            self.config.set('burst_fps', self.burst_fps_spinbox.value())
+            self.config.set('replay_enabled', self.replay_group.isChecked())
+            self.config.set('replay_seconds', self.replay_seconds_spinbox.value())
+            self.config.set('replay_fps', self.replay_fps_spinbox.value())
+            self.config.set('replay_max_width', self.replay_width_spinbox.value())
+            self.config.set('replay_storage', self.replay_storage_combo.currentData())
+            self.config.set('replay_memory_mb', self.replay_memory_spinbox.value())
+
+            self.config.set('auto_save_enabled', self.auto_save_group.isChecked())
+            self.config.set('auto_save_location', self.location_edit.text())
+            self.config.set('auto_save_prefix', self.prefix_edit.text())
+            suffix_type = 'numeric' if self.numeric_radio.isChecked() else 'timestamp'
+            self.config.set('auto_save_suffix_type', suffix_type)
+            self.config.set('auto_save_format', self.format_combo.currentText())
+            self.config.set('auto_save_jpg_quality', self.quality_spinbox.value())
+            self.config.set('auto_save_png_compression', self.png_compression_spinbox.value())
+            self.config.set('auto_save_webp_quality', self.webp_quality_spinbox.value())
+            self.config.set('auto_save_webp_lossless', self.webp_lossless_checkbox.isChecked())
+            self.config.set('export_fps', self.export_fps_spinbox.value())
+            self.config.set('export_max_width', self.export_width_spinbox.value())
+            self.config.set('capture_regions', self.region_settings())
+
         self.accept()
 
 class AboutDialog(QDialog):
@@ -0,0 +1,167 @@
+import threading
+import time
+from collections import deque
+from PySide6.QtCore import QObject, QRunnable, QThreadPool, Signal
+
+from .tracing import tracer
+
+
+class _EncodeSignals(QObject):
+    # token, file_path, success, latency in milliseconds
+    finished = Signal(object, str, bool, float)
+
+
+class _EncodeJob(QRunnable):
+    def __init__(self, pool, image, file_path, encoder, token):
+        super().__init__()
+        self.pool = pool
+        self.image = image
+        self.file_path = file_path
+        self.encoder = encoder
+        self.token = token
+        self.submitted_at = time.perf_counter()
+
+    def run(self):
+        # QImage (unlike QPixmap) is safe to use outside the GUI thread.
+        ok = False
+        try:
+            with tracer.span('encode', path=self.file_path):
+                if self.encoder is not None:
+                    ok = self.encoder.save(self.image, self.file_path)
+                else:
+                    ok = self.image.save(self.file_path)
+        except Exception as e:
+            print(f"Error encoding image to {self.file_path}: {e}")
+        latency_ms = (time.perf_counter() - self.submitted_at) * 1000.0
+        # Release the slot before notifying, so a blocked submitter or the backlog can proceed.
+        self.pool._job_done(latency_ms)
+        self.pool._signals.finished.emit(self.token, self.file_path, ok, latency_ms)
+
+
+class EncoderPool(QObject):
+    """
+    Encodes and writes images on a bounded pool of worker threads so that
+    image compression never runs on the GUI thread.
+
+    At most `max_pending` jobs are queued or encoding at once. Saves that
+    must not be dropped can go to a backlog instead, which is fed into the
+    pool as jobs finish, so the GUI thread never waits for a free slot.
+    """
+    finished = Signal(object, str, bool, float)
+    dropped = Signal(object, str)
+
+    def __init__(self, max_workers=2, max_pending=8, parent=None):
+        super().__init__(parent)
+        self.max_pending = max(1, max_pending)
+        self.thread_pool = QThreadPool(self)
+        self.thread_pool.setMaxThreadCount(max(1, max_workers))
+
+        self._signals = _EncodeSignals()
+        # Worker emissions are queued onto this object's (GUI) thread.
+        self._signals.finished.connect(self._drain_backlog)
+        self._signals.finished.connect(self.finished)
+
+        self._condition = threading.Condition()
+        self._pending = 0
+        self._backlog = deque()
+        self.completed_count = 0
+        self.dropped_count = 0
+        self.last_latency_ms = 0.0
+        self._total_latency_ms = 0.0
+
+    @property
+    def queue_depth(self):
+        """Number of jobs queued or currently encoding."""
+        with self._condition:
+            return self._pending
+
+    @property
+    def backlog_depth(self):
+        """Number of jobs waiting for a free slot."""
+        with self._condition:
+            return len(self._backlog)
+
+    @property
+    def average_latency_ms(self):
+        with self._condition:
+            if not self.completed_count:
+                return 0.0
+            return self._total_latency_ms / self.completed_count
+
+    def stats(self):
+        return {
+            'queue_depth': self.queue_depth,
+            'backlog': self.backlog_depth,
+            'max_pending': self.max_pending,
+            'completed': self.completed_count,
+            'dropped': self.dropped_count,
+            'last_latency_ms': self.last_latency_ms,
+            'average_latency_ms': self.average_latency_ms,
+        }
+
+    def submit(self, image, file_path, encoder=None, token=None, block=False, backlog=False):
+        """
+        Queue `image` (a QImage) to be written to `file_path` with `encoder`
+        (an ImageEncoder; without one, Qt picks the format from the extension).
+
+        When the queue is full the job is dropped with a warning, unless
+        `backlog` is True (it waits in the backlog; use this on the GUI
+        thread) or `block` is True (the caller waits until a worker frees a
+        slot; only for threads that may stall). Returns True if the job was
+        queued.
+        """
+        job = _EncodeJob(self, image, file_path, encoder, token)
+        with self._condition:
+            is_full = self._pending >= self.max_pending
+            # Backlogged jobs also wait behind any already in the backlog, so saves stay in order
+            to_backlog = backlog and (is_full or bool(self._backlog))
+            if to_backlog:
+                self._backlog.append(job)
+                depth = len(self._backlog)
+            else:
+                if is_full and block:
+                    self._condition.wait_for(lambda: self._pending < self.max_pending)
+                    is_full = False
+                if is_full:
+                    self.dropped_count += 1
+                else:
+                    self._pending += 1
+                depth = self._pending
+
+        if to_backlog:
+            tracer.counter('encoder_backlog', depth=depth)
+            return True
+        if is_full:
+            self.dropped.emit(token, file_path)
+            return False
+
+        tracer.counter('encoder_queue', depth=depth)
+        self.thread_pool.start(job)
+        return True
+
+    def _drain_backlog(self, *args):
+        jobs = []
+        with self._condition:
+            while self._backlog and self._pending < self.max_pending:
+                jobs.append(self._backlog.popleft())
+                self._pending += 1
+        for job in jobs:
+            self.thread_pool.start(job)
+
+    def wait_for_done(self, msecs=-1):
+        """Block until all queued jobs, including the backlog, are written (used on shutdown)."""
+        with self._condition:
+            jobs = list(self._backlog)
+            self._backlog.clear()
+            self._pending += len(jobs)
+        for job in jobs:
+            self.thread_pool.start(job)
+        return self.thread_pool.waitForDone(msecs)
+
+    def _job_done(self, latency_ms):
+        with self._condition:
+            self._pending -= 1
+            self.completed_count += 1
+            self.last_latency_ms = latency_ms
+            self._total_latency_ms += latency_ms
+            self._condition.notify_all()
@@ -0,0 +1,447 @@
+import os
+import shutil
+import struct
+import subprocess
+import zlib
+
+import numpy as np
+from PySide6.QtCore import QThread, Signal
+
+from .image_formats import image_files, read_image
+from .imaging import qimage_to_array
+
+
+def ffmpeg_path():
+    """Path of a local ffmpeg executable, or None if there isn't one on PATH."""
+    return shutil.which('ffmpeg')
+
+
+# --- Frame sources (one frame in memory at a time) ---
+
+class CaptureFrameSource:
+    """Full-resolution frames of grid captures, oldest first, fetched one by one from the capture store."""
+
+    def __init__(self, captures):
+        self.captures = list(captures)
+
+    def __len__(self):
+        return len(self.captures)
+
+    def __iter__(self):
+        for capture in self.captures:
+            image = capture.original_image()
+            if image is None:
+                print(f"Warning: skipping capture {capture.id}, its image could not be loaded")
+            yield image
+
+
+class DirectoryFrameSource:
+    """Image files in a directory (e.g. the auto-save folder), in filename order, decoded one by one."""
+
+    def __init__(self, directory):
+        self.paths = image_files(directory)
+
+    def __len__(self):
+        return len(self.paths)
+
+    def __iter__(self):
+        for path in self.paths:
+            image = read_image(path)
+            if image.isNull():
+                print(f"Warning: skipping unreadable image {path}")
+                yield None
+            else:
+                yield image
+
+
+# --- Vectorized scaling and quantization ---
+
+def output_size(width, height, max_width, even=False):
+    if max_width and width > max_width:
+        height = max(1, round(height * max_width / width))
+        width = max_width
+    if even:
+        width, height = max(2, width - width % 2), max(2, height - height % 2)
+    return width, height
+
+
+def resize_array(array, width, height):
+    """
+    Resize an (h, w, channels) uint8 array to (height, width).
+
+    Large reductions are first box-filtered by an integer factor (strided
+    integer sums, which avoids aliasing and any full-size float copy), then
+    the remainder is bilinearly interpolated one axis at a time.
+    """
+    src_h, src_w = array.shape[:2]
+    if (src_w, src_h) == (width, height):
+        return np.asarray(array)
+
+    factor_y = min(257, max(1, src_h // height)) # uint16 row sums must not overflow
+    factor_x = max(1, src_w // width)
+    if factor_x > 1 or factor_y > 1:
+        box_h, box_w = src_h // factor_y, src_w // factor_x
+        view = np.asarray(array)[:box_h * factor_y, :box_w * factor_x]
+        rows = np.zeros((box_h, box_w * factor_x) + view.shape[2:], dtype=np.uint16)
+        for offset in range(factor_y):
+            rows += view[offset::factor_y]
+        sums = np.zeros((box_h, box_w) + view.shape[2:], dtype=np.uint32)
+        for offset in range(factor_x):
+            sums += rows[:, offset::factor_x]
+        data = sums.astype(np.float32) * np.float32(1.0 / (factor_x * factor_y))
+        src_h, src_w = box_h, box_w
+    else:
+        data = np.asarray(array, dtype=np.float32)
+
+    if src_w != width:
+        xs = np.clip((np.arange(width, dtype=np.float32) + 0.5) * (src_w / width) - 0.5, 0, src_w - 1)
+        x0 = np.floor(xs).astype(np.intp)
+        x1 = np.minimum(x0 + 1, src_w - 1)
+        wx = (xs - x0)[None, :, None]
+        data = data[:, x0] * (1 - wx) + data[:, x1] * wx
+    if src_h != height:
+        ys = np.clip((np.arange(height, dtype=np.float32) + 0.5) * (src_h / height) - 0.5, 0, src_h - 1)
+        y0 = np.floor(ys).astype(np.intp)
+        y1 = np.minimum(y0 + 1, src_h - 1)
+        wy = (ys - y0)[:, None, None]
+        data = data[y0] * (1 - wy) + data[y1] * wy
+    return np.clip(data + 0.5, 0, 255).astype(np.uint8)
+
+
+def quantize(rgb, max_colors=256):
+    """
+    Reduce an (h, w, 3) RGB array to at most `max_colors` colours.
+
+    Colours are bucketed to 15 bits; the most frequent buckets become the
+    palette (each entry the mean of the pixels in its bucket) and every
+    other bucket maps to its nearest palette entry. Returns
+    (indices as (h, w) uint8, palette as (n, 3) uint8).
+    """
+    r = rgb[..., 0].astype(np.int32)
+    g = rgb[..., 1].astype(np.int32)
+    b = rgb[..., 2].astype(np.int32)
+    buckets = ((r >> 3) << 10 | (g >> 3) << 5 | (b >> 3)).ravel()
+
+    counts = np.bincount(buckets, minlength=32768)
+    used = np.flatnonzero(counts)
+    sums = np.stack([np.bincount(buckets, weights=channel.ravel(), minlength=32768)
+                     for channel in (r, g, b)], axis=1)
+    means = sums[used] / counts[used, None]
+
+    if len(used) <= max_colors:
+        chosen = np.arange(len(used))
+    else:
+        chosen = np.argpartition(counts[used], -max_colors)[-max_colors:]
+    palette = means[chosen]
+
+    lookup = np.zeros(32768, dtype=np.uint8)
+    if len(used) <= max_colors:
+        lookup[used] = chosen
+    else:
+        # Nearest palette entry for every used bucket, in chunks to bound memory
+        for start in range(0, len(used), 4096):
+            block = means[start:start + 4096]
+            distances = ((block[:, None, :] - palette[None, :, :]) ** 2).sum(axis=2)
+            lookup[used[start:start + 4096]] = distances.argmin(axis=1)
+
+    indices = lookup[buckets].reshape(rgb.shape[:2])
+    return indices, np.clip(palette + 0.5, 0, 255).astype(np.uint8)
+
+
+def bgra_to_rgb(array):
+    return array[..., 2::-1]
+
+
+# --- Writers ---
+
+def lzw_encode(data, min_code_size=8):
+    """GIF-flavoured variable-length LZW encoding of `data` (bytes of palette indices)."""
+    clear_code = 1 << min_code_size
+    end_code = clear_code + 1
+    first_size = min_code_size + 1
+    codes = [clear_code]
+    widths = [] # (index of the first code, code size) wherever the code size changes
+
+    # The table walk is sequential, so it stays in Python but only collects codes; NumPy packs the bits
+    if data:
+        append = codes.append
+        table = {}
+        get = table.get
+        code_size = first_size
+        next_code = end_code + 1
+        grow_at = (1 << code_size) + 1
+        values = iter(data)
+        prefix = next(values)
+        for value in values:
+            key = prefix << 8 | value
+            code = get(key)
+            if code is not None:
+                prefix = code
+                continue
+            append(prefix)
+            if next_code < 4096:
+                table[key] = next_code
+                next_code += 1
+                if next_code == grow_at and code_size < 12:
+                    code_size += 1
+                    grow_at = (1 << code_size) + 1
+                    widths.append((len(codes), code_size))
+            else:
+                append(clear_code)
+                table.clear()
+                code_size = first_size
+                next_code = end_code + 1
+                grow_at = (1 << code_size) + 1
+                widths.append((len(codes), code_size))
+            prefix = value
+        append(prefix)
+    codes.append(end_code)
+
+    # Pack the codes least significant bit first, each at the width it was emitted with
+    starts = [0] + [index for index, _ in widths] + [len(codes)]
+    sizes = np.repeat([first_size] + [size for _, size in widths], np.diff(starts))
+    codes = np.array(codes, dtype=np.uint16)
+    bits = (codes[:, None] >> np.arange(12, dtype=np.uint16)) & 1
+    bits = bits[np.arange(12) < sizes[:, None]].astype(np.uint8)
+    return np.packbits(bits, bitorder='little').tobytes()
+
+
+class GifWriter:
+    """
+    Writes an endlessly looping animated GIF frame by frame, each with its own colour table.
+
+    After the first frame only the bounding box of the pixels that changed
+    is stored; the rest of the previous frame stays on screen.
+    """
+
+    def __init__(self, path, width, height, fps):
+        self.path = path
+        self.width = width
+        self.height = height
+        self.fps = fps
+        self.frame_count = 0
+        self._previous = None
+        self.file = open(path, 'wb')
+        self.file.write(b'GIF89a' + struct.pack('<HHBBB', width, height, 0, 0, 0))
+        # NETSCAPE2.0 application extension: loop forever
+        self.file.write(b'\x21\xFF\x0BNETSCAPE2.0\x03\x01' + struct.pack('<H', 0) + b'\x00')
+
+    def _delay_centiseconds(self):
+        # Spread rounding over the sequence so long exports keep the requested rate
+        index = self.frame_count
+        return max(2, round((index + 1) * 100 / self.fps) - round(index * 100 / self.fps))
+
+    def _changed_area(self, rgb):
+        """(left, top, right, bottom) of the pixels that differ from the previous frame, bounds exclusive."""
+        if self._previous is None:
+            return 0, 0, self.width, self.height
+        changed = (rgb != self._previous).any(axis=2)
+        rows = np.flatnonzero(changed.any(axis=1))
+        if not len(rows):
+            return 0, 0, 1, 1 # Nothing changed; one unchanged pixel keeps the frame and its delay
+        columns = np.flatnonzero(changed.any(axis=0))
+        return columns[0], rows[0], columns[-1] + 1, rows[-1] + 1
+
+    def add_frame(self, rgb):
+        left, top, right, bottom = self._changed_area(rgb)
+        self._previous = np.array(rgb)
+        indices, palette = quantize(rgb[top:bottom, left:right])
+        table_bits = max(1, int(np.ceil(np.log2(max(2, len(palette))))))
+        table = np.zeros((1 << table_bits, 3), dtype=np.uint8)
+        table[:len(palette)] = palette
+
+        # Graphic control extension (frame delay), image descriptor, local colour table
+        self.file.write(b'\x21\xF9\x04\x04' + struct.pack('<H', self._delay_centiseconds()) + b'\x00\x00')
+        self.file.write(b'\x2C' + struct.pack('<HHHHB', left, top, right - left, bottom - top, 0x80 | (table_bits - 1)))
+        self.file.write(table.tobytes())
+
+        min_code_size = max(2, table_bits)
+        data = lzw_encode(indices.tobytes(), min_code_size)
+        self.file.write(bytes([min_code_size]))
+        for start in range(0, len(data), 255):
+            block = data[start:start + 255]
+            self.file.write(bytes([len(block)]) + block)
+        self.file.write(b'\x00')
+        self.frame_count += 1
+
+    def close(self):
+        self.file.write(b'\x3B')
+        self.file.close()
+
+    def abort(self):
+        self.file.close()
+        _remove_file(self.path)
+
+
+class ApngWriter:
+    """
+    Writes an animated PNG frame by frame.
+
+    Scanlines use the PNG "Up" filter, computed for the whole frame at once
+    with NumPy, and are compressed with zlib. The frame count in the acTL
+    chunk is patched on close, so a cancelled or short export is still valid.
+    """
+    SIGNATURE = b'\x89PNG\r\n\x1a\n'
+
+    def __init__(self, path, width, height, fps, compress_level=6):
+        self.path = path
+        self.width = width
+        self.height = height
+        self.fps = fps
+        self.compress_level = compress_level
+        self.frame_count = 0
+        self.sequence = 0
+        self.file = open(path, 'wb')
+        self.file.write(self.SIGNATURE)
+        self._write_chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, 8, 2, 0, 0, 0))
+        self._actl_offset = self.file.tell()
+        self._write_chunk(b'acTL', struct.pack('>II', 0, 0))
+
+    def _write_chunk(self, chunk_type, data):
+        self.file.write(struct.pack('>I', len(data)) + chunk_type + data)
+        self.file.write(struct.pack('>I', zlib.crc32(chunk_type + data) & 0xFFFFFFFF))
+
+    def add_frame(self, rgb):
+        height, width = rgb.shape[:2]
+        filtered = np.empty((height, width * 3 + 1), dtype=np.uint8)
+        filtered[:, 0] = 2 # "Up" filter: each byte minus the byte above it
+        rows = rgb.reshape(height, width * 3)
+        filtered[:, 1:] = rows
+        filtered[1:, 1:] -= rows[:-1]
+        data = zlib.compress(filtered.tobytes(), self.compress_level)
+
+        delay_ms = max(1, round(1000 / self.fps))
+        self._write_chunk(b'fcTL', struct.pack('>IIIIIHHBB', self.sequence, width, height, 0, 0,
+                                                delay_ms, 1000, 0, 0))
+        self.sequence += 1
+        if self.frame_count == 0:
+            self._write_chunk(b'IDAT', data)
+        else:
+            self._write_chunk(b'fdAT', struct.pack('>I', self.sequence) + data)
+            self.sequence += 1
+        self.frame_count += 1
+
+    def close(self):
+        self._write_chunk(b'IEND', b'')
+        self.file.seek(self._actl_offset)
+        self._write_chunk(b'acTL', struct.pack('>II', self.frame_count, 0))
+        self.file.close()
+
+    def abort(self):
+        self.file.close()
+        _remove_file(self.path)
+
+
+class FfmpegWriter:
+    """Pipes raw RGB frames to a local ffmpeg process (H.264 in whatever container `path` names)."""
+
+    def __init__(self, path, width, height, fps, executable=None):
+        self.path = path
+        self.frame_count = 0
+        command = [
+            executable or ffmpeg_path() or 'ffmpeg', '-y', '-loglevel', 'error',
+            '-f', 'rawvideo', '-pix_fmt', 'rgb24', '-s', f'{width}x{height}', '-r', f'{fps:g}', '-i', '-',
+            '-c:v', 'libx264', '-pix_fmt', 'yuv420p', path,
+        ]
+        self.process = subprocess.Popen(command, stdin=subprocess.PIPE, stderr=subprocess.PIPE)
+
+    def add_frame(self, rgb):
+        self.process.stdin.write(np.ascontiguousarray(rgb).tobytes())
+        self.frame_count += 1
+
+    def close(self):
+        self.process.stdin.close()
+        error = self.process.stderr.read().decode(errors='replace').strip()
+        if self.process.wait() != 0:
+            raise RuntimeError(f"ffmpeg failed: {error}")
+
+    def abort(self):
+        self.process.kill()
+        self.process.wait()
+        _remove_file(self.path)
+
+
+WRITERS = {
+    'gif': GifWriter,
+    'apng': ApngWriter,
+    'video': FfmpegWriter,
+}
+
+
+def format_for_path(path):
+    extension = os.path.splitext(path)[1].lower()
+    if extension == '.gif':
+        return 'gif'
+    if extension in ('.png', '.apng'):
+        return 'apng'
+    return 'video'
+
+
+def _remove_file(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+class AnimationExporter(QThread):
+    """
+    Streams frames from a frame source into an animation file on a worker thread.
+
+    Only the frame being processed is held in memory, so memory use does
+    not depend on the length of the sequence. Frames are resized to the
+    size of the first (scaled to `max_width`) frame. Frames the source
+    could not load (None) are left out and counted in `frames_skipped`.
+    """
+    progress = Signal(int, int) # frames done, total
+    export_finished = Signal(bool, str) # success, output path or error message
+
+    def __init__(self, source, path, fps=10.0, max_width=800, output_format=None, parent=None):
+        super().__init__(parent)
+        self.source = source
+        self.path = path
+        self.fps = max(0.1, float(fps))
+        self.max_width = max_width
+        self.output_format = output_format or format_for_path(path)
+        self.frames_written = 0
+        self.frames_skipped = 0
+        self.cancelled = False
+
+    def run(self):
+        total = len(self.source)
+        writer = None
+        size = None
+        try:
+            for index, image in enumerate(self.source):
+                if self.isInterruptionRequested():
+                    if writer:
+                        writer.abort()
+                    self.cancelled = True
+                    self.export_finished.emit(False, "Export cancelled.")
+                    return
+                if image is None:
+                    self.frames_skipped += 1
+                else:
+                    array = qimage_to_array(image)
+                    if writer is None:
+                        size = output_size(image.width(), image.height(), self.max_width,
+                                           even=self.output_format == 'video')
+                        writer = WRITERS[self.output_format](self.path, size[0], size[1], self.fps)
+                    frame = resize_array(array, *size)
+                    writer.add_frame(bgra_to_rgb(frame))
+                    self.frames_written += 1
+                self.progress.emit(index + 1, total)
+
+            if writer is None:
+                if self.frames_skipped:
+                    self.export_finished.emit(False, f"None of the {self.frames_skipped} frames could be loaded.")
+                else:
+                    self.export_finished.emit(False, "There are no frames to export.")
+                return
+            writer.close()
+        except Exception as e:
+            if writer:
+                writer.abort()
+            self.export_finished.emit(False, f"Export failed: {e}")
+            return
+        self.export_finished.emit(True, self.path)
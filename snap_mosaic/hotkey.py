@@ -1,49 +1,158 @@
+import threading
+import time
+
 from PySide6.QtCore import QObject, Signal, Qt
 from PySide6.QtGui import QKeySequence
 from PySide6.QtWidgets import QPushButton
-from pynput import keyboard
+
+from .tracing import tracer
+
+# Activations of a binding closer together than this are dropped (key-repeat storms, bouncing keys)
+DEFAULT_MIN_INTERVAL_MS = 200
+# A held non-modifier key auto-repeats; one with no event for this long lost its release and is dropped
+STALE_KEY_S = 2.0
+
+MODIFIERS = {'ctrl', 'alt', 'shift', 'meta'}
+SPECIAL_KEYS = {
+    'insert', 'delete', 'home', 'end', 'page_up', 'page_down', 'enter', 'esc', 'up', 'down', 'left', 'right',
+    'tab', 'backspace', 'space', 'caps_lock', 'num_lock', 'scroll_lock', 'print_screen', 'pause', 'menu',
+} | {f'f{n}' for n in range(1, 25)}
+_ALIASES = {
+    'control': 'ctrl', 'cmd': 'meta', 'super': 'meta', 'win': 'meta', 'alt_gr': 'alt',
+    'return': 'enter', 'escape': 'esc', 'del': 'delete', 'pgup': 'page_up', 'pgdown': 'page_down',
+}
+# Characters typed with Shift name the key they are on (US layout), so 'shift+1' matches a press that
+# reports '!', and the release (which reports '1' if Shift went up first) names the same key
+_SHIFTED = dict(zip('!@#$%^&*()_+{}|:"<>?~', '1234567890-=[]\\;\',./`'))
+
+
+def parse_hotkey(hotkey_str):
+    """
+    Turn a hotkey string ('f7', 'ctrl+shift+s', or pynput's '<ctrl>+s') into
+    a frozenset of key names. Raises ValueError for unknown keys.
+    """
+    keys = set()
+    for part in (hotkey_str or '').lower().split('+'):
+        name = part.strip().strip('<>')
+        name = _SHIFTED.get(name, _ALIASES.get(name, name))
+        if len(name) != 1 and name not in MODIFIERS and name not in SPECIAL_KEYS:
+            raise ValueError(f"unknown key '{part}' in hotkey '{hotkey_str}'")
+        keys.add(name)
+    if not keys or keys <= MODIFIERS:
+        raise ValueError(f"hotkey '{hotkey_str}' needs a non-modifier key")
+    return frozenset(keys)
+
+
+def key_name(key):
+    """
+    Name of a pressed key in the form `parse_hotkey` produces: 'ctrl' for
+    either Ctrl key, lower-case characters, 'f7', ... Accepts pynput keys
+    and plain strings; returns None for keys that can't be named.
+    """
+    if isinstance(key, str):
+        name = key.lower()
+        return _SHIFTED.get(name, _ALIASES.get(name, name))
+    name = getattr(key, 'name', None) # pynput Key
+    if name:
+        for suffix in ('_l', '_r'):
+            if name.endswith(suffix) and name[:-len(suffix)] in ('ctrl', 'alt', 'shift', 'cmd'):
+                name = name[:-len(suffix)]
+        return _ALIASES.get(name, name)
+    char = getattr(key, 'char', None) # pynput KeyCode
+    if char and char.isprintable():
+        return _SHIFTED.get(char, char.lower())
+    # With Ctrl held some platforms report a control character; fall back to the virtual key
+    vk = getattr(key, 'vk', None)
+    if vk is not None and (0x30 <= vk <= 0x39 or 0x41 <= vk <= 0x5A or 0x61 <= vk <= 0x7A):
+        return chr(vk).lower()
+    return None
+
+
+def _pynput_key_source(on_press, on_release):
+    from pynput import keyboard
+    return keyboard.Listener(on_press=on_press, on_release=on_release)
+
+
+class _Binding:
+    def __init__(self, name, hotkey_str, keys, min_interval_ms):
+        self.name = name
+        self.hotkey_str = hotkey_str
+        self.keys = keys
+        self.min_interval = min_interval_ms / 1000.0
+        self.last_activation = None
+        self.suppressed_count = 0
+
 
 class HotkeyListener(QObject):
-    hotkey_pressed = Signal()
+    """
+    All global hotkeys on a single keyboard hook.
 
-    def __init__(self, hotkey_str='f7'):
-        super().__init__()
-        self.hotkey_str = self._format_hotkey_for_pynput(hotkey_str)
+    One key-event source (a pynput `Listener` thread by default) feeds every
+    binding. A binding fires when exactly its keys are held and one of them
+    was just pressed; auto-repeated presses of a held key are ignored, and
+    activations within a binding's minimum interval of the previous one are
+    dropped. Bindings can be added, changed and removed while the hook runs.
+    A release is matched to its press by virtual key code where the key has
+    one, and a non-modifier key that stops repeating without a release is
+    forgotten after `STALE_KEY_S`.
+
+    `key_source(on_press, on_release)` must return an object with
+    `start()`, `stop()` and `is_alive()` that calls the callbacks (from any
+    thread) with pynput keys or key-name strings.
+    """
+    activated = Signal(str) # Binding name; emitted from the hook thread, delivered on the GUI thread
+
+    def __init__(self, key_source=_pynput_key_source, clock=time.monotonic, parent=None):
+        super().__init__(parent)
+        self.key_source = key_source
+        self.clock = clock
         self.listener = None
+        self._lock = threading.Lock()
+        self._bindings = {}
+        self._pressed = {} # Key name -> time of its last press or auto-repeat
+        self._names_by_vk = {}
+
+    def bind(self, name, hotkey_str, min_interval_ms=DEFAULT_MIN_INTERVAL_MS):
+        """Bind (or rebind) `name` to a hotkey. Returns False if it is invalid or taken by another binding."""
+        try:
+            keys = parse_hotkey(hotkey_str)
+        except ValueError as e:
+            print(f"Failed to register hotkey '{hotkey_str}': {e}")
+            return False
+        with self._lock:
+            for other in self._bindings.values():
+                if other.name != name and other.keys == keys:
+                    print(f"Failed to register hotkey '{hotkey_str}': already used for '{other.name}'.")
+                    return False
+            self._bindings[name] = _Binding(name, hotkey_str, keys, min_interval_ms)
+        print(f"Hotkey '{hotkey_str}' bound to '{name}'.")
+        return True
+
+    def unbind(self, name):
+        with self._lock:
+            self._bindings.pop(name, None)
 
-    def _format_hotkey_for_pynput(self, key_str):
-        parts = key_str.lower().split('+')
-        formatted_parts = []
-        for part in parts:
-            if part in ('ctrl', 'alt', 'shift', 'meta'):
-                formatted_parts.append(f"<{part.replace('meta', 'cmd')}>")
-            elif len(part) > 1:
-                # Other special keys like 'f7', 'home', 'enter'
-                formatted_parts.append(f'<{part}>')
-            else:
-                # Regular character keys
-                formatted_parts.append(part)
-        return "+".join(formatted_parts)
-
-    def on_hotkey_activated(self):
-        # This callback is executed in the listener's thread.
-        # Emitting a Qt signal is a thread-safe way to communicate with the main GUI thread.
-        self.hotkey_pressed.emit()
+    def hotkey_for(self, name):
+        with self._lock:
+            binding = self._bindings.get(name)
+            return binding.hotkey_str if binding else None
+
+    def suppressed_count(self, name):
+        """Activations of `name` dropped by its rate limit."""
+        with self._lock:
+            binding = self._bindings.get(name)
+            return binding.suppressed_count if binding else 0
 
     def start(self):
-        if not self.hotkey_str:
-            print("Cannot start listener: hotkey is not defined.")
-            return False
-        
+        if self.listener is not None:
+            return True
         try:
-            self.listener = keyboard.GlobalHotKeys({
-                self.hotkey_str: self.on_hotkey_activated
-            })
+            self.listener = self.key_source(self._on_press, self._on_release)
             self.listener.start()
-            print(f"Hotkey listener started for '{self.hotkey_str}'.")
+            print("Hotkey listener started.")
             return True
         except Exception as e:
-            print(f"Failed to register hotkey '{self.hotkey_str}': {e}")
+            print(f"Failed to start the hotkey listener: {e}")
             self.listener = None
             return False
 
@@ -52,6 +161,46 @@ class HotkeyListener(QObject):
             self.listener.stop()
             print("Hotkey listener stopped.")
         self.listener = None
+        with self._lock:
+            self._pressed.clear()
+            self._names_by_vk.clear()
+
+    def _on_press(self, key):
+        # Runs on the hook thread
+        name = key_name(key)
+        if name is None:
+            return
+        fired = []
+        with self._lock:
+            now = self.clock()
+            vk = getattr(key, 'vk', None)
+            if vk is not None:
+                self._names_by_vk[vk] = name
+            if name in self._pressed:
+                self._pressed[name] = now
+                return # Auto-repeat of a held key
+            for stale in [held for held, seen in self._pressed.items()
+                          if held not in MODIFIERS and now - seen > STALE_KEY_S]:
+                del self._pressed[stale]
+            self._pressed[name] = now
+            for binding in self._bindings.values():
+                if binding.keys != self._pressed.keys():
+                    continue
+                if binding.last_activation is not None and now - binding.last_activation < binding.min_interval:
+                    binding.suppressed_count += 1
+                    continue
+                binding.last_activation = now
+                fired.append(binding)
+        for binding in fired:
+            tracer.instant('hotkey', hotkey=binding.hotkey_str, binding=binding.name)
+            # Emitting a Qt signal is a thread-safe way to reach the GUI thread
+            self.activated.emit(binding.name)
+
+    def _on_release(self, key):
+        vk = getattr(key, 'vk', None)
+        with self._lock:
+            name = self._names_by_vk.pop(vk, None) if vk is not None else None
+            self._pressed.pop(name or key_name(key), None)
 
 
 class HotkeyInput(QPushButton):
@@ -0,0 +1,338 @@
+"""
+Image file formats for saved captures, and their speed/size settings.
+
+`ImageEncoder` is one setting: a format plus its knob (PNG compression
+level 0-9, JPG or WebP quality, WebP lossless). PNG, JPG and WebP are
+written by Qt's image plugins. QOI ("Quite OK Image", https://qoiformat.org)
+is a lossless format that is cheaper to encode than compressed PNG, at
+a larger size; it is encoded here with NumPy, so it needs no plugin.
+
+`read_image` and `image_files` read saved captures back, QOI included,
+for export, calibration and the synthetic backend. WebP needs Qt's
+imageformats plugin; `format_supported` says whether it is installed.
+
+`calibrate` encodes sample frames with several settings and reports the
+time and size per frame; `python -m snap_mosaic calibrate` runs it.
+"""
+import math
+import os
+import struct
+import time
+
+import numpy as np
+from PySide6.QtCore import QBuffer, QByteArray, QIODevice
+from PySide6.QtGui import QImage, QImageWriter
+
+from .imaging import qimage_to_array
+
+FORMATS = ('png', 'jpg', 'webp', 'qoi')
+# File extension -> format
+EXTENSIONS = {'png': 'png', 'jpg': 'jpg', 'jpeg': 'jpg', 'webp': 'webp', 'qoi': 'qoi'}
+FILE_DIALOG_FILTER = "PNG Images (*.png);;JPEG Images (*.jpg *.jpeg);;WebP Images (*.webp);;QOI Images (*.qoi)"
+DEFAULT_PNG_COMPRESSION = 6 # zlib's default level, what Qt writes when not told otherwise
+# Extensions of the image files read back from folders
+READ_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.webp', '.bmp', '.qoi')
+_qt_writable = None
+
+
+def image_format_for_path(path):
+    """The format for a file name's extension, or None if it isn't one we write."""
+    return EXTENSIONS.get(os.path.splitext(path)[1].lower().lstrip('.'))
+
+
+def format_supported(fmt):
+    """Whether `fmt` can be written here; WebP is missing when Qt's imageformats plugin isn't installed."""
+    global _qt_writable
+    if fmt == 'qoi':
+        return True
+    if _qt_writable is None:
+        _qt_writable = {bytes(name).decode().lower() for name in QImageWriter.supportedImageFormats()}
+    return {'jpg': 'jpeg'}.get(fmt, fmt) in _qt_writable
+
+
+def supported_formats():
+    return tuple(fmt for fmt in FORMATS if format_supported(fmt))
+
+
+def read_image(path):
+    """Load an image file, QOI included. Returns a null QImage if it can't be read."""
+    if not path.lower().endswith('.qoi'):
+        return QImage(path)
+    try:
+        with open(path, 'rb') as f:
+            return decode_qoi(f.read())
+    except (OSError, ValueError, IndexError, struct.error) as e:
+        print(f"Error reading {path}: {e}")
+        return QImage()
+
+
+def image_files(directory):
+    """Paths of the image files in `directory`, in file name order."""
+    return sorted(os.path.join(directory, name) for name in os.listdir(directory)
+                  if name.lower().endswith(READ_EXTENSIONS))
+
+
+def png_quality(level):
+    """The Qt PNG 'quality' that selects zlib compression `level` (Qt maps quality q to level (100 - q) * 9 / 91)."""
+    return 100 - math.ceil(level * 91 / 9)
+
+
+class ImageEncoder:
+    """
+    One way of writing captures: `fmt` ('png', 'jpg', 'webp' or 'qoi') and
+    the setting that trades encode time for file size. Instances are plain
+    values, so they can be sent to worker processes.
+    """
+
+    def __init__(self, fmt='png', png_compression=DEFAULT_PNG_COMPRESSION, jpg_quality=95,
+                 webp_quality=80, webp_lossless=False):
+        if fmt not in FORMATS:
+            raise ValueError(f"unknown image format {fmt!r}; expected one of: {', '.join(FORMATS)}")
+        self.fmt = fmt
+        self.png_compression = min(9, max(0, png_compression))
+        self.jpg_quality = jpg_quality
+        self.webp_quality = webp_quality
+        self.webp_lossless = webp_lossless
+
+    @classmethod
+    def from_config(cls, config, fmt=None):
+        """The auto-save settings, optionally for another format (e.g. the extension of a manual save)."""
+        if fmt is None:
+            fmt = EXTENSIONS.get(config.get('auto_save_format'), 'png')
+            if not format_supported(fmt): # A config from a machine with the WebP plugin
+                print(f"Warning: {fmt} images can't be written here; saving as png.")
+                fmt = 'png'
+        fmt = EXTENSIONS.get(fmt, 'png')
+        return cls(fmt,
+                   png_compression=config.get('auto_save_png_compression', DEFAULT_PNG_COMPRESSION),
+                   jpg_quality=config.get('auto_save_jpg_quality', 95),
+                   webp_quality=config.get('auto_save_webp_quality', 80),
+                   webp_lossless=config.get('auto_save_webp_lossless', False))
+
+    @property
+    def extension(self):
+        return self.fmt
+
+    @property
+    def lossless(self):
+        return self.fmt in ('png', 'qoi') or (self.fmt == 'webp' and self.webp_lossless)
+
+    @property
+    def label(self):
+        if self.fmt == 'png':
+            return f"png level {self.png_compression}"
+        if self.fmt == 'jpg':
+            return f"jpg quality {self.jpg_quality}"
+        if self.fmt == 'webp':
+            return "webp lossless" if self.webp_lossless else f"webp quality {self.webp_quality}"
+        return self.fmt
+
+    def _qt_args(self):
+        """(Qt format name, quality) for the formats Qt writes."""
+        if self.fmt == 'png':
+            return 'PNG', png_quality(self.png_compression)
+        if self.fmt == 'jpg':
+            return 'JPG', self.jpg_quality
+        # Qt's WebP plugin writes lossless at quality 100 and lossy below it
+        return 'WEBP', 100 if self.webp_lossless else min(99, self.webp_quality)
+
+    def encode(self, image):
+        """The encoded file contents as bytes, or None if encoding failed."""
+        if self.fmt == 'qoi':
+            return encode_qoi(image)
+        data = QByteArray()
+        buffer = QBuffer(data)
+        buffer.open(QIODevice.OpenModeFlag.WriteOnly)
+        ok = image.save(buffer, *self._qt_args())
+        buffer.close()
+        return bytes(data) if ok else None
+
+    def save(self, image, path):
+        """Write `image` to `path`. Returns True on success. Safe to call off the GUI thread."""
+        if self.fmt != 'qoi':
+            return image.save(path, *self._qt_args())
+        try:
+            with open(path, 'wb') as f:
+                f.write(encode_qoi(image))
+        except OSError as e:
+            print(f"Error writing {path}: {e}")
+            return False
+        return True
+
+
+# --- QOI ---
+
+QOI_MAGIC = b'qoif'
+QOI_END = b'\x00' * 7 + b'\x01'
+QOI_OP_INDEX = 0x00
+QOI_OP_DIFF = 0x40
+QOI_OP_LUMA = 0x80
+QOI_OP_RUN = 0xc0
+QOI_OP_RGB = 0xfe
+QOI_OP_RGBA = 0xff
+QOI_MAX_RUN = 62
+
+
+def encode_qoi(image):
+    """
+    Encode a QImage as QOI. Produces the same bytes as the reference
+    encoder, but decides each operation with whole-array NumPy operations
+    instead of a loop over pixels. Screenshots are mostly runs of one
+    colour, so the work is done on the run boundaries and on the pixels
+    that start a new colour.
+    """
+    channels = 4 if image.hasAlphaChannel() else 3
+    if channels == 4 and image.format() != QImage.Format.Format_ARGB32:
+        image = image.convertToFormat(QImage.Format.Format_ARGB32) # Straight (not premultiplied) alpha
+    array = qimage_to_array(image)
+    height, width = array.shape[:2]
+    pixels = np.ascontiguousarray(array).reshape(-1, 4) # BGRA
+    packed = pixels.view(np.uint32).ravel()
+
+    # Each pixel is compared with the one before it; the first with opaque black
+    start_pixel = np.array([[0, 0, 0, 255]], dtype=np.uint8)
+    in_run = np.empty(len(packed), dtype=bool)
+    in_run[0] = packed[0] == start_pixel.view(np.uint32)[0, 0]
+    np.equal(packed[1:], packed[:-1], out=in_run[1:])
+    others = np.flatnonzero(~in_run)
+
+    # A run is written every 62 pixels and where it ends
+    edges = np.flatnonzero(np.diff(np.concatenate(([False], in_run, [False])).view(np.int8)))
+    run_starts, run_lengths = edges[0::2], edges[1::2] - edges[0::2]
+    chunks = -(-run_lengths // QOI_MAX_RUN)
+    run_index = np.repeat(np.arange(len(chunks)), chunks)
+    chunk = np.arange(len(run_index)) - np.repeat(np.cumsum(chunks) - chunks, chunks)
+    done = chunk * QOI_MAX_RUN
+    chunk_lengths = np.minimum(QOI_MAX_RUN, run_lengths[run_index] - done)
+    run_ops = run_starts[run_index] + done + chunk_lengths - 1 # The pixel each run op is written after
+
+    # A pixel that starts a new colour is an index hit if the last such pixel
+    # with the same hash was the same colour (the index starts out all zero)
+    colours = pixels[others]
+    previous = pixels[others - 1]
+    if len(others) and others[0] == 0:
+        previous[0] = start_pixel
+    wide = colours.astype(np.int16)
+    hashes = (wide[:, 2] * 3 + wide[:, 1] * 5 + wide[:, 0] * 7 + wide[:, 3] * 11) % 64
+    order = np.argsort(hashes, kind='stable')
+    sorted_hashes, sorted_packed = hashes[order], packed[others][order]
+    first = np.ones(len(order), dtype=bool)
+    first[1:] = sorted_hashes[1:] != sorted_hashes[:-1]
+    hit_sorted = np.where(first, sorted_packed == 0, np.append(False, sorted_packed[1:] == sorted_packed[:-1]))
+    index_hit = np.empty(len(order), dtype=bool)
+    index_hit[order] = hit_sorted
+
+    # The rest are written as a small difference from the previous pixel, or in full
+    delta = wide - previous
+    delta[:, :3] = ((delta[:, :3] + 128) & 255) - 128
+    db, dg, dr = delta[:, 0], delta[:, 1], delta[:, 2]
+    dr_dg, db_dg = dr - dg, db - dg
+    literal = ~index_hit
+    same_alpha = delta[:, 3] == 0
+    is_diff = literal & same_alpha & (dr >= -2) & (dr <= 1) & (dg >= -2) & (dg <= 1) & (db >= -2) & (db <= 1)
+    is_luma = (literal & same_alpha & ~is_diff & (dg >= -32) & (dg <= 31)
+               & (dr_dg >= -8) & (dr_dg <= 7) & (db_dg >= -8) & (db_dg <= 7))
+    is_rgb = literal & same_alpha & ~is_diff & ~is_luma
+    is_rgba = literal & ~same_alpha
+
+    # Operations in pixel order (a run op comes before the pixel that ends the run), then each at its offset
+    colour_rank = np.arange(len(others)) + np.searchsorted(run_ops, others)
+    run_rank = np.arange(len(run_ops)) + np.searchsorted(others, run_ops)
+    sizes = np.ones(len(others) + len(run_ops), dtype=np.int64)
+    sizes[colour_rank[is_luma]] = 2
+    sizes[colour_rank[is_rgb]] = 4
+    sizes[colour_rank[is_rgba]] = 5
+    header = struct.pack('>4sIIBB', QOI_MAGIC, width, height, channels, 0)
+    offsets = np.cumsum(sizes) - sizes + len(header)
+    out = np.empty(len(header) + int(sizes.sum()) + len(QOI_END), dtype=np.uint8)
+    out[:len(header)] = np.frombuffer(header, dtype=np.uint8)
+    out[len(out) - len(QOI_END):] = np.frombuffer(QOI_END, dtype=np.uint8)
+
+    out[offsets[run_rank]] = QOI_OP_RUN | (chunk_lengths - 1)
+    at = offsets[colour_rank]
+    out[at[index_hit]] = QOI_OP_INDEX | hashes[index_hit]
+    out[at[is_diff]] = QOI_OP_DIFF | ((dr[is_diff] + 2) << 4) | ((dg[is_diff] + 2) << 2) | (db[is_diff] + 2)
+    out[at[is_luma]] = QOI_OP_LUMA | (dg[is_luma] + 32)
+    out[at[is_luma] + 1] = ((dr_dg[is_luma] + 8) << 4) | (db_dg[is_luma] + 8)
+    for mask, op, size in ((is_rgb, QOI_OP_RGB, 3), (is_rgba, QOI_OP_RGBA, 4)):
+        out[at[mask]] = op
+        for i, channel in enumerate((2, 1, 0, 3)[:size]): # RGB(A) from BGRA
+            out[at[mask] + 1 + i] = colours[mask, channel]
+    return out.tobytes()
+
+
+def decode_qoi(data):
+    """Decode QOI bytes into a QImage (ARGB32 for 4 channels, else RGB32). A plain loop over the ops, under a second for 1080p."""
+    magic, width, height, channels, _ = struct.unpack('>4sIIBB', data[:14])
+    if magic != QOI_MAGIC:
+        raise ValueError("not a QOI image")
+    index = [(0, 0, 0, 0)] * 64
+    r, g, b, a = 0, 0, 0, 255
+    out = bytearray(width * height * 4)
+    pos = 14
+    pixel = 0
+    total = width * height
+    while pixel < total:
+        op = data[pos]
+        pos += 1
+        run = 1
+        if op == QOI_OP_RGB:
+            r, g, b = data[pos], data[pos + 1], data[pos + 2]
+            pos += 3
+        elif op == QOI_OP_RGBA:
+            r, g, b, a = data[pos], data[pos + 1], data[pos + 2], data[pos + 3]
+            pos += 4
+        elif op & 0xc0 == QOI_OP_INDEX:
+            r, g, b, a = index[op]
+        elif op & 0xc0 == QOI_OP_DIFF:
+            r = (r + ((op >> 4) & 3) - 2) & 255
+            g = (g + ((op >> 2) & 3) - 2) & 255
+            b = (b + (op & 3) - 2) & 255
+        elif op & 0xc0 == QOI_OP_LUMA:
+            dg = (op & 0x3f) - 32
+            second = data[pos]
+            pos += 1
+            r = (r + dg + (second >> 4) - 8) & 255
+            g = (g + dg) & 255
+            b = (b + dg + (second & 0x0f) - 8) & 255
+        else:
+            run = (op & 0x3f) + 1
+        index[(r * 3 + g * 5 + b * 7 + a * 11) % 64] = (r, g, b, a)
+        out[pixel * 4:(pixel + run) * 4] = bytes((b, g, r, a)) * run # BGRA, as Qt stores 32-bit pixels
+        pixel += run
+    image_format = QImage.Format.Format_ARGB32 if channels == 4 else QImage.Format.Format_RGB32
+    return QImage(bytes(out), width, height, width * 4, image_format).copy()
+
+
+# --- Calibration ---
+
+def calibration_encoders(formats=FORMATS):
+    """The settings `calibrate` compares by default, fastest to smallest within each format."""
+    candidates = {
+        'png': [ImageEncoder('png', png_compression=level) for level in (0, 1, 3, 6, 9)],
+        'jpg': [ImageEncoder('jpg', jpg_quality=quality) for quality in (75, 90, 95)],
+        'webp': [ImageEncoder('webp', webp_quality=quality) for quality in (75, 90)]
+                + [ImageEncoder('webp', webp_lossless=True)],
+        'qoi': [ImageEncoder('qoi')],
+    }
+    return [encoder for fmt in formats for encoder in candidates[fmt]]
+
+
+def calibrate(images, encoders):
+    """
+    Encode every image in memory with every encoder (so disk speed doesn't
+    count). Returns (encoder, milliseconds per frame, bytes per frame) for each.
+    """
+    results = []
+    for encoder in encoders:
+        elapsed = 0.0
+        size = 0
+        for image in images:
+            start = time.perf_counter()
+            data = encoder.encode(image)
+            elapsed += time.perf_counter() - start
+            if data is None:
+                raise OSError(f"{encoder.label}: encoding failed")
+            size += len(data)
+        results.append((encoder, elapsed * 1000 / len(images), size / len(images)))
+    return results
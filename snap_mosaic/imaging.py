@@ -0,0 +1,48 @@
+import numpy as np
+from PySide6.QtGui import QImage
+
+
+def qimage_to_array(image):
+    """
+    Return an (height, width, 4) uint8 NumPy view of `image` in BGRA byte order.
+
+    The image is converted to Format_RGB32 first if needed. The returned array
+    shares memory with the (possibly converted) QImage, which is kept alive as
+    the array's base, so it must be treated as read-only.
+    """
+    if image.format() not in (QImage.Format.Format_RGB32, QImage.Format.Format_ARGB32,
+                              QImage.Format.Format_ARGB32_Premultiplied):
+        image = image.convertToFormat(QImage.Format.Format_RGB32)
+    height, width = image.height(), image.width()
+    buffer = np.frombuffer(image.constBits(), dtype=np.uint8, count=image.sizeInBytes())
+    # Rows may be padded; slice off the padding and keep the image referenced
+    rows = buffer.reshape(height, image.bytesPerLine())[:, :width * 4]
+    array = rows.reshape(height, width, 4)
+    array.flags.writeable = False
+    return _ImageArray(array, image)
+
+
+def array_to_qimage(array):
+    """Build a deep-copied Format_RGB32 QImage from an (height, width, 4) BGRA uint8 array."""
+    array = np.ascontiguousarray(array, dtype=np.uint8)
+    height, width = array.shape[:2]
+    image = QImage(array.data, width, height, width * 4, QImage.Format.Format_RGB32)
+    return image.copy()
+
+
+def gray_array(array):
+    """Luma (ITU-R BT.601) of a BGRA array as float32."""
+    return (array[..., 2] * np.float32(0.299) + array[..., 1] * np.float32(0.587)
+            + array[..., 0] * np.float32(0.114))
+
+
+class _ImageArray(np.ndarray):
+    """ndarray view that holds a reference to the QImage owning its memory."""
+
+    def __new__(cls, array, image):
+        view = array.view(cls)
+        view._image = image
+        return view
+
+    def __array_finalize__(self, obj):
+        self._image = getattr(obj, '_image', None)
@@ -1,30 +1,50 @@
 import os
 import json
+import sqlite3
+import time
 from PySide6.QtWidgets import (
     QApplication, QMainWindow, QWidget,
     QVBoxLayout, QHBoxLayout, QPushButton,
-    QScrollArea, QGridLayout,
     QFileDialog, QMessageBox, QStyle,
-    QSystemTrayIcon, QMenu, QCheckBox
+    QSystemTrayIcon, QMenu, QCheckBox, QProgressDialog, QTabWidget, QInputDialog
 )
 from PySide6.QtGui import QPixmap, QIcon
-from PySide6.QtCore import Qt, QRect, QThread, QTimer
-import threading
-from playsound import playsound
-from datetime import datetime
+from PySide6.QtCore import Qt, QRect, QSize, QThread, QTimer, Signal
 
 from snap_mosaic.config import Config
 from snap_mosaic.hotkey import HotkeyListener
-from snap_mosaic.widgets import SelectionOverlay, HoverLabel
+from snap_mosaic.widgets import SelectionOverlay
+from snap_mosaic.capture_grid import Capture, CaptureListModel, CaptureGridView, reserve_capture_ids
 from snap_mosaic.dialogs import SettingsDialog, AboutDialog
-from snap_mosaic.utils import resource_path
+from snap_mosaic.encoder import EncoderPool
+from snap_mosaic.capture_store import CaptureStore
+from snap_mosaic.session_store import SessionStore
+from snap_mosaic.thumbnails import ThumbnailService
+from snap_mosaic.capture_backends import create_backend, off_thread_grab, ENV_VAR as CAPTURE_BACKEND_ENV_VAR
+from snap_mosaic.regions import (
+    CaptureRegion, RegionGrabber, load_regions, save_regions, unique_region_name, filename_part
+)
+from snap_mosaic.change_detection import ChangeDetector
+from snap_mosaic.perceptual_hash import HashIndex, dhash
+from snap_mosaic.scheduler import AutoSnapScheduler, format_interval
+from snap_mosaic.burst import BurstCapture
+from snap_mosaic.replay import ReplayBuffer, ReplayRecorder
+from snap_mosaic.batch_save import BatchSaver
+from snap_mosaic.image_formats import FILE_DIALOG_FILTER, ImageEncoder, format_supported, image_format_for_path
+from snap_mosaic.export import AnimationExporter, CaptureFrameSource, DirectoryFrameSource, ffmpeg_path, format_for_path
+from snap_mosaic.utils import resource_path, timestamped_filename, numbered_filename
+from snap_mosaic.tracing import tracer
+from snap_mosaic.audio import SOUND_FILES, SoundPlayer, create_audio_backend
+from snap_mosaic.control import ControlServer, ControlError, Deferred
 from . import __version__
 
 class SnapMosaic(QMainWindow):
-    def __init__(self):
+    auto_saved = Signal(object, str, bool) # capture, file path, success
+
+    def __init__(self, config=None):
         super().__init__()
         self.version = __version__
-        self.config = Config()
+        self.config = config if config is not None else Config()
 
         self.setWindowTitle("SnapMosaic")
         self.restore_geometry()
@@ -38,15 +58,27 @@ class SnapMosaic(QMainWindow):
         top_button_layout = QHBoxLayout()
         self.define_region_button = QPushButton("Define Region")
         self.define_region_button.setToolTip("Define a new screen region to capture")
+
+        self.add_region_button = QPushButton("Add Region")
+        self.add_region_button.setToolTip("Add another named region; all regions are captured from one screen grab")
         
         self.snap_button = QPushButton() # Text set in update_snap_button_text
         
         self.auto_button = QPushButton() # Text set in update_auto_button_text
         self.auto_button.setCheckable(True)
+
+        self.burst_button = QPushButton() # Text set in update_burst_button_text
         
         self.clear_button = QPushButton("Clear All")
         self.clear_button.setToolTip("Clear all captures from grid")
 
+        self.save_all_button = QPushButton("Save All")
+        self.save_all_button.setToolTip("Save every capture to a folder as image files, named like auto-saves")
+
+        self.export_button = QPushButton("Export")
+        self.export_button.setToolTip("Export captures as an animated GIF, animated PNG or video\n"
+                                      "(uses the auto-save folder when the grid is empty)")
+
         settings_icon = QIcon(resource_path('snap_mosaic/icons/settings.svg'))
         self.settings_button = QPushButton(settings_icon, " Settings")
         self.settings_button.setToolTip("Open settings")
@@ -56,95 +88,266 @@ class SnapMosaic(QMainWindow):
         self.about_button.setToolTip("About SnapMosaic")
 
         top_button_layout.addWidget(self.define_region_button)
+        top_button_layout.addWidget(self.add_region_button)
         top_button_layout.addWidget(self.snap_button)
         top_button_layout.addWidget(self.auto_button)
+        top_button_layout.addWidget(self.burst_button)
         top_button_layout.addWidget(self.clear_button)
+        top_button_layout.addWidget(self.save_all_button)
+        top_button_layout.addWidget(self.export_button)
         top_button_layout.addStretch()
         top_button_layout.addWidget(self.settings_button)
         top_button_layout.addWidget(self.about_button)
         main_layout.addLayout(top_button_layout)
 
-        # Scroll Area for captures
-        self.scroll_area = QScrollArea()
-        self.scroll_area.setWidgetResizable(True)
-        self.scroll_content_widget = QWidget()
-        self.scroll_area.setWidget(self.scroll_content_widget)
-        self.scroll_layout = QGridLayout(self.scroll_content_widget)
-        self.scroll_layout.setSpacing(10)
-        self.scroll_layout.setAlignment(Qt.AlignmentFlag.AlignTop | Qt.AlignmentFlag.AlignLeft)
+        # One virtualized grid of captures per region (only visible thumbnails are painted);
+        # the tab bar only appears once there is more than one region
+        self.grid_tabs = QTabWidget()
+        self.grid_tabs.setDocumentMode(True)
+        self.grid_tabs.setTabBarAutoHide(True)
+        self.grids = {} # region name -> CaptureGridView, the first region's grid first
 
-        main_layout.addWidget(self.scroll_area)
+        main_layout.addWidget(self.grid_tabs)
 
         # --- Connections ---
         self.define_region_button.clicked.connect(self.define_region)
-        self.snap_button.clicked.connect(self.trigger_capture)
+        self.add_region_button.clicked.connect(self.add_region)
+        self.snap_button.clicked.connect(self.snap_now)
         self.auto_button.clicked.connect(self.toggle_auto_snap)
+        self.burst_button.clicked.connect(self.start_burst)
         self.clear_button.clicked.connect(self.clear_grid)
+        self.save_all_button.clicked.connect(self.save_all)
+        self.export_button.clicked.connect(self.export_animation)
         self.settings_button.clicked.connect(self.open_settings)
         self.about_button.clicked.connect(self.open_about)
 
         # --- App State ---
         self.selection_overlay = None
-        self.captured_widgets = []
-        self.hotkey_listener = None
-        self.auto_snap_hotkey_listener = None
+        # Every global hotkey shares one keyboard hook
+        self.hotkey_listener = HotkeyListener(parent=self)
+        self.hotkey_listener.activated.connect(self.on_hotkey_activated)
+        self.hotkey_actions = {
+            'capture': self.snap_now,
+            'auto_snap': self.toggle_auto_snap,
+            'burst': self.start_burst,
+        }
         self.is_quitting = False
         self.is_auto_snapping = False
-        self.auto_snap_timer = QTimer(self)
-        self.auto_snap_timer.timeout.connect(self.trigger_capture)
-        self.resize_timer = QTimer(self)
-        self.resize_timer.setSingleShot(True)
-        self.resize_timer.timeout.connect(self.redraw_grid)
-        self.last_hovered_widget = None  # Track last hovered widget for keyboard shortcuts
+        # Drift-free auto-snap ticks; ticks are dropped while a capture or save is still in flight
+        self.auto_snap_scheduler = AutoSnapScheduler(self)
+        self.auto_snap_scheduler.busy_check = self.is_capture_pipeline_busy
+        self.auto_snap_scheduler.tick.connect(self.on_auto_snap_tick)
+        self.region_schedulers = [] # Extra schedulers for regions with their own interval
+        self.auto_snap_region_names = None # Regions on the global interval (None: all of them)
+
+        # Background image encoding (keeps PNG/JPG compression off the GUI thread)
+        self.encoder = EncoderPool(
+            max_workers=self.config.get('encoder_workers', 2),
+            max_pending=self.config.get('encoder_queue_size', 8),
+            parent=self
+        )
+        self.encoder.finished.connect(self.on_image_encoded)
+        self.encoder.dropped.connect(self.on_image_encode_dropped)
+
+        # Full-resolution frames live in a memory-bounded store; the grid only keeps thumbnails
+        self.capture_store = CaptureStore(self.config.get('capture_memory_budget_mb', 512))
 
+        # Grid thumbnails are scaled on worker threads and cached per display width and pixel ratio
+        self.thumbnails = ThumbnailService(
+            max_workers=self.config.get('thumbnail_workers', 2),
+            cache_mb=self.config.get('thumbnail_cache_mb', 128),
+            parent=self
+        )
+        self.thumbnails.set_target(self.config.get('max_display_width', 500), self.devicePixelRatioF())
+        self.thumbnails.thumbnail_ready.connect(self.on_thumbnail_ready)
+
+        # Captures survive restarts (and crashes) in an on-disk session store, which also backs the capture store
+        self.session_store = self.open_session_store()
+        if self.session_store is not None:
+            self.capture_store.backing = self.session_store
+            # Queued writes hold only capture ids; the writer reads each image from the capture store
+            self.session_store.images = self.capture_store
+
+        # Sounds are loaded once and played without a thread per event
+        self.sounds = SoundPlayer({name: resource_path(path) for name, path in SOUND_FILES.items()},
+                                  create_audio_backend(self.config.get('audio_backend', 'auto')))
+
+        # Screen grabs go through a pluggable backend (Qt, X11 shared memory, or synthetic frames)
+        self.capture_backend = self.open_capture_backend()
+
+        # All regions on a screen are cropped from one grab of their bounding box
+        self.regions = []
+        self.region_grabber = RegionGrabber(
+            lambda rect: self.grab_screen_rect(rect),
+            lambda: [screen.geometry() for screen in QApplication.screens()]
+        )
+
+        # Optional change detection: auto-snap skips frames that match the region's last kept one
+        self.change_detectors = {} # region name -> ChangeDetector
+        self.skipped_frame_count = 0
+
+        # Perceptual hashes of every capture in the session, for near-duplicate lookups
+        self.hash_index = HashIndex()
+
+        # Burst capture runs on its own thread; frames reach the grid in one batch afterwards
+        self.burst_thread = None
+        self.last_burst_stats = None
+        self.pending_auto_save_names = set() # Auto-save file names handed out whose writes haven't finished
+
+        # Optional instant replay: recent frames kept in memory until the capture hotkey commits them
+        self.replay_recorder = None
+        self.replay_stats_timer = QTimer(self)
+        self.replay_stats_timer.setInterval(1000)
+        self.replay_stats_timer.timeout.connect(self.update_snap_button_text)
+
+        # Animation export streams frames on a worker thread
+        self.exporter = None
+        self.export_progress = None
+
+        # Save All encodes on a pool of worker processes
+        self.batch_saver = None
+        self.save_all_progress = None
+        self.save_all_captures = {} # path -> capture, for the Save All in progress
+
+        # Scripts drive the running instance through a local socket
+        self.control_server = ControlServer({
+            'ping': self.control_ping,
+            'status': self.control_status,
+            'capture': self.control_capture,
+            'start_auto_snap': self.control_start_auto_snap,
+            'stop_auto_snap': self.control_stop_auto_snap,
+            'set_region': self.control_set_region,
+            'export': self.control_export,
+            'save_all': self.control_save_all,
+            'activate': self.control_activate,
+        }, parent=self)
 
 
         # Load config and start services
         self.load_app_config()
-        self.start_hotkey_listener()
-        self.start_auto_snap_hotkey_listener()
+        self.restore_session()
+        self.bind_capture_hotkey()
+        self.bind_auto_snap_hotkey()
+        self.bind_burst_hotkey()
+        self.hotkey_listener.start()
         self.setup_tray_icon()
+        self.restart_replay()
+        if self.config.get('control_socket_enabled', True):
+            self.control_server.listen()
 
     def load_app_config(self):
-        # Load capture region from config
-        region_data = self.config.get("capture_region")
-        if region_data:
-            self.capture_region = QRect(region_data['x'], region_data['y'], region_data['width'], region_data['height'])
-            print(f"Loaded capture region: {self.capture_region}")
-        else:
-            self.capture_region = None
+        # Load capture regions from config; each region gets its own grid tab
+        self.regions = load_regions(self.config)
+        for region in self.regions:
+            self.grid_for_region(region.name)
+            print(f"Loaded capture region '{region.name}': {region.rect}")
+        if not self.regions:
+            self.grid_for_region("Region 1")
 
         # Load hotkeys and update button text
         self.hotkey = self.config.get("hotkey", 'f7')
         self.auto_snap_hotkey = self.config.get("auto_snap_hotkey", 'f8')
+        self.burst_hotkey = self.config.get("burst_hotkey", 'f9')
         self.update_snap_button_text()
         self.update_auto_button_text()
+        self.update_burst_button_text()
 
     def save_capture_region(self):
-        if self.capture_region:
-            region_data = {
-                "x": self.capture_region.x(),
-                "y": self.capture_region.y(),
-                "width": self.capture_region.width(),
-                "height": self.capture_region.height()
-            }
-            self.config.set("capture_region", region_data)
+        save_regions(self.config, self.regions)
 
-    def start_hotkey_listener(self):
-        if self.hotkey_listener:
-            self.hotkey_listener.stop()
+    @property
+    def capture_region(self):
+        """Rectangle of the first region, which burst capture and instant replay use."""
+        return self.regions[0].rect if self.regions else None
 
-        self.hotkey_listener = HotkeyListener(self.hotkey)
-        self.hotkey_listener.hotkey_pressed.connect(self.trigger_capture)
-        return self.hotkey_listener.start()
-
-    def start_auto_snap_hotkey_listener(self):
-        if self.auto_snap_hotkey_listener:
-            self.auto_snap_hotkey_listener.stop()
-
-        self.auto_snap_hotkey_listener = HotkeyListener(self.auto_snap_hotkey)
-        self.auto_snap_hotkey_listener.hotkey_pressed.connect(self.toggle_auto_snap)
-        return self.auto_snap_hotkey_listener.start()
+    @capture_region.setter
+    def capture_region(self, rect):
+        if self.regions:
+            self.regions[0].rect = QRect(rect)
+        else:
+            self.regions = [CaptureRegion(self.primary_region_name(), rect)]
+
+    def primary_region_name(self):
+        return self.regions[0].name if self.regions else next(iter(self.grids), "Region 1")
+
+    def region_named(self, name):
+        return next((region for region in self.regions if region.name == name), None)
+
+    # --- Region grids ---
+
+    @property
+    def grid_view(self):
+        """The grid on the tab being shown."""
+        return self.grid_tabs.currentWidget()
+
+    @property
+    def capture_model(self):
+        return self.grid_view.model()
+
+    def grid_for_region(self, name):
+        """The grid of a region, added as a new tab on first use."""
+        grid = self.grids.get(name)
+        if grid is None:
+            grid = CaptureGridView()
+            grid.setModel(CaptureListModel(self))
+            grid.delete_requested.connect(self.delete_image)
+            grid.save_requested.connect(self.save_image)
+            grid.copy_requested.connect(self.copy_image_to_clipboard)
+            grid.capture_delegate.thumbnail_service = self.thumbnails
+            grid.device_pixel_ratio_changed.connect(self.update_thumbnails)
+            self.grids[name] = grid
+            self.grid_tabs.addTab(grid, name)
+        return grid
+
+    def grid_for_capture(self, capture):
+        if capture.region is None:
+            return self.grids[next(iter(self.grids))]
+        return self.grid_for_region(capture.region)
+
+    def all_captures(self):
+        return [capture for grid in self.grids.values() for capture in grid.model().captures()]
+
+    def capture_count(self):
+        return sum(len(grid.model()) for grid in self.grids.values())
+
+    def prune_grids(self):
+        """Drop the empty tabs of regions that no longer exist (always keeping one grid)."""
+        # Give every region its grid first, so a new region's tab can replace an empty leftover
+        for region in self.regions:
+            self.grid_for_region(region.name)
+        names = {region.name for region in self.regions}
+        current_removed = False
+        for name, grid in list(self.grids.items()):
+            if name not in names and not len(grid.model()) and len(self.grids) > 1:
+                current_removed |= grid is self.grid_tabs.currentWidget()
+                self.grid_tabs.removeTab(self.grid_tabs.indexOf(grid))
+                del self.grids[name]
+                grid.deleteLater()
+        # The first region's grid leads, so captures without a region land there
+        for index, region in enumerate(self.regions):
+            grid = self.grids[region.name]
+            self.grid_tabs.tabBar().moveTab(self.grid_tabs.indexOf(grid), index)
+        self.grids = {self.grid_tabs.tabText(i): self.grid_tabs.widget(i) for i in range(self.grid_tabs.count())}
+        if current_removed:
+            self.grid_tabs.setCurrentIndex(0)
+
+    def on_thumbnail_ready(self, capture):
+        self.grid_for_capture(capture).model().capture_changed(capture)
+
+    def bind_capture_hotkey(self):
+        return self.hotkey_listener.bind('capture', self.hotkey, self.config.get('hotkey_min_interval_ms', 100))
+
+    def bind_auto_snap_hotkey(self):
+        # Toggles get a longer debounce, so a bouncing key doesn't start and stop in one press
+        return self.hotkey_listener.bind('auto_snap', self.auto_snap_hotkey, self.config.get('toggle_hotkey_min_interval_ms', 400))
+
+    def bind_burst_hotkey(self):
+        return self.hotkey_listener.bind('burst', self.burst_hotkey, self.config.get('toggle_hotkey_min_interval_ms', 400))
+
+    def on_hotkey_activated(self, name):
+        action = self.hotkey_actions.get(name)
+        if action:
+            action()
 
     def toggle_auto_snap(self):
         if self.is_auto_snapping:
@@ -153,7 +356,7 @@ class SnapMosaic(QMainWindow):
             self.start_auto_snap()
 
     def start_auto_snap(self):
-        if not self.capture_region:
+        if not self.regions:
             QMessageBox.warning(self, "No Region Defined", 
                               "Please define a capture region first before starting Auto-Snap.")
             self.auto_button.setChecked(False)
@@ -161,17 +364,50 @@ class SnapMosaic(QMainWindow):
 
         self.is_auto_snapping = True
         self.auto_button.setChecked(True)
-        interval_sec = self.config.get('auto_snap_interval', 10)
-        self.auto_snap_timer.start(interval_sec * 1000)
+        self.skipped_frame_count = 0
+        self.update_auto_button_text()
+        interval_ms = self.config.get('auto_snap_interval_ms', 10000)
+
+        # Regions sharing an interval share a scheduler, so each tick is one grab for all of them
+        groups = {}
+        for region in self.regions:
+            groups.setdefault(region.interval_ms or interval_ms, []).append(region.name)
+        global_names = groups.pop(interval_ms, [])
+        self.auto_snap_region_names = None if len(global_names) == len(self.regions) else global_names
+        if global_names:
+            self.auto_snap_scheduler.start(interval_ms)
+        for region_interval, names in groups.items():
+            scheduler = AutoSnapScheduler(self)
+            scheduler.busy_check = self.is_capture_pipeline_busy
+            scheduler.tick.connect(lambda names=names: self.trigger_capture(names))
+            scheduler.start(region_interval)
+            self.region_schedulers.append(scheduler)
+            print(f"Auto-Snap capturing {', '.join(names)} every {format_interval(region_interval)}")
         self.update_auto_button_style()
-        print(f"Auto-Snap started with {interval_sec}s interval")
+        print(f"Auto-Snap started with {format_interval(interval_ms)} interval")
+
+    def on_auto_snap_tick(self):
+        self.trigger_capture(self.auto_snap_region_names)
 
     def stop_auto_snap(self):
         self.is_auto_snapping = False
         self.auto_button.setChecked(False)
-        self.auto_snap_timer.stop()
+        self.auto_snap_scheduler.stop()
+        for scheduler in self.region_schedulers:
+            scheduler.stop()
+            scheduler.deleteLater()
+        self.region_schedulers = []
         self.update_auto_button_style()
-        print("Auto-Snap stopped")
+        self.update_auto_button_text()
+        stats = self.auto_snap_scheduler.stats()
+        print(f"Auto-Snap stopped after {stats['ticks']} captures "
+              f"({stats['achieved_fps']:.2f} fps achieved, {stats['dropped_ticks']} ticks dropped)")
+
+    def is_capture_pipeline_busy(self):
+        """True when an auto-snap capture could not be saved right now because the encoder queue is full."""
+        if not self.config.get('auto_save_enabled', False):
+            return False
+        return self.encoder.queue_depth >= self.encoder.max_pending
 
     def flash_auto_button(self):
         """Briefly flash the auto button to provide visual feedback during auto-snap."""
@@ -206,7 +442,7 @@ class SnapMosaic(QMainWindow):
             self.stop_auto_snap()
         
         # Check if there are captures that need to be cleared first
-        if self.captured_widgets:
+        if self.capture_count():
             QMessageBox.information(
                 self,
                 "Clear Captures First",
@@ -215,170 +451,669 @@ class SnapMosaic(QMainWindow):
             )
             return
         
+        self.start_region_selection(self.set_capture_region)
+
+    def add_region(self):
+        if self.is_auto_snapping:
+            self.stop_auto_snap()
+        self.start_region_selection(self.on_region_added)
+
+    def start_region_selection(self, on_selected):
         self.hide()
-        screen = QApplication.primaryScreen()
-        virtual_desktop_rect = screen.virtualGeometry()
-        screenshot = screen.grabWindow(0, virtual_desktop_rect.x(), virtual_desktop_rect.y(), virtual_desktop_rect.width(), virtual_desktop_rect.height())
-        self.selection_overlay = SelectionOverlay(screenshot)
-        self.selection_overlay.selection_made.connect(self.set_capture_region)
+        virtual_desktop_rect = QApplication.primaryScreen().virtualGeometry()
+        screenshot = self.capture_backend.grab_desktop(virtual_desktop_rect)
+        if screenshot is None:
+            self.show()
+            QMessageBox.warning(self, "Screen Grab Failed", "Could not grab the screen to select a region.")
+            return
+        if not hasattr(screenshot, 'toImage'):
+            screenshot = QPixmap.fromImage(screenshot)
+        self.selection_overlay = SelectionOverlay(screenshot,
+                                                  magnifier=self.config.get('selection_magnifier', True),
+                                                  snap_to_edges=self.config.get('selection_snap_to_edges', False))
+        self.selection_overlay.selection_made.connect(on_selected)
+        self.selection_overlay.selection_cancelled.connect(self.show)
         self.selection_overlay.show()
 
     def set_capture_region(self, rect):
+        """Replace all regions with a single one (keeping the first region's name and settings)."""
+        self.regions = self.regions[:1]
         self.capture_region = rect
+        self.change_detectors.clear()
         print(f"Capture region set to: {self.capture_region}")
         self.save_capture_region()
+        self.prune_grids()
+        self.restart_replay() # Drop frames of the old region (and of the selection overlay)
+        self.show()
+
+    def on_region_added(self, rect):
         self.show()
+        name, ok = QInputDialog.getText(self, "Add Region", "Region name:", text=unique_region_name(self.regions))
+        name = name.strip()
+        if not ok or not name:
+            return
+        if self.region_named(name):
+            QMessageBox.warning(self, "Duplicate Region Name", f"There is already a region named '{name}'.")
+            return
+        self.regions.append(CaptureRegion(name, rect))
+        print(f"Capture region '{name}' added: {rect}")
+        self.save_capture_region()
+        self.prune_grids()
+        self.update_snap_button_text()
+        if len(self.regions) == 1:
+            self.restart_replay()
 
     def play_sound(self, name):
-        """
-        Plays a sound using the 'playsound' library in a separate thread
-        to prevent UI blocking.
-        """
+        """Play a preloaded sound without blocking; repeats while it is still playing are coalesced."""
         if not self.config.get('sounds_enabled', True):
             return
+        self.sounds.play(name)
 
-        sound_map = {
-            'snap': 'snap_mosaic/sounds/snap.wav',
-            'save': 'snap_mosaic/sounds/save.wav',
-            'clipboard': 'snap_mosaic/sounds/clipboard.wav',
-            'error': 'snap_mosaic/sounds/error.wav'
-        }
+    def trigger_capture(self, region_names=None):
+        """Capture the regions (all, or those named). Returns the captures added to the grid."""
+        with tracer.span('trigger_capture', auto=self.is_auto_snapping):
+            return self.process_capture(region_names)
 
-        if name in sound_map:
-            file_path = resource_path(sound_map[name])
-            
-            # Run playsound in a separate thread to avoid blocking the GUI
-            try:
-                sound_thread = threading.Thread(target=playsound, args=(file_path,), daemon=True)
-                sound_thread.start()
-            except Exception as e:
-                print(f"Error playing sound '{name}': {e}")
-        else:
-            print(f"Warning: Sound '{name}' not defined in play_sound's sound_map.")
+    def grab_capture_region(self):
+        """Grab the first capture region from the screen. Returns a QPixmap, or None on failure."""
+        return self.grab_screen_rect(self.capture_region)
+
+    def grab_screen_rect(self, rect):
+        """Grab a rectangle of the screen. Returns a QPixmap or QImage, or None on failure."""
+        return self.capture_backend.grab(rect)
 
-    def trigger_capture(self):
+    def grab_capture_region_array(self):
+        """Grab the first capture region as a BGRA array (a reused buffer with some backends)."""
+        return self.capture_backend.grab_array(self.capture_region)
+
+    def open_capture_backend(self):
+        name = os.environ.get(CAPTURE_BACKEND_ENV_VAR) or self.config.get('capture_backend', 'qt')
+        screen = QApplication.primaryScreen()
+        dpr = screen.devicePixelRatio() if screen else 1.0
+        backend = create_backend(name, dpr, screen.geometry() if screen else None)
+        print(f"Capture backend: {backend.name}")
+        return backend
+
+    def set_capture_backend(self, backend):
+        """Switch backends; the burst and replay threads are stopped first so nothing grabs with the old one."""
+        if self.burst_thread and self.burst_thread.isRunning():
+            self.burst_thread.requestInterruption()
+            self.burst_thread.wait()
+        self.stop_replay()
+        previous = self.capture_backend
+        self.capture_backend = backend
+        previous.close()
+        self.restart_replay()
+
+    def start_burst(self):
         if not self.capture_region:
-            print("Hotkey pressed, but no region defined.")
+            QMessageBox.warning(self, "No Region Defined",
+                              "Please define a capture region first before starting a burst.")
+            return
+        if self.burst_thread and self.burst_thread.isRunning():
+            print("Burst already in progress.")
             return
 
-        screen = QApplication.primaryScreen()
-        if not screen:
-            print("Error: Could not get primary screen.")
+        frame_count = self.config.get('burst_frame_count', 30)
+        fps = self.config.get('burst_fps', 20.0)
+        grab = off_thread_grab(self.capture_backend, self.grab_capture_region_array, self)
+        self.burst_thread = BurstCapture(grab, frame_count, fps, self)
+        self.burst_thread.frame_grabbed.connect(self.on_burst_frame_grabbed)
+        self.burst_thread.burst_finished.connect(self.on_burst_finished)
+        self.burst_thread.finished.connect(self.burst_thread.deleteLater)
+        # Emitted on the burst thread as it ends, so it frees that thread's grab buffers
+        self.burst_thread.finished.connect(self.capture_backend.release_thread, Qt.ConnectionType.DirectConnection)
+        self.burst_button.setEnabled(False)
+        self.play_sound('snap')
+        print(f"Burst started: {frame_count} frames at {fps:g} fps")
+        tracer.instant('burst_start', frames=frame_count, fps=fps)
+        self.burst_thread.start(QThread.Priority.TimeCriticalPriority)
+
+    def on_burst_frame_grabbed(self, count):
+        self.burst_button.setText(f"Burst {count}/{self.config.get('burst_frame_count', 30)}")
+
+    def on_burst_finished(self, result):
+        self.burst_thread = None
+        self.burst_button.setEnabled(True)
+        if result is None:
+            self.update_burst_button_text()
+            self.play_sound('error')
             return
 
-        # IMPORTANT: Keep the device pixel ratio for High-DPI displays
-        dpr = screen.devicePixelRatio()
-        pixmap = screen.grabWindow(
-            0,
-            int(self.capture_region.x() * dpr),
-            int(self.capture_region.y() * dpr),
-            int(self.capture_region.width() * dpr),
-            int(self.capture_region.height() * dpr)
-        )
+        with tracer.span('burst_insert', frames=len(result.frames)):
+            self.add_frames_to_grid(result.frames, result.timestamps)
+
+        self.last_burst_stats = result.stats()
+        self.update_burst_button_text()
+        stats = self.last_burst_stats
+        print(f"Burst finished: {stats['frames']}/{stats['requested_frames']} frames at "
+              f"{stats['achieved_fps']:.1f} fps (target {stats['target_fps']:g}), "
+              f"interval {stats['mean_interval_ms']:.1f} ± {stats['interval_stdev_ms']:.1f} ms, "
+              f"max lateness {stats['max_lateness_ms']:.1f} ms, grab {stats['mean_grab_ms']:.1f} ms avg")
 
-        if pixmap.isNull():
+    def add_frames_to_grid(self, images, timestamps):
+        """
+        Add a batch of frames (oldest first) to the grid and auto-save them.
+
+        Batched frames bypass change and duplicate detection: every frame was asked for.
+        """
+        captures = []
+        for image, timestamp in zip(images, timestamps):
+            capture = Capture(None, image, timestamp=timestamp, store=self.capture_store,
+                              display_size=self.thumbnails.display_size(image.size()))
+            capture.region = self.primary_region_name()
+            self.persist_capture(capture)
+            captures.append(capture)
+        self.grid_for_region(self.primary_region_name()).model().add_captures(captures)
+        # Thumbnails follow in the background, newest (on screen) first
+        self.thumbnails.rescale(captures[::-1])
+
+        # Every frame of the batch should be saved: frames the encoder can't take yet wait in its backlog
+        with tracer.span('auto_save_image', frames=len(captures)):
+            for capture in captures:
+                self.auto_save_image(capture, quiet=True, backlog=True)
+        return captures
+
+    def restart_replay(self):
+        """(Re)start the instant replay recorder from the current settings, discarding buffered frames."""
+        self.stop_replay()
+        if not self.config.get('replay_enabled', False) or not self.capture_region:
+            self.update_snap_button_text()
             return
 
-        self.play_sound('snap')
-        
+        fps = self.config.get('replay_fps', 5.0)
+        buffer = ReplayBuffer(
+            max_frames=int(round(self.config.get('replay_seconds', 10) * fps)),
+            memory_budget_mb=self.config.get('replay_memory_mb', 128),
+            max_width=self.config.get('replay_max_width', 960),
+            storage=self.config.get('replay_storage', 'jpeg')
+        )
+        grab = off_thread_grab(self.capture_backend, self.grab_capture_region, self)
+        self.replay_recorder = ReplayRecorder(grab, buffer, fps, self)
+        self.replay_recorder.finished.connect(self.capture_backend.release_thread, Qt.ConnectionType.DirectConnection)
+        self.replay_recorder.start(QThread.Priority.LowPriority)
+        self.replay_stats_timer.start()
+        print(f"Instant replay recording the last {buffer.max_frames} frames at {fps:g} fps")
+
+    def stop_replay(self):
+        if not self.replay_recorder:
+            return
+        self.replay_stats_timer.stop()
+        self.replay_recorder.requestInterruption()
+        self.replay_recorder.wait()
+        self.replay_recorder.buffer.clear() # Uncommitted frames are discarded, never written out
+        self.replay_recorder.deleteLater()
+        self.replay_recorder = None
+
+    def commit_replay(self):
+        """Move the buffered replay frames into the grid (and auto-save). Returns the number of frames."""
+        if not self.replay_recorder:
+            return 0
+        stats = self.replay_recorder.stats()
+        frames = self.replay_recorder.buffer.take_all()
+        if not frames:
+            return 0
+        with tracer.span('replay_commit', frames=len(frames)):
+            images = [frame.image() for frame in frames]
+            self.add_frames_to_grid(images, [frame.timestamp for frame in frames])
+        print(f"Committed {len(frames)} replay frames ({stats['seconds']:.1f}s, "
+              f"{stats['bytes'] / (1024 * 1024):.1f} MB buffered, {stats['cpu_percent']:.1f}% CPU)")
+        return len(frames)
+
+    def snap_now(self):
+        """Capture hotkey / Snap button: commit any instant replay frames, then capture the current frame."""
+        self.commit_replay()
+        self.trigger_capture()
+
+    def process_capture(self, region_names=None):
+        if not self.regions:
+            print("Hotkey pressed, but no region defined.")
+            return []
+
+        regions = self.regions
+        if region_names is not None:
+            regions = [region for region in self.regions if region.name in region_names]
+        # One grab per screen; every region is cut out of it
+        frames = self.region_grabber.grab(regions)
+        if not frames:
+            return []
+
+        kept = []
+        for frame in frames:
+            capture = self.process_region_frame(frame)
+            if capture is not None:
+                kept.append(capture)
+        if not kept:
+            return []
+
+        with tracer.span('play_sound'):
+            self.play_sound('snap')
+
         # Visual feedback for auto-snap mode
         if self.is_auto_snapping:
             self.flash_auto_button()
 
-        # Auto-copy to clipboard if enabled
+        # Auto-copy to clipboard if enabled (the first region's capture when there are several)
         if self.config.get('auto_copy_to_clipboard', False):
-            QApplication.clipboard().setPixmap(pixmap)
+            with tracer.span('clipboard'):
+                QApplication.clipboard().setImage(kept[0].original_image())
             print("Image auto-copied to clipboard.")
-
-        # Scale for display if needed
-        max_width = self.config.get('max_display_width', 500)
-        display_pixmap = pixmap
-        if pixmap.width() > max_width:
-            display_pixmap = pixmap.scaledToWidth(max_width, Qt.TransformationMode.SmoothTransformation)
-            print(f"Scaled image from {pixmap.width()}x{pixmap.height()} to {display_pixmap.width()}x{display_pixmap.height()} for display")
-
-        # Create the image widget with both display and original pixmaps
-        image_container = HoverLabel(display_pixmap, pixmap)
-        image_container.delete_requested.connect(self.delete_image)
-        image_container.save_requested.connect(self.save_image)
-        image_container.copy_requested.connect(self.copy_image_to_clipboard)
-        
-        # Connect hover events for keyboard shortcuts tracking
-        image_container.installEventFilter(self)
-
-        # Auto-save if enabled (this will also set the 'saved' flag)
-        self.auto_save_image(image_container)
-        
-        self.captured_widgets.insert(0, image_container)
-        self.redraw_grid()
-
-    def save_image(self, hover_label, quiet=False):
+        return kept
+
+    def process_region_frame(self, frame):
+        """Run one region's frame through change/duplicate detection, the grid and auto-save. Returns the new capture."""
+        region = frame.region
+
+        # Drop unchanged frames before any copying, scaling, clipboard, saving or sound;
+        # the comparison reads the region straight out of the shared grab
+        if self.config.get('change_detection_enabled', False):
+            detector = self.change_detectors.setdefault(region.name, ChangeDetector())
+            detector.threshold_percent = self.config.get('change_detection_threshold', 0.5)
+            detector.pixel_tolerance = self.config.get('change_detection_pixel_tolerance', 16)
+            with tracer.span('change_detection'):
+                is_changed = detector.check_array(frame.array())
+            # Manual snaps always land; only auto-snap skips unchanged frames
+            if not is_changed and self.is_auto_snapping:
+                self.skipped_frame_count += 1
+                self.update_auto_button_text()
+                return None
+
+        with tracer.span('crop'):
+            image = frame.image()
+
+        # Look for a near-duplicate anywhere in the session, not just the previous frame
+        duplicate_mode = self.config.get('duplicate_detection', 'off')
+        phash = None
+        duplicate = None
+        if duplicate_mode != 'off':
+            with tracer.span('duplicate_lookup'):
+                phash = dhash(image)
+                match = self.hash_index.nearest(phash, self.config.get('duplicate_max_distance', 4))
+            if match:
+                duplicate = match[0]
+                if duplicate_mode == 'skip':
+                    print(f"Skipped near-duplicate capture (distance {match[1]}).")
+                    return None
+                if duplicate_mode == 'collapse':
+                    duplicate.repeat_count += 1
+                    self.capture_updated(duplicate)
+                    print(f"Collapsed near-duplicate capture (distance {match[1]}), seen {duplicate.repeat_count} times.")
+                    if self.is_auto_snapping:
+                        self.flash_auto_button()
+                    return None
+
+        # A grab that already fits is displayed as is; larger ones are scaled on a thumbnail worker
+        display_size = self.thumbnails.display_size(image.size())
+        display_pixmap = None
+        if image.size() == display_size:
+            display_pixmap = frame.pixmap if frame.pixmap is not None else QPixmap.fromImage(image)
+
+        # The grid keeps the display pixmap; the full-resolution frame goes to the capture store
+        with tracer.span('grid_insert'):
+            capture = Capture(display_pixmap, image, timestamp=frame.timestamp, store=self.capture_store,
+                              display_size=display_size)
+            capture.region = region.name
+            capture.duplicate_of = duplicate.id if duplicate else None
+            if phash is not None:
+                capture.phash = phash
+                self.hash_index.add(capture, phash)
+            self.grid_for_region(region.name).model().add_capture(capture)
+            self.thumbnails.request(capture)
+        with tracer.span('session_persist'):
+            self.persist_capture(capture)
+
+        # Auto-save if enabled (this will also set the 'saved' flag).
+        # Only auto-snap may drop a save when the encoder falls behind; manual snaps go to its backlog.
+        with tracer.span('auto_save_image'):
+            self.auto_save_image(capture, backlog=not self.is_auto_snapping)
+        return capture
+
+    def save_image(self, capture, quiet=False):
         file_path, _ = QFileDialog.getSaveFileName(
             self, 
             "Save Image", 
             "", 
-            "PNG Images (*.png);;JPEG Images (*.jpg *.jpeg)"
+            FILE_DIALOG_FILTER
         )
         if file_path:
-            pixmap = hover_label.original_pixmap
-            if not file_path.lower().endswith(('.png', '.jpg', '.jpeg')):
+            image = capture.original_image()
+            if image_format_for_path(file_path) is None:
                 file_path += '.png' # Default to png if no valid extension
-            pixmap.save(file_path)
-            print(f"Image saved to {file_path}")
-            hover_label.is_saved = True
-            hover_label.update() # Trigger repaint to show saved checkmark
-            if not quiet:
-                self.play_sound('save')
-
-    def delete_image(self, image_container):
-        if image_container in self.captured_widgets:
-            self.captured_widgets.remove(image_container)
-            image_container.deleteLater()
+            if not format_supported(image_format_for_path(file_path)):
+                QMessageBox.warning(self, "Save Error", f"{image_format_for_path(file_path).upper()} images can't be "
+                                    "written on this system (Qt's image plugin for it is not installed).")
+                return
+            # The format follows the extension; its compression settings are the auto-save ones
+            encoder = ImageEncoder.from_config(self.config, image_format_for_path(file_path))
+            # An explicit save should never be dropped, so it waits in the backlog if the encoder is busy
+            self.encoder.submit(image, file_path, encoder, token=(capture, 'manual', quiet), backlog=True)
+
+    def delete_image(self, capture):
+        if self.grid_for_capture(capture).model().remove_capture(capture):
+            capture.release()
+            self.hash_index.remove(capture)
+            self.thumbnails.discard(capture)
+            if self.session_store is not None:
+                self.session_store.remove(capture.id)
             print("Image removed.")
-            QTimer.singleShot(0, self.redraw_grid)
 
-    def copy_image_to_clipboard(self, hover_label, quiet=False):
-        QApplication.clipboard().setPixmap(hover_label.original_pixmap)
+    def open_session_store(self):
+        """Open the session database next to the config file, or delete it if session restore is off."""
+        path = os.path.join(os.path.dirname(os.path.abspath(self.config.file_path)), 'session.sqlite3')
+        if not self.config.get('session_restore_enabled', True):
+            for suffix in ('', '-wal', '-shm'):
+                if os.path.exists(path + suffix):
+                    os.remove(path + suffix)
+            return None
+        try:
+            return SessionStore(path, *self.session_storage_settings())
+        except sqlite3.Error as e:
+            print(f"Error opening session store {path}: {e}. Captures will not be kept between sessions.")
+            return None
+
+    def session_storage_settings(self):
+        """(storage mode, keyframe interval, tile size) for the session store."""
+        return (self.config.get('session_storage', 'full'), self.config.get('session_keyframe_interval', 60),
+                self.config.get('session_tile_size', 64))
+
+    def restore_session(self):
+        """Rebuild the grid from the session store's metadata; images are decoded only when needed."""
+        if self.session_store is None:
+            return
+        start = time.perf_counter()
+        records = self.session_store.load_index()
+        if not records:
+            return
+
+        captures = []
+        for record in records:
+            # Laid out for the current width; a thumbnail stored at another width is redone when painted
+            display_size = self.thumbnails.display_size(QSize(record['width'], record['height']))
+            capture = Capture.restored(
+                record['id'], record['timestamp'],
+                QSize(record['width'], record['height']), display_size,
+                lambda capture_id=record['id'], size=display_size: self.load_session_thumbnail(capture_id, size),
+                self.capture_store
+            )
+            capture.is_saved = record['is_saved']
+            capture.phash = record['phash']
+            capture.duplicate_of = record['duplicate_of']
+            capture.repeat_count = record['repeat_count']
+            capture.region = record['region']
+            if capture.phash is not None:
+                self.hash_index.add(capture, capture.phash)
+            captures.append(capture)
+        reserve_capture_ids(records[-1]['id'])
+        # Captures of regions that no longer exist still get a tab of their own
+        by_grid = {}
+        for capture in captures:
+            by_grid.setdefault(self.grid_for_capture(capture), []).append(capture)
+        for grid, grid_captures in by_grid.items():
+            grid.model().add_captures(grid_captures)
+        print(f"Restored {len(captures)} captures from the previous session "
+              f"in {(time.perf_counter() - start) * 1000:.0f} ms")
+
+    def load_session_thumbnail(self, capture_id, size):
+        image = self.session_store.load_thumbnail(capture_id) if self.session_store is not None else None
+        if image is None:
+            placeholder = QPixmap(size)
+            placeholder.fill(Qt.GlobalColor.darkGray)
+            return placeholder
+        return QPixmap.fromImage(image)
+
+    def persist_capture(self, capture):
+        if self.session_store is not None:
+            self.session_store.add(capture)
+
+    def update_thumbnails(self):
+        """Regenerate grid thumbnails for the current display width and screen, visible cells first."""
+        if not self.thumbnails.set_target(self.config.get('max_display_width', 500),
+                                          self.grid_view.devicePixelRatioF()):
+            return
+        captures = self.all_captures()
+        # Cell sizes change right away; the old thumbnails are stretched until the new ones arrive
+        for capture in captures:
+            capture.display_size = self.thumbnails.display_size(capture.original_size)
+        for grid in self.grids.values():
+            grid.relayout()
+        self.thumbnails.rescale(captures, visible=self.grid_view.visible_captures())
+
+    def capture_updated(self, capture):
+        """Repaint a capture whose flags changed and persist the change."""
+        self.grid_for_capture(capture).model().capture_changed(capture)
+        if self.session_store is not None:
+            self.session_store.update(capture)
+
+    def copy_image_to_clipboard(self, capture, quiet=False):
+        QApplication.clipboard().setImage(capture.original_image())
         if not quiet:
             self.play_sound('clipboard')
         print("Image copied to clipboard.")
 
-    def auto_save_image(self, image_container, quiet=False):
+    def auto_save_image(self, capture, quiet=False, backlog=False):
         if not self.config.get('auto_save_enabled'):
             return
 
         location = self.config.get('auto_save_location')
-        prefix = self.config.get('auto_save_prefix')
+        prefix = self.auto_save_prefix_for(capture)
         suffix_type = self.config.get('auto_save_suffix_type')
-        img_format = self.config.get('auto_save_format')
-        pixmap = image_container.original_pixmap
+        encoder = ImageEncoder.from_config(self.config)
+        img_format = encoder.extension
+        image = capture.original_image()
 
         try:
             os.makedirs(location, exist_ok=True)
         except OSError as e:
             print(f"Error creating directory {location}: {e}")
+            self.auto_saved.emit(capture, location, False)
             QMessageBox.warning(self, "Auto-Save Error", f"Could not create the save directory:\n{location}\n\nPlease check permissions and the path in Settings.")
             return
 
         if suffix_type == 'timestamp':
-            # Add milliseconds for uniqueness in rapid captures
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S_%f")[:-3]
-            filename = f"{prefix}-{timestamp}.{img_format}"
+            # Saves are written asynchronously, so also guard against two captures in the same millisecond
+            filename = timestamped_filename(location, prefix, capture.timestamp, img_format,
+                                            taken=self.pending_auto_save_names)
         else:  # numeric
-            counter = self.config.get('auto_save_numeric_counter')
-            filename = f"{prefix}-{counter:04d}.{img_format}"
+            # The counter is saved lazily, so after a crash it may lag behind the files already written
+            filename, counter = numbered_filename(location, prefix, self.config.get('auto_save_numeric_counter'), img_format,
+                                                  taken=self.pending_auto_save_names)
             self.config.set('auto_save_numeric_counter', counter + 1)
 
         file_path = os.path.join(location, filename)
-        quality = self.config.get('auto_save_jpg_quality') if img_format == 'jpg' else -1
+        self.pending_auto_save_names.add(filename)
+
+        # Encoding happens in the background; on_image_encoded sets the 'saved' flag
+        self.encoder.submit(image, file_path, encoder, token=(capture, 'auto', quiet), backlog=backlog)
+
+    def auto_save_prefix_for(self, capture):
+        region = self.region_named(capture.region)
+        if region is not None and region.auto_save_prefix:
+            return region.auto_save_prefix
+        prefix = self.config.get('auto_save_prefix')
+        # Regions share the auto-save folder, so tell their files apart by region name
+        if len(self.regions) > 1 and capture.region:
+            return f"{prefix}-{filename_part(capture.region)}"
+        return prefix
+
+    def on_image_encoded(self, token, file_path, success, latency_ms):
+        capture, kind, quiet = token
+
+        if kind == 'auto':
+            self.pending_auto_save_names.discard(os.path.basename(file_path))
+            self.auto_saved.emit(capture, file_path, success)
+
+        if not success:
+            print(f"Error saving image to {file_path}")
+            title = "Auto-Save Error" if kind == 'auto' else "Save Error"
+            QMessageBox.warning(self, title, f"Could not save the image to:\n{file_path}")
+            return
 
-        if not pixmap.save(file_path, None, quality):
-            print(f"Error auto-saving image to {file_path}")
-            QMessageBox.warning(self, "Auto-Save Error", f"Could not save the image to:\n{file_path}")
+        if kind == 'auto':
+            print(f"Auto-saved image to {file_path} ({latency_ms:.0f} ms)")
         else:
-            print(f"Auto-saved image to {file_path}")
-            image_container.is_saved = True
-            image_container.update() # Trigger repaint to show saved checkmark
+            print(f"Image saved to {file_path} ({latency_ms:.0f} ms)")
+            if not quiet:
+                self.play_sound('save')
+
+        capture.is_saved = True
+        self.capture_updated(capture) # Repaint to show saved checkmark
+
+    def on_image_encode_dropped(self, token, file_path):
+        # Auto-save could not keep up with the capture rate; the capture stays in the grid unsaved
+        capture, kind, quiet = token
+        if kind == 'auto':
+            self.pending_auto_save_names.discard(os.path.basename(file_path))
+            self.auto_saved.emit(capture, file_path, False)
+        print(f"Warning: encoder queue full, auto-save skipped for {file_path} "
+              f"({self.encoder.queue_depth} pending, avg {self.encoder.average_latency_ms:.0f} ms/image)")
+
+    def animation_source(self):
+        """The captures on the current tab, oldest first, or else the images in the auto-save folder (None if neither)."""
+        if len(self.capture_model):
+            return CaptureFrameSource(reversed(self.capture_model.captures()))
+        location = self.config.get('auto_save_location')
+        source = DirectoryFrameSource(location) if location and os.path.isdir(location) else None
+        return source if source and len(source) else None
+
+    def export_animation(self):
+        if self.exporter and self.exporter.isRunning():
+            return
+
+        source = self.animation_source()
+        if source is None:
+            QMessageBox.information(self, "Nothing to Export",
+                                    "There are no captures in the grid or images in the auto-save folder to export.")
+            return
+
+        filters = "Animated GIF (*.gif);;Animated PNG (*.png)"
+        if ffmpeg_path():
+            filters += ";;MP4 Video (*.mp4)"
+        file_path, selected_filter = QFileDialog.getSaveFileName(self, "Export Animation", "", filters)
+        if not file_path:
+            return
+        if not file_path.lower().endswith(('.gif', '.png', '.apng', '.mp4')):
+            file_path += '.mp4' if 'mp4' in selected_filter else ('.png' if 'PNG' in selected_filter else '.gif')
+        self.start_export(source, file_path)
+
+    def start_export(self, source, file_path, fps=None, max_width=None, show_progress=True):
+        self.exporter = AnimationExporter(
+            source, file_path,
+            fps=fps or self.config.get('export_fps', 10.0),
+            max_width=max_width if max_width is not None else self.config.get('export_max_width', 800),
+            parent=self
+        )
+        if show_progress:
+            self.export_progress = QProgressDialog(f"Exporting {len(source)} frames...", "Cancel", 0, len(source), self)
+            self.export_progress.setWindowTitle("Export Animation")
+            self.export_progress.setWindowModality(Qt.WindowModality.WindowModal)
+            self.export_progress.setMinimumDuration(0)
+            self.export_progress.canceled.connect(self.exporter.requestInterruption)
+            self.exporter.progress.connect(self.export_progress.setValue)
+        self.exporter.export_finished.connect(self.on_export_finished)
+        self.exporter.finished.connect(self.exporter.deleteLater)
+        self.exporter.start()
+
+    def on_export_finished(self, success, message):
+        frames = self.exporter.frames_written
+        skipped = self.exporter.frames_skipped
+        cancelled = self.exporter.cancelled
+        self.exporter = None
+        # Exports started over the control socket have no dialog, and report errors in their reply
+        interactive = self.export_progress is not None
+        if interactive:
+            self.export_progress.canceled.disconnect()
+            self.export_progress.close()
+            self.export_progress = None
+        if success:
+            print(f"Exported {frames} frames to {message}")
+            self.play_sound('save')
+            if skipped:
+                print(f"Warning: {skipped} frames could not be loaded and were left out of the export")
+                if interactive:
+                    QMessageBox.warning(self, "Export Incomplete",
+                                        f"Exported {frames} frames to {message}\n\n"
+                                        f"{skipped} frames could not be loaded and were left out.")
+            return
+        print(message)
+        if interactive and not cancelled:
+            QMessageBox.warning(self, "Export Error", message)
+
+    def plan_save_all(self, captures, folder):
+        """(capture, path) for each capture, named like auto-saves (the numeric counter is shared with them)."""
+        img_format = self.config.get('auto_save_format')
+        suffix_type = self.config.get('auto_save_suffix_type')
+        counter = self.config.get('auto_save_numeric_counter')
+        taken = set()
+        plan = []
+        for capture in captures:
+            prefix = self.auto_save_prefix_for(capture)
+            if suffix_type == 'timestamp':
+                filename = timestamped_filename(folder, prefix, capture.timestamp, img_format, taken=taken)
+            else:  # numeric
+                filename, counter = numbered_filename(folder, prefix, counter, img_format, taken=taken)
+                counter += 1
+            taken.add(filename)
+            plan.append((capture, os.path.join(folder, filename)))
+        if suffix_type != 'timestamp':
+            self.config.set('auto_save_numeric_counter', counter)
+        return plan
+
+    def save_all(self):
+        if self.batch_saver is not None:
+            return
+        if not self.capture_count():
+            QMessageBox.information(self, "Nothing to Save", "There are no captures to save.")
+            return
+        folder = QFileDialog.getExistingDirectory(self, "Save All Captures To", self.config.get('auto_save_location'))
+        if folder:
+            self.start_save_all(folder)
+
+    def start_save_all(self, folder, show_progress=True):
+        """Save every capture (oldest first) into `folder` on worker processes. Returns the BatchSaver."""
+        captures = sorted(self.all_captures(), key=lambda capture: capture.id)
+        plan = self.plan_save_all(captures, folder)
+        self.batch_saver = BatchSaver([(capture.original_image, path) for capture, path in plan],
+                                      workers=self.config.get('save_all_workers', 0),
+                                      encoder=ImageEncoder.from_config(self.config), parent=self)
+        self.save_all_captures = {path: capture for capture, path in plan}
+        if show_progress:
+            self.save_all_progress = QProgressDialog(f"Saving {len(plan)} captures...", "Cancel", 0, len(plan), self)
+            self.save_all_progress.setWindowTitle("Save All")
+            self.save_all_progress.setWindowModality(Qt.WindowModality.WindowModal)
+            self.save_all_progress.setMinimumDuration(0)
+            self.save_all_progress.canceled.connect(self.batch_saver.requestInterruption)
+            self.batch_saver.progress.connect(self.save_all_progress.setValue)
+        self.batch_saver.save_finished.connect(self.on_save_all_finished)
+        self.batch_saver.finished.connect(self.batch_saver.deleteLater)
+        print(f"Saving {len(plan)} captures to {folder} on {self.batch_saver.workers} worker processes")
+        self.batch_saver.start()
+        return self.batch_saver
+
+    def on_save_all_finished(self, written, failed, cancelled):
+        saver = self.batch_saver
+        self.batch_saver = None
+        interactive = self.save_all_progress is not None
+        if interactive:
+            self.save_all_progress.canceled.disconnect()
+            self.save_all_progress.close()
+            self.save_all_progress = None
+
+        captures, self.save_all_captures = self.save_all_captures, {}
+        for path in written:
+            capture = captures[path]
+            if not capture.is_saved:
+                capture.is_saved = True
+                self.capture_updated(capture)
+        rate = len(written) / saver.elapsed if saver.elapsed else 0.0
+        print(f"Saved {len(written)} of {len(saver.jobs)} captures in {saver.elapsed:.1f} s ({rate:.1f} images/s)"
+              + (", cancelled" if cancelled else ""))
+        for path, error in failed:
+            print(f"Error saving image to {path}: {error}")
+        if written and not cancelled:
+            self.play_sound('save')
+        if interactive and failed:
+            QMessageBox.warning(self, "Save All Error", f"{len(failed)} captures could not be saved, e.g.:\n"
+                                f"{failed[0][0]}\n{failed[0][1]}")
 
     def clear_grid_with_confirmation(self, reason=None):
         """
@@ -391,7 +1126,7 @@ class SnapMosaic(QMainWindow):
             True if grid was cleared or was already empty.
             False if user cancelled.
         """
-        if not self.captured_widgets:
+        if not self.capture_count():
             return True  # Nothing to clear, proceed
         
         # Check if we should show confirmation
@@ -421,10 +1156,16 @@ class SnapMosaic(QMainWindow):
             if result != QMessageBox.StandardButton.Yes:
                 return False  # User cancelled
         
-        # Clear the grid
-        for widget in self.captured_widgets[:]:
-            self.delete_image(widget)
-        self.captured_widgets.clear()
+        # Clear the grids
+        for grid in self.grids.values():
+            grid.model().clear()
+        self.prune_grids()
+        self.thumbnails.clear()
+        self.capture_store.clear()
+        if self.session_store is not None:
+            self.session_store.clear()
+        self.change_detectors.clear()
+        self.hash_index.clear()
         print("Grid and in-memory image list cleared.")
         return True  # Successfully cleared
 
@@ -441,42 +1182,33 @@ class SnapMosaic(QMainWindow):
                 event.accept()
                 return
         
+        hovered_capture = self.grid_view.hovered_capture()
+
         # Ctrl+S - Quick save the last captured or hovered image
         if event.key() == Qt.Key.Key_S and event.modifiers() == Qt.KeyboardModifier.ControlModifier:
-            target_widget = self.last_hovered_widget if self.last_hovered_widget else (self.captured_widgets[0] if self.captured_widgets else None)
-            if target_widget:
-                self.save_image(target_widget)
+            target = hovered_capture if hovered_capture else self.capture_model.capture_at(0)
+            if target:
+                self.save_image(target)
                 event.accept()
                 return
         
         # Ctrl+C - Copy the last captured or hovered image
         if event.key() == Qt.Key.Key_C and event.modifiers() == Qt.KeyboardModifier.ControlModifier:
-            target_widget = self.last_hovered_widget if self.last_hovered_widget else (self.captured_widgets[0] if self.captured_widgets else None)
-            if target_widget:
-                self.copy_image_to_clipboard(target_widget, quiet=True)
+            target = hovered_capture if hovered_capture else self.capture_model.capture_at(0)
+            if target:
+                self.copy_image_to_clipboard(target, quiet=True)
                 event.accept()
                 return
         
         # Delete key - Delete the hovered image
         if event.key() == Qt.Key.Key_Delete:
-            if self.last_hovered_widget:
-                self.delete_image(self.last_hovered_widget)
+            if hovered_capture:
+                self.delete_image(hovered_capture)
                 event.accept()
                 return
         
         super().keyPressEvent(event)
 
-    def eventFilter(self, obj, event):
-        """Track which widget is being hovered for keyboard shortcuts."""
-        if isinstance(obj, HoverLabel):
-            if event.type() == event.Type.Enter:
-                self.last_hovered_widget = obj
-            elif event.type() == event.Type.Leave:
-                if self.last_hovered_widget == obj:
-                    self.last_hovered_widget = None
-        
-        return super().eventFilter(obj, event)
-
     def closeEvent(self, event):
         if self.is_quitting:
             super().closeEvent(event)
@@ -495,21 +1227,47 @@ class SnapMosaic(QMainWindow):
         else:
             self.quit_application()
 
-    def resizeEvent(self, event):
-        super().resizeEvent(event)
-        self.resize_timer.start(150) # Debounce resize events
-
     def update_snap_button_text(self):
         self.snap_button.setText(f"Snap [{self.hotkey.upper()}]")
-        self.snap_button.setToolTip(f"Capture the defined region ({self.hotkey.upper()})")
+        if len(self.regions) > 1:
+            tooltip = f"Capture all {len(self.regions)} regions from one screen grab ({self.hotkey.upper()})"
+        else:
+            tooltip = f"Capture the defined region ({self.hotkey.upper()})"
+        if self.replay_recorder:
+            stats = self.replay_recorder.stats()
+            tooltip += (
+                f"\nInstant replay: {stats['frames']}/{stats['max_frames']} frames ({stats['seconds']:.1f}s), "
+                f"{stats['bytes'] / (1024 * 1024):.1f} of {stats['memory_budget'] // (1024 * 1024)} MB, "
+                f"{stats['cpu_percent']:.1f}% CPU"
+            )
+        self.snap_button.setToolTip(tooltip)
 
     def update_auto_button_text(self):
         self.auto_button.setText(f"Auto [{self.auto_snap_hotkey.upper()}]")
-        interval = self.config.get('auto_snap_interval', 10)
-        self.auto_button.setToolTip(
-            f"Toggle automatic captures every {interval}s ({self.auto_snap_hotkey.upper()})\n"
+        interval_ms = self.config.get('auto_snap_interval_ms', 10000)
+        tooltip = (
+            f"Toggle automatic captures every {format_interval(interval_ms)} ({self.auto_snap_hotkey.upper()})\n"
             f"Press Escape to stop"
         )
+        stats = self.auto_snap_scheduler.stats()
+        if stats['ticks'] or stats['dropped_ticks']:
+            tooltip += f"\nAchieved rate: {stats['achieved_fps']:.2f} fps, dropped ticks: {stats['dropped_ticks']}"
+        if self.config.get('change_detection_enabled', False):
+            tooltip += f"\nSkipped unchanged frames: {self.skipped_frame_count}"
+        self.auto_button.setToolTip(tooltip)
+
+    def update_burst_button_text(self):
+        self.burst_button.setText(f"Burst [{self.burst_hotkey.upper()}]")
+        frame_count = self.config.get('burst_frame_count', 30)
+        fps = self.config.get('burst_fps', 20.0)
+        tooltip = f"Capture {frame_count} frames at {fps:g} fps ({self.burst_hotkey.upper()})"
+        if self.last_burst_stats:
+            stats = self.last_burst_stats
+            tooltip += (
+                f"\nLast burst: {stats['frames']} frames at {stats['achieved_fps']:.1f} fps, "
+                f"interval jitter {stats['interval_stdev_ms']:.1f} ms, max lateness {stats['max_lateness_ms']:.1f} ms"
+            )
+        self.burst_button.setToolTip(tooltip)
 
     def update_auto_button_style(self):
         if self.is_auto_snapping:
@@ -523,31 +1281,210 @@ class SnapMosaic(QMainWindow):
         else:
             self.auto_button.setStyleSheet("")
 
+    # --- Control socket ---
+
+    def control_ping(self, request):
+        return {'version': self.version}
+
+    def control_status(self, request):
+        return {
+            'version': self.version,
+            'captures': self.capture_count(),
+            'regions': [region.to_dict() for region in self.regions],
+            'auto_snapping': self.is_auto_snapping,
+            'skipped_frames': self.skipped_frame_count,
+            'capture_backend': self.capture_backend.name,
+            'auto_save_enabled': bool(self.config.get('auto_save_enabled')),
+            'auto_save_location': self.config.get('auto_save_location'),
+            'encoder': self.encoder.stats(),
+            'exporting': self.exporter is not None,
+        }
+
+    def control_capture(self, request):
+        """
+        Capture now (all regions, or `region`: a name or list of names). With
+        auto-save on, the reply waits until every file is written (unless
+        `wait` is false) and includes its path.
+        """
+        if not self.regions:
+            raise ControlError("no capture region is defined")
+        names = request.get('region')
+        if isinstance(names, str):
+            names = [names]
+        if names is not None:
+            unknown = [name for name in names if self.region_named(name) is None]
+            if unknown:
+                raise ControlError(f"unknown region: {', '.join(unknown)}")
+
+        # Listen before capturing: a save can fail before trigger_capture returns
+        outcomes = {} # capture id -> (file path, success)
+        results = None
+        deferred = Deferred()
+
+        def finish_if_saved():
+            if results is None or not all(capture_id in outcomes for capture_id in results):
+                return
+            self.auto_saved.disconnect(on_saved)
+            for capture_id, result in results.items():
+                path, success = outcomes[capture_id]
+                if success:
+                    result['path'] = path
+                else:
+                    result['error'] = f"could not save {path}"
+            deferred.resolve({'captures': list(results.values())})
+
+        def on_saved(capture, path, success):
+            outcomes[capture.id] = (path, success)
+            finish_if_saved()
+
+        self.auto_saved.connect(on_saved)
+        captures = self.trigger_capture(names)
+        results = {capture.id: {
+            'id': capture.id,
+            'region': capture.region,
+            'timestamp': capture.timestamp.isoformat(timespec='milliseconds'),
+            'width': capture.original_size.width(),
+            'height': capture.original_size.height(),
+            'path': None,
+        } for capture in captures}
+        if not request.get('wait', True) or not self.config.get('auto_save_enabled'):
+            self.auto_saved.disconnect(on_saved)
+            return {'captures': list(results.values())}
+        finish_if_saved()
+        return deferred
+
+    def control_start_auto_snap(self, request):
+        if not self.regions:
+            raise ControlError("no capture region is defined")
+        if not self.is_auto_snapping:
+            self.start_auto_snap()
+        return {'auto_snapping': True}
+
+    def control_stop_auto_snap(self, request):
+        if self.is_auto_snapping:
+            self.stop_auto_snap()
+        return {'auto_snapping': False, 'skipped_frames': self.skipped_frame_count}
+
+    def control_set_region(self, request):
+        """Move the region called `name` (the first region if no name is given), or add it if it doesn't exist."""
+        try:
+            rect = QRect(int(request['x']), int(request['y']), int(request['width']), int(request['height']))
+        except (KeyError, TypeError, ValueError):
+            raise ControlError("set_region needs integer x, y, width and height")
+        if rect.width() <= 0 or rect.height() <= 0:
+            raise ControlError("the region must have a positive width and height")
+
+        name = request.get('name') or self.primary_region_name()
+        region = self.region_named(name)
+        if region is None:
+            region = CaptureRegion(name, rect)
+            self.regions.append(region)
+            print(f"Capture region '{name}' added: {rect}")
+        else:
+            region.rect = rect
+            print(f"Capture region '{name}' set to: {rect}")
+        if 'interval_ms' in request:
+            region.interval_ms = request['interval_ms']
+        if 'auto_save_prefix' in request:
+            region.auto_save_prefix = request['auto_save_prefix']
+
+        self.change_detectors.pop(name, None)
+        self.save_capture_region()
+        self.prune_grids()
+        self.update_snap_button_text()
+        if region is self.regions[0]:
+            self.restart_replay()
+        return {'region': region.to_dict()}
+
+    def control_export(self, request):
+        """Export like the Export button, to `path`; the reply is sent when the file is written."""
+        path = request.get('path')
+        if not path:
+            raise ControlError("export needs a 'path'")
+        if self.exporter is not None:
+            raise ControlError("an export is already running")
+        if format_for_path(path) == 'video' and not ffmpeg_path():
+            raise ControlError("video export needs ffmpeg on the PATH")
+        source = self.animation_source()
+        if source is None:
+            raise ControlError("there are no captures in the grid or images in the auto-save folder to export")
+
+        self.start_export(source, path, request.get('fps'), request.get('max_width'), show_progress=False)
+        exporter = self.exporter
+        deferred = Deferred()
+        exporter.export_finished.connect(
+            lambda success, message: deferred.resolve({'path': message, 'frames': exporter.frames_written,
+                                                       'skipped': exporter.frames_skipped})
+            if success else deferred.fail(message))
+        return deferred
+
+    def control_save_all(self, request):
+        """Save All into `folder` (default: the auto-save folder); the reply lists the files once written."""
+        folder = request.get('folder') or self.config.get('auto_save_location')
+        if self.batch_saver is not None:
+            raise ControlError("Save All is already running")
+        if not self.capture_count():
+            raise ControlError("there are no captures to save")
+        try:
+            os.makedirs(folder, exist_ok=True)
+        except OSError as e:
+            raise ControlError(f"could not create {folder}: {e}")
+        deferred = Deferred()
+        saver = self.start_save_all(folder, show_progress=False)
+
+        def on_finished(written, failed, cancelled):
+            reply = {'paths': written, 'seconds': round(saver.elapsed, 3)}
+            if failed or cancelled:
+                reply['ok'] = False
+                reply['error'] = "cancelled" if cancelled else f"{len(failed)} captures could not be saved"
+                reply['errors'] = [f"{path}: {error}" for path, error in failed]
+            deferred.resolve(reply)
+        saver.save_finished.connect(on_finished)
+        return deferred
+
+    def control_activate(self, request):
+        self.show_window()
+        return {}
+
     def open_settings(self):
         previous_hotkey = self.config.get('hotkey')
         previous_auto_snap_hotkey = self.config.get('auto_snap_hotkey')
+        previous_burst_hotkey = self.config.get('burst_hotkey')
+        replay_keys = ('replay_enabled', 'replay_seconds', 'replay_fps', 'replay_max_width', 'replay_storage', 'replay_memory_mb')
+        previous_replay = [self.config.get(key) for key in replay_keys]
         previous_max_width = self.config.get('max_display_width', 500)
-        previous_interval = self.config.get('auto_snap_interval', 10)
+        previous_interval = self.config.get('auto_snap_interval_ms', 10000)
+        previous_regions = [region.to_dict() for region in self.regions]
+        previous_backend = self.config.get('capture_backend', 'qt')
+        previous_control_socket = self.config.get('control_socket_enabled', True)
+        previous_session_storage = self.session_storage_settings()
         dialog = SettingsDialog(self.config, self)
 
         if dialog.exec():
+            # Release changed hotkeys first, so two actions can swap keys
+            for name, key, previous in (('capture', 'hotkey', previous_hotkey),
+                                        ('auto_snap', 'auto_snap_hotkey', previous_auto_snap_hotkey),
+                                        ('burst', 'burst_hotkey', previous_burst_hotkey)):
+                if self.config.get(key) != previous:
+                    self.hotkey_listener.unbind(name)
+
             new_hotkey = self.config.get('hotkey')
             if new_hotkey != previous_hotkey:
                 self.hotkey = new_hotkey
 
-                if self.start_hotkey_listener():
+                if self.bind_capture_hotkey():
                     self.update_snap_button_text()
                     QMessageBox.information(self, "Hotkey Updated",
                                             f"The new hotkey '{self.hotkey}' is now active.")
                 else:
                     QMessageBox.warning(self, "Invalid Hotkey",
                                         f"Could not register the hotkey '{self.hotkey}'.\n"
-                                        "It might be already in use by another application.\n"
+                                        "It may be invalid or already assigned to another action.\n"
                                         "Reverting to the previous hotkey.")
                     self.play_sound('error')
                     self.hotkey = previous_hotkey
                     self.config.set('hotkey', previous_hotkey)
-                    self.start_hotkey_listener()
+                    self.bind_capture_hotkey()
                     self.update_snap_button_text()
             
             # Handle auto-snap hotkey changes
@@ -555,30 +1492,83 @@ class SnapMosaic(QMainWindow):
             if new_auto_snap_hotkey != previous_auto_snap_hotkey:
                 self.auto_snap_hotkey = new_auto_snap_hotkey
 
-                if self.start_auto_snap_hotkey_listener():
+                if self.bind_auto_snap_hotkey():
                     self.update_auto_button_text()
                     QMessageBox.information(self, "Auto-Snap Hotkey Updated",
                                             f"The new auto-snap hotkey '{self.auto_snap_hotkey}' is now active.")
                 else:
                     QMessageBox.warning(self, "Invalid Auto-Snap Hotkey",
                                         f"Could not register the auto-snap hotkey '{self.auto_snap_hotkey}'.\n"
-                                        "It might be already in use by another application.\n"
+                                        "It may be invalid or already assigned to another action.\n"
                                         "Reverting to the previous hotkey.")
                     self.play_sound('error')
                     self.auto_snap_hotkey = previous_auto_snap_hotkey
                     self.config.set('auto_snap_hotkey', previous_auto_snap_hotkey)
-                    self.start_auto_snap_hotkey_listener()
+                    self.bind_auto_snap_hotkey()
                     self.update_auto_button_text()
             
+            # Handle burst hotkey changes
+            new_burst_hotkey = self.config.get('burst_hotkey')
+            if new_burst_hotkey != previous_burst_hotkey:
+                self.burst_hotkey = new_burst_hotkey
+
+                if self.bind_burst_hotkey():
+                    QMessageBox.information(self, "Burst Hotkey Updated",
+                                            f"The new burst hotkey '{self.burst_hotkey}' is now active.")
+                else:
+                    QMessageBox.warning(self, "Invalid Burst Hotkey",
+                                        f"Could not register the burst hotkey '{self.burst_hotkey}'.\n"
+                                        "It may be invalid or already assigned to another action.\n"
+                                        "Reverting to the previous hotkey.")
+                    self.play_sound('error')
+                    self.burst_hotkey = previous_burst_hotkey
+                    self.config.set('burst_hotkey', previous_burst_hotkey)
+                    self.bind_burst_hotkey()
+            self.update_burst_button_text() # Frame count or rate may have changed
+
+            self.update_auto_button_text() # Change detection may have been toggled
+
+            # Regions removed, or given their own interval or prefix, on the Regions tab
+            regions = load_regions(self.config)
+            if [region.to_dict() for region in regions] != previous_regions:
+                previous_rect = self.capture_region
+                self.regions = regions
+                self.prune_grids()
+                self.update_snap_button_text()
+                if self.is_auto_snapping:
+                    # Regroup the regions by interval
+                    self.stop_auto_snap()
+                    self.start_auto_snap()
+                if self.capture_region != previous_rect:
+                    previous_replay = None
+
+            if [self.config.get(key) for key in replay_keys] != previous_replay:
+                self.restart_replay()
+
             # Handle interval changes while auto-snap is running
-            new_interval = self.config.get('auto_snap_interval', 10)
+            new_interval = self.config.get('auto_snap_interval_ms', 10000)
             if new_interval != previous_interval and self.is_auto_snapping:
-                self.auto_snap_timer.setInterval(new_interval * 1000)
-                print(f"Auto-snap interval updated to {new_interval}s")
+                self.auto_snap_scheduler.set_interval(new_interval)
+                print(f"Auto-snap interval updated to {format_interval(new_interval)}")
             
-            # Check if max_display_width changed and redraw grid if needed
+            self.capture_store.set_memory_budget(self.config.get('capture_memory_budget_mb', 512))
+
+            if self.session_store is not None and self.session_storage_settings() != previous_session_storage:
+                self.session_store.set_storage(*self.session_storage_settings())
+
+            if self.config.get('capture_backend', 'qt') != previous_backend and not os.environ.get(CAPTURE_BACKEND_ENV_VAR):
+                self.set_capture_backend(self.open_capture_backend())
+
+            control_socket = self.config.get('control_socket_enabled', True)
+            if control_socket != previous_control_socket:
+                if control_socket:
+                    self.control_server.listen()
+                else:
+                    self.control_server.close()
+
+            # Rescale the thumbnails in the background if max_display_width changed
             if previous_max_width != self.config.get('max_display_width'):
-                self.redraw_grid()
+                self.update_thumbnails()
 
     def open_about(self):
         dialog = AboutDialog(self.version, self)
@@ -628,6 +1618,11 @@ class SnapMosaic(QMainWindow):
         self.activateWindow() # Bring to front
 
     def quit_application(self):
+        self.shutdown()
+        QApplication.instance().quit()
+
+    def shutdown(self):
+        """Stop every worker in order and flush what they hold; the window can't capture afterwards."""
         self.is_quitting = True
         # Save window geometry
         geom = self.geometry()
@@ -635,32 +1630,27 @@ class SnapMosaic(QMainWindow):
         # Stop auto-snap if running
         if self.is_auto_snapping:
             self.stop_auto_snap()
+        if self.burst_thread:
+            self.burst_thread.requestInterruption()
+            self.burst_thread.wait()
+        self.stop_replay()
+        if self.exporter:
+            self.exporter.requestInterruption()
+            self.exporter.wait()
+        if self.batch_saver:
+            self.batch_saver.requestInterruption()
+            self.batch_saver.wait()
+        # Let queued saves finish writing before we exit
+        self.encoder.wait_for_done()
+        self.thumbnails.wait_for_done()
+        QApplication.processEvents() # Deliver the last 'saved' notifications so they are persisted
+        if self.session_store is not None:
+            self.session_store.close()
+        self.capture_store.close()
+        self.capture_backend.close()
+        self.sounds.close()
+        self.control_server.close()
         # Stop hotkey listeners
-        if self.hotkey_listener:
-            self.hotkey_listener.stop()
-        if self.auto_snap_hotkey_listener:
-            self.auto_snap_hotkey_listener.stop()
+        self.hotkey_listener.stop()
         self.tray_icon.hide()
-        QApplication.instance().quit()
-
-    def redraw_grid(self):
-        # Clear the existing layout first
-        while self.scroll_layout.count():
-            item = self.scroll_layout.takeAt(0)
-            if item.widget():
-                item.widget().setParent(None)
-
-        if not self.captured_widgets:
-            return
-
-        viewport_width = self.scroll_area.viewport().width()
-        if not self.captured_widgets:
-            return
-        image_width = self.captured_widgets[0].width()
-        spacing = self.scroll_layout.spacing()
-        num_columns = max(1, (viewport_width - spacing) // (image_width + spacing))
-
-        for i, widget in enumerate(self.captured_widgets):
-            row = i // num_columns
-            col = i % num_columns
-            self.scroll_layout.addWidget(widget, row, col)
+        self.config.close() # Write any settings still waiting for the debounced flush
@@ -0,0 +1,119 @@
+from itertools import combinations
+import numpy as np
+from PySide6.QtCore import Qt
+
+from .imaging import qimage_to_array, gray_array
+
+HASH_BITS = 64
+
+
+def dhash(image):
+    """
+    64-bit difference hash of a QImage.
+
+    The image is shrunk to 9x8 grey pixels and each bit records whether a
+    pixel is brighter than its right-hand neighbour, which makes the hash
+    robust to scaling, compression noise and small shifts.
+    """
+    # A fast pre-shrink keeps the smooth (area-averaging) pass cheap for 4K+ frames
+    if image.width() > 256:
+        image = image.scaledToWidth(256, Qt.TransformationMode.FastTransformation)
+    small = image.scaled(9, 8, Qt.AspectRatioMode.IgnoreAspectRatio, Qt.TransformationMode.SmoothTransformation)
+    gray = gray_array(qimage_to_array(small))
+    bits = gray[:, 1:] > gray[:, :-1]
+    return int.from_bytes(np.packbits(bits).tobytes(), 'big')
+
+
+def hamming_distance(a, b):
+    return (a ^ b).bit_count()
+
+
+class HashIndex:
+    """
+    In-memory index of perceptual hashes supporting fast Hamming-radius search.
+
+    Uses multi-index hashing: each 64-bit hash is split into `chunks` 16-bit
+    substrings, each with its own exact-match table. By the pigeonhole
+    principle, two hashes within distance d share at least one substring that
+    differs by at most d // chunks bits, so a query only probes the few table
+    buckets within that radius and verifies the candidates, instead of
+    scanning every entry.
+    """
+
+    def __init__(self, chunks=4):
+        self.chunks = chunks
+        self.chunk_bits = HASH_BITS // chunks
+        self._mask = (1 << self.chunk_bits) - 1
+        self._tables = [dict() for _ in range(chunks)]
+        self._hashes = {} # key -> hash
+        self._neighbour_masks = {}
+
+    def __len__(self):
+        return len(self._hashes)
+
+    def __contains__(self, key):
+        return key in self._hashes
+
+    def _split(self, value):
+        return [(value >> (i * self.chunk_bits)) & self._mask for i in range(self.chunks)]
+
+    def _masks_within(self, radius):
+        # All bit masks of at most `radius` set bits within one chunk, cached per radius
+        masks = self._neighbour_masks.get(radius)
+        if masks is None:
+            masks = [0]
+            for r in range(1, radius + 1):
+                for bits in combinations(range(self.chunk_bits), r):
+                    mask = 0
+                    for bit in bits:
+                        mask |= 1 << bit
+                    masks.append(mask)
+            self._neighbour_masks[radius] = masks
+        return masks
+
+    def add(self, key, value):
+        if key in self._hashes:
+            self.remove(key)
+        self._hashes[key] = value
+        for table, chunk in zip(self._tables, self._split(value)):
+            table.setdefault(chunk, set()).add(key)
+
+    def remove(self, key):
+        value = self._hashes.pop(key, None)
+        if value is None:
+            return
+        for table, chunk in zip(self._tables, self._split(value)):
+            bucket = table.get(chunk)
+            if bucket is not None:
+                bucket.discard(key)
+                if not bucket:
+                    del table[chunk]
+
+    def clear(self):
+        self._hashes.clear()
+        for table in self._tables:
+            table.clear()
+
+    def search(self, value, max_distance):
+        """Return [(key, distance), ...] for all entries within `max_distance`, nearest first."""
+        radius = max_distance // self.chunks
+        masks = self._masks_within(radius)
+        candidates = set()
+        for table, chunk in zip(self._tables, self._split(value)):
+            for mask in masks:
+                bucket = table.get(chunk ^ mask)
+                if bucket:
+                    candidates.update(bucket)
+
+        matches = []
+        for key in candidates:
+            distance = hamming_distance(value, self._hashes[key])
+            if distance <= max_distance:
+                matches.append((key, distance))
+        matches.sort(key=lambda match: match[1])
+        return matches
+
+    def nearest(self, value, max_distance):
+        """Return (key, distance) of the closest entry within `max_distance`, or None."""
+        matches = self.search(value, max_distance)
+        return matches[0] if matches else None
@@ -0,0 +1,155 @@
+import re
+from datetime import datetime
+from PySide6.QtCore import QRect
+
+from .imaging import qimage_to_array
+from .tracing import tracer
+
+
+class CaptureRegion:
+    """A named screen rectangle, with optional per-region interval and auto-save prefix."""
+
+    def __init__(self, name, rect, interval_ms=None, auto_save_prefix=None):
+        self.name = name
+        self.rect = QRect(rect)
+        self.interval_ms = interval_ms # None uses the global Auto-Snap interval
+        self.auto_save_prefix = auto_save_prefix # None uses the global prefix
+
+    def __repr__(self):
+        return f"CaptureRegion({self.name!r}, {self.rect})"
+
+    @classmethod
+    def from_dict(cls, data):
+        rect = QRect(data['x'], data['y'], data['width'], data['height'])
+        return cls(data.get('name') or "Region 1", rect, data.get('interval_ms'), data.get('auto_save_prefix'))
+
+    def to_dict(self):
+        return {
+            'name': self.name,
+            'x': self.rect.x(),
+            'y': self.rect.y(),
+            'width': self.rect.width(),
+            'height': self.rect.height(),
+            'interval_ms': self.interval_ms,
+            'auto_save_prefix': self.auto_save_prefix,
+        }
+
+
+def load_regions(config):
+    regions = []
+    for data in config.get('capture_regions') or []:
+        try:
+            regions.append(CaptureRegion.from_dict(data))
+        except (KeyError, TypeError) as e:
+            print(f"Warning: Ignoring invalid capture region {data!r}: {e}")
+    return regions
+
+
+def save_regions(config, regions):
+    config.set('capture_regions', [region.to_dict() for region in regions])
+
+
+def unique_region_name(regions, base="Region"):
+    names = {region.name for region in regions}
+    index = len(regions) + 1
+    while f"{base} {index}" in names:
+        index += 1
+    return f"{base} {index}"
+
+
+def filename_part(name):
+    """A region name made safe for use in a file name."""
+    return re.sub(r'[^A-Za-z0-9_.-]+', '_', name).strip('_') or "region"
+
+
+def plan_grabs(regions, screens=()):
+    """
+    Group regions into as few screen grabs as possible.
+
+    Regions on the same screen (by their centre; `screens` is a list of
+    screen QRects) share one grab of their bounding box, so the pixels
+    between monitors are never read. Returns a list of (QRect, [regions]).
+    """
+    groups = {}
+    for region in regions:
+        center = region.rect.center()
+        key = next((i for i, screen in enumerate(screens) if screen.contains(center)), -1)
+        groups.setdefault(key, []).append(region)
+
+    plan = []
+    for members in groups.values():
+        bounds = QRect(members[0].rect)
+        for region in members[1:]:
+            bounds = bounds.united(region.rect)
+        plan.append((bounds, members))
+    return plan
+
+
+class RegionFrame:
+    """
+    One region cut from a shared grab.
+
+    `array()` is a zero-copy NumPy view into the grabbed frame, enough for
+    change detection; `image()` copies just the region's pixels (or
+    returns the grab itself when the region is the whole grab).
+    """
+
+    def __init__(self, region, source, rect, pixmap=None, timestamp=None):
+        self.region = region
+        self.source = source # QImage of the whole grab
+        self.rect = rect # Region in the source's pixel coordinates
+        self.pixmap = pixmap # The grabbed QPixmap, when the region is the whole grab
+        self.timestamp = timestamp or datetime.now() # Shared by every region of the grab
+        self._image = None
+
+    def array(self):
+        r = self.rect
+        return qimage_to_array(self.source)[r.top():r.top() + r.height(), r.left():r.left() + r.width()]
+
+    def image(self):
+        if self._image is None:
+            if self.rect == self.source.rect():
+                self._image = self.source
+            else:
+                self._image = self.source.copy(self.rect)
+        return self._image
+
+
+class RegionGrabber:
+    """
+    Grabs several regions with one screen grab per screen.
+
+    `grab_rect(rect)` grabs a logical screen rectangle and returns a QPixmap
+    or QImage (at device pixels), or None on failure.
+    """
+
+    def __init__(self, grab_rect, screens=None):
+        self.grab_rect = grab_rect
+        self.screens = screens # Callable returning screen QRects, for grouping
+        self.grab_count = 0
+
+    def grab(self, regions):
+        """Return a RegionFrame per region, in order; regions whose grab failed are left out."""
+        screens = self.screens() if self.screens else ()
+        frames = {}
+        for bounds, members in plan_grabs(regions, screens):
+            timestamp = datetime.now()
+            with tracer.span('grab', regions=len(members), width=bounds.width(), height=bounds.height()):
+                grabbed = self.grab_rect(bounds)
+            self.grab_count += 1
+            if grabbed is None:
+                continue
+            image = grabbed.toImage() if hasattr(grabbed, 'toImage') else grabbed
+            if image.isNull():
+                continue
+            # The grab may be in device pixels; map logical region rects onto it
+            scale_x = image.width() / bounds.width()
+            scale_y = image.height() / bounds.height()
+            for region in members:
+                offset = region.rect.topLeft() - bounds.topLeft()
+                rect = QRect(round(offset.x() * scale_x), round(offset.y() * scale_y),
+                             round(region.rect.width() * scale_x), round(region.rect.height() * scale_y))
+                rect = rect.intersected(image.rect())
+                pixmap = grabbed if grabbed is not image and rect == image.rect() else None
+                frames[id(region)] = RegionFrame(region, image, rect, pixmap, timestamp)
+        return [frames[id(region)] for region in regions if id(region) in frames]
@@ -0,0 +1,170 @@
+import threading
+import time
+from collections import deque
+from datetime import datetime
+
+from PySide6.QtCore import QThread, QBuffer, QByteArray, QIODevice, Qt
+from PySide6.QtGui import QImage
+
+from .tracing import tracer
+
+
+class ReplayFrame:
+    """One buffered frame, held either as an in-memory JPEG or as a raw QImage."""
+
+    def __init__(self, timestamp, data, size_in_bytes):
+        self.timestamp = timestamp
+        self.data = data # bytes (JPEG) or QImage (raw)
+        self.size_in_bytes = size_in_bytes
+
+    def image(self):
+        if isinstance(self.data, QImage):
+            return self.data
+        return QImage.fromData(self.data, 'JPG')
+
+
+class ReplayBuffer:
+    """
+    Fixed-size ring of recent frames, bounded by frame count and by memory.
+
+    Frames are optionally downscaled to `max_width` and compressed to JPEG
+    in memory; nothing is ever written to disk. The oldest frames are
+    dropped once either bound is exceeded.
+    """
+
+    def __init__(self, max_frames=50, memory_budget_mb=128, max_width=0, storage='jpeg', jpeg_quality=85):
+        self.max_frames = max(1, int(max_frames))
+        self.memory_budget = int(memory_budget_mb * 1024 * 1024)
+        self.max_width = max_width
+        self.storage = storage
+        self.jpeg_quality = jpeg_quality
+        self._lock = threading.Lock()
+        self._frames = deque()
+        self.total_bytes = 0
+        self.evicted_count = 0
+
+    def __len__(self):
+        with self._lock:
+            return len(self._frames)
+
+    def encode(self, image, timestamp=None):
+        """Downscale/compress `image` into a ReplayFrame (safe to call off the GUI thread)."""
+        timestamp = timestamp or datetime.now()
+        if self.max_width and image.width() > self.max_width:
+            image = image.scaledToWidth(self.max_width, Qt.TransformationMode.SmoothTransformation)
+        if self.storage == 'raw':
+            return ReplayFrame(timestamp, image, image.sizeInBytes())
+
+        data = QByteArray()
+        buffer = QBuffer(data)
+        buffer.open(QIODevice.OpenModeFlag.WriteOnly)
+        image.save(buffer, 'JPG', self.jpeg_quality)
+        buffer.close()
+        encoded = data.data()
+        return ReplayFrame(timestamp, encoded, len(encoded))
+
+    def append(self, frame):
+        with self._lock:
+            self._frames.append(frame)
+            self.total_bytes += frame.size_in_bytes
+            while self._frames and (len(self._frames) > self.max_frames
+                                    or (self.total_bytes > self.memory_budget and len(self._frames) > 1)):
+                dropped = self._frames.popleft()
+                self.total_bytes -= dropped.size_in_bytes
+                self.evicted_count += 1
+
+    def take_all(self):
+        """Remove and return every buffered frame, oldest first."""
+        with self._lock:
+            frames = list(self._frames)
+            self._frames.clear()
+            self.total_bytes = 0
+        return frames
+
+    def clear(self):
+        self.take_all()
+
+    def stats(self):
+        with self._lock:
+            span = 0.0
+            if len(self._frames) > 1:
+                span = (self._frames[-1].timestamp - self._frames[0].timestamp).total_seconds()
+            return {
+                'frames': len(self._frames),
+                'max_frames': self.max_frames,
+                'bytes': self.total_bytes,
+                'memory_budget': self.memory_budget,
+                'seconds': span,
+                'evicted': self.evicted_count,
+            }
+
+
+class ReplayRecorder(QThread):
+    """
+    Continuously grabs into a ReplayBuffer at `fps` until interrupted.
+
+    Grabs run against a monotonic schedule; if a grab overruns, the missed
+    slots are skipped rather than made up. `grab_func` must be safe to call
+    off the GUI thread (see `capture_backends.off_thread_grab`).
+    """
+
+    def __init__(self, grab_func, buffer, fps=5.0, parent=None):
+        super().__init__(parent)
+        self.grab_func = grab_func
+        self.buffer = buffer
+        self.fps = max(0.1, float(fps))
+        self.frames_grabbed = 0
+        self.skipped_slots = 0
+        self._busy_seconds = 0.0
+        self._started_at = None
+        self._stats_lock = threading.Lock()
+
+    def stats(self):
+        """Buffer contents plus the recorder's CPU cost as a share of one core."""
+        stats = self.buffer.stats()
+        with self._stats_lock:
+            elapsed = time.monotonic() - self._started_at if self._started_at else 0.0
+            stats.update({
+                'fps': self.fps,
+                'frames_grabbed': self.frames_grabbed,
+                'skipped_slots': self.skipped_slots,
+                'cpu_percent': 100.0 * self._busy_seconds / elapsed if elapsed > 0 else 0.0,
+                'avg_frame_ms': 1000.0 * self._busy_seconds / self.frames_grabbed if self.frames_grabbed else 0.0,
+            })
+        return stats
+
+    def run(self):
+        interval = 1.0 / self.fps
+        start = time.monotonic()
+        with self._stats_lock:
+            self._started_at = start
+        index = 0
+        while not self.isInterruptionRequested():
+            # Sleep in short slices so stopping the recorder stays responsive
+            deadline = start + index * interval
+            while not self.isInterruptionRequested():
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                time.sleep(min(remaining, 0.05))
+            if self.isInterruptionRequested():
+                break
+
+            work_start = time.monotonic()
+            timestamp = datetime.now()
+            frame = self.grab_func()
+            if frame is not None:
+                if hasattr(frame, 'toImage'):
+                    frame = frame.toImage()
+                if not frame.isNull():
+                    with tracer.span('replay_frame'):
+                        self.buffer.append(self.buffer.encode(frame, timestamp))
+            work_end = time.monotonic()
+
+            with self._stats_lock:
+                self.frames_grabbed += 1
+                self._busy_seconds += work_end - work_start
+            next_index = int((work_end - start) / interval) + 1
+            with self._stats_lock:
+                self.skipped_slots += max(0, next_index - index - 1)
+            index = max(index + 1, next_index)
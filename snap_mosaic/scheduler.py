@@ -0,0 +1,125 @@
+import time
+from collections import deque
+from PySide6.QtCore import QObject, QTimer, Qt, Signal
+
+from .tracing import tracer
+
+# Never fire faster than this, whatever the config says
+MIN_INTERVAL_MS = 10
+
+
+def format_interval(interval_ms):
+    """Human readable interval for tooltips and log messages, e.g. '250 ms' or '10s'."""
+    if interval_ms < 1000:
+        return f"{interval_ms} ms"
+    seconds = interval_ms / 1000.0
+    return f"{seconds:g}s"
+
+
+class AutoSnapScheduler(QObject):
+    """
+    Emits `tick` at a fixed rate measured against a monotonic clock.
+
+    Each deadline is computed as `start + n * interval`, so the time spent
+    handling a tick (or a late timer) never pushes later ticks back. If a
+    tick is still being handled, or `busy_check` reports the pipeline is
+    full, when the next deadline arrives, that deadline is dropped instead
+    of being queued; deadlines missed while the GUI thread was blocked are
+    dropped the same way.
+    """
+    tick = Signal()
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.interval_ms = 1000
+        self.busy_check = None
+        self.tick_count = 0
+        self.dropped_ticks = 0
+        self._active = False
+        self._in_tick = False
+        self._start_time = 0.0
+        self._next_index = 0
+        self._tick_times = deque(maxlen=30)
+
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setTimerType(Qt.TimerType.PreciseTimer)
+        self._timer.timeout.connect(self._on_timeout)
+
+    def is_active(self):
+        return self._active
+
+    def start(self, interval_ms):
+        self.interval_ms = max(MIN_INTERVAL_MS, int(interval_ms))
+        self.tick_count = 0
+        self.dropped_ticks = 0
+        self._tick_times.clear()
+        self._active = True
+        self._start_time = time.monotonic()
+        self._next_index = 1
+        self._schedule_next()
+
+    def stop(self):
+        self._active = False
+        self._timer.stop()
+
+    def set_interval(self, interval_ms):
+        """Change the interval; the new schedule is anchored at the next tick."""
+        self.interval_ms = max(MIN_INTERVAL_MS, int(interval_ms))
+        if self._active:
+            self._start_time = time.monotonic()
+            self._next_index = 1
+            self._schedule_next()
+
+    def achieved_fps(self):
+        """Capture rate over the most recent ticks."""
+        if len(self._tick_times) < 2:
+            return 0.0
+        elapsed = self._tick_times[-1] - self._tick_times[0]
+        if elapsed <= 0:
+            return 0.0
+        return (len(self._tick_times) - 1) / elapsed
+
+    def stats(self):
+        return {
+            'interval_ms': self.interval_ms,
+            'target_fps': 1000.0 / self.interval_ms,
+            'achieved_fps': self.achieved_fps(),
+            'ticks': self.tick_count,
+            'dropped_ticks': self.dropped_ticks,
+        }
+
+    def _deadline(self, index):
+        return self._start_time + index * self.interval_ms / 1000.0
+
+    def _schedule_next(self):
+        delay_ms = (self._deadline(self._next_index) - time.monotonic()) * 1000.0
+        self._timer.start(max(0, int(round(delay_ms))))
+
+    def _on_timeout(self):
+        if not self._active:
+            return
+
+        now = time.monotonic()
+        # Deadlines that passed while we were blocked are dropped, not replayed
+        overdue = int((now - self._start_time) * 1000.0 // self.interval_ms)
+        if overdue > self._next_index:
+            self.dropped_ticks += overdue - self._next_index
+            tracer.counter('auto_snap_dropped', dropped=self.dropped_ticks)
+            self._next_index = overdue
+        self._next_index += 1
+
+        if self._in_tick or (self.busy_check and self.busy_check()):
+            self.dropped_ticks += 1
+            tracer.counter('auto_snap_dropped', dropped=self.dropped_ticks)
+        else:
+            self._in_tick = True
+            try:
+                self.tick_count += 1
+                self._tick_times.append(now)
+                self.tick.emit()
+            finally:
+                self._in_tick = False
+
+        if self._active:
+            self._schedule_next()
@@ -0,0 +1,393 @@
+import os
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import numpy as np
+from PySide6.QtCore import QBuffer, QByteArray, QIODevice, QSize, Qt
+from PySide6.QtGui import QImage
+
+from .imaging import array_to_qimage, qimage_to_array
+from .tiles import apply_tiles, changed_tiles, extract_tiles, grid_shape, merge_tiles
+from .utils import lower_thread_priority
+
+# PNG quality 80 maps to a low zlib level: lossless, but quick to write and read back
+IMAGE_FORMAT = 'PNG'
+IMAGE_QUALITY = 80
+THUMBNAIL_FORMAT = 'JPG'
+THUMBNAIL_QUALITY = 85
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS captures (
+    id INTEGER PRIMARY KEY,
+    timestamp TEXT NOT NULL,
+    width INTEGER NOT NULL,
+    height INTEGER NOT NULL,
+    thumb_width INTEGER NOT NULL,
+    thumb_height INTEGER NOT NULL,
+    is_saved INTEGER NOT NULL DEFAULT 0,
+    phash INTEGER,
+    duplicate_of INTEGER,
+    repeat_count INTEGER NOT NULL DEFAULT 1,
+    region TEXT
+);
+CREATE TABLE IF NOT EXISTS thumbnails (id INTEGER PRIMARY KEY, data BLOB NOT NULL);
+CREATE TABLE IF NOT EXISTS images (id INTEGER PRIMARY KEY, data BLOB NOT NULL);
+CREATE TABLE IF NOT EXISTS deltas (
+    id INTEGER PRIMARY KEY,
+    base INTEGER NOT NULL,
+    tile_size INTEGER NOT NULL,
+    tiles BLOB NOT NULL,
+    data BLOB NOT NULL
+);
+CREATE INDEX IF NOT EXISTS deltas_base ON deltas (base);
+"""
+
+# 'full' stores every image whole; 'delta' stores keyframes and, in between, only the tiles that changed
+STORAGE_MODES = ('full', 'delta')
+# A frame with more of its tiles changed than this is stored as a keyframe instead
+MAX_CHANGED_FRACTION = 0.5
+
+# Columns that may change after a capture is stored
+MUTABLE_FIELDS = ('is_saved', 'repeat_count', 'duplicate_of')
+
+
+def _encode(image, fmt, quality):
+    data = QByteArray()
+    buffer = QBuffer(data)
+    buffer.open(QIODevice.OpenModeFlag.WriteOnly)
+    ok = image.save(buffer, fmt, quality)
+    buffer.close()
+    return data.data() if ok else None
+
+
+def _to_signed64(value):
+    # 64-bit perceptual hashes are unsigned; SQLite integers are signed
+    return value - (1 << 64) if value is not None and value >= 1 << 63 else value
+
+
+def _to_unsigned64(value):
+    return value + (1 << 64) if value is not None and value < 0 else value
+
+
+class SessionStore:
+    """
+    Persists the captures of a session in a SQLite database.
+
+    Metadata, thumbnails and full-resolution images live in separate tables
+    so that restoring the grid only reads the small metadata rows;
+    thumbnails and images are decoded when they are first needed. Writes
+    (including PNG/JPEG encoding) happen in order on a single background
+    thread and are committed one capture at a time, so a crash loses at
+    most the captures still queued.
+
+    With `storage='delta'`, consecutive captures of a region form a chain:
+    a full keyframe every `keyframe_interval` captures, and in between only
+    the `tile_size` tiles that changed since the previous capture (stored
+    as one strip image per capture). Loading a delta frame replays its
+    chain from the keyframe; deleting a frame folds its tiles into the next
+    one, so the rest of the chain stays loadable.
+    """
+
+    def __init__(self, path, storage='full', keyframe_interval=60, tile_size=64):
+        self.path = path
+        self.storage = storage
+        self.keyframe_interval = max(1, keyframe_interval)
+        self.tile_size = tile_size
+        self._chains = {} # (region, width, height) -> (last capture id, its pixels, frames since keyframe)
+        self._decoded = None # (capture id, frame array) of the last frame rebuilt from deltas
+        self.images = None # Anything with peek(id) returning a QImage, such as the CaptureStore; see add()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.executescript(SCHEMA)
+        # Sessions saved before multi-region capture have no region column
+        columns = {row[1] for row in self._connection.execute("PRAGMA table_info(captures)")}
+        if 'region' not in columns:
+            self._connection.execute("ALTER TABLE captures ADD COLUMN region TEXT")
+        self._connection.commit()
+        self._persisted = {row[0] for row in self._connection.execute("SELECT id FROM captures")}
+        # The writer runs at a lower priority: encoding a backlog must not slow down capturing
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="SessionStore",
+                                            initializer=lower_thread_priority)
+
+    def __len__(self):
+        with self._lock:
+            return len(self._persisted)
+
+    def contains(self, capture_id):
+        """True once the capture's full-resolution image is safely on disk."""
+        with self._lock:
+            return capture_id in self._persisted
+
+    # --- Reads (GUI thread) ---
+
+    def load_index(self):
+        """Metadata of every stored capture, oldest first, without touching any image data."""
+        with self._lock:
+            rows = self._connection.execute(
+                "SELECT id, timestamp, width, height, thumb_width, thumb_height, is_saved, phash, "
+                "duplicate_of, repeat_count, region FROM captures ORDER BY id"
+            ).fetchall()
+        return [{
+            'id': row[0],
+            'timestamp': datetime.fromisoformat(row[1]),
+            'width': row[2],
+            'height': row[3],
+            'thumb_width': row[4],
+            'thumb_height': row[5],
+            'is_saved': bool(row[6]),
+            'phash': _to_unsigned64(row[7]),
+            'duplicate_of': row[8],
+            'repeat_count': row[9],
+            'region': row[10],
+        } for row in rows]
+
+    def load_thumbnail(self, capture_id):
+        return self._load_blob("thumbnails", capture_id, THUMBNAIL_FORMAT)
+
+    def load(self, capture_id):
+        """Decode the full-resolution image of a stored capture, or return None."""
+        deltas = [] # (capture id, tile size, tiles, data), newest first
+        frame = keyframe = None
+        with self._lock:
+            current = capture_id
+            while True:
+                if deltas and self._decoded is not None and self._decoded[0] == current:
+                    frame = self._decoded[1].copy()
+                    break
+                row = self._connection.execute("SELECT data FROM images WHERE id = ?", (current,)).fetchone()
+                if row is not None:
+                    keyframe = row[0]
+                    break
+                row = self._connection.execute(
+                    "SELECT base, tile_size, tiles, data FROM deltas WHERE id = ?", (current,)).fetchone()
+                if row is None:
+                    if deltas:
+                        print(f"Error: capture {capture_id} is stored as changes to capture {current}, which is missing")
+                    return None
+                deltas.append((current, *row[1:]))
+                current = row[0]
+
+        if keyframe is not None:
+            image = QImage.fromData(keyframe, IMAGE_FORMAT)
+            if image.isNull():
+                print(f"Error: could not decode stored image for capture {current}")
+                return None
+            if not deltas:
+                return image
+            frame = np.array(qimage_to_array(image))
+        for delta_id, tile_size, tiles, data in reversed(deltas):
+            if not tiles:
+                continue # Nothing changed
+            strip = QImage.fromData(data, IMAGE_FORMAT)
+            if strip.isNull():
+                print(f"Error: could not decode stored changes for capture {delta_id}")
+                return None
+            apply_tiles(frame, np.frombuffer(tiles, dtype=np.uint32), qimage_to_array(strip), tile_size)
+        with self._lock:
+            self._decoded = (capture_id, frame)
+        return array_to_qimage(frame)
+
+    def storage_stats(self):
+        """Number and total size in bytes of the keyframes (whole images) and delta frames stored."""
+        with self._lock:
+            keyframes = self._connection.execute("SELECT COUNT(*), COALESCE(SUM(LENGTH(data)), 0) FROM images").fetchone()
+            deltas = self._connection.execute(
+                "SELECT COUNT(*), COALESCE(SUM(LENGTH(data) + LENGTH(tiles)), 0) FROM deltas").fetchone()
+        return {'keyframes': keyframes[0], 'keyframe_bytes': keyframes[1],
+                'deltas': deltas[0], 'delta_bytes': deltas[1]}
+
+    def _load_blob(self, table, capture_id, fmt):
+        with self._lock:
+            row = self._connection.execute(f"SELECT data FROM {table} WHERE id = ?", (capture_id,)).fetchone()
+        if row is None:
+            return None
+        image = QImage.fromData(row[0], fmt)
+        if image.isNull():
+            print(f"Error: could not decode stored {table[:-1]} for capture {capture_id}")
+            return None
+        return image
+
+    # --- Writes (queued in order on the writer thread) ---
+
+    def add(self, capture, image=None, thumbnail=None):
+        """
+        Store a new capture. `image` and `thumbnail` are QImages; encoding happens in the background.
+        Without an image, the writer thread reads it from `images` when the capture's turn comes, so
+        a backlog of queued captures holds no full-resolution frames. Without a thumbnail, one of the
+        capture's display size is scaled from the image on the writer thread.
+        """
+        size = image.size() if image is not None else capture.original_size
+        thumbnail_size = thumbnail.size() if thumbnail is not None else QSize(capture.display_size)
+        record = (
+            capture.id, capture.timestamp.isoformat(), size.width(), size.height(),
+            thumbnail_size.width(), thumbnail_size.height(), int(capture.is_saved), _to_signed64(capture.phash),
+            capture.duplicate_of, capture.repeat_count, capture.region,
+        )
+        self._executor.submit(self._write_capture, record, image, thumbnail)
+
+    def update(self, capture):
+        """Write the mutable fields (saved flag, duplicate info) of a stored capture."""
+        values = (int(capture.is_saved), capture.repeat_count, capture.duplicate_of, capture.id)
+        self._executor.submit(self._execute,
+                              "UPDATE captures SET is_saved = ?, repeat_count = ?, duplicate_of = ? WHERE id = ?",
+                              values)
+
+    def set_storage(self, storage, keyframe_interval=60, tile_size=64):
+        """Change how later captures are stored; frames already stored are left as they are."""
+        self._executor.submit(self._set_storage, storage, keyframe_interval, tile_size)
+
+    def remove(self, capture_id):
+        self._executor.submit(self._delete, capture_id)
+
+    def clear(self):
+        self._executor.submit(self._delete_all)
+
+    def flush(self):
+        """Block until every queued write has been committed."""
+        self._executor.submit(lambda: None).result()
+
+    def close(self):
+        self._executor.shutdown(wait=True)
+        with self._lock:
+            self._connection.close()
+
+    def _write_capture(self, record, image, thumbnail):
+        if image is None:
+            image = self.images.peek(record[0]) if self.images is not None else None
+            if image is None:
+                return # Deleted before its turn came
+        if thumbnail is None:
+            thumbnail = image.scaled(record[4], record[5], Qt.AspectRatioMode.IgnoreAspectRatio,
+                                     Qt.TransformationMode.SmoothTransformation)
+        chain_key = (record[10], image.width(), image.height())
+        delta, chain = self._encode_frame(chain_key, record[0], image)
+        image_data = _encode(image, IMAGE_FORMAT, IMAGE_QUALITY) if delta is None else delta[-1]
+        thumbnail_data = _encode(thumbnail, THUMBNAIL_FORMAT, THUMBNAIL_QUALITY)
+        if image_data is None or thumbnail_data is None:
+            print(f"Error: could not encode capture {record[0]} for the session store")
+            return
+        try:
+            with self._lock:
+                with self._connection:
+                    self._connection.execute("INSERT OR REPLACE INTO captures VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", record)
+                    self._connection.execute("INSERT OR REPLACE INTO thumbnails VALUES (?, ?)", (record[0], thumbnail_data))
+                    if delta is None:
+                        self._connection.execute("INSERT OR REPLACE INTO images VALUES (?, ?)", (record[0], image_data))
+                    else:
+                        self._connection.execute("INSERT OR REPLACE INTO deltas VALUES (?, ?, ?, ?, ?)", (record[0], *delta))
+                self._persisted.add(record[0])
+        except sqlite3.Error as e:
+            print(f"Error writing capture {record[0]} to the session store: {e}")
+            self._chains.pop(chain_key, None)
+            return
+        if chain is not None:
+            self._chains[chain_key] = chain
+
+    def _encode_frame(self, chain_key, capture_id, image):
+        """
+        In delta mode, decide how to store `image`: returns (delta, chain), where
+        delta is None for a keyframe or else (base id, tile size, tiles, strip data),
+        and chain is the chain's state once the frame is written.
+        """
+        if self.storage != 'delta':
+            return None, None
+        array = qimage_to_array(image) # Keeps `image` alive, so it can be compared with the next frame
+        chain = self._chains.get(chain_key)
+        if chain is not None and chain[2] < self.keyframe_interval:
+            changed = changed_tiles(array, chain[1], self.tile_size)
+            rows, columns = grid_shape(array.shape[0], array.shape[1], self.tile_size)
+            if len(changed) <= rows * columns * MAX_CHANGED_FRACTION:
+                data = b''
+                if len(changed):
+                    data = _encode(array_to_qimage(extract_tiles(array, changed, self.tile_size)),
+                                   IMAGE_FORMAT, IMAGE_QUALITY)
+                if data is not None:
+                    return (chain[0], self.tile_size, changed.tobytes(), data), (capture_id, array, chain[2] + 1)
+        return None, (capture_id, array, 1)
+
+    def _set_storage(self, storage, keyframe_interval, tile_size):
+        self.storage = storage
+        self.keyframe_interval = max(1, keyframe_interval)
+        self.tile_size = tile_size
+        self._chains.clear() # The next capture of each region starts with a keyframe
+
+    def _rebase_next(self, capture_id):
+        """Before deleting a frame, make the frame stored as changes to it loadable without it."""
+        with self._lock:
+            child = self._connection.execute(
+                "SELECT id, tile_size, tiles, data FROM deltas WHERE base = ?", (capture_id,)).fetchone()
+            if child is None:
+                return
+            parent = self._connection.execute(
+                "SELECT base, tile_size, tiles, data FROM deltas WHERE id = ?", (capture_id,)).fetchone()
+        child_id = child[0]
+        if parent is None or parent[1] != child[1]:
+            # The deleted frame is a keyframe: the next frame becomes one
+            image = self.load(child_id)
+            data = _encode(image, IMAGE_FORMAT, IMAGE_QUALITY) if image is not None else None
+            if data is None:
+                print(f"Error: could not rebuild capture {child_id}; it is lost with capture {capture_id}")
+                return
+            with self._lock:
+                with self._connection:
+                    self._connection.execute("INSERT OR REPLACE INTO images VALUES (?, ?)", (child_id, data))
+                    self._connection.execute("DELETE FROM deltas WHERE id = ?", (child_id,))
+            return
+
+        # Both are deltas: the next frame takes on the deleted frame's tiles too
+        tile_size = child[1]
+        strips = []
+        for tiles, data in ((parent[2], parent[3]), (child[2], child[3])):
+            strip = qimage_to_array(QImage.fromData(data, IMAGE_FORMAT)) if tiles else np.empty((0, tile_size, 4), np.uint8)
+            strips.append((np.frombuffer(tiles, dtype=np.uint32), strip))
+        tiles, strip = merge_tiles(*strips[0], *strips[1], tile_size)
+        data = _encode(array_to_qimage(strip), IMAGE_FORMAT, IMAGE_QUALITY) if len(tiles) else b''
+        with self._lock:
+            with self._connection:
+                self._connection.execute("UPDATE deltas SET base = ?, tiles = ?, data = ? WHERE id = ?",
+                                         (parent[0], tiles.tobytes(), data, child_id))
+
+    def _execute(self, sql, values):
+        try:
+            with self._lock:
+                with self._connection:
+                    self._connection.execute(sql, values)
+        except sqlite3.Error as e:
+            print(f"Error updating the session store: {e}")
+
+    def _delete(self, capture_id):
+        try:
+            self._rebase_next(capture_id)
+            with self._lock:
+                with self._connection:
+                    for table in ("captures", "thumbnails", "images", "deltas"):
+                        self._connection.execute(f"DELETE FROM {table} WHERE id = ?", (capture_id,))
+                self._persisted.discard(capture_id)
+                self._decoded = None
+            # A chain whose last frame is gone starts over with a keyframe
+            for key, chain in list(self._chains.items()):
+                if chain[0] == capture_id:
+                    del self._chains[key]
+        except sqlite3.Error as e:
+            print(f"Error removing capture {capture_id} from the session store: {e}")
+
+    def _delete_all(self):
+        try:
+            with self._lock:
+                with self._connection:
+                    for table in ("captures", "thumbnails", "images", "deltas"):
+                        self._connection.execute(f"DELETE FROM {table}")
+                self._persisted.clear()
+                self._decoded = None
+                # Give the space of a cleared session back to the file system
+                self._connection.execute("VACUUM")
+            self._chains.clear()
+        except sqlite3.Error as e:
+            print(f"Error clearing the session store: {e}")
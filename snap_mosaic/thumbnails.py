@@ -0,0 +1,228 @@
+import heapq
+import itertools
+from collections import OrderedDict
+from PySide6.QtCore import QObject, QRunnable, QThreadPool, QSize, Qt, Signal
+from PySide6.QtGui import QPixmap
+
+from .tracing import tracer
+
+# Request priorities: cells on screen (and new captures) before everything else
+HIGH_PRIORITY = 0
+LOW_PRIORITY = 1
+
+
+def display_size_for(original_size, max_width):
+    """Logical size a capture of `original_size` pixels is shown at in the grid."""
+    if original_size.width() <= max_width or original_size.width() <= 0:
+        return QSize(original_size)
+    height = max(1, round(original_size.height() * max_width / original_size.width()))
+    return QSize(max_width, height)
+
+
+def pixel_ratio_for(original_size, display_size, device_pixel_ratio):
+    """Device pixel ratio of a thumbnail; thumbnails are never upscaled past the original."""
+    if display_size.width() <= 0:
+        return 1.0
+    return min(device_pixel_ratio, original_size.width() / display_size.width())
+
+
+class _ThumbnailSignals(QObject):
+    # capture, cache key, QImage (or None if the original could not be loaded)
+    finished = Signal(object, object, object)
+
+
+class _ThumbnailJob(QRunnable):
+    def __init__(self, signals, capture, key, display_size, pixel_ratio):
+        super().__init__()
+        self.signals = signals
+        self.capture = capture
+        self.key = key
+        self.display_size = display_size
+        self.pixel_ratio = pixel_ratio
+
+    def run(self):
+        # Only QImages are touched here; the pixmap is made on the GUI thread.
+        thumbnail = None
+        try:
+            image = self.capture.original_image()
+            if image is not None and not image.isNull():
+                pixel_size = QSize(max(1, round(self.display_size.width() * self.pixel_ratio)),
+                                   max(1, round(self.display_size.height() * self.pixel_ratio)))
+                with tracer.span('thumbnail', width=image.width(), height=image.height()):
+                    if image.size() == pixel_size:
+                        thumbnail = image.copy()
+                    else:
+                        thumbnail = image.scaled(pixel_size, Qt.AspectRatioMode.IgnoreAspectRatio,
+                                                 Qt.TransformationMode.SmoothTransformation)
+                thumbnail.setDevicePixelRatio(self.pixel_ratio)
+        except Exception as e:
+            print(f"Error creating thumbnail for capture {self.key[0]}: {e}")
+        self.signals.finished.emit(self.capture, self.key, thumbnail)
+
+
+class ThumbnailService(QObject):
+    """
+    Produces the grid's display pixmaps on a small worker pool.
+
+    Thumbnails are cached per (capture id, max display width, device pixel
+    ratio) in a memory-bounded LRU cache, so switching back to an earlier
+    width is instant. Requests are queued by priority and only a few are
+    handed to the pool at a time, so when the target width changes the
+    visible cells are regenerated first and a request for a cell scrolled
+    into view overtakes the background work. Until its new thumbnail
+    arrives a capture keeps its old one, which the grid scales into the new
+    cell size.
+    """
+    thumbnail_ready = Signal(object) # Capture whose display pixmap was replaced
+
+    def __init__(self, max_workers=2, cache_mb=128, parent=None):
+        super().__init__(parent)
+        self.thread_pool = QThreadPool(self)
+        self.thread_pool.setMaxThreadCount(max(1, max_workers))
+        self.max_width = 500
+        self.device_pixel_ratio = 1.0
+        self.cache_budget = int(cache_mb * 1024 * 1024)
+
+        self._signals = _ThumbnailSignals()
+        # Worker emissions are queued onto this object's (GUI) thread.
+        self._signals.finished.connect(self._on_finished)
+
+        self._cache = OrderedDict() # key -> QPixmap, least recently used first
+        self._cache_bytes = 0
+        self._queue = [] # heap of (priority, sequence, key, capture)
+        self._queued = {} # key -> best queued priority
+        self._in_flight = set()
+        self._sequence = itertools.count()
+        self.generated_count = 0
+        self.cache_hits = 0
+
+    def stats(self):
+        return {
+            'max_width': self.max_width,
+            'device_pixel_ratio': self.device_pixel_ratio,
+            'queued': len(self._queued),
+            'in_flight': len(self._in_flight),
+            'generated': self.generated_count,
+            'cache_hits': self.cache_hits,
+            'cached': len(self._cache),
+            'cache_bytes': self._cache_bytes,
+        }
+
+    def set_target(self, max_width, device_pixel_ratio=1.0):
+        """Change the width/ratio thumbnails are made for. Queued work for the old target is dropped."""
+        if (max_width, device_pixel_ratio) == (self.max_width, self.device_pixel_ratio):
+            return False
+        self.max_width = max_width
+        self.device_pixel_ratio = device_pixel_ratio
+        self._queue.clear()
+        self._queued.clear()
+        return True
+
+    def display_size(self, original_size):
+        return display_size_for(original_size, self.max_width)
+
+    def key_for(self, capture):
+        return (capture.id, self.max_width, self.device_pixel_ratio)
+
+    def is_current(self, capture):
+        """True if the capture's display pixmap matches the current target."""
+        key = self.key_for(capture)
+        if capture.thumbnail_key == key:
+            return True
+        pixmap = capture.display_pixmap
+        if pixmap is None:
+            return False
+        display_size = self.display_size(capture.original_size)
+        ratio = pixel_ratio_for(capture.original_size, display_size, self.device_pixel_ratio)
+        # Thumbnails made elsewhere (at capture time, or restored from the session) may already fit
+        if pixmap.deviceIndependentSize().toSize() == display_size and abs(pixmap.devicePixelRatio() - ratio) < 0.01:
+            capture.thumbnail_key = key
+            return True
+        return False
+
+    def request(self, capture, priority=HIGH_PRIORITY):
+        """Make sure a thumbnail for the current target is (or will be) set on `capture`."""
+        capture.display_size = self.display_size(capture.original_size)
+        if priority == LOW_PRIORITY and capture.has_lazy_thumbnail():
+            return # Restored and never shown yet; it is requested when painted
+        if self.is_current(capture):
+            return
+        key = self.key_for(capture)
+        cached = self._cache.get(key)
+        if cached is not None:
+            self._cache.move_to_end(key)
+            self.cache_hits += 1
+            capture.set_display_pixmap(cached, key)
+            return
+        if key in self._in_flight or self._queued.get(key, LOW_PRIORITY + 1) <= priority:
+            return
+        self._queued[key] = priority
+        heapq.heappush(self._queue, (priority, next(self._sequence), key, capture))
+        self._pump()
+
+    def rescale(self, captures, visible=()):
+        """
+        Bring every capture to the current target: `visible` first, then
+        the rest in the given order. Restored captures whose thumbnail was
+        never loaded are left to be requested when they are painted.
+        """
+        for capture in visible:
+            self.request(capture, HIGH_PRIORITY)
+        for capture in captures:
+            self.request(capture, LOW_PRIORITY)
+
+    def discard(self, capture):
+        """Forget the cached thumbnails of a deleted capture."""
+        for key in [key for key in self._cache if key[0] == capture.id]:
+            self._cache_bytes -= self._pixmap_bytes(self._cache.pop(key))
+        self._queued = {key: p for key, p in self._queued.items() if key[0] != capture.id}
+
+    def clear(self):
+        self._queue.clear()
+        self._queued.clear()
+        self._cache.clear()
+        self._cache_bytes = 0
+
+    def wait_for_done(self, msecs=-1):
+        self._queue.clear()
+        self._queued.clear()
+        return self.thread_pool.waitForDone(msecs)
+
+    def _pump(self):
+        while self._queue and len(self._in_flight) < self.thread_pool.maxThreadCount():
+            priority, _, key, capture = heapq.heappop(self._queue)
+            if self._queued.get(key) != priority:
+                continue # Superseded by a higher-priority request, or dropped
+            del self._queued[key]
+            if key in self._in_flight:
+                continue
+            self._in_flight.add(key)
+            display_size = self.display_size(capture.original_size)
+            ratio = pixel_ratio_for(capture.original_size, display_size, self.device_pixel_ratio)
+            self.thread_pool.start(_ThumbnailJob(self._signals, capture, key, display_size, ratio))
+
+    def _on_finished(self, capture, key, image):
+        self._in_flight.discard(key)
+        if image is not None:
+            pixmap = QPixmap.fromImage(image)
+            self.generated_count += 1
+            self._store(key, pixmap)
+            # A result for an earlier target is still worth caching, but not showing
+            if key == self.key_for(capture):
+                capture.set_display_pixmap(pixmap, key)
+                self.thumbnail_ready.emit(capture)
+        self._pump()
+
+    @staticmethod
+    def _pixmap_bytes(pixmap):
+        return pixmap.width() * pixmap.height() * max(1, pixmap.depth() // 8)
+
+    def _store(self, key, pixmap):
+        previous = self._cache.pop(key, None)
+        if previous is not None:
+            self._cache_bytes -= self._pixmap_bytes(previous)
+        self._cache[key] = pixmap
+        self._cache_bytes += self._pixmap_bytes(pixmap)
+        while self._cache_bytes > self.cache_budget and len(self._cache) > 1:
+            _, evicted = self._cache.popitem(last=False)
+            self._cache_bytes -= self._pixmap_bytes(evicted)
@@ -0,0 +1,65 @@
+"""
+Fixed-size tiles of a frame, for storing only the parts that changed.
+
+Frames are (height, width, 4) uint8 arrays, as returned by
+`qimage_to_array`. A frame is cut into `tile` x `tile` squares in row
+order (edge tiles are padded with zeros). `changed_tiles` compares two
+frames' pixels tile by tile with whole-array NumPy operations, so finding
+the changed tiles needs no Python loop and can't miss a change.
+"""
+import numpy as np
+
+
+def grid_shape(height, width, tile):
+    """(rows, columns) of tiles covering a height x width frame."""
+    return -(-height // tile), -(-width // tile)
+
+
+def _tiled(array, tile):
+    """A (rows, columns, tile, tile, 4) view of `array`, padded to whole tiles."""
+    height, width = array.shape[:2]
+    rows, columns = grid_shape(height, width, tile)
+    if (rows * tile, columns * tile) != (height, width):
+        padded = np.zeros((rows * tile, columns * tile, 4), dtype=np.uint8)
+        padded[:height, :width] = array
+        array = padded
+    return np.ascontiguousarray(array).reshape(rows, tile, columns, tile, 4).swapaxes(1, 2)
+
+
+def changed_tiles(array, previous, tile):
+    """Indices of the tiles whose pixels differ between two frames of the same size."""
+    different = _tiled(array, tile) != _tiled(previous, tile)
+    return np.flatnonzero(different.any(axis=(2, 3, 4))).astype(np.uint32)
+
+
+def extract_tiles(array, indices, tile):
+    """The tiles at `indices`, stacked top to bottom into one (len(indices) * tile, tile, 4) strip."""
+    tiles = _tiled(array, tile).reshape(-1, tile, tile, 4)
+    return tiles[indices].reshape(-1, tile, 4)
+
+
+def apply_tiles(array, indices, strip, tile):
+    """Copy a strip from `extract_tiles` back into `array` (a writable frame) at `indices`."""
+    height, width = array.shape[:2]
+    rows, columns = grid_shape(height, width, tile)
+    strip = strip.reshape(-1, tile, tile, 4)
+    for index, pixels in zip(indices.tolist(), strip):
+        y, x = divmod(index, columns)
+        y, x = y * tile, x * tile
+        h, w = min(tile, height - y), min(tile, width - x)
+        array[y:y + h, x:x + w] = pixels[:h, :w]
+    return array
+
+
+def merge_tiles(first_indices, first_strip, second_indices, second_strip, tile):
+    """
+    Combine two consecutive deltas into one: the union of their tiles,
+    taking the second's pixels where both changed a tile.
+    """
+    tiles = {}
+    for indices, strip in ((first_indices, first_strip), (second_indices, second_strip)):
+        for index, pixels in zip(indices.tolist(), strip.reshape(-1, tile, tile, 4)):
+            tiles[index] = pixels
+    indices = np.array(sorted(tiles), dtype=np.uint32)
+    strip = np.concatenate([tiles[index] for index in indices.tolist()]) if tiles else np.empty((0, tile, 4), np.uint8)
+    return indices, strip
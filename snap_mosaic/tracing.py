@@ -0,0 +1,175 @@
+"""
+Lightweight span recorder for the capture pipeline.
+
+Spans are written as Chrome trace-event JSON, which can be opened in
+chrome://tracing or https://ui.perfetto.dev. Tracing is off by default and
+costs a single attribute check per span when disabled. Enable it with the
+`--trace[=PATH]` command-line flag or the SNAPMOSAIC_TRACE environment
+variable (a file path, or 1 for the default path).
+"""
+import json
+import os
+import threading
+import time
+
+DEFAULT_TRACE_PATH = "snapmosaic-trace.json"
+ENV_VAR = "SNAPMOSAIC_TRACE"
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    __slots__ = ('tracer', 'name', 'args', 'start')
+
+    def __init__(self, tracer, name, args):
+        self.tracer = tracer
+        self.name = name
+        self.args = args
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.tracer._record_complete(self.name, self.start, time.perf_counter_ns(), self.args)
+        return False
+
+
+class Tracer:
+    def __init__(self, max_events=1_000_000):
+        self.enabled = False
+        self.output_path = None
+        self.max_events = max_events
+        self.dropped_events = 0
+        self._events = []
+        self._lock = threading.Lock()
+        self._origin_ns = time.perf_counter_ns()
+        self._pid = os.getpid()
+
+    def enable(self, output_path=DEFAULT_TRACE_PATH):
+        self.output_path = output_path
+        self._origin_ns = time.perf_counter_ns()
+        self.enabled = True
+        print(f"Tracing enabled, writing to {os.path.abspath(output_path)} on exit.")
+
+    def disable(self):
+        self.enabled = False
+
+    def span(self, name, **args):
+        """Context manager timing one pipeline stage."""
+        if not self.enabled:
+            return _NULL_SPAN
+        return _Span(self, name, args)
+
+    def instant(self, name, **args):
+        """Record a point-in-time event, e.g. a hotkey press."""
+        if not self.enabled:
+            return
+        self._append({
+            'name': name, 'ph': 'i', 's': 't',
+            'ts': self._micros(time.perf_counter_ns()),
+            'pid': self._pid, 'tid': threading.get_ident(),
+            'args': args,
+        })
+
+    def counter(self, name, **values):
+        """Record counter values (e.g. queue depth) as a track in the trace viewer."""
+        if not self.enabled:
+            return
+        self._append({
+            'name': name, 'ph': 'C',
+            'ts': self._micros(time.perf_counter_ns()),
+            'pid': self._pid, 'tid': threading.get_ident(),
+            'args': values,
+        })
+
+    def events(self):
+        with self._lock:
+            return list(self._events)
+
+    def clear(self):
+        with self._lock:
+            self._events.clear()
+            self.dropped_events = 0
+
+    def save(self, output_path=None):
+        """Write all recorded events as Chrome trace-event JSON. Returns the path, or None."""
+        path = output_path or self.output_path
+        if not path:
+            return None
+        with self._lock:
+            events = list(self._events)
+            dropped = self.dropped_events
+        thread_names = [{
+            'name': 'thread_name', 'ph': 'M', 'pid': self._pid, 'tid': thread.ident,
+            'args': {'name': thread.name},
+        } for thread in threading.enumerate()]
+        trace = {
+            'traceEvents': thread_names + events,
+            'displayTimeUnit': 'ms',
+            'otherData': {'application': 'SnapMosaic', 'dropped_events': dropped},
+        }
+        try:
+            with open(path, 'w') as f:
+                json.dump(trace, f)
+        except OSError as e:
+            print(f"Error writing trace to {path}: {e}")
+            return None
+        print(f"Wrote {len(events)} trace events to {path}")
+        return path
+
+    def _micros(self, ns):
+        return (ns - self._origin_ns) / 1000.0
+
+    def _record_complete(self, name, start_ns, end_ns, args):
+        self._append({
+            'name': name, 'ph': 'X', 'cat': 'capture',
+            'ts': self._micros(start_ns), 'dur': (end_ns - start_ns) / 1000.0,
+            'pid': self._pid, 'tid': threading.get_ident(),
+            'args': args,
+        })
+
+    def _append(self, event):
+        with self._lock:
+            if len(self._events) >= self.max_events:
+                self.dropped_events += 1
+                return
+            self._events.append(event)
+
+
+tracer = Tracer()
+
+
+def configure_from_args(argv, environ=os.environ):
+    """
+    Enable the global tracer from `--trace[=PATH]` in `argv` or the
+    SNAPMOSAIC_TRACE environment variable. Returns `argv` without the flag.
+    """
+    path = None
+    remaining = []
+    for arg in argv:
+        if arg == '--trace':
+            path = DEFAULT_TRACE_PATH
+        elif arg.startswith('--trace='):
+            path = arg.split('=', 1)[1] or DEFAULT_TRACE_PATH
+        else:
+            remaining.append(arg)
+
+    env_value = environ.get(ENV_VAR, '').strip()
+    if path is None and env_value and env_value.lower() not in ('0', 'false', 'no', 'off'):
+        path = DEFAULT_TRACE_PATH if env_value.lower() in ('1', 'true', 'yes', 'on') else env_value
+
+    if path:
+        tracer.enable(path)
+    return remaining
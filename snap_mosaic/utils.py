@@ -1,5 +1,9 @@
 import sys
 import os
+import threading
+
+# Niceness of background writer threads, so they get the CPU only when the capture path leaves some over
+BACKGROUND_NICENESS = 10
 
 def resource_path(relative_path):
     """ Get absolute path to resource, works for dev and for PyInstaller """
@@ -11,3 +15,49 @@ def resource_path(relative_path):
         base_path = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
 
     return os.path.join(base_path, relative_path)
+
+
+def timestamped_filename(directory, prefix, timestamp, extension, taken=()):
+    """
+    Name a file after `timestamp` (a datetime), to the millisecond:
+    `{prefix}-{YYYYmmdd_HHMMSS_mmm}.{extension}`. If that name exists in
+    `directory` or is in `taken` (names handed out whose writes may still
+    be pending), a -2, -3, ... suffix is added.
+    """
+    stamp = timestamp.strftime("%Y%m%d_%H%M%S_%f")[:-3]
+    base = f"{prefix}-{stamp}.{extension}"
+
+    def in_use(name):
+        return name in taken or os.path.exists(os.path.join(directory, name))
+
+    filename = base
+    if in_use(filename):
+        repeat = 2
+        while in_use(f"{prefix}-{stamp}-{repeat}.{extension}"):
+            repeat += 1
+        filename = f"{prefix}-{stamp}-{repeat}.{extension}"
+    return filename
+
+
+def lower_thread_priority():
+    """
+    Lower the calling thread's scheduling priority. Only Linux schedules
+    threads by niceness; elsewhere this does nothing.
+    """
+    if not sys.platform.startswith('linux'):
+        return
+    try:
+        os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), BACKGROUND_NICENESS)
+    except OSError as e:
+        print(f"Could not lower background thread priority: {e}")
+
+
+def numbered_filename(directory, prefix, counter, extension, taken=()):
+    """
+    The first `{prefix}-{NNNN}.{extension}` from `counter` on that is neither
+    in `directory` nor in `taken`. Returns (filename, number).
+    """
+    while (f"{prefix}-{counter:04d}.{extension}" in taken
+           or os.path.exists(os.path.join(directory, f"{prefix}-{counter:04d}.{extension}"))):
+        counter += 1
+    return f"{prefix}-{counter:04d}.{extension}", counter
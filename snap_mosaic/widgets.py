@@ -1,168 +1,229 @@
-from PySide6.QtWidgets import (
-    QWidget, QLabel, QApplication, QRubberBand, QToolTip, QStyle
-)
-from PySide6.QtGui import QPainter, QColor, QPen, QPainterPath, QIcon
-from PySide6.QtCore import Qt, QRect, Signal
+import numpy as np
+from PySide6.QtWidgets import QWidget, QApplication
+from PySide6.QtGui import QPainter, QImage, QColor, QPen, QRegion
+from PySide6.QtCore import Qt, QRect, QPoint, QSize, Signal
+
+from .imaging import qimage_to_array, gray_array
+
+SELECTION_BORDER = 2 # Logical pixels, including antialiasing slack
+MAGNIFIER_SIZE = 120 # Logical size of the magnifier
+MAGNIFIER_ZOOM = 8 # Screen pixels are shown this many times larger
+MAGNIFIER_OFFSET = 24 # Distance between the cursor and the magnifier
+SNAP_DISTANCE = 6 # Logical pixels an edge snaps across
+SNAP_MIN_STRENGTH = 24.0 # Mean luma step that counts as an edge
+
+
+def prerender_backdrop(screenshot, size, device_pixel_ratio):
+    """
+    Return the screenshot as an RGB32 QImage of `size` logical pixels at
+    `device_pixel_ratio`, so painting it is a 1:1 blit. A grab that already
+    has the right size is used as is.
+    """
+    image = screenshot.toImage() if hasattr(screenshot, 'toImage') else QImage(screenshot)
+    pixel_size = QSize(round(size.width() * device_pixel_ratio), round(size.height() * device_pixel_ratio))
+    if image.size() != pixel_size:
+        image = image.scaled(pixel_size, Qt.AspectRatioMode.IgnoreAspectRatio, Qt.TransformationMode.SmoothTransformation)
+    if image.format() != QImage.Format.Format_RGB32:
+        image = image.convertToFormat(QImage.Format.Format_RGB32)
+    image.setDevicePixelRatio(device_pixel_ratio)
+    return image
+
+
+def frame_region(rect, border=SELECTION_BORDER):
+    """The strip along the outline of `rect` that painting its frame touches."""
+    if rect is None or rect.isNull():
+        return QRegion()
+    outer = rect.adjusted(-border, -border, border + 1, border + 1)
+    inner = rect.adjusted(border + 1, border + 1, -border, -border)
+    region = QRegion(outer)
+    return region.subtracted(QRegion(inner)) if inner.isValid() else region
+
+
+def selection_dirty_region(old, new, border=SELECTION_BORDER):
+    """
+    What must be repainted when the selection changes from `old` to `new`
+    (either may be None): the area that changed between inside and outside,
+    plus both outlines. Dragging a corner of a large selection only touches
+    thin strips, not the whole selection.
+    """
+    region = frame_region(old, border).united(frame_region(new, border))
+    old_region = QRegion(old) if old is not None else QRegion()
+    new_region = QRegion(new) if new is not None else QRegion()
+    return region.united(old_region.xored(new_region))
+
+
+def snap_to_edge(pixels, position, distance):
+    """
+    Move `position` (x, y in device pixels) to the strongest vertical and
+    horizontal edge of `pixels` (a BGRA array) within `distance` pixels,
+    per axis. An axis without an edge of at least SNAP_MIN_STRENGTH is left
+    alone. Only a small patch around the position is read.
+    """
+    height, width = pixels.shape[:2]
+    x, y = position
+    snapped = []
+    for axis, (along, across, limit) in enumerate(((x, y, width), (y, x, height))):
+        lo, hi = max(0, along - distance - 1), min(limit, along + distance + 1)
+        band_lo, band_hi = max(0, across - 8), min(pixels.shape[axis], across + 9)
+        if hi - lo < 2 or band_hi <= band_lo:
+            snapped.append(along)
+            continue
+        if axis == 0:
+            patch = gray_array(pixels[band_lo:band_hi, lo:hi])
+            steps = np.abs(np.diff(patch, axis=1)).mean(axis=0)
+        else:
+            patch = gray_array(pixels[lo:hi, band_lo:band_hi])
+            steps = np.abs(np.diff(patch, axis=0)).mean(axis=1)
+        # Step k lies between pixels lo+k and lo+k+1; an edge at the latter starts the new area
+        candidates = lo + 1 + np.arange(len(steps))
+        order = np.lexsort((np.abs(candidates - along), -steps))
+        best = order[0]
+        snapped.append(int(candidates[best]) if steps[best] >= SNAP_MIN_STRENGTH else along)
+    return tuple(snapped)
 
-from .utils import resource_path
 
 class SelectionOverlay(QWidget):
+    """
+    Full-desktop overlay for dragging out a capture region.
+
+    The screenshot is prerendered once into a backdrop at the overlay's
+    device pixel ratio, and only the parts of it that the selection frame
+    (and magnifier) moved over are repainted. The optional magnifier and
+    edge snapping read from that backdrop; nothing is grabbed again.
+    """
     selection_made = Signal(QRect)
+    selection_cancelled = Signal()
 
-    def __init__(self, screen_pixmap):
+    def __init__(self, screen_pixmap, magnifier=False, snap_to_edges=False):
         super().__init__()
         self.setWindowFlags(Qt.WindowType.FramelessWindowHint | Qt.WindowType.WindowStaysOnTopHint)
         self.setCursor(Qt.CursorShape.CrossCursor)
+        self.setAttribute(Qt.WidgetAttribute.WA_OpaquePaintEvent) # The backdrop covers every pixel
+        self.setMouseTracking(magnifier or snap_to_edges)
 
         screen_geometry = QApplication.primaryScreen().virtualGeometry()
         self.setGeometry(screen_geometry)
-        self.pixmap = screen_pixmap
+        self.device_pixel_ratio = self.devicePixelRatioF()
+        self.backdrop = prerender_backdrop(screen_pixmap, screen_geometry.size(), self.device_pixel_ratio)
+        self._pixels = None # Zero-copy view of the backdrop, for snapping
 
-        self.rubber_band = QRubberBand(QRubberBand.Shape.Rectangle, self)
+        self.magnifier_enabled = magnifier
+        self.snap_enabled = snap_to_edges
         self.origin = None
+        self.selection = None
+        self.cursor_pos = None
+        self.painted_area = 0 # Logical pixels repainted, for measuring
+
+        highlight = self.palette().highlight().color()
+        self.frame_pen = QPen(highlight, 1)
+        self.fill_color = QColor(highlight.red(), highlight.green(), highlight.blue(), 40)
+
+    # --- Geometry ---
+
+    def device_rect(self, rect):
+        dpr = self.device_pixel_ratio
+        return QRect(round(rect.x() * dpr), round(rect.y() * dpr), round(rect.width() * dpr), round(rect.height() * dpr))
+
+    def snap(self, pos):
+        if not self.snap_enabled:
+            return pos
+        if self._pixels is None:
+            self._pixels = qimage_to_array(self.backdrop)
+        dpr = self.device_pixel_ratio
+        x, y = snap_to_edge(self._pixels, (round(pos.x() * dpr), round(pos.y() * dpr)), round(SNAP_DISTANCE * dpr))
+        return QPoint(round(x / dpr), round(y / dpr))
+
+    def magnifier_rect(self, pos):
+        if not self.magnifier_enabled or pos is None:
+            return None
+        x = pos.x() + MAGNIFIER_OFFSET
+        y = pos.y() + MAGNIFIER_OFFSET
+        # Flip to the other side of the cursor near the right and bottom edges
+        if x + MAGNIFIER_SIZE > self.width():
+            x = pos.x() - MAGNIFIER_OFFSET - MAGNIFIER_SIZE
+        if y + MAGNIFIER_SIZE + 20 > self.height():
+            y = pos.y() - MAGNIFIER_OFFSET - MAGNIFIER_SIZE - 20
+        # Room for the coordinate label underneath
+        return QRect(x, y, MAGNIFIER_SIZE, MAGNIFIER_SIZE + 20)
+
+    def _move_to(self, pos):
+        """Update the cursor (and selection) and repaint only what changed."""
+        old_selection, old_magnifier = self.selection, self.magnifier_rect(self.cursor_pos)
+        self.cursor_pos = pos
+        if self.origin is not None:
+            self.selection = QRect(self.origin, pos).normalized()
+        dirty = selection_dirty_region(old_selection, self.selection) if self.selection != old_selection else QRegion()
+        for rect in (old_magnifier, self.magnifier_rect(pos)):
+            if rect is not None:
+                dirty = dirty.united(QRegion(rect.adjusted(-1, -1, 1, 1)))
+        if not dirty.isEmpty():
+            self.update(dirty)
+
+    # --- Painting ---
 
     def paintEvent(self, event):
         painter = QPainter(self)
-        painter.drawPixmap(self.rect(), self.pixmap)
+        for rect in event.region():
+            painter.drawImage(rect, self.backdrop, self.device_rect(rect))
+            self.painted_area += rect.width() * rect.height()
+
+        if self.selection is not None:
+            painter.fillRect(self.selection, self.fill_color)
+            painter.setPen(self.frame_pen)
+            painter.drawRect(self.selection.adjusted(0, 0, -1, -1))
+
+        magnifier = self.magnifier_rect(self.cursor_pos)
+        if magnifier is not None and magnifier.intersects(event.rect()):
+            self.paint_magnifier(painter, magnifier)
+
+    def paint_magnifier(self, painter, rect):
+        dpr = self.device_pixel_ratio
+        view = QRect(rect.topLeft(), QSize(MAGNIFIER_SIZE, MAGNIFIER_SIZE))
+        samples = MAGNIFIER_SIZE // MAGNIFIER_ZOOM
+        center = QPoint(round(self.cursor_pos.x() * dpr), round(self.cursor_pos.y() * dpr))
+        source = QRect(center.x() - samples // 2, center.y() - samples // 2, samples, samples)
+
+        painter.fillRect(view, QColor("black"))
+        painter.setRenderHint(QPainter.RenderHint.SmoothPixmapTransform, False)
+        painter.drawImage(QRect(view.topLeft(), QSize(samples * MAGNIFIER_ZOOM, samples * MAGNIFIER_ZOOM)),
+                          self.backdrop, source)
+
+        # Outline the pixel under the cursor
+        cell = QRect(view.x() + (samples // 2) * MAGNIFIER_ZOOM, view.y() + (samples // 2) * MAGNIFIER_ZOOM,
+                     MAGNIFIER_ZOOM, MAGNIFIER_ZOOM)
+        painter.setPen(QPen(QColor("red"), 1))
+        painter.drawRect(cell.adjusted(0, 0, -1, -1))
+        painter.setPen(QPen(QColor("white"), 1))
+        painter.drawRect(view.adjusted(0, 0, -1, -1))
+
+        label = QRect(rect.x(), view.bottom() + 1, rect.width(), rect.height() - view.height())
+        painter.fillRect(label, QColor(0, 0, 0, 200))
+        text = f"{self.cursor_pos.x()}, {self.cursor_pos.y()}"
+        if self.selection is not None:
+            text += f"  {self.selection.width()}×{self.selection.height()}"
+        painter.drawText(label, Qt.AlignmentFlag.AlignCenter, text)
+
+    # --- Input ---
 
     def mousePressEvent(self, event):
-        self.origin = event.pos()
-        self.rubber_band.setGeometry(QRect(self.origin, event.pos()).normalized())
-        self.rubber_band.show()
+        self.origin = self.snap(event.position().toPoint())
+        self._move_to(self.origin)
 
     def mouseMoveEvent(self, event):
-        if self.origin:
-            self.rubber_band.setGeometry(QRect(self.origin, event.pos()).normalized())
+        if self.origin is not None or self.magnifier_enabled:
+            self._move_to(self.snap(event.position().toPoint()))
 
     def mouseReleaseEvent(self, event):
-        if self.origin:
-            self.rubber_band.hide()
-            selection_rect = QRect(self.origin, event.pos()).normalized()
+        if self.origin is not None:
+            selection_rect = QRect(self.origin, self.snap(event.position().toPoint())).normalized()
+            self.origin = None
             self.selection_made.emit(selection_rect)
             self.close()
 
-class HoverLabel(QLabel):
-    delete_requested = Signal(object)
-    save_requested = Signal(object)
-    copy_requested = Signal(object)
-
-    def __init__(self, display_pixmap, original_pixmap=None, parent=None):
-        super().__init__(parent)
-        self.original_pixmap = original_pixmap if original_pixmap else display_pixmap
-        self.setPixmap(display_pixmap)
-        self.setFixedSize(display_pixmap.size())
-        self.is_hovering = False
-        self.is_saved = False
-        self.hovered_icon = None # Can be 'save', 'delete', 'copy', or None
-
-        # Define "hotspots" for the buttons
-        icon_size = 24
-        margin = 5
-        self.copy_rect = QRect(self.width() - 3 * (icon_size + margin), margin, icon_size, icon_size)
-        self.save_rect = QRect(self.width() - 2 * (icon_size + margin), margin, icon_size, icon_size)
-        self.delete_rect = QRect(self.width() - (icon_size + margin), margin, icon_size, icon_size)
-
-        self.setMouseTracking(True) # Needed for mouseMoveEvent
-
-    def enterEvent(self, event):
-        self.is_hovering = True
-        self.update() # Trigger a repaint
-        super().enterEvent(event)
-
-    def leaveEvent(self, event):
-        self.is_hovering = False
-        self.hovered_icon = None
-        QToolTip.hideText()
-        self.update() # Trigger a repaint
-        super().leaveEvent(event)
-
-    def mouseMoveEvent(self, event):
-        if self.is_hovering:
-            pos = event.pos()
-            old_hovered_icon = self.hovered_icon
-
-            if self.copy_rect.contains(pos):
-                self.hovered_icon = 'copy'
-                QToolTip.showText(event.globalPos(), "Copy to Clipboard (Ctrl+C)", self)
-            elif self.save_rect.contains(pos):
-                self.hovered_icon = 'save'
-                QToolTip.showText(event.globalPos(), "Save Image (Ctrl+S)", self)
-            elif self.delete_rect.contains(pos):
-                self.hovered_icon = 'delete'
-                QToolTip.showText(event.globalPos(), "Delete Image (Delete)", self)
-            else:
-                self.hovered_icon = None
-                QToolTip.hideText()
-
-            if self.hovered_icon != old_hovered_icon:
-                self.update() # Repaint only if hover state changes
-        super().mouseMoveEvent(event)
-
-    def mousePressEvent(self, event):
-        if self.is_hovering:
-            if self.copy_rect.contains(event.pos()):
-                self.copy_requested.emit(self)
-            elif self.save_rect.contains(event.pos()):
-                self.save_requested.emit(self)
-            elif self.delete_rect.contains(event.pos()):
-                self.delete_requested.emit(self)
-        super().mousePressEvent(event)
-
-    def paintEvent(self, event):
-        super().paintEvent(event) # First, draw the base pixmap
-
-        # If there's no custom drawing to do, exit early.
-        if not self.is_hovering and not self.is_saved:
+    def keyPressEvent(self, event):
+        if event.key() == Qt.Key.Key_Escape:
+            self.origin = None
+            self.selection_cancelled.emit()
+            self.close()
             return
-
-        painter = QPainter(self)
-
-        if self.is_hovering:
-            painter.setRenderHint(QPainter.RenderHint.Antialiasing)
-
-            # Draw semi-transparent overlay and border
-            overlay_color = QColor(0, 0, 0, 127) # Black with 50% opacity
-            painter.fillRect(self.rect(), overlay_color)
-            pen = QPen(QColor("#55aaff"), 2) # Blue border
-            painter.setPen(pen)
-            painter.drawRect(self.rect().adjusted(0, 0, -1, -1))
-
-            # Draw icons
-            style = self.style()
-            copy_icon = QIcon(resource_path("snap_mosaic/icons/clipboard.svg"))
-            save_icon = style.standardIcon(QStyle.StandardPixmap.SP_DialogSaveButton)
-            delete_icon = style.standardIcon(QStyle.StandardPixmap.SP_MessageBoxCritical)
-
-            copy_icon.paint(painter, self.copy_rect)
-            save_icon.paint(painter, self.save_rect)
-            delete_icon.paint(painter, self.delete_rect)
-
-            # Draw hover effect on icons
-            if self.hovered_icon:
-                hover_color = QColor(255, 255, 255, 70) # White with ~27% opacity
-                if self.hovered_icon == 'copy':
-                    painter.fillRect(self.copy_rect, hover_color)
-                elif self.hovered_icon == 'save':
-                    painter.fillRect(self.save_rect, hover_color)
-                elif self.hovered_icon == 'delete':
-                    painter.fillRect(self.delete_rect, hover_color)
-
-        if self.is_saved:
-            icon_size = 24
-            margin = 5
-            saved_rect = QRect(margin, self.height() - icon_size - margin, icon_size, icon_size)
-
-            # Draw a background for the checkmark for better visibility
-            # The circle will be slightly larger than the icon
-            bg_rect = saved_rect.adjusted(-margin, -margin, margin, margin)
-            path = QPainterPath()
-            path.addEllipse(bg_rect)
-            
-            # Use a semi-transparent white for the background
-            painter.setBrush(QColor(255, 255, 255, 180))
-            painter.setPen(Qt.PenStyle.NoPen) # No outline for the circle
-            painter.drawPath(path)
-
-            # Now draw the icon on top
-            saved_icon = self.style().standardIcon(QStyle.StandardPixmap.SP_DialogApplyButton)
-            saved_icon.paint(painter, saved_rect)
+        super().keyPressEvent(event)
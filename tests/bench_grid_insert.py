@@ -0,0 +1,88 @@
+"""Benchmark: adding capture N+1 to the grid, or updating the newest one, should cost the same at N=10 and N=5,000"""
+from PySide6.QtWidgets import QApplication
+from PySide6.QtGui import QPixmap, QColor
+import statistics
+import sys
+import time
+
+app = QApplication(sys.argv)
+
+from snap_mosaic.capture_grid import Capture, CaptureListModel, CaptureGridView
+
+SIZES = (10, 1000, 5000)
+SAMPLES = 50
+MAX_RATIO = 2.0
+
+pixmap = QPixmap(300, 200)
+pixmap.fill(QColor(90, 140, 200))
+
+model = CaptureListModel()
+view = CaptureGridView()
+view.setModel(model)
+view.resize(1280, 800)
+view.show()
+
+
+def fill_model(count):
+    model.clear()
+    for _ in range(count):
+        model.add_capture(Capture(pixmap))
+    app.processEvents()
+
+
+def time_insert():
+    """Insert one capture at the front and flush layout and painting."""
+    start = time.perf_counter()
+    model.add_capture(Capture(pixmap))
+    view.viewport().repaint()
+    app.processEvents()
+    return (time.perf_counter() - start) * 1000.0
+
+
+def time_remove():
+    """Remove one capture from the middle and flush layout and painting."""
+    capture = model.capture_at(len(model) // 2)
+    start = time.perf_counter()
+    model.remove_capture(capture)
+    view.viewport().repaint()
+    app.processEvents()
+    return (time.perf_counter() - start) * 1000.0
+
+
+def time_changed():
+    """Report the newest capture as changed (as a finished save or thumbnail does)."""
+    capture = model.capture_at(0)
+    start = time.perf_counter()
+    for _ in range(1000):
+        model.capture_changed(capture)
+    return (time.perf_counter() - start) * 1000.0 # ms per 1,000 updates
+
+
+def time_reflow():
+    """Resize the view (changing the column count) and flush painting."""
+    view.resize(900 if view.width() > 900 else 1280, 800)
+    start = time.perf_counter()
+    app.processEvents()
+    view.viewport().repaint()
+    return (time.perf_counter() - start) * 1000.0
+
+
+results = {}
+changed = {}
+for size in SIZES:
+    fill_model(size)
+    insert_ms = statistics.median(time_insert() for _ in range(SAMPLES))
+    remove_ms = statistics.median(time_remove() for _ in range(SAMPLES))
+    reflow_ms = statistics.median(time_reflow() for _ in range(10))
+    changed[size] = statistics.median(time_changed() for _ in range(10))
+    results[size] = insert_ms
+    print(f"N={size:>5}: insert {insert_ms:.3f} ms, remove {remove_ms:.3f} ms, reflow {reflow_ms:.3f} ms, "
+          f"update newest {changed[size]:.3f} ms/1k")
+
+ratio = results[SIZES[-1]] / results[SIZES[0]]
+print(f"\nInsert cost ratio N={SIZES[-1]} vs N={SIZES[0]}: {ratio:.2f}x")
+assert ratio < MAX_RATIO, f"Grid insertion cost grows with capture count ({ratio:.2f}x)"
+changed_ratio = changed[SIZES[-1]] / changed[SIZES[0]]
+print(f"Update cost ratio N={SIZES[-1]} vs N={SIZES[0]}: {changed_ratio:.2f}x")
+assert changed_ratio < MAX_RATIO, f"Updating a capture's row grows with capture count ({changed_ratio:.2f}x)"
+print("✓ Grid insertion and update cost is independent of capture count")
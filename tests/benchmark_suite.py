@@ -0,0 +1,291 @@
+"""
+Headless benchmark suite for the capture, scale, save and grid hot paths.
+
+Runs under QT_QPA_PLATFORM=offscreen with a synthetic frame source, writes
+machine-readable JSON and compares it against a stored baseline:
+
+    python tests/benchmark_suite.py --output bench_output.json
+    python tests/benchmark_suite.py --save-baseline   # refresh tests/benchmark_baseline.json
+
+Exits with status 1 if any metric regressed by more than --threshold
+(default 50%) relative to the baseline.
+"""
+import os
+import sys
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+os.environ.setdefault("PYNPUT_BACKEND", "dummy")
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import argparse
+import json
+import platform
+import statistics
+import tempfile
+import time
+from datetime import datetime
+
+from PySide6.QtWidgets import QApplication
+from PySide6.QtGui import QImage, QPixmap, QColor, QPainter, QLinearGradient
+from PySide6.QtCore import Qt, QRect, QSize, QEventLoop, QTimer
+
+app = QApplication(sys.argv[:1])
+
+from snap_mosaic import __version__
+from snap_mosaic.config import Config
+from snap_mosaic.capture_grid import Capture, CaptureListModel, CaptureGridView
+from snap_mosaic.encoder import EncoderPool
+from snap_mosaic.batch_save import BatchSaver, default_workers
+from snap_mosaic.image_formats import ImageEncoder
+from snap_mosaic.capture_backends import SyntheticBackend, available_backends, benchmark_backends, create_backend
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "benchmark_baseline.json")
+RESOLUTIONS = {'1080p': (1920, 1080), '4k': (3840, 2160), '8k': (7680, 4320)}
+
+
+class SyntheticFrameSource:
+    """Deterministic frames with a gradient, moving blocks and text, so encoders see realistic content."""
+
+    def __init__(self, width, height):
+        self.width = width
+        self.height = height
+        self.frame_index = 0
+
+    def next_image(self):
+        image = QImage(self.width, self.height, QImage.Format.Format_RGB32)
+        gradient = QLinearGradient(0, 0, self.width, self.height)
+        gradient.setColorAt(0, QColor(30, 60, 90))
+        gradient.setColorAt(1, QColor(200, 220, 240))
+        painter = QPainter(image)
+        painter.fillRect(image.rect(), gradient)
+        block = max(8, self.width // 16)
+        for i in range(12):
+            x = (self.frame_index * 37 + i * block * 2) % max(1, self.width - block)
+            y = (i * block) % max(1, self.height - block)
+            painter.fillRect(x, y, block, block, QColor.fromHsv((i * 30 + self.frame_index * 7) % 360, 200, 220))
+        painter.setPen(QColor("black"))
+        painter.drawText(QRect(10, 10, self.width - 20, 40), Qt.AlignmentFlag.AlignLeft,
+                         f"Synthetic frame {self.frame_index}")
+        painter.end()
+        self.frame_index += 1
+        return image
+
+    def next_pixmap(self):
+        return QPixmap.fromImage(self.next_image())
+
+
+def median_ms(func, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - start) * 1000.0)
+    return statistics.median(samples)
+
+
+def spin_event_loop(msecs=0):
+    loop = QEventLoop()
+    QTimer.singleShot(msecs, loop.quit)
+    loop.exec()
+
+
+def bench_trigger_capture(results, quick):
+    """End-to-end captures/sec through SnapMosaic.trigger_capture with auto-save off (session store on, as by default)."""
+    from snap_mosaic.main_window import SnapMosaic
+
+    work_dir = tempfile.mkdtemp(prefix="snapmosaic-bench-")
+    config = Config(os.path.join(work_dir, "SnapMosaic.json"))
+    config.settings.update({'sounds_enabled': False, 'auto_save_enabled': False})
+    window = SnapMosaic(config)
+    window.capture_region = QRect(0, 0, 1920, 1080)
+    window.capture_backend = SyntheticBackend(QSize(1920, 1080))
+    window.grab_screen_rect(window.capture_region) # Render the frames before timing
+
+    count = 50 if quick else 200
+    start = time.perf_counter()
+    for _ in range(count):
+        window.trigger_capture()
+    app.processEvents()
+    elapsed = time.perf_counter() - start
+    results['trigger_capture_1080p_per_sec'] = {'value': count / elapsed, 'unit': 'captures/s', 'better': 'higher'}
+
+    window.shutdown() # Waits for thumbnails and the session store before closing the capture store
+    window.deleteLater()
+
+
+def bench_grid(results, quick):
+    """Cost of adding one capture (insert + repaint) as the grid grows."""
+    model = CaptureListModel()
+    view = CaptureGridView()
+    view.setModel(model)
+    view.resize(1280, 800)
+    view.show()
+    pixmap = QPixmap(300, 200)
+    pixmap.fill(QColor(90, 140, 200))
+
+    def insert_one():
+        model.add_capture(Capture(pixmap))
+        view.viewport().repaint()
+        app.processEvents()
+
+    for size in ((10, 1000) if quick else (10, 1000, 5000)):
+        model.clear()
+        for _ in range(size):
+            model.add_capture(Capture(pixmap))
+        app.processEvents()
+        results[f'grid_insert_at_{size}_ms'] = {'value': median_ms(insert_one, 30), 'unit': 'ms', 'better': 'lower'}
+    view.deleteLater()
+
+
+def bench_encode(results, quick):
+    """Encode time per format setting for a 1080p frame, and throughput through the encoder pool."""
+    out_dir = tempfile.mkdtemp(prefix="snapmosaic-bench-")
+    image = SyntheticFrameSource(1920, 1080).next_image()
+    repeat = 3 if quick else 8
+    for fmt, quality in (('png', -1), ('jpg', 95)):
+        path = os.path.join(out_dir, f"frame.{fmt}")
+        ms = median_ms(lambda: image.save(path, None, quality), repeat)
+        results[f'encode_{fmt}_1080p_ms'] = {'value': ms, 'unit': 'ms', 'better': 'lower'}
+    for encoder in (ImageEncoder('png', png_compression=1), ImageEncoder('webp'), ImageEncoder('qoi')):
+        ms = median_ms(lambda: encoder.encode(image), repeat)
+        name = encoder.label.replace(' ', '_')
+        results[f'encode_{name}_1080p_ms'] = {'value': ms, 'unit': 'ms', 'better': 'lower'}
+
+    pool = EncoderPool(max_workers=2, max_pending=64)
+    count = 8 if quick else 32
+    start = time.perf_counter()
+    for i in range(count):
+        pool.submit(image, os.path.join(out_dir, f"pool-{i}.png"), block=True)
+    pool.wait_for_done()
+    spin_event_loop()
+    elapsed = time.perf_counter() - start
+    results['encoder_pool_png_1080p_per_sec'] = {'value': count / elapsed, 'unit': 'images/s', 'better': 'higher'}
+
+
+def bench_save_all(results, quick):
+    """Save All throughput for 4K PNG frames on one worker process and on one per core."""
+    image = SyntheticFrameSource(3840, 2160).next_image()
+    count = 6 if quick else 48
+    for label, workers in (('1_worker', 1), ('all_cores', default_workers())):
+        out_dir = tempfile.mkdtemp(prefix="snapmosaic-bench-")
+        saver = BatchSaver([(lambda: image, os.path.join(out_dir, f"frame-{i}.png")) for i in range(count)], workers)
+        saver.run()
+        results[f'save_all_png_4k_{label}_per_sec'] = {'value': len(saver.written) / saver.elapsed,
+                                                       'unit': 'images/s', 'better': 'higher'}
+
+
+def bench_scale(results, quick):
+    """scaledToWidth(500, SmoothTransformation) as done for the grid display pixmap."""
+    repeat = 3 if quick else 10
+    for name, (width, height) in RESOLUTIONS.items():
+        pixmap = SyntheticFrameSource(width, height).next_pixmap()
+        ms = median_ms(lambda: pixmap.scaledToWidth(500, Qt.TransformationMode.SmoothTransformation), repeat)
+        results[f'scale_{name}_to_500_ms'] = {'value': ms, 'unit': 'ms', 'better': 'lower'}
+
+
+def bench_backends(results, quick):
+    """Grabs/sec of a 1080p region for every capture backend that works here (see capture_backends)."""
+    rect = QRect(0, 0, 1920, 1080)
+    names = available_backends()
+    if QApplication.platformName() == 'offscreen':
+        # The offscreen platform has no screen to read: Qt's grab returns a blank pixmap, so its rate means nothing
+        names = [name for name in names if name != 'qt']
+    backends = [create_backend(name) for name in names]
+    synthetic = SyntheticBackend(QSize(1920, 1080))
+    synthetic.grab(rect)
+    backends.append(synthetic)
+    rates = benchmark_backends(backends, rect, duration=0.2 if quick else 1.0, max_grabs=10 ** 6)
+    for backend in backends:
+        backend.close()
+        if rates.get(backend.name):
+            results[f'grab_{backend.name}_1080p_per_sec'] = {'value': rates[backend.name], 'unit': 'grabs/s', 'better': 'higher'}
+
+
+BENCHMARKS = {
+    'trigger_capture': bench_trigger_capture,
+    'backends': bench_backends,
+    'grid': bench_grid,
+    'encode': bench_encode,
+    'save_all': bench_save_all,
+    'scale': bench_scale,
+}
+
+
+def compare(results, baseline, threshold):
+    """Return a list of (name, baseline, current, change) for metrics that regressed past `threshold`."""
+    regressions = []
+    for name, current in results.items():
+        reference = baseline.get('results', {}).get(name)
+        if not reference or not reference['value']:
+            continue
+        if current['better'] == 'lower':
+            change = current['value'] / reference['value'] - 1.0
+        else:
+            change = reference['value'] / current['value'] - 1.0 if current['value'] else float('inf')
+        marker = "REGRESSION" if change > threshold else "ok"
+        print(f"  {name:<36} {reference['value']:>10.3f} -> {current['value']:>10.3f} {current['unit']:<10} "
+              f"{change * 100:+6.1f}%  {marker}")
+        if change > threshold:
+            regressions.append((name, reference['value'], current['value'], change))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="SnapMosaic headless benchmark suite")
+    parser.add_argument('--output', help="Write results JSON to this file")
+    parser.add_argument('--baseline', default=BASELINE_PATH, help="Baseline JSON to compare against")
+    parser.add_argument('--save-baseline', action='store_true', help="Overwrite the baseline with these results")
+    parser.add_argument('--threshold', type=float, default=0.5, help="Allowed slowdown before failing (0.5 = 50%%)")
+    parser.add_argument('--only', choices=sorted(BENCHMARKS), action='append', help="Run only these benchmarks")
+    parser.add_argument('--quick', action='store_true', help="Fewer iterations (smoke run)")
+    args = parser.parse_args(argv)
+
+    results = {}
+    for name in (args.only or BENCHMARKS):
+        print(f"Running {name} benchmark...")
+        BENCHMARKS[name](results, args.quick)
+
+    report = {
+        'meta': {
+            'version': __version__,
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'qt_platform': os.environ.get("QT_QPA_PLATFORM"),
+            'quick': args.quick,
+        },
+        'results': results,
+    }
+
+    print()
+    for name, result in results.items():
+        print(f"  {name:<36} {result['value']:>10.3f} {result['unit']}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"\nResults written to {args.output}")
+
+    if args.save_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"Baseline saved to {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"\nNo baseline at {args.baseline}; run with --save-baseline to create one.")
+        return 0
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    print(f"\nComparison against baseline ({baseline['meta'].get('timestamp')}):")
+    regressions = compare(results, baseline, args.threshold)
+    if regressions:
+        print(f"\n✗ {len(regressions)} benchmark(s) regressed by more than {args.threshold * 100:.0f}%")
+        return 1
+    print("\n✓ No regressions against baseline")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
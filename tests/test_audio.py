@@ -0,0 +1,73 @@
+"""Verify sound playback: decode-once loading, coalescing of repeated sounds and the single playsound worker"""
+import os
+import sys
+import tempfile
+import threading
+import time
+from PySide6.QtWidgets import QApplication
+
+from snap_mosaic.audio import (
+    SOUND_FILES, NullAudioBackend, PlaysoundBackend, Sound, SoundPlayer, create_audio_backend
+)
+from snap_mosaic.utils import resource_path
+
+app = QApplication(sys.argv)
+paths = {name: resource_path(path) for name, path in SOUND_FILES.items()}
+
+# Test 1: Every sound's header is read once, up front; the samples are left to the backend
+snap = Sound('snap', paths['snap'])
+assert snap.frame_count and 0 < snap.duration < 5 and not hasattr(snap, 'pcm')
+assert abs(snap.duration - snap.frame_count / snap.frame_rate) < 1e-9
+player = SoundPlayer(paths, NullAudioBackend())
+assert set(player.sounds) == set(SOUND_FILES)
+print(f"✓ {len(player.sounds)} sounds loaded at startup (snap is {snap.duration * 1000:.0f} ms)")
+
+# Test 2: A sound requested while it is still playing is coalesced; other sounds still play
+assert player.play('snap')
+assert not player.play('snap') and not player.play('snap')
+assert player.play('clipboard')
+assert player.backend.played == ['snap', 'clipboard'] and player.coalesced_count == 2
+time.sleep(player.sounds['snap'].duration + 0.02)
+assert player.play('snap')
+assert player.backend.played == ['snap', 'clipboard', 'snap'] and player.play_count == 3
+print("✓ Overlapping requests for the same sound are coalesced")
+
+# Test 3: Missing or broken files are reported, not fatal
+broken = os.path.join(tempfile.mkdtemp(), 'broken.wav')
+with open(broken, 'wb') as f:
+    f.write(b'not a wav file')
+partial = SoundPlayer({'snap': paths['snap'], 'broken': broken, 'missing': broken + '.gone'}, NullAudioBackend())
+assert set(partial.sounds) == {'snap'}
+assert not partial.play('broken') and not partial.play('unknown')
+print("✓ Unloadable sounds are skipped")
+
+# Test 4: playsound runs on one long-lived worker, and a sound already waiting is not queued twice
+if PlaysoundBackend.available():
+    backend = PlaysoundBackend()
+    calls, threads = [], set()
+    release = threading.Event()
+
+    def fake_playsound(path, block=True):
+        threads.add(threading.get_ident())
+        calls.append(os.path.basename(path))
+        release.wait(5)
+
+    backend._playsound = fake_playsound
+    for name in ('snap', 'save', 'save', 'save', 'error'):
+        backend.play(player.sounds[name])
+    release.set()
+    deadline = time.monotonic() + 5
+    while len(calls) < 3 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    backend.close()
+    assert calls == ['snap.wav', 'save.wav', 'error.wav'], calls
+    assert len(threads) == 1 and threading.get_ident() not in threads
+    print("✓ playsound plays on a single worker thread")
+else:
+    print("- Skipping playsound worker test (playsound not installed)")
+
+# Test 5: The null backend can be forced
+assert isinstance(create_audio_backend('null'), NullAudioBackend)
+print("✓ Null backend selectable")
+
+print("\n✓ All audio tests passed!")
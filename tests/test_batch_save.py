@@ -0,0 +1,147 @@
+"""Verify Save All: process-pool encoding, temp-file renames, failures, cancellation and auto-save naming"""
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import numpy as np
+from PySide6.QtWidgets import QApplication
+from PySide6.QtGui import QImage, QColor, QPixmap
+
+from snap_mosaic.batch_save import BatchSaver, TEMP_SUFFIX, temp_path_for
+from snap_mosaic.imaging import qimage_to_array
+
+
+def make_image(index, width=320, height=200):
+    image = QImage(width, height, QImage.Format.Format_RGB32)
+    image.fill(QColor(index * 40 % 256, 90, 200))
+    image.setPixelColor(index, index, QColor("white"))
+    return image
+
+
+def wait_until(app, condition, timeout=120):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        app.processEvents()
+        time.sleep(0.005)
+    assert condition(), "timed out"
+
+
+def leftovers(folder):
+    return [name for name in os.listdir(folder) if name.endswith(TEMP_SUFFIX)]
+
+
+def main():
+    app = QApplication(sys.argv)
+    tmp = tempfile.mkdtemp()
+
+    # Test 1: Every frame is encoded by the workers and lands under its final name, pixel for pixel
+    folder = os.path.join(tmp, 'pool')
+    os.makedirs(folder)
+    images = [make_image(i) for i in range(6)]
+    jobs = [(lambda image=image: image, os.path.join(folder, f"frame-{i}.{'png' if i % 2 else 'jpg'}"))
+            for i, image in enumerate(images)]
+    progress = []
+    saver = BatchSaver(jobs, workers=2)
+    saver.progress.connect(lambda done, total: progress.append((done, total)))
+    saver.run()
+    app.processEvents()
+    assert sorted(saver.written) == sorted(path for _, path in jobs) and not saver.failed and not saver.cancelled
+    assert progress and progress[-1] == (6, 6), progress
+    for i, (_, path) in enumerate(jobs):
+        decoded = qimage_to_array(QImage(path).convertToFormat(QImage.Format.Format_RGB32))
+        original = qimage_to_array(images[i])
+        if path.endswith('.png'):
+            assert np.array_equal(decoded, original), path
+        else:
+            assert np.abs(decoded.astype(int) - original).mean() < 4, path
+    assert not leftovers(folder)
+    assert temp_path_for(os.path.join(folder, "a.png")) == os.path.join(folder, ".a.png" + TEMP_SUFFIX)
+    print("✓ Frames are encoded on worker processes and renamed into place")
+
+    # Test 2: A frame that can't be loaded or written fails alone
+    jobs = [(lambda: images[0], os.path.join(folder, "ok.png")),
+            (lambda: None, os.path.join(folder, "deleted.png")),
+            (lambda: images[1], os.path.join(tmp, 'missing-folder', "lost.png"))]
+    saver = BatchSaver(jobs, workers=2)
+    saver.run()
+    assert saver.written == [os.path.join(folder, "ok.png")], saver.written
+    assert sorted(os.path.basename(path) for path, _ in saver.failed) == ["deleted.png", "lost.png"], saver.failed
+    print("✓ Failed frames are reported without stopping the rest")
+
+    # Test 3: Cancelling stops handing out frames; files already written are complete, nothing half-written remains
+    folder = os.path.join(tmp, 'cancel')
+    os.makedirs(folder)
+    big = make_image(3, 1920, 1080)
+    jobs = [(lambda: big, os.path.join(folder, f"frame-{i:03d}.png")) for i in range(60)]
+    saver = BatchSaver(jobs, workers=2)
+    saver.progress.connect(lambda done, total: saver.requestInterruption())
+    saver.start()
+    wait_until(app, saver.isFinished)
+    assert saver.cancelled and 0 < len(saver.written) < len(jobs), (saver.cancelled, len(saver.written))
+    assert sorted(os.listdir(folder)) == sorted(os.path.basename(path) for path in saver.written)
+    assert all(not QImage(path).isNull() for path in saver.written)
+    print(f"✓ Cancelling keeps {len(saver.written)} complete files and leaves no temporary files")
+
+    # Test 4: The window names files like auto-saves and marks the captures saved
+    os.environ['SNAPMOSAIC_CAPTURE_BACKEND'] = 'synthetic'
+    os.environ['SNAPMOSAIC_AUDIO_BACKEND'] = 'null'
+    os.environ['SNAPMOSAIC_CONTROL_SOCKET'] = f"snapmosaic-test-{os.getpid()}"
+    from snap_mosaic.config import Config
+    from snap_mosaic.capture_grid import Capture
+    from snap_mosaic.regions import CaptureRegion
+    from snap_mosaic.main_window import SnapMosaic
+    from PySide6.QtCore import QRect
+
+    config = Config(os.path.join(tmp, 'config.json'))
+    config.settings.update({'sounds_enabled': False, 'session_restore_enabled': False, 'auto_save_prefix': "Shot"})
+    window = SnapMosaic(config)
+    window.regions = [CaptureRegion("A", QRect(0, 0, 10, 10)), CaptureRegion("B", QRect(0, 0, 10, 10))]
+    same_time = datetime(2025, 5, 6, 7, 8, 9, 123000)
+    for i, region in enumerate(["A", "A", "B"]):
+        image = make_image(i, 64, 48)
+        capture = Capture(QPixmap.fromImage(image), image, timestamp=same_time)
+        capture.region = region
+        window.grid_for_region(region).model().add_capture(capture)
+
+    folder = os.path.join(tmp, 'window')
+    os.makedirs(folder)
+    window.start_save_all(folder, show_progress=False)
+    wait_until(app, lambda: window.batch_saver is None)
+    assert sorted(os.listdir(folder)) == ["Shot-A-20250506_070809_123-2.png", "Shot-A-20250506_070809_123.png",
+                                          "Shot-B-20250506_070809_123.png"], os.listdir(folder)
+    assert all(capture.is_saved for capture in window.all_captures())
+
+    config.settings.update({'auto_save_suffix_type': 'numeric', 'auto_save_numeric_counter': 7, 'auto_save_format': 'jpg'})
+    open(os.path.join(folder, "Shot-A-0007.jpg"), 'w').close()
+    plan = window.plan_save_all(window.all_captures(), folder)
+    assert [os.path.basename(path) for _, path in plan] == ["Shot-A-0008.jpg", "Shot-A-0009.jpg", "Shot-B-0010.jpg"], plan
+    assert config.get('auto_save_numeric_counter') == 11
+    print("✓ Save All names files like auto-saves, numeric counter included")
+
+    # Test 5: Auto-saves in the same millisecond get distinct names while earlier writes are still pending
+    folder = os.path.join(tmp, 'auto')
+    config.settings.update({'auto_save_enabled': True, 'auto_save_location': folder,
+                            'auto_save_suffix_type': 'timestamp', 'auto_save_format': 'png'})
+    captures = []
+    for i in range(4):
+        image = make_image(i, 64, 48)
+        capture = Capture(QPixmap.fromImage(image), image, timestamp=same_time)
+        capture.region = "A"
+        captures.append(capture)
+        window.auto_save_image(capture, quiet=True, backlog=True)
+    assert len(window.pending_auto_save_names) == 4, window.pending_auto_save_names
+    window.encoder.wait_for_done()
+    wait_until(app, lambda: not window.pending_auto_save_names)
+    assert sorted(os.listdir(folder)) == ["Shot-A-20250506_070809_123-2.png", "Shot-A-20250506_070809_123-3.png",
+                                          "Shot-A-20250506_070809_123-4.png", "Shot-A-20250506_070809_123.png"], os.listdir(folder)
+    window.quit_application()
+    print("✓ Auto-saves in one millisecond never reuse a name that is still being written")
+
+    print("\n✓ All Save All tests passed!")
+
+
+# Worker processes import this script again, so the tests only run in the parent
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""Verify the capture model ordering and the delegate's button hit-testing"""
+from PySide6.QtWidgets import QApplication
+from PySide6.QtGui import QPixmap
+from PySide6.QtCore import QRect, QPoint, QSize
+import sys
+
+app = QApplication(sys.argv)
+
+from snap_mosaic.capture_grid import Capture, CaptureListModel, CaptureGridView
+
+# Test 1: Newest captures are shown first
+model = CaptureListModel()
+first = Capture(QPixmap(300, 200))
+second = Capture(QPixmap(300, 200))
+model.add_capture(first)
+model.add_capture(second)
+assert model.rowCount() == 2
+assert model.capture_at(0) is second
+assert model.capture_at(1) is first
+assert first.id != second.id
+print("✓ Newest capture is at row 0")
+
+# Test 2: Removing a capture removes exactly that row
+assert model.remove_capture(second)
+assert not model.remove_capture(second)
+assert model.captures() == [first]
+print("✓ Remove deletes a single row")
+
+# Test 3: Button hotspots sit in the top-right corner of the cell
+view = CaptureGridView()
+view.setModel(model)
+delegate = view.capture_delegate
+cell = QRect(100, 50, 300, 200)
+rects = delegate.button_rects(cell)
+assert rects['delete'].right() == cell.right() - delegate.MARGIN
+assert rects['copy'].left() < rects['save'].left() < rects['delete'].left()
+assert delegate.button_at(cell, rects['save'].center()) == 'save'
+assert delegate.button_at(cell, QPoint(cell.left() + 10, cell.bottom() - 10)) is None
+print("✓ Delegate hit-testing resolves buttons")
+
+# Test 4: Rows are found by capture, and stay right after removals from the middle
+captures = [Capture(QPixmap(30, 20)) for _ in range(50)]
+model.add_captures(captures[:20])
+for capture in captures[20:]:
+    model.add_capture(capture)
+for index in (0, 17, 25, 49, 3):
+    assert model.remove_capture(captures[index])
+remaining = [capture for index, capture in enumerate(captures) if index not in (0, 17, 25, 49, 3)]
+assert all(model.row_of(capture) == len(remaining) - 1 - i for i, capture in enumerate(remaining))
+assert model.row_of(captures[25]) == -1 and model.row_of(Capture(QPixmap(30, 20))) == -1
+print("✓ Rows are found by capture after inserts and removals")
+
+# Test 5: Captures of different sizes get cells that fit the largest, and only their own area is hit
+model.clear()
+wide, small = Capture(QPixmap(400, 100)), Capture(QPixmap(120, 240))
+model.add_capture(wide)
+model.add_capture(small)
+view.resize(1000, 600)
+assert view.cell_size() == QSize(400, 240)
+small_rect, wide_rect = view.visualRect(model.index(0, 0)), view.visualRect(model.index(1, 0))
+assert small_rect.size() == QSize(120, 240) and wide_rect.size() == QSize(400, 100)
+assert not small_rect.intersects(wide_rect)
+assert view.indexAt(small_rect.center()).row() == 0 and view.indexAt(wide_rect.center()).row() == 1
+assert not view.indexAt(QPoint(small_rect.right() + 20, small_rect.top() + 10)).isValid() # Empty part of the cell
+assert not view.indexAt(QPoint(wide_rect.left() + 10, wide_rect.bottom() + 20)).isValid()
+model.remove_capture(small)
+assert view.cell_size() == QSize(400, 100)
+wide.display_size = QSize(200, 50) # A smaller maximum display width
+view.relayout()
+assert view.cell_size() == QSize(200, 50)
+print("✓ Mixed-size captures get cells that fit the largest")
+
+# Test 6: Clearing empties the model
+model.clear()
+assert len(model) == 0 and model.row_of(remaining[0]) == -1
+print("✓ Clear empties the model")
+
+print("\n✓ All capture grid tests passed!")
@@ -0,0 +1,49 @@
+"""Verify that change detection skips unchanged frames and keeps changed ones"""
+from PySide6.QtGui import QImage, QColor
+from PySide6.QtCore import QRect
+
+from snap_mosaic.change_detection import ChangeDetector
+
+
+def make_frame(color, patch=None):
+    image = QImage(640, 480, QImage.Format.Format_RGB32)
+    image.fill(QColor(color))
+    if patch:
+        rect, patch_color = patch
+        for y in range(rect.top(), rect.bottom() + 1):
+            for x in range(rect.left(), rect.right() + 1):
+                image.setPixelColor(x, y, QColor(patch_color))
+    return image
+
+
+detector = ChangeDetector(threshold_percent=1.0, pixel_tolerance=16)
+
+# Test 1: The first frame is always kept
+assert detector.check(make_frame("#336699"))
+print("✓ First frame kept")
+
+# Test 2: An identical frame, or one differing only by noise, is skipped
+assert not detector.check(make_frame("#336699"))
+assert not detector.check(make_frame("#3a6c9f")) # Every channel off by a few levels
+print(f"✓ Unchanged frame skipped ({detector.last_changed_percent:.2f}% changed)")
+
+# Test 3: A small change below the threshold is skipped
+small = (QRect(0, 0, 20, 20), "#ffffff") # 400 px, ~0.13% of the frame
+assert not detector.check(make_frame("#336699", small))
+print(f"✓ Small change skipped ({detector.last_changed_percent:.2f}% changed)")
+
+# Test 4: A change above the threshold is kept and becomes the new reference
+large = (QRect(0, 0, 100, 100), "#ffffff") # 10,000 px, ~3.3% of the frame
+assert detector.check(make_frame("#336699", large))
+assert not detector.check(make_frame("#336699", large))
+print(f"✓ Large change kept and used as reference")
+
+# Test 5: A new frame size always counts as a change
+detector.reset()
+assert detector.check(make_frame("#336699"))
+small_image = QImage(320, 240, QImage.Format.Format_RGB32)
+small_image.fill(QColor("#336699"))
+assert detector.check(small_image)
+print("✓ Frame size change detected")
+
+print("\n✓ All change detection tests passed!")
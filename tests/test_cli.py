@@ -0,0 +1,86 @@
+"""Verify the headless command line: capture, watch and export run without widgets and write the expected files"""
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from datetime import datetime
+
+from snap_mosaic.cli import StartupProfile, build_parser
+from snap_mosaic.utils import timestamped_filename, numbered_filename
+
+tmp = tempfile.mkdtemp()
+root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+env = dict(os.environ, QT_QPA_PLATFORM='offscreen', PYTHONPATH=root)
+env.pop('SNAPMOSAIC_TRACE', None)
+
+
+def run(*args):
+    return subprocess.run([sys.executable, '-m', 'snap_mosaic', *args], cwd=root, env=env,
+                          capture_output=True, text=True, timeout=120)
+
+
+config_path = os.path.join(tmp, 'config.json')
+with open(config_path, 'w') as f:
+    json.dump({'capture_regions': [{'name': "Chat", 'x': 10, 'y': 20, 'width': 120, 'height': 80}]}, f)
+
+# Test 1: File naming shared with the GUI's auto-save
+stamp = datetime(2025, 1, 2, 3, 4, 5, 678000)
+taken = set()
+for expected in ["Snap-20250102_030405_678.png", "Snap-20250102_030405_678-2.png", "Snap-20250102_030405_678-3.png"]:
+    name = timestamped_filename(tmp, "Snap", stamp, 'png', taken=taken)
+    assert name == expected, name
+    taken.add(name)
+taken.discard("Snap-20250102_030405_678.png")
+assert timestamped_filename(tmp, "Snap", stamp, 'png', taken=taken) == "Snap-20250102_030405_678.png"
+open(os.path.join(tmp, "Snap-0003.png"), 'w').close()
+assert numbered_filename(tmp, "Snap", 3, 'png') == ("Snap-0004.png", 4)
+print("✓ Timestamped and numbered file names skip names already taken")
+
+# Test 2: Options are accepted before or after the command
+args, extra = build_parser().parse_known_args(['--startup-profile', 'capture', '-r', 'Chat', '--config', 'x.json'])
+assert args.command == 'capture' and args.startup_profile and args.config == 'x.json' and args.region == ['Chat']
+assert not extra
+profile = StartupProfile(enabled=False)
+profile.mark("phase")
+assert profile.phases == []
+print("✓ Arguments parse with options before or after the command")
+
+# Test 3: capture grabs a configured region and a rectangle, and never loads QtWidgets
+out = os.path.join(tmp, 'capture')
+result = run('capture', '--config', config_path, '--backend', 'synthetic', '-r', 'Chat', '-r', '0,0,64,48',
+             '-o', out, '--startup-profile')
+assert result.returncode == 0, result.stderr
+saved = result.stdout.split()
+assert len(saved) == 2 and all(os.path.exists(path) for path in saved), result.stdout
+assert sorted(os.path.basename(path).split('-')[1] for path in saved) == ["Chat", "Region_2"], saved
+assert "Startup profile:" in result.stderr and "first grab" in result.stderr, result.stderr
+assert "QtWidgets not loaded" in result.stderr, result.stderr
+print("✓ capture saves each region and reports its startup phases without loading widgets")
+
+# Test 4: An unknown region is a usage error
+result = run('capture', '--config', config_path, '--backend', 'synthetic', '-r', 'Nope', '-o', out)
+assert result.returncode == 2 and "unknown region 'Nope'" in result.stderr and "Chat" in result.stderr, result.stderr
+print("✓ Unknown regions are rejected")
+
+# Test 5: watch captures right away and then on the interval, as JPG, until --count
+watch_dir = os.path.join(tmp, 'watch')
+result = run('watch', '--config', config_path, '--backend', 'synthetic', '-i', '0.05', '-n', '3',
+             '-o', watch_dir, '--format', 'jpg', '--prefix', 'W')
+assert result.returncode == 0, result.stderr
+files = sorted(os.listdir(watch_dir))
+assert len(files) == 3 and all(name.startswith("W-") and name.endswith(".jpg") for name in files), files
+assert "Captured 3 time(s): 3 saved" in result.stderr, result.stderr
+print("✓ watch captures on the interval and stops after --count")
+
+# Test 6: export turns a folder of captures into a GIF
+gif_path = os.path.join(tmp, 'watch.gif')
+result = run('export', watch_dir, '-o', gif_path, '--config', config_path, '--quiet')
+assert result.returncode == 0, result.stderr
+with open(gif_path, 'rb') as f:
+    assert f.read(6) == b'GIF89a'
+result = run('export', os.path.join(tmp, 'missing'), '-o', gif_path, '--config', config_path)
+assert result.returncode == 2 and "no such folder" in result.stderr, result.stderr
+print("✓ export writes an animation from a folder")
+
+print("\n✓ All command line tests passed!")
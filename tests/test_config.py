@@ -0,0 +1,83 @@
+"""Verify Config batches and debounces writes and replaces the settings file atomically"""
+import json
+import os
+import sys
+import tempfile
+import time
+from PySide6.QtWidgets import QApplication
+
+from snap_mosaic.config import Config
+
+app = QApplication(sys.argv)
+tmp = tempfile.mkdtemp()
+path = os.path.join(tmp, 'SnapMosaic.json')
+
+
+def read_file():
+    with open(path) as f:
+        return json.load(f)
+
+
+# Test 1: set() returns without writing; changes close together share one debounced write
+config = Config(path, flush_delay=0.2)
+config.set('hotkey', 'f6')
+config.set('max_display_width', 640)
+assert not os.path.exists(path) and config.write_count == 0
+time.sleep(0.5)
+assert config.write_count == 1
+assert read_file()['hotkey'] == 'f6' and read_file()['max_display_width'] == 640
+print("✓ Two set() calls saved by one background write")
+
+# Test 2: A batch (even nested) is written once, after the outermost block
+with config.batch():
+    for i in range(20):
+        config.set('auto_save_numeric_counter', i)
+    with config.batch():
+        config.set('burst_fps', 30.0)
+    time.sleep(0.3)
+    assert config.write_count == 1 # Nothing is written while the batch is open
+config.flush()
+assert config.write_count == 2
+assert read_file()['auto_save_numeric_counter'] == 19 and read_file()['burst_fps'] == 30.0
+print("✓ Batched changes are written together")
+
+# Test 3: A batch that raises is rolled back and never written
+try:
+    with config.batch():
+        config.set('hotkey', 'f1')
+        config.set('sounds_enabled', False)
+        raise ValueError("invalid setting")
+except ValueError:
+    pass
+config.flush()
+assert config.get('hotkey') == 'f6' and config.get('sounds_enabled') is True
+assert config.write_count == 2 and read_file()['hotkey'] == 'f6'
+print("✓ A failed batch is rolled back")
+
+# Test 4: A failed write leaves the previous file intact and no temp files behind
+real_replace = os.replace
+def failing_replace(src, dst):
+    raise OSError("disk full")
+os.replace = failing_replace
+try:
+    config.set('hotkey', 'f2')
+    config.flush()
+finally:
+    os.replace = real_replace
+assert read_file()['hotkey'] == 'f6'
+assert os.listdir(tmp) == ['SnapMosaic.json'], os.listdir(tmp)
+config.flush() # The change is still pending and is retried
+assert read_file()['hotkey'] == 'f2'
+print("✓ Interrupted writes keep the old settings and are retried")
+
+# Test 5: A hot-path counter costs no disk I/O per update
+start = time.perf_counter()
+for i in range(1000):
+    config.set('auto_save_numeric_counter', i)
+elapsed_ms = (time.perf_counter() - start) * 1000
+writes = config.write_count
+config.close()
+assert config.write_count - writes <= 2 and Config(path).get('auto_save_numeric_counter') == 999
+print(f"✓ 1000 counter updates took {elapsed_ms:.1f} ms with {config.write_count - writes} file write(s)")
+
+print("\n✓ All config tests passed!")
@@ -0,0 +1,160 @@
+"""Verify the control socket: request/batch handling, the window's commands, and forwarding a second launch"""
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+os.environ['SNAPMOSAIC_CAPTURE_BACKEND'] = 'synthetic'
+os.environ['SNAPMOSAIC_AUDIO_BACKEND'] = 'null'
+os.environ['SNAPMOSAIC_CONTROL_SOCKET'] = f"snapmosaic-test-{os.getpid()}"
+
+from PySide6.QtWidgets import QApplication
+from PySide6.QtCore import QTimer
+
+from snap_mosaic.config import Config
+from snap_mosaic.control import ControlServer, ControlError, Deferred
+
+app = QApplication(sys.argv)
+tmp = tempfile.mkdtemp()
+root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+
+# The client runs in another process: its blocking socket calls would stall this one's event loop
+CLIENT = """
+import json, sys
+from snap_mosaic.control import ControlClient
+client = ControlClient(timeout_ms=20000)
+assert client.connect(), "could not connect"
+replies = []
+for line in json.loads(sys.argv[1]):
+    if isinstance(line, str): # Raw bytes, e.g. invalid JSON
+        client.socket.write(line.encode() + b'\\n')
+    else:
+        client.send(line)
+for _ in json.loads(sys.argv[1]):
+    replies.append(client.receive())
+print(json.dumps(replies))
+"""
+
+
+def run_process(args, timeout=60):
+    """Run a process while this one keeps serving control requests. Returns (exit code, stdout, stderr)."""
+    env = dict(os.environ, QT_QPA_PLATFORM='offscreen', PYTHONPATH=root)
+    process = subprocess.Popen([sys.executable, *args], cwd=root, env=env,
+                               stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+    deadline = time.monotonic() + timeout
+    while process.poll() is None and time.monotonic() < deadline:
+        app.processEvents()
+        time.sleep(0.002)
+    stdout, stderr = process.communicate(timeout=10)
+    return process.returncode, stdout, stderr
+
+
+def send_all(*requests):
+    """Send the requests over one connection without waiting in between; returns their replies."""
+    code, stdout, stderr = run_process(['-c', CLIENT, json.dumps(requests)])
+    assert code == 0, stderr
+    return json.loads(stdout)
+
+
+# Test 1: Replies, errors, ids and batches
+def slow(request):
+    deferred = Deferred()
+    QTimer.singleShot(50, lambda: deferred.resolve({'value': request['value']}))
+    return deferred
+
+
+def fail(request):
+    raise ControlError("nope")
+
+
+server = ControlServer({'echo': lambda request: {'echo': request.get('text')}, 'slow': slow, 'fail': fail})
+assert server.listen()
+assert not ControlServer({}).listen() # A second server on the same name steps aside
+
+
+# A slow reply still comes back before later ones, and a batch answers in request order
+echo, failed, missing, invalid, slow_reply, batch = send_all(
+    {'command': 'echo', 'text': "hi", 'id': 7},
+    {'command': 'fail'},
+    {'command': 'missing'},
+    '{not json',
+    {'command': 'slow', 'value': 1},
+    [{'command': 'slow', 'value': 2}, {'command': 'echo', 'text': "b"}, {'command': 'fail'}],
+)
+assert echo == {'echo': "hi", 'ok': True, 'id': 7}, echo
+assert failed == {'ok': False, 'error': "nope"}, failed
+assert not missing['ok'] and "unknown command 'missing'" in missing['error'], missing
+assert not invalid['ok'] and "invalid JSON" in invalid['error'], invalid
+assert slow_reply == {'value': 1, 'ok': True}, slow_reply
+assert batch == [{'value': 2, 'ok': True}, {'echo': "b", 'ok': True}, {'ok': False, 'error': "nope"}], batch
+server.close()
+print("✓ Requests, errors and batches are answered in order, deferred replies included")
+
+# Test 2: The window's commands: set a region, capture with file paths, batch, auto-snap, export, status
+from snap_mosaic.main_window import SnapMosaic
+
+config = Config(os.path.join(tmp, 'config.json'))
+config.settings.update({
+    'sounds_enabled': False,
+    'session_restore_enabled': False,
+    'auto_save_enabled': True,
+    'auto_save_location': os.path.join(tmp, 'saves'),
+})
+window = SnapMosaic(config)
+# A stray image in the auto-save folder: an export that fell back to the folder would pick it up as a 7th frame
+from PySide6.QtGui import QImage
+os.makedirs(config.get('auto_save_location'))
+stray = QImage(160, 120, QImage.Format.Format_RGB32)
+stray.fill(0)
+assert stray.save(os.path.join(config.get('auto_save_location'), "stray.png"))
+
+names = ['no_region', 'region', 'bad_region', 'capture', 'batch', 'unknown', 'start', 'stop', 'export']
+replies = dict(zip(names, send_all(
+    {'command': 'capture'},
+    {'command': 'set_region', 'name': "Chat", 'x': 0, 'y': 0, 'width': 160, 'height': 120},
+    {'command': 'set_region', 'x': 0, 'y': 0, 'width': 0, 'height': 10},
+    {'command': 'capture', 'region': "Chat"},
+    [{'command': 'capture'} for _ in range(5)] + [{'command': 'status'}],
+    {'command': 'capture', 'region': "Other"},
+    {'command': 'start_auto_snap'},
+    {'command': 'stop_auto_snap'},
+    {'command': 'export', 'path': os.path.join(tmp, 'captures.gif')},
+)))
+assert not replies['no_region']['ok'] and "no capture region" in replies['no_region']['error']
+assert replies['region']['region']['width'] == 160 and window.region_named("Chat") is not None
+assert not replies['bad_region']['ok']
+# The new region's tab replaces the empty startup tab and is the one shown
+assert list(window.grids) == ["Chat"] and window.grid_view is window.grids["Chat"], list(window.grids)
+captured = replies['capture']['captures']
+assert len(captured) == 1 and captured[0]['region'] == "Chat" and (captured[0]['width'], captured[0]['height']) == (160, 120)
+assert captured[0]['path'] and os.path.exists(captured[0]['path']), captured
+batch = replies['batch']
+assert all(reply['ok'] for reply in batch), batch
+paths = [reply['captures'][0]['path'] for reply in batch[:5]]
+assert len(set(paths)) == 5 and all(os.path.exists(path) for path in paths), paths
+ids = [reply['captures'][0]['id'] for reply in batch[:5]]
+assert ids == sorted(ids) and captured[0]['id'] < ids[0]
+assert batch[5]['captures'] == 6 and batch[5]['capture_backend'] == 'synthetic'
+assert not replies['unknown']['ok'] and "Other" in replies['unknown']['error']
+assert replies['start']['auto_snapping'] and not replies['stop']['auto_snapping'] and not window.is_auto_snapping
+# The export used the six captures in Chat's grid, not the auto-save folder
+assert len(window.capture_model) == 6 and window.grid_view is window.grids["Chat"]
+assert replies['export']['ok'] and replies['export']['frames'] == 6, replies['export']
+with open(os.path.join(tmp, 'captures.gif'), 'rb') as f:
+    assert f.read(6) == b'GIF89a'
+print("✓ Window commands capture, report saved paths, batch, toggle Auto-Snap and export")
+
+# Test 3: A second launch passes its request to the running window instead of opening another
+code, stdout, stderr = run_process(['-m', 'snap_mosaic', 'gui', '--capture'])
+assert code == 0, stderr
+assert "already running" in stderr, stderr
+forwarded = json.loads(stdout)
+assert forwarded[0]['ok'] and os.path.exists(forwarded[0]['captures'][0]['path']), forwarded
+assert window.capture_count() == 7
+print("✓ A second launch forwards its arguments to the running instance")
+
+window.quit_application()
+print("\n✓ All control socket tests passed!")
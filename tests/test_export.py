@@ -0,0 +1,171 @@
+"""Verify streaming animation export: scaling, quantization, GIF/APNG writers and cancellation"""
+import os
+import struct
+import sys
+import tempfile
+import numpy as np
+from PySide6.QtWidgets import QApplication
+from PySide6.QtGui import QImage, QImageReader, QColor
+from PySide6.QtCore import QEventLoop, QTimer
+
+from snap_mosaic.export import (
+    resize_array, quantize, GifWriter, ApngWriter, AnimationExporter, DirectoryFrameSource
+)
+from snap_mosaic.imaging import qimage_to_array
+
+app = QApplication(sys.argv)
+tmp = tempfile.mkdtemp()
+
+
+def make_frame(index, width=320, height=240):
+    image = QImage(width, height, QImage.Format.Format_RGB32)
+    image.fill(QColor(20, 40, 60))
+    for y in range(40, 80):
+        for x in range(index * 10, index * 10 + 40):
+            image.setPixelColor(x, y, QColor(250, 200, 0))
+    return image
+
+
+def rgb_of(image):
+    return qimage_to_array(image.convertToFormat(QImage.Format.Format_RGB32))[..., 2::-1]
+
+
+def run_export(exporter):
+    results = []
+    loop = QEventLoop()
+    exporter.export_finished.connect(lambda ok, message: results.append((ok, message)))
+    exporter.export_finished.connect(loop.quit)
+    QTimer.singleShot(20000, loop.quit)
+    exporter.start()
+    loop.exec()
+    exporter.wait()
+    return results[0]
+
+
+# Test 1: Vectorized resize keeps flat colours and averages fine detail
+flat = np.full((1080, 1920, 4), 77, dtype=np.uint8)
+assert resize_array(flat, 640, 360).shape == (360, 640, 4)
+assert (resize_array(flat, 640, 360) == 77).all()
+checker = np.zeros((400, 400, 3), dtype=np.uint8)
+checker[::2, ::2] = 255
+checker[1::2, 1::2] = 255
+assert abs(int(resize_array(checker, 100, 100).mean()) - 127) <= 1
+print("✓ Resize preserves flat colours and box-filters detail")
+
+# Test 2: Quantization is exact for few colours and bounded for many
+rgb = rgb_of(make_frame(3))
+indices, palette = quantize(rgb)
+assert len(palette) == 2 and (palette[indices] == rgb).all()
+noise = np.random.default_rng(1).integers(0, 256, (200, 200, 3), dtype=np.uint8)
+indices, palette = quantize(noise)
+assert len(palette) <= 256 and indices.max() < len(palette)
+print("✓ Palette exact for 2 colours, at most 256 for noise")
+
+# Test 3: GIF frames decode back with Qt's reader
+path = os.path.join(tmp, "anim.gif")
+writer = GifWriter(path, 320, 240, fps=10)
+for i in range(6):
+    writer.add_frame(rgb_of(make_frame(i)))
+writer.close()
+reader = QImageReader(path)
+assert reader.imageCount() == 6
+for i in range(6):
+    decoded = rgb_of(reader.read())
+    assert (decoded == rgb_of(make_frame(i))).all(), i
+# Noise overflows the 4096-entry LZW table, exercising the clear-code reset
+path = os.path.join(tmp, "noise.gif")
+writer = GifWriter(path, 200, 200, fps=10)
+noise_indices, noise_palette = quantize(noise)
+writer.add_frame(noise)
+writer.close()
+assert (rgb_of(QImage(path)) == noise_palette[noise_indices]).all()
+# Later frames store only the area that changed, and an unchanged frame still counts
+path = os.path.join(tmp, "partial.gif")
+writer = GifWriter(path, 320, 240, fps=10)
+for i in (0, 1, 1, 2):
+    writer.add_frame(rgb_of(make_frame(i)))
+writer.close()
+reader = QImageReader(path)
+assert reader.imageCount() == 4
+for i in (0, 1, 1, 2):
+    assert (rgb_of(reader.read()) == rgb_of(make_frame(i))).all(), i
+single = os.path.join(tmp, "single.gif")
+writer = GifWriter(single, 320, 240, fps=10)
+writer.add_frame(rgb_of(make_frame(0)))
+writer.close()
+assert os.path.getsize(path) < 2 * os.path.getsize(single), (os.path.getsize(path), os.path.getsize(single))
+print("✓ GIF decodes to the exact source frames")
+
+# Test 4: APNG has one fcTL per frame, a patched acTL and a valid default image
+path = os.path.join(tmp, "anim.png")
+writer = ApngWriter(path, 320, 240, fps=10)
+for i in range(4):
+    writer.add_frame(rgb_of(make_frame(i)))
+writer.close()
+with open(path, 'rb') as f:
+    data = f.read()
+chunks = []
+offset = 8
+while offset < len(data):
+    length, chunk_type = struct.unpack('>I4s', data[offset:offset + 8])
+    chunks.append((chunk_type, data[offset + 8:offset + 8 + length]))
+    offset += 12 + length
+types = [chunk_type for chunk_type, _ in chunks]
+assert types.count(b'fcTL') == 4 and types.count(b'fdAT') == 3 and types[-1] == b'IEND'
+assert struct.unpack('>II', dict(chunks)[b'acTL']) == (4, 0)
+assert (rgb_of(QImage(path)) == rgb_of(make_frame(0))).all()
+print("✓ APNG structure valid, first frame lossless")
+
+# Test 5: Exporting a directory streams every frame and scales to max_width
+frame_dir = os.path.join(tmp, "frames")
+os.makedirs(frame_dir)
+for i in range(8):
+    make_frame(i).save(os.path.join(frame_dir, f"SnapMosaic-{i:04d}.png"))
+source = DirectoryFrameSource(frame_dir)
+assert len(source) == 8
+exporter = AnimationExporter(source, os.path.join(tmp, "dir.gif"), fps=5, max_width=160)
+progress = []
+exporter.progress.connect(lambda done, total: progress.append((done, total)))
+ok, message = run_export(exporter)
+assert ok and progress[-1] == (8, 8)
+reader = QImageReader(message)
+assert reader.imageCount() == 8 and reader.size().width() == 160
+print("✓ Directory exported frame by frame with progress")
+
+# Test 6: Cancelling removes the partial file
+class SlowSource:
+    def __len__(self):
+        return 1000
+
+    def __iter__(self):
+        for i in range(1000):
+            yield make_frame(i % 20)
+
+path = os.path.join(tmp, "cancel.gif")
+exporter = AnimationExporter(SlowSource(), path)
+exporter.progress.connect(lambda done, total: done == 3 and exporter.requestInterruption())
+ok, message = run_export(exporter)
+assert not ok and exporter.cancelled and not os.path.exists(path)
+print("✓ Cancelled export leaves no partial file")
+
+# Test 7: Frames that can't be loaded are left out and reported; an export with none loadable fails
+class GappySource:
+    def __init__(self, frames):
+        self.frames = frames
+
+    def __len__(self):
+        return len(self.frames)
+
+    def __iter__(self):
+        return iter(self.frames)
+
+exporter = AnimationExporter(GappySource([make_frame(0), None, make_frame(1), None]), os.path.join(tmp, "gaps.gif"))
+ok, message = run_export(exporter)
+assert ok and exporter.frames_written == 2 and exporter.frames_skipped == 2
+assert QImageReader(message).imageCount() == 2
+exporter = AnimationExporter(GappySource([None, None]), os.path.join(tmp, "empty.gif"))
+ok, message = run_export(exporter)
+assert not ok and "None of the 2 frames" in message, message
+print("✓ Unloadable frames are counted, not silently dropped")
+
+print("\n✓ All animation export tests passed!")
@@ -0,0 +1,170 @@
+"""Verify the single-hook hotkey listener: parsing, matching, debouncing and rebinding, driven by a fake key source"""
+import sys
+import threading
+from PySide6.QtWidgets import QApplication
+from PySide6.QtCore import QEventLoop, QTimer
+
+from snap_mosaic.hotkey import HotkeyListener, key_name, parse_hotkey
+
+app = QApplication(sys.argv)
+
+
+class FakeKeySource:
+    """Stands in for the pynput listener; key events are injected from a thread like a real hook."""
+    instances = []
+
+    def __init__(self, on_press, on_release):
+        self.on_press = on_press
+        self.on_release = on_release
+        self.alive = False
+        FakeKeySource.instances.append(self)
+
+    def start(self):
+        self.alive = True
+
+    def stop(self):
+        self.alive = False
+
+    def is_alive(self):
+        return self.alive
+
+    def send(self, *events):
+        def run():
+            for kind, key in events:
+                (self.on_press if kind == 'press' else self.on_release)(key)
+        thread = threading.Thread(target=run)
+        thread.start()
+        thread.join()
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+def tap(*keys):
+    return [('press', key) for key in keys] + [('release', key) for key in reversed(keys)]
+
+
+def deliver():
+    loop = QEventLoop()
+    QTimer.singleShot(20, loop.quit)
+    loop.exec()
+
+
+class FakeKey:
+    """A pynput-like key: Key members have a name, KeyCodes a char and/or vk."""
+
+    def __init__(self, name=None, char=None, vk=None):
+        self.name, self.char, self.vk = name, char, vk
+
+
+# Test 1: Hotkey strings and key events are normalized to the same names
+assert parse_hotkey('f7') == {'f7'}
+assert parse_hotkey('ctrl+shift+S') == parse_hotkey('<ctrl>+<shift>+s') == {'ctrl', 'shift', 's'}
+assert parse_hotkey('alt+page_up') == {'alt', 'page_up'}
+for invalid in ('', 'ctrl', 'ctrl+nosuchkey'):
+    try:
+        parse_hotkey(invalid)
+        assert False, invalid
+    except ValueError:
+        pass
+assert key_name(FakeKey(name='ctrl_l')) == key_name(FakeKey(name='ctrl_r')) == 'ctrl'
+assert key_name(FakeKey(name='cmd')) == 'meta' and key_name(FakeKey(name='f7')) == 'f7'
+assert key_name(FakeKey(char='S')) == 's' and key_name(FakeKey(char='\x13', vk=0x53)) == 's'
+assert key_name(FakeKey()) is None
+print("✓ Hotkeys and key events normalized")
+
+# Test 2: Several bindings on one hook, each dispatched by name on the GUI thread
+clock = FakeClock()
+listener = HotkeyListener(FakeKeySource, clock)
+fired = []
+listener.activated.connect(lambda name: fired.append((name, threading.current_thread() is threading.main_thread())))
+assert listener.bind('capture', 'f7', 100)
+assert listener.bind('auto_snap', 'ctrl+shift+a', 400)
+assert listener.bind('burst', 'f9', 400)
+assert listener.start() and len(FakeKeySource.instances) == 1
+source = FakeKeySource.instances[0]
+source.send(*tap('f7'))
+clock.now += 1
+source.send(*tap(FakeKey(name='ctrl_l'), FakeKey(name='shift_r'), FakeKey(char='A')))
+clock.now += 1
+source.send(*tap('f9'))
+source.send(*tap('f8'), *tap('a')) # Unbound key, and 'a' without its modifiers
+deliver()
+assert fired == [('capture', True), ('auto_snap', True), ('burst', True)], fired
+print("✓ Three bindings dispatched from a single hook")
+
+# Test 3: A held key's auto-repeat fires once; a repeat storm of taps is rate-limited
+fired.clear()
+source.send(('press', 'f7'), ('press', 'f7'), ('press', 'f7'), ('release', 'f7'))
+for _ in range(10): # X11-style repeat: release/press pairs within the interval
+    clock.now += 0.005
+    source.send(*tap('f7'))
+clock.now += 0.2
+source.send(*tap('f7'))
+deliver()
+assert [name for name, _ in fired] == ['capture', 'capture'], fired
+assert listener.suppressed_count('capture') == 10
+print("✓ Held keys and repeat storms are debounced")
+
+# Test 4: Extra modifiers don't match a plain binding
+fired.clear()
+clock.now += 1
+source.send(*tap('shift', 'f7'))
+deliver()
+assert fired == []
+print("✓ Bindings match their exact key combination")
+
+# Test 5: Rebinding keeps the same hook; conflicts and invalid keys are rejected
+assert listener.bind('capture', 'f6')
+assert not listener.bind('burst', 'f6') and listener.hotkey_for('burst') == 'f9'
+assert not listener.bind('burst', 'hyper+x')
+fired.clear()
+clock.now += 1
+source.send(*tap('f7'), *tap('f6'))
+listener.unbind('auto_snap')
+source.send(*tap('ctrl', 'shift', 'a'))
+deliver()
+assert [name for name, _ in fired] == ['capture'] and len(FakeKeySource.instances) == 1 and source.alive
+listener.stop()
+assert not source.alive
+print("✓ Rebinding without restarting the hook")
+
+# Test 6: Shifted characters name their key, and a release always ends the press it belongs to
+listener = HotkeyListener(FakeKeySource, clock)
+fired.clear()
+listener.activated.connect(lambda name: fired.append((name, True)))
+assert parse_hotkey('shift+!') == parse_hotkey('shift+1') == {'shift', '1'}
+assert listener.bind('mark', 'shift+1') and listener.bind('capture', 'f7') and listener.start()
+source = FakeKeySource.instances[-1]
+clock.now += 1
+# Shift goes up before the digit, so the release reports the unshifted character
+source.send(('press', 'shift'), ('press', FakeKey(char='!')), ('release', 'shift'), ('release', FakeKey(char='1')))
+clock.now += 1
+source.send(*tap('f7'))
+clock.now += 1 # A layout the table doesn't know: the release is matched by virtual key code
+source.send(('press', 'shift'), ('press', FakeKey(char='§', vk=0x31)), ('release', 'shift'),
+            ('release', FakeKey(char='é', vk=0x31)))
+clock.now += 1
+source.send(*tap('f7'))
+deliver()
+assert [name for name, _ in fired] == ['mark', 'capture', 'capture'], fired
+assert not listener._pressed
+
+# A key whose release was lost is forgotten once it stops auto-repeating
+fired.clear()
+source.send(('press', 'x'))
+clock.now += 1
+source.send(*tap('f7')) # Still counts as held
+clock.now += 3
+source.send(*tap('f7'))
+deliver()
+assert [name for name, _ in fired] == ['capture'], fired
+listener.stop()
+print("✓ Shifted characters and mismatched releases don't leave keys stuck")
+
+print("\n✓ All hotkey tests passed!")
@@ -0,0 +1,208 @@
+"""Verify the image formats: QOI matches the reference encoder, PNG levels, WebP, the encoder pool and calibration"""
+import os
+import struct
+import subprocess
+import sys
+import tempfile
+
+import numpy as np
+from PySide6.QtWidgets import QApplication
+from PySide6.QtGui import QImage, QColor
+from PySide6.QtCore import QEventLoop, QRect, QTimer
+
+app = QApplication(sys.argv)
+
+from snap_mosaic import cli, image_formats
+from snap_mosaic.capture_backends import SyntheticBackend
+from snap_mosaic.dialogs import SettingsDialog
+from snap_mosaic.export import DirectoryFrameSource
+from snap_mosaic.config import Config
+from snap_mosaic.encoder import EncoderPool
+from snap_mosaic.image_formats import (FORMATS, ImageEncoder, calibrate, calibration_encoders, decode_qoi,
+                                       encode_qoi, format_supported, image_files, image_format_for_path,
+                                       read_image, supported_formats)
+from snap_mosaic.imaging import qimage_to_array
+
+tmp = tempfile.mkdtemp()
+root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+
+def reference_qoi(image):
+    """The QOI reference encoder (qoi.h), pixel by pixel."""
+    rgba = qimage_to_array(image).reshape(-1, 4)[:, [2, 1, 0, 3]].tolist()
+    channels = 4 if image.hasAlphaChannel() else 3
+    out = bytearray(struct.pack('>4sIIBB', b'qoif', image.width(), image.height(), channels, 0))
+    index = [(0, 0, 0, 0)] * 64
+    previous = (0, 0, 0, 255)
+    run = 0
+    for i, pixel in enumerate(map(tuple, rgba)):
+        if pixel == previous:
+            run += 1
+            if run == 62 or i == len(rgba) - 1:
+                out.append(0xc0 | (run - 1))
+                run = 0
+            continue
+        if run:
+            out.append(0xc0 | (run - 1))
+            run = 0
+        r, g, b, a = pixel
+        slot = (r * 3 + g * 5 + b * 7 + a * 11) % 64
+        if index[slot] == pixel:
+            out.append(slot)
+        else:
+            index[slot] = pixel
+            if a == previous[3]:
+                vr, vg, vb = (((c - p + 128) & 255) - 128 for c, p in zip(pixel[:3], previous[:3]))
+                vg_r, vg_b = vr - vg, vb - vg
+                if -2 <= vr <= 1 and -2 <= vg <= 1 and -2 <= vb <= 1:
+                    out.append(0x40 | (vr + 2) << 4 | (vg + 2) << 2 | (vb + 2))
+                elif -32 <= vg <= 31 and -8 <= vg_r <= 7 and -8 <= vg_b <= 7:
+                    out += bytes((0x80 | (vg + 32), (vg_r + 8) << 4 | (vg_b + 8)))
+                else:
+                    out += bytes((0xfe, r, g, b))
+            else:
+                out += bytes((0xff, r, g, b, a))
+        previous = pixel
+    return bytes(out + b'\x00' * 7 + b'\x01')
+
+
+def make_image(pixels, alpha):
+    height, width = pixels.shape[:2]
+    image_format = QImage.Format.Format_ARGB32 if alpha else QImage.Format.Format_RGB32
+    return QImage(np.ascontiguousarray(pixels).tobytes(), width, height, width * 4, image_format).copy()
+
+
+# Test 1: QOI output is byte for byte the reference encoder's, and decodes back to the same pixels
+rng = np.random.default_rng(7)
+for trial in range(24):
+    width, height = int(rng.integers(1, 48)), int(rng.integers(1, 48))
+    pixels = rng.integers(0, 256, (height, width, 4), dtype=np.uint8)
+    kind = trial % 6
+    if kind == 1:
+        pixels[:] = pixels[0, 0] # One long run, several 62-pixel chunks
+    elif kind == 2:
+        pixels = pixels // 128 * 128 # Few colours: index hits
+    elif kind == 3:
+        pixels = np.cumsum(rng.integers(-2, 2, (height, width, 4)), axis=1).astype(np.uint8) # Small steps
+    elif kind == 4:
+        pixels[::2] = 0 # Transparent black, already in the zeroed index
+    elif kind == 5:
+        pixels[:, :] = (0, 0, 0, 255) # A run from the first pixel
+    alpha = trial % 2 == 0
+    if not alpha:
+        pixels[..., 3] = 255
+    image = make_image(pixels, alpha)
+    data = encode_qoi(image)
+    assert data == reference_qoi(image), trial
+    assert np.array_equal(qimage_to_array(decode_qoi(data)), qimage_to_array(image)), trial
+print("✓ QOI matches the reference encoder and round-trips losslessly")
+
+# Test 2: PNG levels trade size for time, level 6 is Qt's default, WebP lossless is exact
+screen = QImage(640, 360, QImage.Format.Format_RGB32)
+screen.fill(QColor(30, 30, 40))
+for y in range(0, 360, 12):
+    for x in range(0, 640, 3):
+        screen.setPixelColor(x, y, QColor((x * 7) % 256, (y * 3) % 256, 120))
+sizes = {level: len(ImageEncoder('png', png_compression=level).encode(screen)) for level in (0, 1, 9)}
+assert sizes[0] > sizes[1] > sizes[9], sizes
+default_png = os.path.join(tmp, 'default.png')
+screen.save(default_png)
+with open(default_png, 'rb') as f:
+    assert ImageEncoder('png').encode(screen) == f.read()
+
+lossless = ImageEncoder('webp', webp_lossless=True).encode(screen)
+lossy = ImageEncoder('webp', webp_quality=50).encode(screen)
+decoded = QImage.fromData(lossless).convertToFormat(QImage.Format.Format_RGB32)
+assert np.array_equal(qimage_to_array(decoded), qimage_to_array(screen))
+assert not QImage.fromData(lossy).isNull() and lossy != lossless
+assert not ImageEncoder('webp', webp_quality=50).lossless and ImageEncoder('qoi').lossless
+print(f"✓ PNG levels 0/1/9: {sizes[0]}/{sizes[1]}/{sizes[9]} bytes; lossless WebP is exact")
+
+# Test 3: Settings come from the config, and the extension picks the format
+config = Config(os.path.join(tmp, 'config.json'))
+config.settings.update({'auto_save_format': 'webp', 'auto_save_webp_quality': 60, 'auto_save_png_compression': 2})
+encoder = ImageEncoder.from_config(config)
+assert (encoder.fmt, encoder.webp_quality, encoder.label) == ('webp', 60, "webp quality 60")
+assert ImageEncoder.from_config(config, 'png').label == "png level 2"
+assert image_format_for_path("a/b.JPEG") == 'jpg' and image_format_for_path("a.bmp") is None
+assert cli.IMAGE_FORMATS == FORMATS
+print("✓ Encoder settings follow the config")
+
+# Test 4: The encoder pool writes each format with its settings
+pool = EncoderPool(max_workers=2, max_pending=8)
+results = []
+pool.finished.connect(lambda token, path, ok, ms: results.append((path, ok)))
+for fmt in FORMATS:
+    pool.submit(screen, os.path.join(tmp, f"pool.{fmt}"), ImageEncoder(fmt))
+pool.wait_for_done()
+loop = QEventLoop()
+QTimer.singleShot(50, loop.quit)
+loop.exec()
+assert sorted(results) == sorted((os.path.join(tmp, f"pool.{fmt}"), True) for fmt in FORMATS), results
+for fmt in ('png', 'jpg', 'webp'):
+    assert not QImage(os.path.join(tmp, f"pool.{fmt}")).isNull(), fmt
+with open(os.path.join(tmp, "pool.qoi"), 'rb') as f:
+    assert np.array_equal(qimage_to_array(decode_qoi(f.read())), qimage_to_array(screen))
+print("✓ The encoder pool writes PNG, JPG, WebP and QOI files")
+
+# Test 5: Calibration reports time and size per frame for each setting
+encoders = calibration_encoders(('png', 'qoi'))
+assert [encoder.label for encoder in encoders][-1] == "qoi" and len(encoders) == 6
+measured = calibrate([screen, screen], encoders)
+assert all(ms > 0 and size > 0 for _, ms, size in measured), measured
+assert dict((encoder.label, size) for encoder, _, size in measured)["png level 0"] > 640 * 360 * 3
+
+env = dict(os.environ, QT_QPA_PLATFORM='offscreen', PYTHONPATH=root)
+result = subprocess.run([sys.executable, '-m', 'snap_mosaic', 'calibrate', '--config', os.path.join(tmp, 'config.json'),
+                         '--backend', 'synthetic', '-r', '0,0,320,200', '-n', '2', '--format', 'png', '--format', 'qoi'],
+                        cwd=root, env=env, capture_output=True, text=True, timeout=120)
+assert result.returncode == 0, result.stderr
+assert "png level 9" in result.stdout and "qoi" in result.stdout and "jpg" not in result.stdout, result.stdout
+assert "* png level 6" in result.stdout, result.stdout # The current setting is marked
+result = subprocess.run([sys.executable, '-m', 'snap_mosaic', 'calibrate', '--config', os.path.join(tmp, 'config.json'),
+                         os.path.join(tmp, 'missing')], cwd=root, env=env, capture_output=True, text=True, timeout=120)
+assert result.returncode == 2 and "no such file or folder" in result.stderr, result.stderr
+print("✓ Calibration reports milliseconds and bytes per frame")
+
+# Test 6: A QOI auto-save folder is read back by export, calibration and the synthetic backend
+qoi_dir = os.path.join(tmp, 'qoi-folder')
+os.makedirs(qoi_dir)
+frames = []
+for i in range(3):
+    frame = QImage(48, 32, QImage.Format.Format_RGB32)
+    frame.fill(QColor(40 * i, 90, 200))
+    frames.append(frame)
+    ImageEncoder('qoi').save(frame, os.path.join(qoi_dir, f"frame-{i}.qoi"))
+with open(os.path.join(qoi_dir, "frame-3.qoi"), 'wb') as f:
+    f.write(b'qoif\x00') # Truncated
+assert image_files(qoi_dir)[0].endswith("frame-0.qoi") and read_image(image_files(qoi_dir)[-1]).isNull()
+read_back = [image for image in DirectoryFrameSource(qoi_dir) if image is not None]
+assert [qimage_to_array(image).tolist() for image in read_back] == [qimage_to_array(f).tolist() for f in frames]
+backend = SyntheticBackend.from_directory(qoi_dir)
+assert backend.grab(QRect(0, 0, 48, 32)) == frames[0].convertToFormat(QImage.Format.Format_RGB32)
+os.remove(os.path.join(qoi_dir, "frame-3.qoi"))
+result = subprocess.run([sys.executable, '-m', 'snap_mosaic', 'calibrate', '--config', os.path.join(tmp, 'config.json'),
+                         '--format', 'qoi', qoi_dir], cwd=root, env=env, capture_output=True, text=True, timeout=120)
+assert result.returncode == 0 and "Encoding 3 sample frame(s)" in result.stdout, result.stdout + result.stderr
+print("✓ QOI folders are read by export, calibration and the synthetic backend")
+
+# Test 7: Without Qt's WebP plugin, WebP is greyed out in Settings and rejected by the CLI
+image_formats._qt_writable = {'png', 'jpeg', 'jpg', 'bmp'}
+assert supported_formats() == ('png', 'jpg', 'qoi') and format_supported('qoi')
+config.settings['auto_save_format'] = 'webp'
+assert ImageEncoder.from_config(config).fmt == 'png'
+dialog = SettingsDialog(config)
+webp_item = dialog.format_combo.model().item(FORMATS.index('webp'))
+assert not webp_item.isEnabled() and dialog.format_combo.currentText() == 'png'
+dialog.deleteLater()
+args = cli.build_parser().parse_args(['capture', '--format', 'webp'])
+try:
+    cli._make_image_encoder(args, config)
+    assert False, "webp accepted"
+except cli.UsageError as e:
+    assert "webp" in str(e)
+image_formats._qt_writable = None
+assert format_supported('webp') # This build has the plugin
+print("✓ WebP is offered only when Qt can write it")
+
+print("\n✓ All image format tests passed!")
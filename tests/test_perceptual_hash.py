@@ -0,0 +1,67 @@
+"""Verify perceptual hashing and fast near-duplicate lookups"""
+from PySide6.QtGui import QImage, QColor, QPainter
+import random
+import time
+
+from snap_mosaic.perceptual_hash import HashIndex, dhash, hamming_distance
+
+
+def make_frame(width, height, state):
+    image = QImage(width, height, QImage.Format.Format_RGB32)
+    image.fill(QColor("white"))
+    painter = QPainter(image)
+    if state:
+        painter.fillRect(0, 0, width // 2, height, QColor("black"))
+        painter.fillRect(width // 2, height // 3, width // 4, height // 3, QColor("red"))
+    else:
+        painter.fillRect(width // 2, 0, width // 2, height, QColor("navy"))
+        painter.fillRect(0, height // 2, width // 3, height // 4, QColor("green"))
+    painter.end()
+    return image
+
+
+# Test 1: Scaling the same content barely changes the hash; different content does
+state_a = dhash(make_frame(1280, 720, True))
+state_a_scaled = dhash(make_frame(640, 360, True))
+state_b = dhash(make_frame(1280, 720, False))
+assert hamming_distance(state_a, state_a_scaled) <= 4
+assert hamming_distance(state_a, state_b) > 4
+print(f"✓ dhash: same content {hamming_distance(state_a, state_a_scaled)} bits apart, "
+      f"different content {hamming_distance(state_a, state_b)} bits apart")
+
+# Test 2: A UI toggling between two states matches the earlier capture, not only the previous one
+index = HashIndex()
+index.add('first', state_a)
+index.add('second', state_b)
+assert index.nearest(dhash(make_frame(1280, 720, True)), 4)[0] == 'first'
+index.remove('first')
+assert index.nearest(state_a, 4) is None
+print("✓ Index finds earlier near-duplicates and forgets removed entries")
+
+# Test 3: Radius search matches a brute-force scan
+random.seed(1234)
+index = HashIndex()
+values = {key: random.getrandbits(64) for key in range(2000)}
+for key, value in values.items():
+    index.add(key, value)
+for _ in range(50):
+    query = random.choice(list(values.values())) ^ (1 << random.randrange(64)) ^ (1 << random.randrange(64))
+    for max_distance in (3, 6):
+        expected = sorted(k for k, v in values.items() if hamming_distance(query, v) <= max_distance)
+        assert sorted(k for k, _ in index.search(query, max_distance)) == expected
+print("✓ Multi-index search matches brute force")
+
+# Test 4: Lookups stay sub-millisecond with tens of thousands of entries
+index = HashIndex()
+hashes = [random.getrandbits(64) for _ in range(50000)]
+for key, value in enumerate(hashes):
+    index.add(key, value)
+queries = [value ^ 0b101 for value in hashes[:1000]]
+start = time.perf_counter()
+for query in queries:
+    index.nearest(query, 4)
+per_lookup_ms = (time.perf_counter() - start) * 1000.0 / len(queries)
+assert per_lookup_ms < 1.0, per_lookup_ms
+print(f"✓ {len(index)} entries, {per_lookup_ms:.3f} ms per lookup")
+
+print("\n✓ All perceptual hash tests passed!")
@@ -0,0 +1,88 @@
+"""Verify the instant replay ring buffer bounds, in-memory storage and recorder cost reporting"""
+import sys
+import threading
+import time
+from datetime import datetime, timedelta
+from PySide6.QtWidgets import QApplication
+from PySide6.QtGui import QImage, QColor, QPixmap
+from PySide6.QtCore import QEventLoop, QTimer
+
+from snap_mosaic.capture_backends import QtBackend, off_thread_grab
+from snap_mosaic.replay import ReplayBuffer, ReplayRecorder
+
+app = QApplication(sys.argv)
+
+
+def make_frame(index, width=1280, height=720):
+    image = QImage(width, height, QImage.Format.Format_RGB32)
+    image.fill(QColor(index * 20 % 256, 80, 160))
+    return image
+
+
+# Test 1: The ring keeps only the newest max_frames frames, oldest first
+buffer = ReplayBuffer(max_frames=5, storage='raw', max_width=0)
+start = datetime.now()
+for i in range(8):
+    buffer.append(buffer.encode(make_frame(i, 64, 48), start + timedelta(seconds=i)))
+assert len(buffer) == 5 and buffer.evicted_count == 3
+frames = buffer.take_all()
+assert [f.image().pixelColor(0, 0).red() for f in frames] == [i * 20 for i in range(3, 8)]
+assert len(buffer) == 0 and buffer.total_bytes == 0
+print("✓ Ring keeps the newest frames and take_all empties it")
+
+# Test 2: Frames are downscaled and JPEG-compressed in memory
+buffer = ReplayBuffer(max_frames=10, max_width=640, storage='jpeg')
+frame = buffer.encode(make_frame(1))
+assert isinstance(frame.data, bytes)
+assert frame.size_in_bytes < make_frame(1).sizeInBytes() / 20
+assert frame.image().width() == 640
+print(f"✓ 1280x720 frame stored as {frame.size_in_bytes} bytes of 640 px JPEG")
+
+# Test 3: The memory budget bounds the buffer independently of the frame count
+raw_size = make_frame(0).sizeInBytes()
+buffer = ReplayBuffer(max_frames=100, memory_budget_mb=raw_size * 3.5 / (1024 * 1024), storage='raw')
+for i in range(10):
+    buffer.append(buffer.encode(make_frame(i)))
+assert len(buffer) == 3 and buffer.total_bytes <= buffer.memory_budget
+print("✓ Memory budget limits buffered frames")
+
+# Test 4: The recorder fills the buffer at its rate, reports its cost
+grabs = []
+
+def grab():
+    grabs.append(time.monotonic())
+    return make_frame(len(grabs), 320, 240)
+
+buffer = ReplayBuffer(max_frames=5, max_width=0)
+recorder = ReplayRecorder(grab, buffer, fps=20.0)
+recorder.start()
+loop = QEventLoop()
+QTimer.singleShot(600, loop.quit)
+loop.exec()
+stats = recorder.stats()
+recorder.requestInterruption()
+recorder.wait()
+assert 9 <= len(grabs) <= 14, len(grabs)
+assert len(buffer) == 5 and stats['frames'] == 5
+assert 0.0 < stats['cpu_percent'] < 100.0 and stats['avg_frame_ms'] > 0
+print(f"✓ Recorder grabbed {len(grabs)} frames in 0.6s at {stats['cpu_percent']:.1f}% CPU, {stats['avg_frame_ms']:.2f} ms/frame")
+
+# Test 5: With the Qt backend the recorder's grabs run on the GUI thread, as pixmaps turned into images
+grab_threads = []
+
+def gui_only_grab():
+    grab_threads.append(threading.current_thread() is threading.main_thread())
+    return QPixmap.fromImage(make_frame(len(grab_threads), 320, 240))
+
+buffer = ReplayBuffer(max_frames=5, max_width=0)
+recorder = ReplayRecorder(off_thread_grab(QtBackend(), gui_only_grab), buffer, fps=20.0)
+recorder.start()
+loop = QEventLoop()
+QTimer.singleShot(400, loop.quit)
+loop.exec()
+recorder.requestInterruption()
+assert recorder.wait(5000)
+assert grab_threads and all(grab_threads) and len(buffer) > 0
+print(f"✓ {len(grab_threads)} Qt grabs for the recorder ran on the GUI thread")
+
+print("\n✓ All instant replay tests passed!")
@@ -0,0 +1,77 @@
+"""Verify that the auto-snap scheduler keeps a drift-free rate and drops ticks instead of queueing them"""
+import json
+import os
+import sys
+import tempfile
+import time
+from PySide6.QtWidgets import QApplication
+from PySide6.QtCore import QEventLoop, QTimer
+
+from snap_mosaic.config import Config
+from snap_mosaic.scheduler import AutoSnapScheduler, format_interval
+
+app = QApplication(sys.argv)
+
+
+def run_for(msecs):
+    loop = QEventLoop()
+    QTimer.singleShot(msecs, loop.quit)
+    loop.exec()
+
+
+# Test 1: Sub-second interval without drift
+scheduler = AutoSnapScheduler()
+ticks = []
+scheduler.tick.connect(lambda: ticks.append(time.monotonic()))
+scheduler.start(50)
+run_for(1030)
+scheduler.stop()
+assert 18 <= len(ticks) <= 21, len(ticks)
+# Every tick lands on a multiple of the interval from the start; lateness doesn't accumulate
+offsets = [(t - scheduler._start_time) * 1000 % 50 for t in ticks]
+assert max(min(o, 50 - o) for o in offsets) < 15, offsets
+print(f"✓ 50 ms interval: {len(ticks)} ticks in ~1s, {scheduler.achieved_fps():.1f} fps achieved")
+
+# Test 2: A slow tick handler drops ticks instead of queueing them
+scheduler = AutoSnapScheduler()
+count = [0]
+
+def slow_capture():
+    count[0] += 1
+    time.sleep(0.12) # Longer than two intervals
+
+scheduler.tick.connect(slow_capture)
+scheduler.start(50)
+started = time.monotonic()
+run_for(1000)
+scheduler.stop()
+deadlines = int((time.monotonic() - started) * 1000 // 50)
+stats = scheduler.stats()
+assert stats['dropped_ticks'] > 0
+assert count[0] + stats['dropped_ticks'] <= deadlines, (count[0], stats, deadlines)
+assert stats['achieved_fps'] < 10
+print(f"✓ Slow captures: {count[0]} ticks, {stats['dropped_ticks']} dropped, {stats['achieved_fps']:.1f} fps")
+
+# Test 3: busy_check vetoes ticks while the pipeline is full
+scheduler = AutoSnapScheduler()
+fired = []
+scheduler.tick.connect(lambda: fired.append(1))
+scheduler.busy_check = lambda: True
+scheduler.start(20)
+run_for(200)
+scheduler.stop()
+assert not fired and scheduler.dropped_ticks >= 5
+print(f"✓ Busy pipeline: {scheduler.dropped_ticks} ticks dropped, none fired")
+
+# Test 4: Legacy whole-second intervals are migrated to milliseconds
+with tempfile.TemporaryDirectory() as tmp:
+    path = os.path.join(tmp, 'SnapMosaic.json')
+    with open(path, 'w') as f:
+        json.dump({'auto_snap_interval': 3}, f)
+    config = Config(path)
+    assert config.get('auto_snap_interval_ms') == 3000
+    assert config.get('auto_snap_interval') is None
+assert format_interval(250) == "250 ms" and format_interval(10000) == "10s" and format_interval(1500) == "1.5s"
+print("✓ Legacy interval migrated and formatted")
+
+print("\n✓ All scheduler tests passed!")
@@ -0,0 +1,99 @@
+"""Verify the selection overlay: prerendered backdrop, dirty-region repaints, magnifier and edge snapping"""
+import sys
+from PySide6.QtWidgets import QApplication
+from PySide6.QtGui import QImage, QColor, QPixmap, QPainter, QRegion
+from PySide6.QtCore import Qt, QRect, QPoint, QSize
+from PySide6.QtTest import QTest
+
+from snap_mosaic.imaging import qimage_to_array
+from snap_mosaic.widgets import (
+    SelectionOverlay, prerender_backdrop, selection_dirty_region, snap_to_edge, MAGNIFIER_OFFSET, MAGNIFIER_ZOOM
+)
+
+app = QApplication(sys.argv)
+desktop = QApplication.primaryScreen().virtualGeometry()
+
+
+def region_area(region):
+    return sum(rect.width() * rect.height() for rect in region)
+
+
+def make_desktop(size):
+    """Dark left half, bright right half from x=300, and a mid-grey band from y=200."""
+    image = QImage(size, QImage.Format.Format_RGB32)
+    image.fill(QColor(20, 20, 20))
+    painter = QPainter(image)
+    painter.fillRect(QRect(300, 0, size.width() - 300, size.height()), QColor(230, 230, 230))
+    painter.fillRect(QRect(0, 200, 300, size.height() - 200), QColor(120, 120, 120))
+    painter.end()
+    return image
+
+
+# Test 1: The backdrop is prerendered at the device pixel ratio once
+grab = QPixmap.fromImage(make_desktop(QSize(800, 600)))
+backdrop = prerender_backdrop(grab, QSize(400, 300), 2.0)
+assert backdrop.size() == QSize(800, 600) and backdrop.devicePixelRatio() == 2.0
+assert backdrop.format() == QImage.Format.Format_RGB32
+scaled = prerender_backdrop(grab, QSize(800, 600), 1.5)
+assert scaled.size() == QSize(1200, 900)
+print("✓ Backdrop matches the overlay's device pixels")
+
+# Test 2: Dragging a corner of a large selection dirties only thin strips
+old, new = QRect(100, 100, 1600, 900), QRect(100, 100, 1605, 903)
+dirty = selection_dirty_region(old, new)
+assert region_area(dirty) < 0.05 * old.width() * old.height()
+assert dirty.contains(QRect(1700, 500, 5, 1)) and dirty.contains(QRect(500, 1001, 1, 2))
+assert not dirty.contains(QPoint(800, 500))
+assert region_area(selection_dirty_region(None, QRect(10, 10, 50, 50))) >= 50 * 50
+print(f"✓ Corner drag repaints {region_area(dirty)} px of a {old.width() * old.height()} px selection")
+
+# Test 3: Edges are snapped to within the snap distance, and only there
+pixels = qimage_to_array(make_desktop(QSize(800, 600)))
+assert snap_to_edge(pixels, (297, 150), 6) == (300, 150) # Vertical edge only (no horizontal edge here)
+assert snap_to_edge(pixels, (150, 203), 6) == (150, 200)
+assert snap_to_edge(pixels, (296, 204), 6) == (300, 200)
+assert snap_to_edge(pixels, (280, 150), 6) == (280, 150) # Too far away
+assert snap_to_edge(pixels, (2, 2), 6) == (2, 2)
+print("✓ Snapping finds nearby edges in the backdrop")
+
+# Test 4: The overlay repaints only what the selection and magnifier touched
+overlay = SelectionOverlay(QPixmap.fromImage(make_desktop(desktop.size())), magnifier=False)
+overlay.show()
+QTest.qWaitForWindowExposed(overlay)
+app.processEvents()
+QTest.mousePress(overlay, Qt.MouseButton.LeftButton, pos=QPoint(50, 50))
+app.processEvents()
+for x in range(200, 260, 10):
+    QTest.mouseMove(overlay, QPoint(x, 400))
+    app.processEvents()
+overlay.painted_area = 0
+QTest.mouseMove(overlay, QPoint(265, 405))
+app.processEvents()
+assert 0 < overlay.painted_area < 0.05 * overlay.width() * overlay.height(), overlay.painted_area
+selections = []
+overlay.selection_made.connect(selections.append)
+QTest.mouseRelease(overlay, Qt.MouseButton.LeftButton, pos=QPoint(265, 405))
+assert selections == [QRect(QPoint(50, 50), QPoint(265, 405))]
+print(f"✓ A drag step repainted {overlay.painted_area} of {overlay.width() * overlay.height()} px")
+
+# Test 5: The magnifier shows the backdrop under the cursor, without grabbing again
+overlay = SelectionOverlay(QPixmap.fromImage(make_desktop(desktop.size())), magnifier=True, snap_to_edges=True)
+overlay.show()
+QTest.qWaitForWindowExposed(overlay)
+QTest.mouseMove(overlay, QPoint(303, 100)) # Snaps onto the edge at x=300
+app.processEvents()
+assert overlay.cursor_pos == QPoint(300, 100)
+shot = overlay.grab().toImage()
+magnifier = overlay.magnifier_rect(overlay.cursor_pos)
+assert magnifier.topLeft() == QPoint(300 + MAGNIFIER_OFFSET, 100 + MAGNIFIER_OFFSET)
+# The zoomed cell left of the cursor's is dark, the cursor's own is bright
+center = magnifier.x() + (120 // MAGNIFIER_ZOOM // 2) * MAGNIFIER_ZOOM
+assert shot.pixelColor(center - MAGNIFIER_ZOOM // 2, magnifier.y() + 30).red() < 60
+assert shot.pixelColor(center + MAGNIFIER_ZOOM // 2, magnifier.y() + 30).red() > 200
+cancelled = []
+overlay.selection_cancelled.connect(lambda: cancelled.append(True))
+QTest.keyClick(overlay, Qt.Key.Key_Escape)
+assert cancelled and not overlay.isVisible()
+print("✓ Magnifier reads the cached backdrop; Escape cancels")
+
+print("\n✓ All selection overlay tests passed!")
@@ -0,0 +1,248 @@
+"""Verify the SQLite session store round-trips captures and reloads a session lazily"""
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+import numpy as np
+from PySide6.QtWidgets import QApplication
+from PySide6.QtGui import QImage, QColor, QPixmap
+from PySide6.QtCore import QSize, Qt
+
+from snap_mosaic.session_store import SessionStore
+from snap_mosaic.capture_grid import Capture, CaptureListModel, reserve_capture_ids
+from snap_mosaic.capture_store import CaptureStore
+
+app = QApplication(sys.argv)
+tmp = tempfile.mkdtemp()
+path = os.path.join(tmp, 'session.sqlite3')
+
+
+def make_image(index, width=320, height=200):
+    image = QImage(width, height, QImage.Format.Format_RGB32)
+    image.fill(QColor(index * 7 % 256, 90, 200))
+    return image
+
+
+def make_capture(index):
+    image = make_image(index)
+    thumbnail = image.scaledToWidth(160, Qt.TransformationMode.SmoothTransformation)
+    capture = Capture(QPixmap.fromImage(thumbnail), image)
+    return capture, image, thumbnail
+
+
+# Test 1: Captures survive closing and reopening the store, metadata included
+store = SessionStore(path)
+captures = []
+for i in range(3):
+    capture, image, thumbnail = make_capture(i)
+    capture.phash = (1 << 63) + i # Unsigned 64-bit hashes must round-trip
+    store.add(capture, image, thumbnail)
+    captures.append(capture)
+captures[1].is_saved = True
+captures[1].repeat_count = 4
+store.update(captures[1])
+store.close()
+
+store = SessionStore(path)
+index = store.load_index()
+assert [row['id'] for row in index] == [c.id for c in captures]
+assert index[0]['timestamp'] == captures[0].timestamp
+assert index[0]['phash'] == (1 << 63)
+assert index[1]['is_saved'] and index[1]['repeat_count'] == 4
+assert (index[0]['width'], index[0]['height'], index[0]['thumb_width']) == (320, 200, 160)
+image = store.load(captures[2].id)
+assert image.size() == QSize(320, 200) and image.pixelColor(5, 5) == make_image(2).pixelColor(5, 5)
+assert store.load_thumbnail(captures[2].id).width() == 160
+print("✓ Captures, thumbnails and metadata survive a restart")
+
+# Test 2: Removing and clearing drop rows from every table
+store.remove(captures[0].id)
+store.flush()
+assert not store.contains(captures[0].id) and store.load(captures[0].id) is None
+assert len(store.load_index()) == 2
+store.clear()
+store.flush()
+assert len(store) == 0 and store.load_index() == []
+print("✓ Remove and clear delete stored captures")
+
+# Test 3: A large session reloads quickly because no image is decoded up front
+start = datetime.now()
+for i in range(2000):
+    capture, image, thumbnail = make_capture(i)
+    capture.timestamp = start + timedelta(milliseconds=i)
+    store.add(capture, image, thumbnail)
+store.flush()
+last_id = capture.id
+store.close()
+
+load_start = time.perf_counter()
+store = SessionStore(path)
+capture_store = CaptureStore(memory_budget_mb=64)
+capture_store.backing = store
+thumbnail_loads = []
+
+def thumbnail_loader(capture_id):
+    thumbnail_loads.append(capture_id)
+    return QPixmap.fromImage(store.load_thumbnail(capture_id))
+
+restored = [
+    Capture.restored(row['id'], row['timestamp'], QSize(row['width'], row['height']),
+                     QSize(row['thumb_width'], row['thumb_height']),
+                     lambda capture_id=row['id']: thumbnail_loader(capture_id), capture_store)
+    for row in store.load_index()
+]
+model = CaptureListModel()
+model.add_captures(restored)
+elapsed = time.perf_counter() - load_start
+assert model.rowCount() == 2000 and not thumbnail_loads
+assert elapsed < 1.0, f"restoring 2000 captures took {elapsed:.2f}s"
+print(f"✓ Restored 2000 captures in {elapsed * 1000:.0f} ms without decoding any image")
+
+# Test 4: Thumbnails and full images load on first use, through the backing store
+newest = restored[-1]
+assert newest.display_pixmap.width() == 160 and thumbnail_loads == [newest.id]
+assert newest.original_image().size() == QSize(320, 200)
+assert capture_store.stats()['backing_reads'] == 1
+print("✓ Thumbnails and full images load lazily from the session store")
+
+# Test 5: New captures never reuse ids from the previous session
+reserve_capture_ids(last_id)
+fresh, _, _ = make_capture(0)
+assert fresh.id > last_id
+print("✓ Capture ids continue after the restored session")
+
+store.close()
+capture_store.close()
+
+# Test 6: Delta storage keeps a keyframe plus changed tiles, and rebuilds every frame exactly
+from snap_mosaic.imaging import array_to_qimage, qimage_to_array
+from snap_mosaic.tiles import apply_tiles, changed_tiles, extract_tiles
+
+rng = np.random.default_rng(3)
+page = np.full((300, 500, 4), 235, dtype=np.uint8)
+page[..., 3] = 255
+for y in range(10, 180, 14): # Lines of "text" above the widget
+    page[y:y + 6, 10:490][rng.random((6, 480)) < 0.4] = (40, 40, 40, 255)
+
+
+def dashboard(i):
+    frame = page.copy()
+    frame[200:260, 300:420, :3] = (i * 37 % 256, 120, 200 - i % 50) # The one widget that updates
+    if i % 7 == 0:
+        frame[5:8, 480:500, :3] = 0 # Now and then, something on an edge tile
+    return array_to_qimage(frame)
+
+
+changed = changed_tiles(qimage_to_array(dashboard(2)), qimage_to_array(dashboard(1)), 32)
+widget_tiles = [row * 16 + column for row in range(6, 9) for column in range(9, 14)]
+assert changed.tolist() == widget_tiles, changed # Only the widget's tiles
+rebuilt = np.array(qimage_to_array(dashboard(1)))
+apply_tiles(rebuilt, changed, extract_tiles(qimage_to_array(dashboard(2)), changed, 32), 32)
+assert np.array_equal(rebuilt, qimage_to_array(dashboard(2)))
+
+frames = [dashboard(i) for i in range(40)]
+sizes = {}
+for storage in ('full', 'delta'):
+    store = SessionStore(os.path.join(tmp, f"{storage}.sqlite3"), storage=storage, keyframe_interval=20, tile_size=32)
+    stored = []
+    for frame in frames:
+        capture = Capture(QPixmap(), frame)
+        capture.region = "Dashboard"
+        capture.display_size = QSize(100, 60)
+        store.add(capture, frame)
+        stored.append(capture)
+    store.flush()
+    stats = store.storage_stats()
+    sizes[storage] = stats['keyframe_bytes'] + stats['delta_bytes']
+    for frame, capture in zip(frames, stored):
+        assert np.array_equal(qimage_to_array(store.load(capture.id)), qimage_to_array(frame)), capture.id
+    if storage == 'full':
+        store.close()
+assert (stats['keyframes'], stats['deltas']) == (2, 38), stats
+reduction = sizes['full'] / sizes['delta']
+assert reduction > 10, sizes
+print(f"✓ Delta storage rebuilds every frame exactly and takes {reduction:.0f}x less space")
+
+# Test 7: Deleting keyframes and frames in the middle of a chain keeps the rest loadable
+deleted = {stored[0].id, stored[1].id, stored[7].id, stored[20].id, stored[39].id}
+for capture_id in deleted:
+    store.remove(capture_id)
+store.flush()
+for frame, capture in zip(frames, stored):
+    image = store.load(capture.id)
+    if capture.id in deleted:
+        assert image is None
+    else:
+        assert np.array_equal(qimage_to_array(image), qimage_to_array(frame)), capture.id
+extra = Capture(QPixmap(), frames[5])
+extra.region = "Dashboard"
+extra.display_size = QSize(100, 60)
+store.add(extra, frames[5]) # The chain's last frame was deleted, so this starts a new one
+store.flush()
+assert np.array_equal(qimage_to_array(store.load(extra.id)), qimage_to_array(frames[5]))
+assert store.storage_stats()['keyframes'] == 3, store.storage_stats()
+store.close()
+print("✓ Deleted frames are folded into the next one, so the chain stays loadable")
+
+# Test 8: Edits that cancel out in any sum or checksum still count as changes
+base = page.copy()
+base[0, 1:4, 2] = 100
+edited = base.copy()
+edited[0, 1, 2] += 32 # Red of pixel (1, 0) up, red of pixel (3, 0) down by the same amount
+edited[0, 3, 2] -= 32
+store = SessionStore(os.path.join(tmp, "cancel.sqlite3"), storage='delta', keyframe_interval=10, tile_size=32)
+stored = []
+for pixels in (base, edited):
+    capture = Capture(QPixmap(), array_to_qimage(pixels))
+    capture.region = "Dashboard"
+    capture.display_size = QSize(100, 60)
+    store.add(capture, array_to_qimage(pixels))
+    stored.append(capture)
+store.flush()
+assert changed_tiles(edited, base, 32).tolist() == [0]
+assert np.array_equal(qimage_to_array(store.load(stored[1].id)), edited)
+assert store.storage_stats()['deltas'] == 1 and store.storage_stats()['delta_bytes'] > 0
+store.close()
+print("✓ A change that sums to zero is still stored")
+
+# Test 9: Without an image, the writer reads each capture from the capture store when its turn comes
+import threading
+
+
+class GatedImages:
+    """The capture store, behind a gate that holds the writer back."""
+
+    def __init__(self, store):
+        self.store = store
+        self.gate = threading.Event()
+        self.peeked = []
+
+    def peek(self, capture_id):
+        self.gate.wait(10)
+        self.peeked.append(capture_id)
+        return self.store.peek(capture_id)
+
+
+frame_bytes = make_image(0).sizeInBytes()
+capture_store = CaptureStore(memory_budget_mb=2 * frame_bytes / (1024 * 1024), spill_dir=tmp) # Most frames spill
+store = SessionStore(os.path.join(tmp, "by_id.sqlite3"))
+store.images = GatedImages(capture_store)
+queued = []
+for i in range(6):
+    capture = Capture(QPixmap(), make_image(i), store=capture_store, display_size=QSize(160, 100))
+    store.add(capture)
+    queued.append(capture)
+capture_store.remove(queued[2].id) # Deleted while its write was still queued
+store.images.gate.set()
+store.flush()
+assert store.images.peeked == [capture.id for capture in queued]
+kept = [capture for i, capture in enumerate(queued) if i != 2]
+assert [row['id'] for row in store.load_index()] == [capture.id for capture in kept]
+for i, capture in zip((0, 1, 3, 4, 5), kept):
+    assert store.load(capture.id).pixelColor(5, 5) == make_image(i).pixelColor(5, 5), i
+store.close()
+capture_store.close()
+print("✓ Queued captures are read from the capture store on the writer thread")
+
+print("\n✓ All session store tests passed!")
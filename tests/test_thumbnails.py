@@ -0,0 +1,126 @@
+"""Verify thumbnails are made off the GUI thread, cached per width, and regenerated visible-first"""
+import sys
+import threading
+import time
+from PySide6.QtWidgets import QApplication
+from PySide6.QtGui import QImage, QColor, QPixmap
+from PySide6.QtCore import QEventLoop, QTimer, QSize
+
+from snap_mosaic.capture_grid import Capture
+from snap_mosaic.thumbnails import ThumbnailService, display_size_for, pixel_ratio_for, HIGH_PRIORITY, LOW_PRIORITY
+
+app = QApplication(sys.argv)
+
+
+def wait_until(condition, timeout_ms=5000):
+    deadline = time.monotonic() + timeout_ms / 1000.0
+    while not condition() and time.monotonic() < deadline:
+        loop = QEventLoop()
+        QTimer.singleShot(10, loop.quit)
+        loop.exec()
+    return condition()
+
+
+class TrackedCapture(Capture):
+    """Records the thread that loads its full-resolution image."""
+    def original_image(self):
+        self.loaded_on = threading.current_thread()
+        return super().original_image()
+
+
+def make_capture(service, index, width=1920, height=1080):
+    image = QImage(width, height, QImage.Format.Format_RGB32)
+    image.fill(QColor(index % 256, 100, 150))
+    return TrackedCapture(None, image, display_size=service.display_size(image.size()))
+
+
+# Test 1: Display sizes keep the aspect ratio and thumbnails are never upscaled
+assert display_size_for(QSize(1920, 1080), 500) == QSize(500, 281)
+assert display_size_for(QSize(400, 300), 500) == QSize(400, 300)
+assert pixel_ratio_for(QSize(1920, 1080), QSize(500, 281), 2.0) == 2.0
+assert pixel_ratio_for(QSize(800, 600), QSize(500, 375), 2.0) == 1.6
+assert pixel_ratio_for(QSize(400, 300), QSize(400, 300), 2.0) == 1.0
+print("✓ Display size and pixel ratio calculations")
+
+# Test 2: Thumbnails are scaled on a worker thread at the screen's pixel ratio
+service = ThumbnailService(max_workers=2)
+service.set_target(500, 2.0)
+ready = []
+service.thumbnail_ready.connect(ready.append)
+capture = make_capture(service, 1)
+service.request(capture)
+assert wait_until(lambda: ready == [capture])
+pixmap = capture.display_pixmap
+assert capture.loaded_on is not threading.main_thread()
+assert pixmap.size() == QSize(1000, 562) and pixmap.devicePixelRatio() == 2.0
+assert pixmap.deviceIndependentSize().toSize() == capture.display_size == QSize(500, 281)
+service.request(capture)
+assert service.stats()['queued'] == 0 and service.stats()['in_flight'] == 0
+print("✓ Thumbnail made off the GUI thread at 2x for a 500 px cell")
+
+# Test 3: After a width change the visible captures are regenerated first
+service = ThumbnailService(max_workers=1)
+service.set_target(400)
+captures = [make_capture(service, i) for i in range(20)]
+for c in captures:
+    service.request(c, LOW_PRIORITY)
+assert wait_until(lambda: service.stats()['generated'] == 20)
+
+order = []
+service.thumbnail_ready.connect(order.append)
+service.set_target(300)
+visible = captures[-3:]
+start = time.perf_counter()
+service.rescale(captures, visible=visible)
+call_ms = (time.perf_counter() - start) * 1000
+assert wait_until(lambda: len(order) == 20)
+assert set(order[:3]) == set(visible), [c.id for c in order[:3]]
+assert all(c.display_pixmap.width() == 300 for c in captures)
+print(f"✓ Visible cells rescaled first; queuing 20 rescales took {call_ms:.1f} ms on the GUI thread")
+
+# Test 4: Cells scrolled into view overtake queued background work
+service.set_target(200)
+service.rescale(captures)
+late = captures[0] # Queued last in newest-first order
+service.request(late, HIGH_PRIORITY)
+order.clear()
+assert wait_until(lambda: len(order) == 20)
+assert late in order[:3], order.index(late)
+print("✓ A high-priority request jumps the rescale queue")
+
+# Test 5: Switching back to an earlier width is served from the cache
+generated = service.generated_count
+service.set_target(300)
+service.rescale(captures)
+assert service.generated_count == generated and service.cache_hits == 20
+assert all(c.display_pixmap.width() == 300 for c in captures)
+print("✓ Thumbnails for an earlier width come from the cache")
+
+# Test 6: Queued work for an old width is dropped when the target changes again
+service.set_target(250)
+service.rescale(captures)
+service.set_target(300)
+assert service.stats()['queued'] == 0
+assert wait_until(lambda: service.stats()['in_flight'] == 0)
+assert all(c.display_pixmap.width() == 300 for c in captures)
+print("✓ Superseded rescales are discarded")
+
+# Test 7: The cache stays within its memory budget
+service = ThumbnailService(max_workers=2, cache_mb=1)
+service.set_target(300)
+for i in range(10):
+    service.request(make_capture(service, i))
+assert wait_until(lambda: service.stats()['generated'] == 10)
+assert service.stats()['cache_bytes'] <= service.cache_budget and service.stats()['cached'] < 10
+print(f"✓ Cache holds {service.stats()['cached']} thumbnails within 1 MB")
+
+# Test 8: Restored captures are not loaded by a background rescale
+loads = []
+restored = Capture.restored(9999, None, QSize(1920, 1080), QSize(400, 225),
+                            lambda: loads.append(1) or QPixmap(400, 225), None)
+service.request(restored, LOW_PRIORITY)
+assert not loads and service.stats()['queued'] == 0 and restored.display_size == QSize(300, 169)
+print("✓ Restored captures wait until they are painted")
+
+service.wait_for_done()
+print("\n✓ All thumbnail service tests passed!")